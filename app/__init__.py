@@ -11,6 +11,12 @@ def create_app(config_name="development"):
     from app.config import get_config
     app.config.from_object(get_config(config_name))
 
+    # Atrás de proxy reverso: IP real do cliente a partir de X-Forwarded-For
+    proxy_count = app.config.get("PROXY_FIX_X_FOR", 0)
+    if proxy_count:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count)
+
     # Configurar pasta de uploads
     app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
@@ -19,6 +25,60 @@ def create_app(config_name="development"):
     from app.extensions import init_extensions
     init_extensions(app)
 
+    # Limites do cache de usuários (get_user_by_id / decorators de autenticação)
+    from app.models.user.cache import user_cache
+    user_cache.configure(
+        max_size=app.config.get("USER_CACHE_MAX_SIZE"),
+        ttl_seconds=app.config.get("USER_CACHE_TTL_SECONDS")
+    )
+
+    # Logs de auditoria/segurança gravados em lote por uma thread (ou na hora, em modo sync)
+    from app.utils.security.log_sink import init_log_sink
+    init_log_sink(app)
+
+    # Rate limiting: backend (memória ou MongoDB), algoritmo e políticas por rota
+    from app.utils.security.rate_limiter import init_rate_limiter
+    init_rate_limiter(app)
+
+    # Pool do bcrypt e custo calibrado para PASSWORD_HASH_TARGET_MS
+    from app.utils.helpers.password_helpers import init_password_hasher
+    init_password_hasher(app)
+
+    # Autenticação pelas claims do token + tabela de revogação (AUTH_TOKEN_MODE)
+    from app.utils.security.token_revocation import init_token_revocation
+    init_token_revocation(app)
+
+    # Armazenamento dos uploads (disco local ou S3) e URL pública
+    from app.services.upload.storage import init_storage
+    init_storage(app)
+
+    # Pool de geração das variantes de imagem (criado no primeiro upload)
+    from app.services.upload.image_pipeline import image_pipeline, start_retry_job
+    image_pipeline.configure(
+        workers=app.config.get("UPLOAD_PIPELINE_WORKERS"),
+        max_pending=app.config.get("UPLOAD_PIPELINE_MAX_PENDING"),
+        formats=app.config.get("UPLOAD_IMAGE_FORMATS"),
+        max_pixels=app.config.get("UPLOAD_MAX_IMAGE_PIXELS")
+    )
+    # Manifestos recusados com a fila cheia só voltam à fila por esta varredura
+    upload_retry_seconds = app.config.get("UPLOAD_PIPELINE_RETRY_SECONDS", 60)
+    if upload_retry_seconds:
+        start_retry_job(upload_retry_seconds)
+
+    # Coleta periódica dos uploads sem referência (anúncios, perfis e jogos)
+    upload_gc_seconds = app.config.get("UPLOAD_GC_INTERVAL_SECONDS", 0)
+    if upload_gc_seconds:
+        from app.services.upload.blob_store import start_gc_job
+        start_gc_job(
+            upload_gc_seconds,
+            grace_seconds=app.config.get("UPLOAD_GC_GRACE_SECONDS", 86400),
+            batch_size=app.config.get("UPLOAD_GC_BATCH_SIZE", 200)
+        )
+
+    # Visualizações dos anúncios acumuladas em memória e gravadas em lote
+    from app.services.ad.view_counter import init_view_counter
+    init_view_counter(app)
+
     # Registrar blueprints DEPOIS das extensões
     from app.api import register_blueprints
     register_blueprints(app)
@@ -36,8 +96,51 @@ def create_app(config_name="development"):
         with app.app_context():
             try:
                 setup_indexes()
+                # Índices TTL dos logs com a retenção configurada (LOG_RETENTION_DAYS_*)
+                from app.services.audit.log_storage import apply_log_retention, retention_from_config
+                apply_log_retention(retention_from_config(app.config))
                 print("MongoDB indexes configured successfully")
             except Exception as e:
                 print(f"Warning: Could not configure indexes: {e}")
 
+    # Migrações de dados (uma vez, em qualquer configuração: run.py usa "testing"
+    # com o banco real e as rotas dependem dos campos preenchidos aqui)
+    with app.app_context():
+        try:
+            # Contadores de anúncios dos jogos criados antes de ads_count/active_ads_count
+            from app.services.game.game_counter_service import ensure_game_counters_backfilled
+            ensure_game_counters_backfilled()
+            # Curtidas dos anúncios: arrays likes -> coleção ad_likes (uma vez) e
+            # o índice único do qual o alternar de curtidas depende (sempre)
+            from app.services.ad.likes_migration import ensure_ad_likes_migrated
+            ensure_ad_likes_migrated()
+            # Total de favoritos desnormalizado nos anúncios (uma vez) e o índice
+            # único (user_id, ad_id) do qual add/toggle de favoritos dependem (sempre)
+            from app.services.favorites.favorites_count_migration import ensure_favorites_count_migrated
+            ensure_favorites_count_migrated()
+        except Exception as e:
+            print(f"Warning: Could not run data migrations: {e}")
+
+    # Índice de busca construído e renovado em segundo plano
+    from app.services.search.search_service import start_search_index_job
+    start_search_index_job(app.config.get("SEARCH_INDEX_REFRESH_SECONDS", 0))
+
+    # Reconciliação periódica dos contadores de anúncios por jogo
+    reconcile_seconds = app.config.get("GAME_COUNTERS_RECONCILE_SECONDS", 0)
+    if reconcile_seconds:
+        from app.services.game.game_counter_service import start_reconciliation_job
+        start_reconciliation_job(reconcile_seconds)
+
+    # Reparo periódico dos contadores de não lidas (chat e notificações)
+    unread_reconcile_seconds = app.config.get("UNREAD_COUNTERS_RECONCILE_SECONDS", 0)
+    if unread_reconcile_seconds:
+        from app.services.notification.unread_counter_service import start_reconciliation_job as start_unread_job
+        start_unread_job(unread_reconcile_seconds)
+
+    # Retenção dos logs de auditoria/segurança e agregação dos eventos por hora
+    log_maintenance_seconds = app.config.get("LOG_MAINTENANCE_INTERVAL_SECONDS", 0)
+    if log_maintenance_seconds:
+        from app.services.audit.log_storage import start_log_maintenance_job, retention_from_config
+        start_log_maintenance_job(log_maintenance_seconds, retention_from_config(app.config))
+
     return app
\ No newline at end of file
@@ -4,6 +4,12 @@ from datetime import datetime
 from app.utils.helpers.response_helpers import success_response, error_response
 from app.utils.decorators.permissions import admin_required
 from app.db.mongo_client import db
+from app.services.search import search_service
+from app.services.game import game_counter_service
+from app.services.ad import ad_service
+from app.services.notification import unread_counter_service
+from pymongo import ReturnDocument
+from app.utils.helpers.pagination import pipeline_stages, page_result, InvalidCursorError
 from bson import ObjectId
 
 # Criar blueprint
@@ -26,6 +32,7 @@ def get_all_ads():
         limit = int(request.args.get('limit', 10))
         search = request.args.get('search', '')
         status = request.args.get('status', 'all')
+        cursor = request.args.get('cursor')
         
         skip = (page - 1) * limit
         
@@ -40,8 +47,8 @@ def get_all_ads():
             ]
         
         # Pipeline de agregação para incluir dados do usuário
-        pipeline = [
-            {'$match': query},
+        # (paginação antes dos $lookup: só os anúncios da página são enriquecidos)
+        pipeline = pipeline_stages(query, limit, cursor=cursor, skip=skip) + [
             {'$lookup': {
                 'from': 'users',
                 'localField': 'user_id', 
@@ -56,12 +63,10 @@ def get_all_ads():
                 'as': 'game'
             }},
             {'$unwind': {'path': '$game', 'preserveNullAndEmptyArrays': True}},
-            {'$sort': {'created_at': -1}},
-            {'$skip': skip},
-            {'$limit': limit}
+            {'$sort': {'created_at': -1, '_id': -1}}
         ]
         
-        ads = list(db.ads.aggregate(pipeline))
+        ads, next_cursor = page_result(list(db.ads.aggregate(pipeline)), limit)
         total = db.ads.count_documents(query)
         
         # Converter ObjectIds para strings recursivamente
@@ -83,9 +88,12 @@ def get_all_ads():
             'total': total,
             'page': page,
             'limit': limit,
-            'total_pages': (total + limit - 1) // limit
+            'total_pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor
         })
         
+    except InvalidCursorError:
+        return error_response("Cursor de paginação inválido", 400)
     except Exception as e:
         print(f"Erro ao listar anúncios: {str(e)}")
         return error_response("Erro ao carregar anúncios")
@@ -96,16 +104,16 @@ def get_all_ads():
 def delete_ad_admin(ad_id):
     """Deletar anúncio (admin pode deletar qualquer anúncio)."""
     try:
-        # Verificar se o anúncio existe
-        ad = db.ads.find_one({'_id': ObjectId(ad_id)})
-        if not ad:
-            return error_response("Anúncio não encontrado", 404)
-        
         # Admin pode deletar qualquer anúncio
-        result = db.ads.delete_one({'_id': ObjectId(ad_id)})
-        
-        if result.deleted_count == 0:
-            return error_response("Falha ao deletar anúncio", 500)
+        deleted_ad = db.ads.find_one_and_delete(
+            {'_id': ObjectId(ad_id)},
+            projection=ad_service.DELETED_AD_PROJECTION
+        )
+        if not deleted_ad:
+            return error_response("Anúncio não encontrado", 404)
+
+        # Mesmos efeitos da remoção pelo dono (busca, contadores, upload, curtidas)
+        ad_service.on_ad_deleted(deleted_ad)
         
         return success_response(message="Anúncio deletado com sucesso")
         
@@ -125,19 +133,19 @@ def update_ad_status(ad_id):
         if new_status not in ['active', 'inactive', 'banned', 'pending']:
             return error_response("Status inválido")
         
-        # Verificar se o anúncio existe
-        ad = db.ads.find_one({'_id': ObjectId(ad_id)})
-        if not ad:
-            return error_response("Anúncio não encontrado", 404)
-        
-        # Atualizar status
-        result = db.ads.update_one(
+        # Atualizar status (documento anterior usado para ajustar os contadores)
+        previous = db.ads.find_one_and_update(
             {'_id': ObjectId(ad_id)},
-            {'$set': {'status': new_status, 'updated_at': datetime.utcnow()}}
+            {'$set': {'status': new_status, 'updated_at': datetime.utcnow()}},
+            projection={'game_id': 1, 'status': 1},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.modified_count == 0:
-            return error_response("Falha ao atualizar status", 500)
+        if not previous:
+            return error_response("Anúncio não encontrado", 404)
+        
+        search_service.index_ad(ad_id)
+        game_counter_service.on_ad_status_changed(previous.get('game_id'), previous.get('status'), new_status)
         
         return success_response(message=f"Status atualizado para {new_status}")
         
@@ -145,6 +153,40 @@ def update_ad_status(ad_id):
         print(f"Erro ao atualizar status: {str(e)}")
         return error_response("Erro ao atualizar status do anúncio")
 
+@admin_bp.route("/games/recount-ads", methods=["POST"])
+@jwt_required()
+@admin_required
+def recount_game_ads():
+    """Recalcula os contadores de anúncios de todos os jogos."""
+    try:
+        result = game_counter_service.reconcile_game_ad_counters()
+        if not result["success"]:
+            return error_response(result["message"], 500)
+        
+        result.pop("success")
+        return success_response(data=result, message="Contadores de anúncios recalculados")
+        
+    except Exception as e:
+        print(f"Erro ao recalcular contadores: {str(e)}")
+        return error_response("Erro ao recalcular contadores de anúncios")
+
+@admin_bp.route("/counters/recount-unread", methods=["POST"])
+@jwt_required()
+@admin_required
+def recount_unread_counters():
+    """Recalcula os contadores de não lidas (chat e notificações)."""
+    try:
+        result = unread_counter_service.reconcile_unread_counters()
+        if not result["success"]:
+            return error_response(result["message"], 500)
+        
+        result.pop("success")
+        return success_response(data=result, message="Contadores de não lidas recalculados")
+        
+    except Exception as e:
+        print(f"Erro ao recalcular contadores de não lidas: {str(e)}")
+        return error_response("Erro ao recalcular contadores de não lidas")
+
 @admin_bp.route("/orders/<order_id>", methods=["GET"])
 @jwt_required()
 @admin_required
@@ -1,13 +1,14 @@
 # app/api/ads/routes.py - VERSÃO CORRIGIDA COM VALIDAÇÕES
 from flask import Blueprint, request, g, jsonify
 
-from app.services.ad.ad_service import format_ad_response, create_ad, get_ad_by_id, update_ad, like_ad, delete_ad, \
-    get_ad_likes, get_user_ads
+from app.services.ad.ad_service import create_ad, get_ad_by_id, update_ad, like_ad, delete_ad, \
+    get_ad_likes, get_user_ads, hydrate_ads, get_liked_ad_ids
 from app.services.ad_questions.questions_service import validate_object_id
 from app.utils.helpers.response_helpers import success_response, error_response
 from app.utils.decorators.auth_decorators import jwt_required
 from bson import ObjectId, errors as bson_errors
 from app.db.mongo_client import db
+from app.utils.helpers.pagination import paginate_find, InvalidCursorError
 from datetime import datetime
 
 # Criar blueprint
@@ -37,6 +38,7 @@ def get_ads():
         game_id = request.args.get("game_id")
         ad_type = request.args.get("ad_type")
         limit, skip = validate_pagination_params(request)
+        cursor = request.args.get("cursor")
 
         # Construir query
         query = {"status": "active"}
@@ -51,37 +53,25 @@ def get_ads():
         if ad_type and ad_type in ["venda", "troca", "procura"]:
             query["ad_type"] = ad_type
 
-        # Buscar anúncios
-        ads_cursor = db.ads.find(query).sort("created_at", -1).skip(skip).limit(limit)
-
-        # Converter cursor para lista com tratamento de erro
-        ads_list = []
-        for ad in ads_cursor:
-            try:
-                # Validar se o anúncio tem dados mínimos necessários
-                if not ad.get("_id") or not ad.get("user_id") or not ad.get("game_id"):
-                    print(f"Anúncio inválido ignorado: {ad.get('_id')}")
-                    continue
-
-                # Buscar dados do jogo
-                game = db.games.find_one({"_id": ad["game_id"]})
-                if not game:
-                    print(f"Jogo não encontrado para anúncio {ad.get('_id')}")
-                    continue
-
-                # Formatar anúncio
-                ad_data = format_ad_response(ad, game)
-
-                # Verificar se a formatação foi bem sucedida
-                if ad_data and ad_data.get("_id"):
-                    ads_list.append(ad_data)
-
-            except Exception as e:
-                print(f"Erro ao processar anúncio {ad.get('_id')}: {e}")
+        # Buscar anúncios (cursor de keyset; skip apenas por compatibilidade)
+        try:
+            ads_page, next_cursor = paginate_find(db.ads, query, limit, cursor=cursor, skip=skip)
+        except InvalidCursorError:
+            return error_response("Cursor de paginação inválido", status_code=400)
+
+        # Validar se os anúncios têm dados mínimos necessários
+        valid_ads = []
+        for ad in ads_page:
+            if not ad.get("_id") or not ad.get("user_id") or not ad.get("game_id"):
+                print(f"Anúncio inválido ignorado: {ad.get('_id')}")
                 continue
+            valid_ads.append(ad)
+
+        # Formatar anúncios em lote (jogos, favoritos e carrinho em consultas agrupadas)
+        ads_list = hydrate_ads(valid_ads, require_game=True)
 
         return success_response(
-            data={"ads": ads_list, "total": len(ads_list)},
+            data={"ads": ads_list, "total": len(ads_list), "next_cursor": next_cursor},
             message="Anúncios encontrados com sucesso"
         )
 
@@ -108,25 +98,9 @@ def get_boosted_ads():
         # Buscar anúncios em destaque
         boosted_cursor = db.ads.find(query).limit(limit)
 
-        # Converter cursor para lista
-        boosted_ads_list = []
-        for ad in boosted_cursor:
-            try:
-                if not ad.get("_id") or not ad.get("game_id"):
-                    continue
-
-                # Buscar dados do jogo
-                game = db.games.find_one({"_id": ad["game_id"]})
-                if not game:
-                    continue
-
-                ad_data = format_ad_response(ad, game)
-                if ad_data and ad_data.get("_id"):
-                    boosted_ads_list.append(ad_data)
-
-            except Exception as e:
-                print(f"Erro ao processar anúncio em destaque {ad.get('_id')}: {e}")
-                continue
+        # Formatar anúncios em lote
+        boosted_ads = [ad for ad in boosted_cursor if ad.get("_id") and ad.get("game_id")]
+        boosted_ads_list = hydrate_ads(boosted_ads, require_game=True)
 
         return success_response(
             data={"boosted_ads": boosted_ads_list},
@@ -198,7 +172,7 @@ def get_ad_details(ad_id):
         if hasattr(g, 'user') and g.user:
             user_id = str(g.user["_id"])
 
-        result = get_ad_by_id(ad_id, increment_view=True, user_id=user_id)
+        result = get_ad_by_id(ad_id, increment_view=True, user_id=user_id, viewer=request.remote_addr)
 
         if result["success"]:
             return success_response(
@@ -315,6 +289,30 @@ def like_ad_route(ad_id):
         return error_response(f"Erro ao curtir anúncio: {str(e)}")
 
 
+@ads_bp.route("/likes/status", methods=["POST"])
+@jwt_required
+def get_likes_status_route():
+    """Quais dos anúncios informados o usuário curtiu (páginas de listagem)."""
+    try:
+        data = request.get_json(silent=True) or {}
+        ad_ids = data.get("ad_ids")
+        if not isinstance(ad_ids, list) or not ad_ids:
+            return error_response("Lista de anúncios é obrigatória", status_code=400)
+        if len(ad_ids) > 100:
+            return error_response("Máximo de 100 anúncios por consulta", status_code=400)
+
+        liked = get_liked_ad_ids(g.user["_id"], ad_ids)
+
+        return success_response(
+            data={"liked": {str(ad_id): ObjectId(ad_id) in liked for ad_id in ad_ids if validate_object_id(ad_id)}},
+            message="Curtidas verificadas"
+        )
+
+    except Exception as e:
+        print(f"Erro ao verificar curtidas: {e}")
+        return error_response(f"Erro ao verificar curtidas: {str(e)}")
+
+
 @ads_bp.route("/<ad_id>/likes", methods=["GET"])
 def get_ad_likes_route(ad_id):
     """Retorna informações de curtidas do anúncio."""
@@ -355,11 +353,11 @@ def get_user_ads_route(user_id):
 
         limit, skip = validate_pagination_params(request)
 
-        result = get_user_ads(user_id, limit, skip)
+        result = get_user_ads(user_id, limit, skip, request.args.get("cursor"))
 
         if result["success"]:
             return success_response(
-                data={"ads": result["ads"], "total": result["total"]},
+                data={"ads": result["ads"], "total": result["total"], "next_cursor": result["next_cursor"]},
                 message="Anúncios do usuário encontrados"
             )
         else:
@@ -377,11 +375,11 @@ def get_my_ads():
     try:
         limit, skip = validate_pagination_params(request)
 
-        result = get_user_ads(g.user["_id"], limit, skip)
+        result = get_user_ads(g.user["_id"], limit, skip, request.args.get("cursor"))
 
         if result["success"]:
             return success_response(
-                data={"ads": result["ads"], "total": result["total"]},
+                data={"ads": result["ads"], "total": result["total"], "next_cursor": result["next_cursor"]},
                 message="Seus anúncios encontrados"
             )
         else:
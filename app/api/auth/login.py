@@ -1,5 +1,5 @@
 from flask import request, jsonify
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import get_jwt_identity, get_jwt, jwt_required
 from app.services.auth.login_service import login_user, refresh_auth_token
 from app.utils.helpers.response_helpers import success_response, error_response
 
@@ -31,14 +31,16 @@ def login_handler():
             status_code=200
         )
     else:
-        return error_response(result["message"], status_code=401)
+        return error_response(result["message"], status_code=result.get("status_code", 401))
 
 
 @jwt_required()
 def refresh_token_handler():
     """Handler para refresh de token."""
     user_id = get_jwt_identity()
-    result = refresh_auth_token(user_id)
+    result = refresh_auth_token(user_id, get_jwt().get("tv"))
+    if not result["success"]:
+        return error_response(result["message"], status_code=401)
 
     return success_response(
         data={"access_token": result["access_token"]},
@@ -34,4 +34,4 @@ def reset_password_handler():
     if result["success"]:
         return success_response(message=result["message"], status_code=200)
     else:
-        return error_response(result["message"], status_code=400)
+        return error_response(result["message"], status_code=result.get("status_code", 400))
@@ -36,4 +36,4 @@ def register_handler():
             status_code=201
         )
     else:
-        return error_response(result["message"], status_code=400)
+        return error_response(result["message"], status_code=result.get("status_code", 400))
@@ -56,7 +56,7 @@ def get_room_messages(room_id):
         limit = int(request.args.get("limit", 50))
         skip = int(request.args.get("skip", 0))
 
-        result = get_chat_messages(room_id, g.user["_id"], limit, skip)
+        result = get_chat_messages(room_id, g.user["_id"], limit, skip, request.args.get("cursor"))
 
         if result["success"]:
             return success_response(
@@ -87,7 +87,7 @@ def send_message_route(room_id):
 
         if result["success"]:
             # Emitir via WebSocket
-            from app.extensions import socketio
+            from app.extensions.socketio import socketio
             socketio.emit('new_message', {
                 'message': result["data"]["message"]
             }, room=room_id)
@@ -120,6 +120,16 @@ def mark_room_as_read(room_id):
         result = mark_messages_as_read(room_id, g.user["_id"])
 
         if result["success"]:
+            watermark = result["data"].get("read_watermark")
+            if watermark:
+                try:
+                    from app.extensions.socketio import socketio
+                    socketio.emit('read_receipt', {
+                        'room_id': room_id, 'user_id': g.user["_id"], **watermark
+                    }, to=room_id)
+                except Exception as e:
+                    print(f"Erro ao enviar confirmação de leitura: {e}")
+
             return success_response(
                 data=result.get("data", {}),
                 message="Mensagens marcadas como lidas"
@@ -3,6 +3,8 @@ from app.utils.decorators.auth_decorators import jwt_required, admin_required
 from app.utils.helpers.response_helpers import success_response, error_response
 from bson import ObjectId
 from app.db.mongo_client import db
+from app.services.search import search_service
+from app.services.upload import blob_store
 
 # Criar blueprint para games
 games_bp = Blueprint("games", __name__)
@@ -22,32 +24,15 @@ def get_games():
         if search:
             query["name"] = {"$regex": search, "$options": "i"}  # Busca case-insensitive
 
-        # Buscar jogos no MongoDB com contagem de anúncios
-        pipeline = [
-            {"$match": query},
-            {"$lookup": {
-                "from": "ads",
-                "localField": "_id",
-                "foreignField": "game_id",
-                "as": "ads"
-            }},
-            {"$addFields": {
-                "ads_count": {"$size": "$ads"}
-            }},
-            {"$project": {
-                "ads": 0  # Remove o array de ads, mantém apenas a contagem
-            }},
-            {"$sort": {"name": 1}},
-            {"$skip": skip},
-            {"$limit": limit}
-        ]
-        
-        games_cursor = db.games.aggregate(pipeline)
+        # Buscar jogos (ads_count e active_ads_count são mantidos pelo game_counter_service)
+        games_cursor = db.games.find(query).sort("name", 1).skip(skip).limit(limit)
 
         # Converter cursor para lista
         games = []
         for game in games_cursor:
             game["_id"] = str(game["_id"])
+            game.setdefault("ads_count", 0)
+            game.setdefault("active_ads_count", 0)
             games.append(game)
 
         return success_response(
@@ -62,29 +47,14 @@ def get_games():
 def get_game(game_id):
     """Retorna detalhes de um jogo específico."""
     try:
-        # Buscar jogo pelo ID com contagem de anúncios
-        pipeline = [
-            {"$match": {"_id": ObjectId(game_id)}},
-            {"$lookup": {
-                "from": "ads",
-                "localField": "_id",
-                "foreignField": "game_id",
-                "as": "ads"
-            }},
-            {"$addFields": {
-                "ads_count": {"$size": "$ads"}
-            }},
-            {"$project": {
-                "ads": 0  # Remove o array de ads, mantém apenas a contagem
-            }}
-        ]
-        
-        result = list(db.games.aggregate(pipeline))
-        
-        if not result:
+        # Buscar jogo pelo ID (contadores de anúncios já vêm no documento)
+        game = db.games.find_one({"_id": ObjectId(game_id)})
+
+        if not game:
             return error_response("Jogo não encontrado", status_code=404)
-            
-        game = result[0]
+
+        game.setdefault("ads_count", 0)
+        game.setdefault("active_ads_count", 0)
 
         # Converter ObjectId para string
         game["_id"] = str(game["_id"])
@@ -164,12 +134,17 @@ def create_game():
             "category": data.get("category", ""),
             "is_featured": data.get("is_featured", False),
             "is_active": data.get("is_active", True),
+            "ads_count": 0,
+            "active_ads_count": 0,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
 
         # Inserir no banco
         result = db.games.insert_one(new_game)
+        search_service.index_game(result.inserted_id, new_game)
+        blob_store.acquire(new_game["image_url"])
+        blob_store.acquire(new_game["cover_url"])
         new_game["_id"] = str(result.inserted_id)
 
         return success_response(
@@ -201,7 +176,10 @@ def update_game(game_id):
 
         # Preparar dados para atualização
         from datetime import datetime
-        update_data = {k: v for k, v in data.items() if k not in ["_id", "created_at"]}
+        update_data = {
+            k: v for k, v in data.items()
+            if k not in ["_id", "created_at", "ads_count", "active_ads_count"]
+        }
         update_data["updated_at"] = datetime.utcnow()
 
         # Atualizar jogo
@@ -210,8 +188,14 @@ def update_game(game_id):
             {"$set": update_data}
         )
 
+        # Referências às imagens trocadas
+        for field in ("image_url", "cover_url"):
+            if field in update_data:
+                blob_store.swap_reference(game.get(field), update_data[field])
+
         # Buscar jogo atualizado
         updated_game = db.games.find_one({"_id": ObjectId(game_id)})
+        search_service.index_game(game_id, updated_game)
         updated_game["_id"] = str(updated_game["_id"])
 
         return success_response(
@@ -243,6 +227,9 @@ def delete_game(game_id):
 
         # Remover jogo
         db.games.delete_one({"_id": ObjectId(game_id)})
+        search_service.remove_game(game_id)
+        blob_store.release(game.get("image_url"))
+        blob_store.release(game.get("cover_url"))
 
         return success_response(
             message="Jogo removido com sucesso"
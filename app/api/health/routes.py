@@ -3,6 +3,10 @@ import time
 import platform
 from datetime import datetime
 from app.db.mongo_client import mongo_client
+from app.utils.security.log_sink import log_sink
+from app.utils.security.token_revocation import token_revocation
+from app.utils.helpers.password_helpers import password_hasher
+from app.services.ad.view_counter import view_counter
 import os
 import sys
 
@@ -49,6 +53,10 @@ def health_check():
         "dependencies": {
             "mongodb": mongo_status
         },
+        "audit_log_sink": log_sink.stats(),
+        "token_revocation": token_revocation.stats(),
+        "password_hasher": password_hasher.stats(),
+        "ad_view_counter": view_counter.stats(),
         "system_info": system_info
     }
 
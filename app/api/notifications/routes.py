@@ -5,7 +5,8 @@ from app.services.notification.notification_service import (
     mark_all_notifications_as_read,
     delete_notification,
     create_report,
-    get_reports
+    get_reports,
+    get_unread_count as get_unread_notifications_count
 )
 from app.utils.helpers.response_helpers import success_response, error_response
 from app.utils.decorators.auth_decorators import jwt_required
@@ -27,7 +28,8 @@ def get_notifications():
             user_id=str(g.user["_id"]),
             limit=limit,
             skip=skip,
-            filter_type=filter_type
+            filter_type=filter_type,
+            cursor=request.args.get("cursor")
         )
 
         if result["success"]:
@@ -35,7 +37,8 @@ def get_notifications():
                 data={
                     "notifications": result["notifications"],
                     "total": result["total"],
-                    "unread_count": result["unread_count"]
+                    "unread_count": result["unread_count"],
+                    "next_cursor": result["next_cursor"]
                 },
                 message="Notificações encontradas"
             )
@@ -136,14 +139,16 @@ def get_reports_route():
         result = get_reports(
             limit=limit,
             skip=skip,
-            status_filter=status_filter
+            status_filter=status_filter,
+            cursor=request.args.get("cursor")
         )
 
         if result["success"]:
             return success_response(
                 data={
                     "reports": result["reports"],
-                    "total": result["total"]
+                    "total": result["total"],
+                    "next_cursor": result["next_cursor"]
                 },
                 message="Reports encontrados"
             )
@@ -158,15 +163,11 @@ def get_reports_route():
 def get_unread_count():
     """Retorna apenas o número de notificações não lidas."""
     try:
-        result = get_user_notifications(
-            user_id=str(g.user["_id"]),
-            limit=1,  # Só precisamos do count
-            skip=0
-        )
+        result = get_unread_notifications_count(str(g.user["_id"]))
 
         if result["success"]:
             return success_response(
-                data={"unread_count": result["unread_count"]},
+                data={"unread_count": result["count"]},
                 message="Contador de não lidas"
             )
         else:
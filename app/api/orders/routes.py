@@ -124,11 +124,11 @@ def get_user_orders_route():
         limit = max(1, min(limit, 100))  # Entre 1 e 100
         skip = max(0, skip)
 
-        result = get_user_orders(g.user["_id"], role, limit, skip)
+        result = get_user_orders(g.user["_id"], role, limit, skip, request.args.get("cursor"))
 
         if result["success"]:
             return success_response(
-                data={"orders": result["orders"], "total": result["total"]},
+                data={"orders": result["orders"], "total": result["total"], "next_cursor": result["next_cursor"]},
                 message="Pedidos encontrados com sucesso"
             )
         else:
@@ -271,7 +271,7 @@ def get_sales():
         limit = max(1, min(limit, 100))
         skip = max(0, skip)
 
-        result = get_user_orders(g.user["_id"], "seller", limit, skip)
+        result = get_user_orders(g.user["_id"], "seller", limit, skip, request.args.get("cursor"))
 
         if result["success"]:
             orders = result["orders"]
@@ -283,7 +283,7 @@ def get_sales():
                     orders = [order for order in orders if order["status"] == status]
 
             return success_response(
-                data={"sales": orders, "total": len(orders)},
+                data={"sales": orders, "total": len(orders), "next_cursor": result["next_cursor"]},
                 message="Vendas encontradas com sucesso"
             )
         else:
@@ -310,7 +310,7 @@ def get_purchases():
         limit = max(1, min(limit, 100))
         skip = max(0, skip)
 
-        result = get_user_orders(g.user["_id"], "buyer", limit, skip)
+        result = get_user_orders(g.user["_id"], "buyer", limit, skip, request.args.get("cursor"))
 
         if result["success"]:
             orders = result["orders"]
@@ -322,7 +322,7 @@ def get_purchases():
                     orders = [order for order in orders if order["status"] == status]
 
             return success_response(
-                data={"purchases": orders, "total": len(orders)},
+                data={"purchases": orders, "total": len(orders), "next_cursor": result["next_cursor"]},
                 message="Compras encontradas com sucesso"
             )
         else:
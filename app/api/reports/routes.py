@@ -53,7 +53,7 @@ def get_reports():
             filters['reason'] = reason
         
         # Get reports
-        result = ReportService.get_reports(filters, page, limit)
+        result = ReportService.get_reports(filters, page, limit, request.args.get('cursor'))
         
         return jsonify(result), result.get('status_code', 200)
         
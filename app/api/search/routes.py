@@ -1,10 +1,67 @@
-from flask import Blueprint
-from app.utils.helpers.response_helpers import success_response
+from flask import Blueprint, request
+from app.services.search.search_service import search_catalog, VALID_AD_TYPES, VALID_SEARCH_TYPES
+from app.services.ad_questions.questions_service import validate_object_id
+from app.utils.helpers.response_helpers import success_response, error_response
 
 # Criar blueprint
 search_bp = Blueprint("search", __name__)
 
+
+def _parse_price(value):
+    """Converte o parâmetro de preço, retornando None se ausente."""
+    if value in (None, ""):
+        return None
+    price = float(value)
+    if price < 0:
+        raise ValueError("Preço não pode ser negativo")
+    return price
+
+
 @search_bp.route("/", methods=["GET"])
 def search():
-    """Pesquisa global na plataforma."""
-    return success_response(message="Endpoint de pesquisa")
+    """Pesquisa global na plataforma (anúncios e jogos)."""
+    try:
+        query = request.args.get("q", "").strip()
+        if not query:
+            return error_response("Parâmetro 'q' é obrigatório", status_code=400)
+        if len(query) > 100:
+            return error_response("Busca muito longa", status_code=400)
+
+        search_type = request.args.get("type", "all")
+        if search_type not in VALID_SEARCH_TYPES:
+            return error_response("Tipo de busca inválido", status_code=400)
+
+        try:
+            page = max(1, int(request.args.get("page", 1)))
+            limit = min(max(1, int(request.args.get("limit", 20))), 100)
+            min_price = _parse_price(request.args.get("min_price"))
+            max_price = _parse_price(request.args.get("max_price"))
+        except ValueError:
+            return error_response("Parâmetros de paginação ou preço inválidos", status_code=400)
+
+        ad_type = request.args.get("ad_type")
+        if ad_type and ad_type not in VALID_AD_TYPES:
+            return error_response("Tipo de anúncio inválido", status_code=400)
+
+        game_id = request.args.get("game_id")
+        if game_id and not validate_object_id(game_id):
+            return error_response("ID de jogo inválido", status_code=400)
+
+        filters = {
+            "platform": request.args.get("platform"),
+            "ad_type": ad_type,
+            "game_id": game_id,
+            "min_price": min_price,
+            "max_price": max_price,
+        }
+
+        result = search_catalog(query, search_type, filters, page, limit)
+        if not result["success"]:
+            return error_response(result["message"])
+
+        result.pop("success")
+        return success_response(data=result, message="Busca realizada com sucesso")
+
+    except Exception as e:
+        print(f"Erro na busca: {e}")
+        return error_response(f"Erro ao realizar busca: {str(e)}")
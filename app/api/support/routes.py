@@ -9,6 +9,9 @@ from app.utils.helpers.response_helpers import success_response, error_response
 from app.utils.security.audit_logger import AuditLogger
 from app.utils.security.input_validator import InputValidator
 from app.db.mongo_client import db
+from app.models.user.cache import invalidate_user, user_cache
+from app.models.user.crud import bump_token_version
+from app.utils.helpers.pagination import paginate_find, pipeline_stages, page_result, InvalidCursorError
 from bson import ObjectId
 import logging
 
@@ -178,7 +181,9 @@ def get_all_tickets():
         if priority and not InputValidator.validate_enum(priority, valid_priorities):
             priority = None
         
-        tickets = SupportService.get_all_tickets(page, limit, status, category, priority)
+        tickets = SupportService.get_all_tickets(
+            page, limit, status, category, priority, cursor=request.args.get('cursor')
+        )
         
         # Log de auditoria para acesso a dados sensíveis
         AuditLogger.log_data_access(
@@ -189,6 +194,8 @@ def get_all_tickets():
         )
         
         return success_response(data=tickets, message="Tickets recuperados com sucesso")
+    except InvalidCursorError:
+        return error_response("Cursor de paginação inválido", 400)
     except Exception as e:
         logger.error(f"Erro ao buscar todos os tickets: {str(e)}")
         return error_response("Erro interno do servidor", 500)
@@ -374,6 +381,13 @@ def get_admin_stats():
         logger.error(f"Erro ao obter estatísticas: {str(e)}")
         return error_response(f"Erro ao obter estatísticas: {str(e)}", 500)
 
+@support_bp.route('/admin/cache-stats', methods=['GET'])
+@admin_rate_limit(30)
+@admin_required
+def get_cache_stats():
+    """Taxa de acerto do cache de usuários deste processo."""
+    return success_response(data={"users": user_cache.stats()}, message="Estatísticas de cache recuperadas")
+
 @support_bp.route('/admin/users', methods=['GET'])
 @admin_rate_limit(30)
 @admin_required
@@ -413,12 +427,15 @@ def get_all_users():
             elif status == 'inactive':
                 query['is_active'] = False
         
-        # Buscar usuários
+        # Buscar usuários (cursor de keyset; page apenas sem cursor)
         skip = (page - 1) * limit
-        users_cursor = db.users.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        users_page, next_cursor = paginate_find(
+            db.users, query, limit, cursor=request.args.get('cursor'), skip=skip,
+            projection={'password': 0}
+        )
         users = []
         
-        for user in users_cursor:
+        for user in users_page:
             user['_id'] = str(user['_id'])
             # Remover campos sensíveis
             user.pop('password', None)
@@ -432,10 +449,13 @@ def get_all_users():
             'total': total,
             'page': page,
             'limit': limit,
-            'total_pages': (total + limit - 1) // limit
+            'total_pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor
         }
         
         return success_response(data=convert_objectids(result), message="Usuários recuperados com sucesso")
+    except InvalidCursorError:
+        return error_response("Cursor de paginação inválido", 400)
     except Exception as e:
         logger.error(f"Erro ao buscar usuários: {str(e)}")
         return error_response("Erro interno do servidor", 500)
@@ -520,6 +540,13 @@ def update_user(user_id):
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+        # Papel/status alterados precisam valer já na próxima requisição
+        invalidate_user(user_id)
+        role_changed = 'role' in update_data and update_data['role'] != user.get('role')
+        deactivated = update_data.get('is_active') is False and user.get('is_active', True)
+        if role_changed or deactivated:
+            # Tokens emitidos com o papel/status anterior deixam de valer
+            bump_token_version(user_id)
         
         if result.modified_count == 0:
             return error_response("Nenhuma alteração realizada", 400)
@@ -572,9 +599,9 @@ def get_all_orders():
             query['status'] = status
         
         # Buscar pedidos com informações de usuários
+        # (paginação antes dos $lookup: só os pedidos da página são enriquecidos)
         skip = (page - 1) * limit
-        pipeline = [
-            {"$match": query},
+        pipeline = pipeline_stages(query, limit, cursor=request.args.get('cursor'), skip=skip) + [
             {"$lookup": {
                 "from": "users",
                 "localField": "buyer_id",
@@ -606,12 +633,10 @@ def get_all_orders():
                 "seller": 0,
                 "ad": 0
             }},
-            {"$sort": {"created_at": -1}},
-            {"$skip": skip},
-            {"$limit": limit}
+            {"$sort": {"created_at": -1, "_id": -1}}
         ]
         
-        orders = list(db.orders.aggregate(pipeline))
+        orders, next_cursor = page_result(list(db.orders.aggregate(pipeline)), limit)
         total = db.orders.count_documents(query)
         
         
@@ -630,10 +655,13 @@ def get_all_orders():
             'total': total,
             'page': page,
             'limit': limit,
-            'total_pages': (total + limit - 1) // limit
+            'total_pages': (total + limit - 1) // limit,
+            'next_cursor': next_cursor
         }
         
         return success_response(data=convert_objectids(result), message="Pedidos recuperados com sucesso")
+    except InvalidCursorError:
+        return error_response("Cursor de paginação inválido", 400)
     except Exception as e:
         logger.error(f"Erro ao buscar pedidos: {str(e)}")
         return error_response("Erro interno do servidor", 500)
@@ -710,12 +738,16 @@ def get_audit_logs():
         if admin_id and not InputValidator.validate_object_id(admin_id):
             admin_id = None
         
-        # Buscar logs de auditoria
-        from app.utils.security.audit_logger import AuditLogger
-        logs = AuditLogger.get_admin_activity_report(
-            admin_id=admin_id,
-            limit=pagination['limit']
-        )
+        # Buscar logs de auditoria (cursor de keyset; page apenas sem cursor)
+        try:
+            logs, next_cursor = AuditLogger.list_admin_activity(
+                admin_id=admin_id,
+                limit=pagination['limit'],
+                cursor=request.args.get('cursor'),
+                skip=(pagination['page'] - 1) * pagination['limit']
+            )
+        except InvalidCursorError:
+            return error_response("Cursor inválido", 400)
         
         # Log de auditoria para acesso aos logs (meta-auditoria)
         AuditLogger.log_data_access(
@@ -728,8 +760,114 @@ def get_audit_logs():
         return success_response(data={
             "logs": logs,
             "page": pagination['page'],
-            "limit": pagination['limit']
+            "limit": pagination['limit'],
+            "next_cursor": next_cursor
         }, message="Logs de auditoria recuperados com sucesso")
     except Exception as e:
         logger.error(f"Erro ao buscar logs de auditoria: {str(e)}")
+        return error_response("Erro interno do servidor", 500)
+
+@support_bp.route('/admin/security-events/summary', methods=['GET'])
+@admin_rate_limit(30)
+@admin_required
+def get_security_events_summary():
+    """Resumo dos eventos de segurança por severidade, tipo, hora e IP (agregações por hora)."""
+    try:
+        hours = min(max(request.args.get('hours', 24, type=int), 1), 24 * 90)
+        ip_address = request.args.get('ip_address')
+        severity = request.args.get('severity')
+        if severity and severity not in ['low', 'medium', 'high', 'critical']:
+            return error_response("Severidade inválida", 400)
+
+        from app.services.audit.log_storage import get_security_summary
+        summary = get_security_summary(hours=hours, ip_address=ip_address, severity=severity)
+
+        AuditLogger.log_data_access(
+            resource_type="security_logs",
+            resource_ids="security_events_summary",
+            access_type="read",
+            authorized=True
+        )
+
+        return success_response(data=summary, message="Resumo de eventos de segurança recuperado com sucesso")
+    except Exception as e:
+        logger.error(f"Erro ao buscar resumo de eventos de segurança: {str(e)}")
+        return error_response("Erro interno do servidor", 500)
+
+@support_bp.route('/admin/security-events', methods=['GET'])
+@admin_rate_limit(20)
+@admin_required
+def get_security_events():
+    """Lista eventos de segurança filtrados por tipo, severidade ou IP (paginado por cursor)."""
+    try:
+        pagination = InputValidator.validate_pagination(
+            request.args.get('page'),
+            request.args.get('limit'),
+            max_limit=50
+        )
+
+        query = {}
+        for field in ('event_type', 'severity', 'ip_address'):
+            value = request.args.get(field)
+            if value:
+                query[field] = value
+
+        try:
+            events, next_cursor = paginate_find(
+                db.security_logs, query, pagination['limit'],
+                cursor=request.args.get('cursor'),
+                skip=(pagination['page'] - 1) * pagination['limit'],
+                sort_field="timestamp"
+            )
+        except InvalidCursorError:
+            return error_response("Cursor inválido", 400)
+
+        for event in events:
+            event['_id'] = str(event['_id'])
+            if event.get('user_id'):
+                event['user_id'] = str(event['user_id'])
+
+        AuditLogger.log_data_access(
+            resource_type="security_logs",
+            resource_ids="security_events_list",
+            access_type="read",
+            authorized=True
+        )
+
+        return success_response(data={
+            "events": events,
+            "page": pagination['page'],
+            "limit": pagination['limit'],
+            "next_cursor": next_cursor
+        }, message="Eventos de segurança recuperados com sucesso")
+    except Exception as e:
+        logger.error(f"Erro ao buscar eventos de segurança: {str(e)}")
+        return error_response("Erro interno do servidor", 500)
+
+@support_bp.route('/admin/logs/maintenance', methods=['POST'])
+@admin_rate_limit(5)
+@admin_required
+def run_log_maintenance():
+    """Aplica a retenção configurada e atualiza as agregações de eventos de segurança."""
+    try:
+        from flask import current_app
+        from app.services.audit.log_storage import apply_log_retention, rollup_security_events, retention_from_config
+
+        retention_result = apply_log_retention(retention_from_config(current_app.config))
+        if not retention_result["success"]:
+            return error_response(retention_result["message"], 500)
+
+        rollup_result = rollup_security_events()
+        if not rollup_result["success"]:
+            return error_response(rollup_result["message"], 500)
+
+        AuditLogger.log_admin_action(action="maintenance", resource_type="logs", success=True)
+
+        return success_response(data={
+            "retention_changed": retention_result["changed"],
+            "rollup_since": rollup_result["since"].isoformat(),
+            "rollup_until": rollup_result["until"].isoformat()
+        }, message="Manutenção dos logs concluída")
+    except Exception as e:
+        logger.error(f"Erro na manutenção dos logs: {str(e)}")
         return error_response("Erro interno do servidor", 500)
\ No newline at end of file
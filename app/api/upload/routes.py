@@ -1,42 +1,110 @@
-from flask import Blueprint, request, current_app, send_from_directory, abort, g
+from flask import Blueprint, request, current_app, abort, g
 from app.utils.decorators.auth_decorators import jwt_required
 from app.utils.helpers.response_helpers import success_response, error_response
 from app.services.upload.upload_service import UploadService
+from app.services.upload.file_server import serve_upload
+from app.utils.security.security_middleware import skip_payload_scan
 import os
 
 upload_bp = Blueprint("upload", __name__)
 
 
 @upload_bp.route("/<path:filename>")
+@skip_payload_scan
 def serve_file(filename):
-    """Serve arquivos de upload (imagens, etc)."""
+    """Serve arquivos de upload (imagens, etc) com cache HTTP (ver file_server)."""
     try:
-        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-        file_path = os.path.join(upload_folder, filename)
+        return serve_upload(filename)
 
-        # Verificar se arquivo existe
-        if os.path.exists(file_path):
-            return send_from_directory(upload_folder, filename)
+    except Exception as e:
+        print(f"Erro ao servir arquivo {filename}: {e}")
+        abort(404)
+
+
+@upload_bp.route("/status/<category>/<filename>", methods=["GET"])
+@jwt_required
+def get_upload_status(category, filename):
+    """Status da geração das variantes de um upload (pending, ready, failed)."""
+    try:
+        if category not in ["ads", "profiles", "games"]:
+            return error_response("Categoria inválida", status_code=400)
+
+        upload_service = UploadService()
+        result = upload_service.get_variant_status(filename, category)
+
+        if result["success"]:
+            result.pop("success")
+            return success_response(data=result)
         else:
-            # Retornar imagem padrão baseada no tipo
-            if 'profiles' in filename:
-                default_file = 'profiles/medium/no-user-image.jpg'
-            elif 'ads' in filename:
-                default_file = 'ads/medium/no-ads-image.jpg'
-            elif 'games' in filename:
-                default_file = 'games/medium/valorant.jpg'
-            else:
-                default_file = 'ads/medium/no-ads-image.jpg'
+            return error_response(result["message"], status_code=404)
 
-            default_path = os.path.join(upload_folder, default_file)
-            if os.path.exists(default_path):
-                return send_from_directory(upload_folder, default_file)
-            else:
-                abort(404)
+    except Exception as e:
+        return error_response(f"Erro ao consultar status do upload: {str(e)}")
+
+
+@upload_bp.route("/presign", methods=["POST"])
+@jwt_required
+def presign_upload():
+    """Prepara o upload direto para o armazenamento (URL de PUT pré-assinada)."""
+    try:
+        data = request.json or {}
+        category = data.get("category", "ads")
+
+        if category not in ["ads", "profiles", "games"]:
+            return error_response("Categoria inválida", status_code=400)
+        if category == "games" and g.user.get("role") not in ["admin", "support"]:
+            return error_response("Acesso negado. Apenas administradores podem fazer upload de imagens de jogos.",
+                                  status_code=403)
+
+        upload_service = UploadService()
+        result = upload_service.create_direct_upload(
+            category,
+            data.get("content_type"),
+            data.get("sha256"),
+            data.get("size"),
+            expires_in=current_app.config.get("UPLOAD_PRESIGN_EXPIRES_SECONDS", 900)
+        )
+
+        if result["success"]:
+            return success_response(data=result["data"], message=result["message"])
+        else:
+            return error_response(result["message"], status_code=400)
 
     except Exception as e:
-        print(f"Erro ao servir arquivo {filename}: {e}")
-        abort(404)
+        return error_response(f"Erro ao preparar upload: {str(e)}")
+
+
+@upload_bp.route("/complete", methods=["POST"])
+@jwt_required
+def complete_upload():
+    """Confirma um upload direto: registra o arquivo e agenda as variantes."""
+    try:
+        data = request.json or {}
+        category = data.get("category", "ads")
+
+        if category not in ["ads", "profiles", "games"]:
+            return error_response("Categoria inválida", status_code=400)
+        if category == "games" and g.user.get("role") not in ["admin", "support"]:
+            return error_response("Acesso negado", status_code=403)
+
+        upload_service = UploadService()
+        result = upload_service.complete_direct_upload(
+            category,
+            data.get("filename"),
+            data.get("replace_existing")
+        )
+
+        if result["success"]:
+            return success_response(
+                data=result["data"],
+                message=result["message"],
+                status_code=201
+            )
+        else:
+            return error_response(result["message"], status_code=400)
+
+    except Exception as e:
+        return error_response(f"Erro ao confirmar upload: {str(e)}")
 
 
 @upload_bp.route("/ad-image", methods=["POST"])
@@ -173,6 +241,9 @@ def upload_game_image():
                     )
 
                     if update_result.modified_count > 0:
+                        from app.services.upload import blob_store
+                        blob_store.swap_reference(game.get("image_url"), result["data"]["main_url"])
+
                         # Buscar jogo atualizado
                         updated_game = db.games.find_one({"_id": ObjectId(game_id)})
                         updated_game["_id"] = str(updated_game["_id"])
@@ -268,15 +339,19 @@ def delete_image():
                     from bson import ObjectId
                     from datetime import datetime
 
-                    db.games.update_one(
+                    previous = db.games.find_one_and_update(
                         {"_id": ObjectId(data["game_id"])},
                         {
                             "$set": {
                                 "image_url": "",
                                 "updated_at": datetime.utcnow()
                             }
-                        }
+                        },
+                        projection={"image_url": 1}
                     )
+                    if previous:
+                        from app.services.upload import blob_store
+                        blob_store.release(previous.get("image_url"))
                 except Exception as e:
                     print(f"Erro ao limpar imagem do jogo: {e}")
 
@@ -300,39 +375,14 @@ def optimize_existing_images():
         data = request.json or {}
         category = data.get("category", "all")  # all, ads, profiles, games
 
+        # Variações geradas com uma decodificação por arquivo (UploadService.optimize_images)
         upload_service = UploadService()
-        upload_folder = upload_service.upload_folder
-
-        categories_to_process = []
-        if category == "all":
-            categories_to_process = ["ads", "profiles", "games"]
-        else:
-            categories_to_process = [category]
-
-        optimized_count = 0
-        errors = []
-
-        for cat in categories_to_process:
-            cat_path = os.path.join(upload_folder, cat)
-            if not os.path.exists(cat_path):
-                continue
+        result = upload_service.optimize_images(None if category == "all" else category)
+        if not result["success"]:
+            return error_response(result["message"])
 
-            # Buscar arquivos na pasta principal da categoria
-            for filename in os.listdir(cat_path):
-                if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-                    try:
-                        original_path = os.path.join(cat_path, filename)
-
-                        # Criar variações de tamanho se não existirem
-                        for size_name, size_dims in upload_service.image_sizes.items():
-                            size_path = os.path.join(cat_path, size_name, filename)
-
-                            if not os.path.exists(size_path):
-                                if upload_service.resize_image(original_path, size_dims, size_path):
-                                    optimized_count += 1
-
-                    except Exception as e:
-                        errors.append(f"Erro ao otimizar {filename}: {str(e)}")
+        optimized_count = result["data"]["optimized_count"]
+        errors = result["data"]["errors"]
 
         message = f"Otimização concluída. {optimized_count} variações criadas."
         if errors:
@@ -350,6 +400,39 @@ def optimize_existing_images():
         return error_response(f"Erro na otimização: {str(e)}")
 
 
+@upload_bp.route("/images/gc", methods=["POST"])
+@jwt_required
+def collect_unreferenced_images():
+    """Recalcula as referências e remove uploads sem uso (apenas admin)."""
+    try:
+        if g.user.get("role") not in ["admin", "support"]:
+            return error_response("Acesso negado", status_code=403)
+
+        from app.services.upload import blob_store
+
+        data = request.json or {}
+        reconcile_result = blob_store.reconcile_blob_refcounts()
+        if not reconcile_result["success"]:
+            return error_response(reconcile_result["message"])
+
+        gc_result = blob_store.collect_garbage(
+            grace_seconds=int(data.get("grace_seconds", current_app.config.get("UPLOAD_GC_GRACE_SECONDS", 86400))),
+            batch_size=int(data.get("batch_size", current_app.config.get("UPLOAD_GC_BATCH_SIZE", 200)))
+        )
+        if not gc_result["success"]:
+            return error_response(gc_result["message"])
+
+        reconcile_result.pop("success")
+        gc_result.pop("success")
+        return success_response(
+            data={"references": reconcile_result, "collected": gc_result},
+            message=f"{gc_result['collected']} imagens sem uso removidas"
+        )
+
+    except Exception as e:
+        return error_response(f"Erro na coleta de imagens: {str(e)}")
+
+
 @upload_bp.route("/images/stats", methods=["GET"])
 @jwt_required
 def get_upload_stats():
@@ -422,6 +505,12 @@ def get_upload_stats():
 
         stats["total_size_mb"] = round(stats["total_size_mb"], 2)
 
+        # Fila de geração de variantes deste worker e arquivos únicos armazenados
+        from app.services.upload.image_pipeline import image_pipeline
+        from app.services.upload.blob_store import get_blob_stats
+        stats["pipeline"] = image_pipeline.stats()
+        stats["blobs"] = get_blob_stats()
+
         return success_response(data=stats)
 
     except Exception as e:
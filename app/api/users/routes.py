@@ -5,6 +5,7 @@ from app.utils.decorators.auth_decorators import jwt_required
 from app.services.user.user_service import (
     get_user_profile, update_user_profile, change_password, get_user_dashboard_data, get_user_public_profile
 )
+from app.services.auth.login_service import refresh_auth_token
 
 # Criar blueprint
 users_bp = Blueprint("users", __name__)
@@ -70,9 +71,14 @@ def change_user_password():
         result = change_password(g.user["_id"], data["current_password"], data["new_password"])
 
         if result["success"]:
-            return success_response(message=result["message"])
+            # A troca de senha revoga os tokens anteriores; a sessão atual recebe um novo
+            token = refresh_auth_token(g.user["_id"])
+            return success_response(
+                data={"access_token": token.get("access_token")},
+                message=result["message"]
+            )
         else:
-            return error_response(result["message"], status_code=400)
+            return error_response(result["message"], status_code=result.get("status_code", 400))
 
     except Exception as e:
         return error_response(f"Erro ao alterar senha: {str(e)}")
@@ -194,7 +200,7 @@ def remove_from_favorites_route(ad_id):
         result = remove_from_favorites(g.user["_id"], ad_id)
 
         if result["success"]:
-            return success_response(message=result["message"])
+            return success_response(data=result.get("data"), message=result["message"])
         else:
             return error_response(result["message"], status_code=400)
 
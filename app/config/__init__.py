@@ -1,11 +1,13 @@
 from app.config.development import DevelopmentConfig 
 from app.config.production import ProductionConfig 
 from app.config.testing import TestingConfig 
+from app.config.benchmark import BenchmarkConfig 
  
 def get_config(config_name): 
     configs = { 
         "development": DevelopmentConfig, 
         "production": ProductionConfig, 
-        "testing": TestingConfig 
+        "testing": TestingConfig, 
+        "benchmark": BenchmarkConfig 
     } 
     return configs.get(config_name, DevelopmentConfig) 
@@ -0,0 +1,18 @@
+import os 
+from datetime import timedelta 
+ 
+# Usada pelos benchmarks de tests/benchmarks: mongod local, sem TLS
+class BenchmarkConfig: 
+    DEBUG = False
+    SECRET_KEY = "benchmark-secret-key"
+    MONGODB_URI = os.getenv("BENCH_MONGODB_URI", "mongodb://localhost:27017")
+    MONGODB_DB_NAME = os.getenv("BENCH_MONGODB_DB", "gameunite_bench")
+    MONGODB_TLS = False
+    JWT_SECRET_KEY = "jwt-benchmark-secret"
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=6)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=1)
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    SOCKETIO_PRESENCE_BACKEND = os.getenv("SOCKETIO_PRESENCE_BACKEND", "local")
+    # Comparar a autenticação: AUTH_TOKEN_MODE=database lê o usuário a cada requisição
+    AUTH_TOKEN_MODE = os.getenv("AUTH_TOKEN_MODE", "stateless")
+    AUTH_REVOCATION_REFRESH_SECONDS = 5
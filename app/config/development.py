@@ -8,3 +8,47 @@ class DevelopmentConfig:
     JWT_SECRET_KEY = "jwt-dev-secret" 
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1) 
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30) 
+    # Intervalo (segundos) da reconciliação dos contadores de anúncios por jogo
+    GAME_COUNTERS_RECONCILE_SECONDS = 3600
+    # Intervalo (segundos) do reparo dos contadores de não lidas (chat e notificações)
+    UNREAD_COUNTERS_RECONCILE_SECONDS = 3600
+    # WebSocket em um único processo: sem fila e presença em memória
+    SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+    SOCKETIO_PRESENCE_BACKEND = "local"
+    SOCKETIO_LOGGER = True
+    # Geração das variantes de imagem em segundo plano
+    UPLOAD_PIPELINE_WORKERS = 1
+    UPLOAD_PIPELINE_MAX_PENDING = 16
+    UPLOAD_PIPELINE_RETRY_SECONDS = 60
+    UPLOAD_IMAGE_FORMATS = ["webp", "avif"]
+    UPLOAD_MAX_IMAGE_PIXELS = 40000000
+    # Coleta de uploads sem referência
+    UPLOAD_GC_INTERVAL_SECONDS = 3600
+    UPLOAD_GC_GRACE_SECONDS = 86400
+    UPLOAD_GC_BATCH_SIZE = 200
+    # Armazenamento dos uploads (pasta uploads/)
+    UPLOAD_STORAGE_BACKEND = "local"
+    UPLOAD_BASE_URL = "http://127.0.0.1:5000/api/upload"
+    # Rate limiting em memória (um processo)
+    RATE_LIMIT_BACKEND = "memory"
+    RATE_LIMIT_ALGORITHM = "sliding_window"
+    RATE_LIMIT_MAX_KEYS = 10000
+    # Logs de auditoria em lote
+    AUDIT_LOG_MODE = "async"
+    AUDIT_LOG_FLUSH_SECONDS = 1.0
+    # Retenção dos logs e agregação dos eventos de segurança
+    LOG_RETENTION_DAYS_AUDIT = 365
+    LOG_RETENTION_DAYS_SECURITY = 90
+    LOG_RETENTION_DAYS_DATA_ACCESS = 30
+    LOG_RETENTION_DAYS_ROLLUPS = 730
+    LOG_MAINTENANCE_INTERVAL_SECONDS = 900
+    # Autenticação pelas claims do token com tabela de revogação em memória
+    AUTH_TOKEN_MODE = "stateless"
+    AUTH_REVOCATION_REFRESH_SECONDS = 5
+    # bcrypt em 2 processos com custo fixo (sem calibração na inicialização)
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_MAX_PENDING = 32
+    PASSWORD_HASH_ROUNDS = 12
+    # Visualizações gravadas em lote, sem descarte de repetidas
+    AD_VIEW_FLUSH_SECONDS = 5
+    AD_VIEW_DEDUPE_WINDOW_SECONDS = 0
\ No newline at end of file
@@ -8,3 +8,97 @@ class ProductionConfig:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY") 
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1) 
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30) 
+    # Reconstrução periódica do índice de busca (cada worker mantém o seu)
+    SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", 300))
+    # Intervalo (segundos) da reconciliação dos contadores de anúncios por jogo
+    GAME_COUNTERS_RECONCILE_SECONDS = int(os.getenv("GAME_COUNTERS_RECONCILE_SECONDS", 3600))
+
+    # Cache de usuários em memória (por worker); TTL limita dados desatualizados entre workers
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+    # Intervalo (segundos) do reparo dos contadores de não lidas (chat e notificações)
+    UNREAD_COUNTERS_RECONCILE_SECONDS = int(os.getenv("UNREAD_COUNTERS_RECONCILE_SECONDS", 3600))
+    # WebSocket em vários workers: fila para os emits e presença compartilhada
+    SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    SOCKETIO_PRESENCE_BACKEND = os.getenv("SOCKETIO_PRESENCE_BACKEND", "mongo")
+    SOCKETIO_PRESENCE_TTL_SECONDS = int(os.getenv("SOCKETIO_PRESENCE_TTL_SECONDS", 90))
+    # Geração das variantes de imagem: processos por worker web, fila máxima e varredura de pendentes
+    UPLOAD_PIPELINE_WORKERS = int(os.getenv("UPLOAD_PIPELINE_WORKERS", 2))
+    UPLOAD_PIPELINE_MAX_PENDING = int(os.getenv("UPLOAD_PIPELINE_MAX_PENDING", 64))
+    UPLOAD_PIPELINE_RETRY_SECONDS = int(os.getenv("UPLOAD_PIPELINE_RETRY_SECONDS", 60))
+    # Formatos gravados além do JPEG (AVIF só se o Pillow tiver o codec) e limite de pixels do original
+    UPLOAD_IMAGE_FORMATS = [fmt for fmt in os.getenv("UPLOAD_IMAGE_FORMATS", "webp,avif").split(",") if fmt]
+    UPLOAD_MAX_IMAGE_PIXELS = int(os.getenv("UPLOAD_MAX_IMAGE_PIXELS", 40000000))
+    # Coleta de uploads sem referência: intervalo, carência após a última referência e tamanho do lote
+    UPLOAD_GC_INTERVAL_SECONDS = int(os.getenv("UPLOAD_GC_INTERVAL_SECONDS", 3600))
+    UPLOAD_GC_GRACE_SECONDS = int(os.getenv("UPLOAD_GC_GRACE_SECONDS", 86400))
+    UPLOAD_GC_BATCH_SIZE = int(os.getenv("UPLOAD_GC_BATCH_SIZE", 200))
+    # Entrega dos uploads: max-age dos nomes imutáveis e transferência feita pelo proxy
+    # (location interna do nginx apontando para a pasta uploads/, ex. "/protected-uploads")
+    UPLOAD_CACHE_MAX_AGE = int(os.getenv("UPLOAD_CACHE_MAX_AGE", 31536000))
+    UPLOAD_ACCEL_REDIRECT_PREFIX = os.getenv("UPLOAD_ACCEL_REDIRECT_PREFIX")
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "false").lower() == "true"
+    # Armazenamento dos uploads: "local" (pasta uploads/) ou "s3" (S3 ou compatível, ex. MinIO
+    # com UPLOAD_S3_ENDPOINT_URL); URL base das imagens e acesso direto ao bucket
+    UPLOAD_STORAGE_BACKEND = os.getenv("UPLOAD_STORAGE_BACKEND", "local")
+    UPLOAD_BASE_URL = os.getenv("UPLOAD_BASE_URL", "http://127.0.0.1:5000/api/upload")
+    UPLOAD_S3_BUCKET = os.getenv("UPLOAD_S3_BUCKET")
+    UPLOAD_S3_PREFIX = os.getenv("UPLOAD_S3_PREFIX", "")
+    UPLOAD_S3_REGION = os.getenv("UPLOAD_S3_REGION")
+    UPLOAD_S3_ENDPOINT_URL = os.getenv("UPLOAD_S3_ENDPOINT_URL")
+    UPLOAD_PUBLIC_BASE_URL = os.getenv("UPLOAD_PUBLIC_BASE_URL")
+    UPLOAD_PRESIGN_EXPIRES_SECONDS = int(os.getenv("UPLOAD_PRESIGN_EXPIRES_SECONDS", 900))
+    # Rate limiting: "memory" (por processo) ou "mongo" (compartilhado entre workers),
+    # algoritmo padrão (sliding_window ou token_bucket) e chaves mantidas em memória
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "mongo")
+    RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    # Limites por endpoint que sobrescrevem os dos decorators, ex. {"support.create_ticket": {"limit": 5}}
+    RATE_LIMIT_POLICIES = {}
+    # Middleware de segurança: caracteres examinados por requisição (query string + strings do JSON)
+    SECURITY_SCAN_MAX_BYTES = int(os.getenv("SECURITY_SCAN_MAX_BYTES", 65536))
+    # Logs de auditoria/segurança: "async" (fila + gravação em lote) ou "sync"; tamanho da fila,
+    # lote, intervalo máximo entre gravações e política com a fila cheia ("drop" ou "block")
+    AUDIT_LOG_MODE = os.getenv("AUDIT_LOG_MODE", "async")
+    AUDIT_LOG_QUEUE_SIZE = int(os.getenv("AUDIT_LOG_QUEUE_SIZE", 10000))
+    AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", 500))
+    AUDIT_LOG_FLUSH_SECONDS = float(os.getenv("AUDIT_LOG_FLUSH_SECONDS", 1.0))
+    AUDIT_LOG_OVERFLOW = os.getenv("AUDIT_LOG_OVERFLOW", "drop")
+    AUDIT_LOG_BLOCK_TIMEOUT_MS = int(os.getenv("AUDIT_LOG_BLOCK_TIMEOUT_MS", 50))
+    # Retenção (dias) dos logs de auditoria, segurança, acesso a dados e das
+    # agregações por hora dos eventos de segurança; intervalo da manutenção
+    LOG_RETENTION_DAYS_AUDIT = int(os.getenv("LOG_RETENTION_DAYS_AUDIT", 365))
+    LOG_RETENTION_DAYS_SECURITY = int(os.getenv("LOG_RETENTION_DAYS_SECURITY", 90))
+    LOG_RETENTION_DAYS_DATA_ACCESS = int(os.getenv("LOG_RETENTION_DAYS_DATA_ACCESS", 30))
+    LOG_RETENTION_DAYS_ROLLUPS = int(os.getenv("LOG_RETENTION_DAYS_ROLLUPS", 730))
+    LOG_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("LOG_MAINTENANCE_INTERVAL_SECONDS", 900))
+    # Autenticação: "stateless" valida o token pelas claims (role, is_active, tv)
+    # e pela tabela de revogação em memória; "database" lê o usuário a cada requisição
+    AUTH_TOKEN_MODE = os.getenv("AUTH_TOKEN_MODE", "stateless")
+    AUTH_REVOCATION_REFRESH_SECONDS = int(os.getenv("AUTH_REVOCATION_REFRESH_SECONDS", 5))
+    AUTH_REVOCATION_MAX_STALENESS_SECONDS = int(os.getenv("AUTH_REVOCATION_MAX_STALENESS_SECONDS", 30))
+    # Pool do bcrypt (0 = na própria requisição; sem valor = um processo por núcleo),
+    # fila máxima antes de responder 503 e custo: PASSWORD_HASH_ROUNDS fixo ou
+    # calibrado na inicialização para levar até PASSWORD_HASH_TARGET_MS, nunca
+    # abaixo de PASSWORD_HASH_MIN_ROUNDS
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS")) if os.getenv("PASSWORD_HASH_WORKERS") else None
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+    PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", 0))
+    PASSWORD_HASH_TARGET_MS = int(os.getenv("PASSWORD_HASH_TARGET_MS", 250))
+    PASSWORD_HASH_MIN_ROUNDS = int(os.getenv("PASSWORD_HASH_MIN_ROUNDS", 12))
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", 10))
+    # Visualizações dos anúncios: intervalo de gravação do buffer (0 = na hora),
+    # máximo de anúncios no buffer e janela de descarte de visualizações repetidas
+    # do mesmo visitante (0 = desligado), com capacidade/erro dos filtros de Bloom.
+    # Visitantes anônimos são identificados pelo IP: atrás de proxy só ligue o
+    # descarte com PROXY_FIX_X_FOR configurado, senão todos compartilham o IP do proxy
+    AD_VIEW_FLUSH_SECONDS = float(os.getenv("AD_VIEW_FLUSH_SECONDS", 5))
+    AD_VIEW_MAX_PENDING = int(os.getenv("AD_VIEW_MAX_PENDING", 5000))
+    AD_VIEW_DEDUPE_WINDOW_SECONDS = int(os.getenv("AD_VIEW_DEDUPE_WINDOW_SECONDS", 0))
+    AD_VIEW_DEDUPE_CAPACITY = int(os.getenv("AD_VIEW_DEDUPE_CAPACITY", 200000))
+    AD_VIEW_DEDUPE_ERROR_RATE = float(os.getenv("AD_VIEW_DEDUPE_ERROR_RATE", 0.01))
+    # Quantidade de proxies reversos confiáveis na frente da aplicação (0 = nenhum).
+    # Com valor > 0 o IP do cliente (request.remote_addr) vem de X-Forwarded-For,
+    # o que vale para rate limiting, logs de auditoria e visualizações
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", 0))
\ No newline at end of file
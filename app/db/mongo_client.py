@@ -25,13 +25,15 @@ def init_mongo(app):
     db_name = app.config.get('MONGODB_DB_NAME', 'gameunite').lower()
     app.config['MONGODB_DB_NAME'] = db_name
 
+    # TLS é obrigatório no Atlas; um mongod local (benchmarks) pode desativá-lo
+    tls_options = {"ssl": True, "tlsCAFile": certifi.where()} if app.config.get('MONGODB_TLS', True) else {}
+
     # Criar cliente MongoDB com configurações simplificadas
     mongo_client = MongoClient(
         mongo_uri,
-        ssl=True,
-        tlsCAFile=certifi.where(),
         serverSelectionTimeoutMS=5000,  # 5 segundos de timeout
         connectTimeoutMS=30000,  # 30 segundos para a conexão inicial
+        **tls_options
     )
 
     # Testar a conexão
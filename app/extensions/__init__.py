@@ -29,6 +29,6 @@ def init_extensions(app):
     from app.extensions.jwt import jwt
     jwt.init_app(app)
 
-    # SocketIO
-    from app.extensions.socketio import socketio
-    socketio.init_app(app)
\ No newline at end of file
+    # SocketIO (fila de mensagens, modo assíncrono e presença vêm da configuração)
+    from app.extensions.socketio import init_socketio
+    init_socketio(app)
\ No newline at end of file
@@ -1,12 +1,48 @@
+import os
+
 from flask_socketio import SocketIO
 
-# Configuração SocketIO para desenvolvimento
-socketio = SocketIO(
-    cors_allowed_origins=[
-        'http://localhost:3000',
-        'http://127.0.0.1:3000'
-    ],
-    async_mode='threading',
-    logger=True,
-    engineio_logger=True
-)
\ No newline at end of file
+DEFAULT_CORS_ORIGINS = [
+    'http://localhost:3000',
+    'http://127.0.0.1:3000'
+]
+
+# As opções dependem da configuração da aplicação e são aplicadas em init_socketio
+socketio = SocketIO()
+
+
+def socketio_options(config):
+    """Monta as opções do Socket.IO a partir da configuração.
+
+    - SOCKETIO_ASYNC_MODE: "threading" (padrão), "eventlet" ou "gevent".
+      Com eventlet/gevent cada conexão é um greenlet, não uma thread do SO;
+      o monkey patch precisa acontecer antes de qualquer import (ver run.py).
+      Requer o pacote correspondente (requirements-optional.txt).
+    - SOCKETIO_MESSAGE_QUEUE: URL da fila usada para distribuir os emits entre
+      workers (redis://, amqp://, mongodb:// via kombu...). Sem fila, os emits
+      ficam restritos ao processo atual (modo local, um único worker).
+      Requer redis (redis://) ou kombu (demais) - ver requirements-optional.txt.
+    """
+    options = {
+        'cors_allowed_origins': config.get('SOCKETIO_CORS_ORIGINS', DEFAULT_CORS_ORIGINS),
+        # Mesmo padrão do run.py, que aplica o monkey patch pela variável de ambiente
+        'async_mode': config.get('SOCKETIO_ASYNC_MODE', os.getenv('SOCKETIO_ASYNC_MODE', 'threading')),
+        'logger': config.get('SOCKETIO_LOGGER', False),
+        'engineio_logger': config.get('SOCKETIO_LOGGER', False)
+    }
+
+    message_queue = config.get('SOCKETIO_MESSAGE_QUEUE')
+    if message_queue:
+        options['message_queue'] = message_queue
+        options['channel'] = config.get('SOCKETIO_CHANNEL', 'gameunite-socketio')
+
+    return options
+
+
+def init_socketio(app):
+    """Inicializa o Socket.IO e o registro de presença deste worker."""
+    socketio.init_app(app, **socketio_options(app.config))
+
+    from app.websockets.presence import init_presence
+    with app.app_context():
+        init_presence(app, socketio)
@@ -1,81 +1,112 @@
-def setup_indexes():
-    """Configura índices para todas as coleções do MongoDB."""
-    from app.db.mongo_client import db
+"""Plano de índices do MongoDB.
 
-    # Usuários
-    from app.models.user.schema import user_indexes
-    for index_config in user_indexes:
-        db.users.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
+Cada módulo de schema declara sua lista de índices. Cada índice é um dict com:
+    - key: campo único ("email") ou lista de (campo, direção) para compostos
+    - unique / sparse: opções padrão do MongoDB
+    - partial: filtro do índice parcial (partialFilterExpression)
+    - ttl: segundos para expirar documentos (expireAfterSeconds)
+    - name: nome explícito (obrigatório quando já existe um índice com a mesma
+      chave e opções diferentes)
+    - replaces: nomes de índices antigos que este substitui; são removidos
+      (se existirem) antes da criação
+"""
+import logging
 
-    # Jogos
-    from app.models.game.schema import game_indexes
-    for index_config in game_indexes:
-        db.games.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
+logger = logging.getLogger(__name__)
 
-    # Anúncios
-    from app.models.ad.schema import ad_indexes
-    for index_config in ad_indexes:
-        db.ads.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
 
-    # Pedidos
+def get_index_plan():
+    """Retorna o mapeamento coleção -> lista de índices declarados nos schemas."""
+    from app.models.user.schema import user_indexes
+    from app.models.game.schema import game_indexes
+    from app.models.ad.schema import ad_indexes
     from app.models.order.schema import order_indexes
-    for index_config in order_indexes:
-        db.orders.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
-
-    # Chat
     from app.models.chat.schema import chat_room_indexes, chat_message_indexes
-    for index_config in chat_room_indexes:
-        db.chat_rooms.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
-    for index_config in chat_message_indexes:
-        db.chat_messages.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
-
-    # Favoritos
     from app.models.favorites.schema import favorites_indexes
-    for index_config in favorites_indexes:
-        db.favorites.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
-
-    # Carrinho
+    from app.models.ad_likes.schema import ad_likes_indexes
     from app.models.cart.schema import cart_indexes
-    for index_config in cart_indexes:
-        db.cart.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
-
-    # Perguntas dos Anúncios
     from app.models.ad_questions.schema import ad_questions_indexes
-    for index_config in ad_questions_indexes:
-        db.ad_questions.create_index(
-            index_config["key"],
-            unique=index_config.get("unique", False),
-            background=True
-        )
\ No newline at end of file
+    from app.models.notification.schema import notification_indexes
+    from app.models.report.schema import report_indexes
+    from app.models.support_ticket.schema import support_ticket_indexes
+    from app.models.presence.schema import presence_indexes
+    from app.models.upload.schema import upload_variant_indexes, upload_blob_indexes
+    from app.models.rate_limit.schema import rate_limit_indexes
+    from app.models.audit_log.schema import (
+        audit_log_indexes, security_log_indexes, data_access_log_indexes, security_rollup_indexes
+    )
+
+    return {
+        "users": user_indexes,
+        "games": game_indexes,
+        "ads": ad_indexes,
+        "orders": order_indexes,
+        "chat_rooms": chat_room_indexes,
+        "chat_messages": chat_message_indexes,
+        "favorites": favorites_indexes,
+        "ad_likes": ad_likes_indexes,
+        "cart": cart_indexes,
+        "ad_questions": ad_questions_indexes,
+        "notifications": notification_indexes,
+        "reports": report_indexes,
+        "support_tickets": support_ticket_indexes,
+        "socket_presence": presence_indexes,
+        "upload_variants": upload_variant_indexes,
+        "upload_blobs": upload_blob_indexes,
+        "rate_limits": rate_limit_indexes,
+        "audit_logs": audit_log_indexes,
+        "security_logs": security_log_indexes,
+        "data_access_logs": data_access_log_indexes,
+        "security_event_rollups": security_rollup_indexes,
+    }
+
+
+def index_options(index_config):
+    """Converte a definição declarativa nas opções do create_index."""
+    options = {
+        "unique": index_config.get("unique", False),
+        "background": True
+    }
+    if index_config.get("sparse"):
+        options["sparse"] = True
+    if "partial" in index_config:
+        options["partialFilterExpression"] = index_config["partial"]
+    if "ttl" in index_config:
+        options["expireAfterSeconds"] = index_config["ttl"]
+    if "name" in index_config:
+        options["name"] = index_config["name"]
+    return options
+
+
+def create_indexes(collection, index_configs):
+    """Cria os índices declarados em uma coleção.
+
+    Um índice que conflita com outro já existente (mesma chave, opções
+    diferentes) é registrado no log e não interrompe os demais.
+    """
+    from pymongo.errors import OperationFailure
+
+    created = []
+    existing = None
+    for index_config in index_configs:
+        try:
+            for legacy_name in index_config.get("replaces", []):
+                if existing is None:
+                    existing = collection.index_information()
+                if legacy_name in existing:
+                    collection.drop_index(legacy_name)
+                    existing.pop(legacy_name)
+                    logger.info(f"Índice {legacy_name} em {collection.name} removido (substituído)")
+            created.append(collection.create_index(index_config["key"], **index_options(index_config)))
+        except OperationFailure as e:
+            logger.warning(f"Índice {index_config['key']} em {collection.name} não foi criado: {e}")
+    return created
+
+
+def setup_indexes(database=None):
+    """Configura índices para todas as coleções do MongoDB."""
+    if database is None:
+        from app.db.mongo_client import db as database
+
+    for collection_name, index_configs in get_index_plan().items():
+        create_indexes(database[collection_name], index_configs)
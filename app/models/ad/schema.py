@@ -1,10 +1,18 @@
 # Define os índices para a coleção de anúncios
 ad_indexes = [
-    {"key": "game_id", "unique": False},
-    {"key": "user_id", "unique": False},
-    {"key": "ad_type", "unique": False},
-    {"key": "is_boosted", "unique": False},
-    {"key": "status", "unique": False}
+    # Contadores por jogo / verificação antes de excluir um jogo
+    {"key": "game_id"},
+    # Listagens públicas: {status[, game_id][, ad_type]} ordenadas por created_at
+    {"key": [("status", 1), ("created_at", -1), ("_id", -1)]},
+    {"key": [("status", 1), ("game_id", 1), ("created_at", -1), ("_id", -1)]},
+    {"key": [("status", 1), ("ad_type", 1), ("created_at", -1), ("_id", -1)]},
+    {"key": [("status", 1), ("game_id", 1), ("ad_type", 1), ("created_at", -1), ("_id", -1)]},
+    # Anúncios em destaque (índice parcial: só os impulsionados)
+    {"key": [("status", 1), ("game_id", 1)], "name": "boosted_status_game",
+     "partial": {"is_boosted": True}},
+    # Anúncios do usuário e listagem administrativa
+    {"key": [("user_id", 1), ("created_at", -1), ("_id", -1)]},
+    {"key": [("created_at", -1), ("_id", -1)]}
 ]
 
 # Exemplo de documento de anúncio
@@ -20,6 +28,8 @@ ad_schema_example = {
     "boost_expires_at": "2023-06-01T12:00:00Z", # Expiração do boost
     "status": "active",  # "active", "paused", "deleted"
     "view_count": 150,  # Contador de visualizações
+    "likes_count": 12,  # Total de curtidas (documentos em ad_likes)
+    "favorites_count": 8,  # Total de favoritos (documentos em favorites)
     "created_at": "2023-05-01T12:00:00Z",
     "updated_at": "2023-05-01T12:00:00Z"
 }
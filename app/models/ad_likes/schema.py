@@ -0,0 +1,13 @@
+# Define os índices para a coleção de curtidas de anúncios
+ad_likes_indexes = [
+    # Uma curtida por usuário e anúncio; também atende "quais destes anúncios
+    # o usuário curtiu" ({ad_id: {$in: [...]}, user_id})
+    {"key": [("ad_id", 1), ("user_id", 1)], "unique": True}
+]
+
+# Exemplo de documento de curtida (o total fica em ads.likes_count)
+ad_likes_schema_example = {
+    "ad_id": "60d5ec9af682fbd12a0b7777",    # ID do anúncio
+    "user_id": "60d5ec9af682fbd12a0b9999",  # ID do usuário que curtiu
+    "created_at": "2023-05-01T12:00:00Z"
+}
@@ -1,8 +1,9 @@
 ad_questions_indexes = [
-    {"key": "ad_id", "unique": False},
-    {"key": "user_id", "unique": False},
-    {"key": "created_at", "unique": False},
-    {"key": "status", "unique": False}
+    # Perguntas do anúncio / dos anúncios do vendedor, mais recentes primeiro
+    {"key": [("ad_id", 1), ("created_at", -1)]},
+    {"key": [("ad_id", 1), ("status", 1), ("created_at", -1)]},
+    {"key": [("user_id", 1), ("created_at", -1)]},
+    {"key": [("answered_by", 1), ("created_at", -1)], "sparse": True}
 ]
 
 # Exemplo de documento de pergunta
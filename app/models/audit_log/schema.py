@@ -0,0 +1,73 @@
+# Retenção padrão de cada tipo de log (segundos); sobrescrita por LOG_RETENTION_DAYS_*.
+# Os índices TTL não fazem parte do plano abaixo: apply_log_retention
+# (app/services/audit/log_storage.py) os cria e ajusta a partir da configuração.
+DEFAULT_LOG_RETENTION_SECONDS = {
+    "audit_logs": 365 * 86400,
+    "security_logs": 90 * 86400,
+    "data_access_logs": 30 * 86400,
+    "security_event_rollups": 730 * 86400,
+}
+
+# Índices dos logs de ações administrativas
+audit_log_indexes = [
+    # Relatório por admin e listagem paginada (keyset em timestamp, _id)
+    {"key": [("admin_id", 1), ("timestamp", -1), ("_id", -1)]},
+    {"key": [("timestamp", -1), ("_id", -1)]}
+]
+
+# Índices dos eventos de segurança
+security_log_indexes = [
+    # Filtros do painel por tipo/severidade e por IP
+    {"key": [("event_type", 1), ("severity", 1), ("timestamp", -1)]},
+    {"key": [("ip_address", 1), ("timestamp", -1)]},
+    {"key": [("timestamp", -1), ("_id", -1)]}
+]
+
+# Índices dos registros de acesso a dados sensíveis
+data_access_log_indexes = [
+    {"key": [("user_id", 1), ("timestamp", -1)]},
+    {"key": [("ip_address", 1), ("timestamp", -1)]}
+]
+
+# Índices dos eventos de segurança agregados por hora/IP/tipo/severidade
+security_rollup_indexes = [
+    {"key": [("hour", -1), ("severity", 1)]},
+    {"key": [("ip_address", 1), ("hour", -1)]}
+]
+
+# Exemplo de log de ação administrativa
+audit_log_schema_example = {
+    "_id": "60d5ec9af682fbd12a0b5555",
+    "timestamp": "2023-05-01T12:00:00Z",
+    "admin_id": "60d5ec9af682fbd12a0b9999",
+    "admin_username": "admin",
+    "action": "update",
+    "resource_type": "ticket",
+    "resource_id": "60d5ec9af682fbd12a0b1234",
+    "ip_address": "203.0.113.7",
+    "user_agent": "Mozilla/5.0",
+    "success": True,
+    "error_message": None,
+    "old_data": {"status": "open"},
+    "new_data": {"status": "closed"},
+    "endpoint": "support.update_ticket_status",
+    "method": "PUT"
+}
+
+# Exemplo de evento de segurança agregado (_id: hora + IP + tipo + severidade)
+security_rollup_schema_example = {
+    "_id": {
+        "hour": "2023-05-01T12:00:00Z",
+        "ip_address": "203.0.113.7",
+        "event_type": "resource_enumeration",
+        "severity": "low"
+    },
+    "hour": "2023-05-01T12:00:00Z",
+    "ip_address": "203.0.113.7",
+    "event_type": "resource_enumeration",
+    "severity": "low",
+    "count": 42,
+    "users": ["60d5ec9af682fbd12a0b9999"],
+    "first_seen": "2023-05-01T12:03:10Z",
+    "last_seen": "2023-05-01T12:58:41Z"
+}
@@ -2,9 +2,11 @@ from datetime import datetime, timedelta
 
 # Índices para a coleção de carrinho
 cart_indexes = [
-    {"key": "user_id", "unique": False},
-    {"key": "created_at", "unique": False},
-    {"key": [("user_id", 1), ("ad_id", 1)], "unique": True}  # Previne duplicatas
+    {"key": [("user_id", 1), ("ad_id", 1)], "unique": True},  # Previne duplicatas
+    # Itens do carrinho do usuário, mais recentes primeiro
+    {"key": [("user_id", 1), ("created_at", -1)]},
+    # TTL: o MongoDB remove os itens assim que expires_at passa
+    {"key": "expires_at", "ttl": 0}
 ]
 
 # Exemplo de documento de carrinho
@@ -1,14 +1,15 @@
 # Define os índices para a coleção de salas de chat
 chat_room_indexes = [
     {"key": "order_id", "unique": True},
-    {"key": "buyer_id", "unique": False},
-    {"key": "seller_id", "unique": False}
+    # Salas do usuário ordenadas pela última atividade
+    {"key": [("buyer_id", 1), ("updated_at", -1)]},
+    {"key": [("seller_id", 1), ("updated_at", -1)]}
 ]
 
 # Define os índices para a coleção de mensagens de chat
 chat_message_indexes = [
-    {"key": "room_id", "unique": False},
-    {"key": "created_at", "unique": False}
+    # Mensagens da sala por (created_at, _id)
+    {"key": [("room_id", 1), ("created_at", -1), ("_id", -1)]}
 ]
 
 # Exemplo de documento de sala de chat
@@ -19,6 +20,23 @@ chat_room_schema_example = {
     "admin_id": None,                         # ID do admin (se intervenção)
     "has_support_request": False,             # Se há pedido de suporte
     "status": "active",                       # "active", "closed"
+    "last_message": {                         # Resumo da última mensagem (lista de salas)
+        "message_id": "60d5ec9af682fbd12a0b7777",
+        "content": "Olá, quando podemos começar?",
+        "created_at": "2023-05-01T12:10:00Z",
+        "is_system": False,
+        "user_id": "60d5ec9af682fbd12a0b9999"
+    },
+    "unread_counts": {                        # Não lidas por participante
+        "60d5ec9af682fbd12a0b9999": 0,
+        "60d5ec9af682fbd12a0b8888": 1
+    },
+    "read_watermarks": {                      # Última mensagem vista por participante
+        "60d5ec9af682fbd12a0b9999": {
+            "message_id": "60d5ec9af682fbd12a0b7777",
+            "created_at": "2023-05-01T12:10:00Z"
+        }
+    },
     "created_at": "2023-05-01T12:00:00Z",
     "updated_at": "2023-05-01T12:00:00Z"
 }
@@ -30,6 +48,5 @@ chat_message_schema_example = {
     "user_role": "buyer",                    # "buyer", "seller", "admin"
     "content": "Olá, quando podemos começar?", # Conteúdo da mensagem
     "is_system": False,                       # Se é mensagem do sistema
-    "created_at": "2023-05-01T12:10:00Z",
-    "read_by": ["60d5ec9af682fbd12a0b9999"]  # IDs dos usuários que leram
+    "created_at": "2023-05-01T12:10:00Z"
 }
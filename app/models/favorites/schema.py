@@ -1,7 +1,8 @@
 favorites_indexes = [
-    {"key": "user_id", "unique": False},
-    {"key": "ad_id", "unique": False},
-    {"key": [("user_id", 1), ("ad_id", 1)], "unique": True}  # Índice composto único
+    {"key": "ad_id"},
+    {"key": [("user_id", 1), ("ad_id", 1)], "unique": True},  # Índice composto único
+    # Favoritos do usuário por (created_at, _id)
+    {"key": [("user_id", 1), ("created_at", -1), ("_id", -1)]}
 ]
 
 # Exemplo de documento de favorito
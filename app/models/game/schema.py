@@ -1,7 +1,11 @@
 # Define os índices para a coleção de jogos
 game_indexes = [
     {"key": "name", "unique": True},
-    {"key": "slug", "unique": True}
+    # Jogos criados pelo painel de suporte não têm slug; o antigo slug_1 (único
+    # sem filtro) fazia esses jogos colidirem em slug: null
+    {"key": "slug", "unique": True, "name": "slug_unique_partial",
+     "partial": {"slug": {"$type": "string"}}, "replaces": ["slug_1"]},
+    {"key": "is_featured", "partial": {"is_featured": True}}
 ]
 
 # Exemplo de documento de jogo
@@ -0,0 +1,214 @@
+"""Index advisor: roda explain() nos formatos de consulta reais dos serviços.
+
+Cada entrada de QUERY_SHAPES reproduz um find (filtro + ordenação + limite)
+feito pela camada de serviços/rotas. Para cada uma, o plano vencedor é
+inspecionado e o advisor aponta:
+    - COLLSCAN: a consulta varre a coleção inteira
+    - SORT: a ordenação é feita em memória (nenhum índice cobre o sort)
+
+Uso (contra um mongod local, por exemplo):
+    python -m app.models.index_advisor --uri mongodb://localhost:27017 --db gameunite_advisor --apply-indexes
+
+Com --apply-indexes o plano de índices (setup_indexes) é aplicado antes da
+análise. O processo termina com código 1 se algum problema for encontrado.
+"""
+import argparse
+import json
+import sys
+
+from bson import ObjectId
+
+# IDs fictícios: o explain só precisa do formato da consulta
+_USER_ID = ObjectId("000000000000000000000001")
+_OTHER_ID = ObjectId("000000000000000000000002")
+_GAME_ID = ObjectId("000000000000000000000003")
+_AD_ID = ObjectId("000000000000000000000004")
+_ROOM_ID = ObjectId("000000000000000000000005")
+
+_RECENT = [("created_at", -1), ("_id", -1)]
+
+QUERY_SHAPES = [
+    # Anúncios
+    {"name": "ads: listagem pública", "collection": "ads",
+     "filter": {"status": "active"}, "sort": _RECENT, "limit": 21},
+    {"name": "ads: listagem por jogo", "collection": "ads",
+     "filter": {"status": "active", "game_id": _GAME_ID}, "sort": _RECENT, "limit": 21},
+    {"name": "ads: listagem por tipo", "collection": "ads",
+     "filter": {"status": "active", "ad_type": "venda"}, "sort": _RECENT, "limit": 21},
+    {"name": "ads: listagem por jogo e tipo", "collection": "ads",
+     "filter": {"status": "active", "game_id": _GAME_ID, "ad_type": "venda"}, "sort": _RECENT, "limit": 21},
+    {"name": "ads: destaques", "collection": "ads",
+     "filter": {"status": "active", "is_boosted": True}, "limit": 5},
+    {"name": "ads: destaques por jogo", "collection": "ads",
+     "filter": {"status": "active", "is_boosted": True, "game_id": _GAME_ID}, "limit": 5},
+    {"name": "ads: anúncios do usuário", "collection": "ads",
+     "filter": {"user_id": _USER_ID}, "sort": _RECENT, "limit": 21},
+    {"name": "ads: admin todos", "collection": "ads",
+     "filter": {}, "sort": _RECENT, "limit": 11},
+    {"name": "ads: admin por status", "collection": "ads",
+     "filter": {"status": "inactive"}, "sort": _RECENT, "limit": 11},
+    {"name": "ads: anúncios do jogo", "collection": "ads",
+     "filter": {"game_id": _GAME_ID}},
+
+    # Favoritos e carrinho
+    {"name": "favorites: do usuário", "collection": "favorites",
+     "filter": {"user_id": _USER_ID}, "sort": _RECENT, "limit": 21},
+    {"name": "favorites: usuário + anúncio", "collection": "favorites",
+     "filter": {"user_id": _USER_ID, "ad_id": _AD_ID}, "limit": 1},
+    {"name": "favorites: por anúncio", "collection": "favorites",
+     "filter": {"ad_id": {"$in": [_AD_ID]}}},
+    {"name": "cart: itens do usuário", "collection": "cart",
+     "filter": {"user_id": _USER_ID}, "sort": [("created_at", -1)]},
+    {"name": "cart: usuário + anúncio", "collection": "cart",
+     "filter": {"user_id": _USER_ID, "ad_id": _AD_ID}, "limit": 1},
+
+    # Pedidos
+    {"name": "orders: compras", "collection": "orders",
+     "filter": {"buyer_id": _USER_ID}, "sort": _RECENT, "limit": 21},
+    {"name": "orders: vendas", "collection": "orders",
+     "filter": {"seller_id": _USER_ID}, "sort": _RECENT, "limit": 21},
+    {"name": "orders: comprador ou vendedor", "collection": "orders",
+     "filter": {"$or": [{"buyer_id": _USER_ID}, {"seller_id": _USER_ID}]}, "sort": _RECENT, "limit": 21},
+    {"name": "orders: vendas concluídas", "collection": "orders",
+     "filter": {"seller_id": {"$in": [_USER_ID, _OTHER_ID]}, "status": "delivered"}},
+    {"name": "orders: admin por status", "collection": "orders",
+     "filter": {"status": "pending"}, "sort": _RECENT, "limit": 21},
+
+    # Chat
+    {"name": "chat_messages: mensagens da sala", "collection": "chat_messages",
+     "filter": {"room_id": _ROOM_ID}, "sort": _RECENT, "limit": 51},
+    {"name": "chat_rooms: salas do usuário", "collection": "chat_rooms",
+     "filter": {"$or": [{"buyer_id": _USER_ID}, {"seller_id": _USER_ID}]}, "sort": [("updated_at", -1)]},
+
+    # Notificações
+    {"name": "notifications: do usuário", "collection": "notifications",
+     "filter": {"user_id": _USER_ID}, "sort": _RECENT, "limit": 21},
+    {"name": "notifications: não lidas", "collection": "notifications",
+     "filter": {"user_id": _USER_ID, "read": False}, "sort": _RECENT, "limit": 21},
+
+    # Usuários e jogos
+    {"name": "users: por email", "collection": "users", "filter": {"email": "x@example.com"}, "limit": 1},
+    {"name": "users: administradores", "collection": "users", "filter": {"role": "admin"}},
+    {"name": "users: token de recuperação", "collection": "users",
+     "filter": {"reset_password_token": "token"}, "limit": 1},
+    {"name": "users: admin listagem", "collection": "users", "filter": {}, "sort": _RECENT, "limit": 21},
+    {"name": "games: listagem", "collection": "games", "filter": {}, "sort": [("name", 1)], "limit": 20},
+    {"name": "games: destaques", "collection": "games", "filter": {"is_featured": True}, "limit": 10},
+
+    # Perguntas, suporte e reports
+    {"name": "ad_questions: do anúncio", "collection": "ad_questions",
+     "filter": {"ad_id": _AD_ID}, "sort": [("created_at", -1)]},
+    {"name": "ad_questions: dos anúncios do vendedor", "collection": "ad_questions",
+     "filter": {"ad_id": {"$in": [_AD_ID]}, "status": "pending"}, "sort": [("created_at", -1)], "limit": 20},
+    {"name": "ad_questions: feitas pelo usuário", "collection": "ad_questions",
+     "filter": {"user_id": _USER_ID}, "sort": [("created_at", -1)]},
+    {"name": "ad_questions: respondidas pelo usuário", "collection": "ad_questions",
+     "filter": {"answered_by": _USER_ID}, "sort": [("created_at", -1)]},
+    {"name": "support_tickets: admin todos", "collection": "support_tickets",
+     "filter": {}, "sort": _RECENT, "limit": 11},
+    {"name": "support_tickets: admin por status", "collection": "support_tickets",
+     "filter": {"status": "open"}, "sort": _RECENT, "limit": 11},
+    {"name": "support_tickets: do usuário", "collection": "support_tickets",
+     "filter": {"$or": [{"user_id": str(_USER_ID)}, {"user_id": _USER_ID}]}, "sort": [("created_at", -1)]},
+    {"name": "reports: admin todos", "collection": "reports",
+     "filter": {}, "sort": _RECENT, "limit": 51},
+    {"name": "reports: admin por status", "collection": "reports",
+     "filter": {"status": "pending"}, "sort": _RECENT, "limit": 51},
+]
+
+# Estágios que indicam um problema no plano vencedor
+PROBLEM_STAGES = {
+    "COLLSCAN": "varredura completa da coleção",
+    "SORT": "ordenação em memória",
+}
+
+
+def _collect_stages(node, stages, index_names):
+    """Percorre a árvore do plano (formato clássico ou SBE) coletando estágios."""
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "indexName" in node:
+            index_names.append(node["indexName"])
+        for value in node.values():
+            _collect_stages(value, stages, index_names)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_stages(item, stages, index_names)
+
+
+def explain_shape(database, shape):
+    """Executa o explain de um formato de consulta e classifica o plano."""
+    cursor = database[shape["collection"]].find(shape["filter"])
+    if shape.get("sort"):
+        cursor = cursor.sort(shape["sort"])
+    if shape.get("limit"):
+        cursor = cursor.limit(shape["limit"])
+
+    winning_plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+
+    stages, index_names = [], []
+    _collect_stages(winning_plan, stages, index_names)
+
+    issues = [
+        f"{stage}: {description}"
+        for stage, description in PROBLEM_STAGES.items()
+        if stage in stages
+    ]
+
+    return {
+        "name": shape["name"],
+        "collection": shape["collection"],
+        "stages": stages,
+        "indexes": sorted(set(index_names)),
+        "issues": issues,
+        "empty_collection": stages == ["EOF"],
+    }
+
+
+def run_advisor(database, shapes=None):
+    """Analisa todos os formatos de consulta e retorna os relatórios."""
+    return [explain_shape(database, shape) for shape in (shapes or QUERY_SHAPES)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisa os planos das consultas do serviço.")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="gameunite")
+    parser.add_argument("--apply-indexes", action="store_true",
+                        help="Aplica o plano de índices antes da análise")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+    from app.models import setup_indexes
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    database = client[args.db]
+
+    if args.apply_indexes:
+        setup_indexes(database)
+
+    reports = run_advisor(database)
+    problems = [report for report in reports if report["issues"]]
+
+    if args.json:
+        print(json.dumps(reports, indent=2, ensure_ascii=False))
+    else:
+        for report in reports:
+            if report["empty_collection"]:
+                status = "SEM DADOS"
+            else:
+                status = "PROBLEMA" if report["issues"] else "OK"
+            indexes = ", ".join(report["indexes"]) or "-"
+            print(f"[{status:<9}] {report['name']:<45} índices: {indexes}")
+            for issue in report["issues"]:
+                print(f"            -> {issue}")
+        print(f"\n{len(reports)} consultas analisadas, {len(problems)} com problemas")
+
+    client.close()
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -60,4 +60,11 @@ class ReportUpdate(BaseModel):
     admin_notes: Optional[str] = None
     reviewed_by: Optional[str] = None
     reviewed_at: Optional[datetime] = None
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Define os índices para a coleção de notificações (paginação por cursor em (created_at, _id))
+notification_indexes = [
+    {"key": [("user_id", 1), ("created_at", -1), ("_id", -1)]},
+    {"key": [("user_id", 1), ("read", 1), ("created_at", -1), ("_id", -1)]}
+]
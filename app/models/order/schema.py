@@ -1,9 +1,13 @@
 # Define os índices para a coleção de pedidos
 order_indexes = [
-    {"key": "buyer_id", "unique": False},
-    {"key": "seller_id", "unique": False},
-    {"key": "ad_id", "unique": False},
-    {"key": "status", "unique": False}
+    {"key": "ad_id"},
+    # Pedidos do comprador/vendedor e listagem administrativa por (created_at, _id)
+    {"key": [("buyer_id", 1), ("created_at", -1), ("_id", -1)]},
+    {"key": [("seller_id", 1), ("created_at", -1), ("_id", -1)]},
+    # Vendas concluídas por vendedor (estatísticas do vendedor)
+    {"key": [("seller_id", 1), ("status", 1)]},
+    {"key": [("status", 1), ("created_at", -1), ("_id", -1)]},
+    {"key": [("created_at", -1), ("_id", -1)]}
 ]
 
 # Exemplo de documento de pedido
@@ -0,0 +1,20 @@
+# Índices da coleção de presença do WebSocket (uma entrada por conexão)
+presence_indexes = [
+    # Usuário online: conexões ainda não expiradas
+    {"key": [("user_id", 1), ("expires_at", 1)]},
+    # Conexões de um worker (heartbeat e limpeza ao encerrar)
+    {"key": "worker_id"},
+    # TTL: conexões sem heartbeat (worker caiu) são removidas pelo MongoDB
+    {"key": "expires_at", "ttl": 0}
+]
+
+# Exemplo de documento de presença
+presence_schema_example = {
+    "_id": "k2Jd8s0aQ1",                      # sid da conexão Socket.IO
+    "user_id": "60d5ec9af682fbd12a0b9999",
+    "username": "johndoe",
+    "role": "user",
+    "worker_id": "web-1:4711",               # host:pid do processo que atende a conexão
+    "connected_at": "2023-05-01T12:00:00Z",
+    "expires_at": "2023-05-01T12:01:30Z"      # renovado a cada heartbeat
+}
@@ -0,0 +1,17 @@
+# Índices da coleção de rate limiting compartilhado (RATE_LIMIT_BACKEND = "mongo")
+rate_limit_indexes = [
+    # TTL: contadores de clientes ociosos são removidos pelo MongoDB
+    {"key": "expires_at", "ttl": 0}
+]
+
+# Exemplo de documento de rate limiting (um por rota + cliente)
+rate_limit_schema_example = {
+    "_id": "create_ticket:ip_203.0.113.7",   # <scope>:<cliente>
+    "w": 29030400,                            # janela atual (sliding_window)
+    "c": 3,                                   # requisições na janela atual
+    "p": 7,                                   # requisições na janela anterior
+    "t": 4.5,                                 # fichas restantes (token_bucket)
+    "ts": 1741824000.25,                      # última recomposição das fichas (token_bucket)
+    "allowed": True,                          # resultado da última verificação
+    "expires_at": "2025-03-13T00:02:00Z"
+}
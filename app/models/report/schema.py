@@ -60,4 +60,11 @@ class ReportSchema:
             'resolved_at': report.get('resolved_at'),
             'created_at': report['created_at'],
             'updated_at': report['updated_at']
-        }
\ No newline at end of file
+        }
+
+
+# Define os índices para a coleção de reports (paginação por cursor em (created_at, _id))
+report_indexes = [
+    {"key": [("created_at", -1), ("_id", -1)]},
+    {"key": [("status", 1), ("created_at", -1), ("_id", -1)]}
+]
@@ -72,4 +72,12 @@ class GameCategoryCreate(BaseModel):
 class GameCategoryUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
-    is_active: Optional[bool] = None
\ No newline at end of file
+    is_active: Optional[bool] = None
+
+
+# Define os índices para a coleção de tickets de suporte (paginação por cursor em (created_at, _id))
+support_ticket_indexes = [
+    {"key": [("user_id", 1), ("created_at", -1)]},
+    {"key": [("created_at", -1), ("_id", -1)]},
+    {"key": [("status", 1), ("created_at", -1), ("_id", -1)]}
+]
@@ -0,0 +1,52 @@
+# Índices da coleção de manifestos de variantes de imagem (um por upload)
+upload_variant_indexes = [
+    # Consulta de status e remoção por arquivo
+    {"key": [("category", 1), ("filename", 1)], "unique": True},
+    # Varredura de pendentes (reenfileiramento)
+    {"key": [("status", 1), ("created_at", 1)]}
+]
+
+# Índices da coleção de arquivos endereçados por conteúdo (_id "<categoria>/<arquivo>")
+upload_blob_indexes = [
+    # Coleta: sem referências há mais que a carência
+    {"key": [("ref_count", 1), ("unreferenced_since", 1)]},
+    # Mesmo conteúdo em categorias diferentes
+    {"key": "sha256", "sparse": True}
+]
+
+# Exemplo de manifesto de variantes
+upload_variant_schema_example = {
+    "_id": "60d5ec9af682fbd12a0b4444",
+    "category": "ads",
+    "filename": "ads_3f2a9c1e0b7d4e21a5c6f8d9e0a1b2c3_1683000000.jpg",
+    "original_key": "ads/ads_3f2a9c1e0b7d4e21a5c6f8d9e0a1b2c3_1683000000.jpg",  # chave no armazenamento
+    "outputs": {
+        "thumbnail": {"size": [300, 300], "key": "ads/thumbnail/ads_3f2a...jpg"}
+    },
+    "formats": ["jpeg", "webp", "avif"],  # cada variante é gravada em todos
+    "status": "pending",  # pending, ready, failed
+    "queued": True,       # False quando a fila estava cheia no upload
+    "attempts": 1,
+    "variants": {
+        "thumbnail": {"status": "ready", "url": "http://127.0.0.1:5000/api/upload/ads/thumbnail/ads_3f2a...jpg"},
+        "medium": {"status": "pending", "url": "http://127.0.0.1:5000/api/upload/ads/medium/ads_3f2a...jpg"},
+        "large": {"status": "pending", "url": "http://127.0.0.1:5000/api/upload/ads/large/ads_3f2a...jpg"}
+    },
+    "created_at": "2023-05-01T12:00:00Z",
+    "updated_at": "2023-05-01T12:00:01Z",
+    "completed_at": None
+}
+
+# Exemplo de arquivo armazenado (um por conteúdo único em cada categoria)
+upload_blob_schema_example = {
+    "_id": "ads/9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08.jpg",
+    "category": "ads",
+    "filename": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08.jpg",
+    "sha256": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+    "size_bytes": 482113,
+    "ref_count": 12,              # anúncios, perfis e jogos que usam a imagem
+    "upload_count": 14,           # quantas vezes o mesmo conteúdo foi enviado
+    "unreferenced_since": None,   # preenchido quando ref_count chega a 0
+    "created_at": "2023-05-01T12:00:00Z",
+    "last_uploaded_at": "2023-05-03T09:30:00Z"
+}
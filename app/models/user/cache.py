@@ -0,0 +1,114 @@
+"""Cache de usuários em memória (LRU + TTL) para leituras por ID.
+
+get_user_by_id e os decorators de autenticação passam por aqui antes de ir
+ao MongoDB. Os documentos são guardados sem o hash da senha (USER_PROJECTION)
+e cada leitura devolve uma cópia, então quem chamar pode alterar o dicionário
+à vontade.
+
+O cache é local ao processo: as funções de escrita de app.models.user.crud e
+as rotas administrativas chamam invalidate_user, e o TTL limita o tempo em
+que outro worker pode enxergar um dado desatualizado (ex.: usuário
+desativado ou com o papel alterado).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# Projeção usada em todas as leituras cacheadas (nunca guardar o hash da senha)
+USER_PROJECTION = {"password": 0}
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_TTL_SECONDS = 60
+
+
+class UserCache:
+    """Cache LRU com expiração por entrada, seguro para múltiplas threads."""
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def configure(self, max_size=None, ttl_seconds=None):
+        """Ajusta os limites (chamado na criação da aplicação)."""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds
+            self._entries.clear()
+
+    def get(self, user_id):
+        """Retorna uma cópia do usuário cacheado ou None (miss ou expirado)."""
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(user)
+
+    def set(self, user_id, user):
+        """Armazena o usuário (sem a senha), descartando o menos usado se cheio."""
+        if not self.enabled or not user:
+            return
+
+        key = str(user_id)
+        stored = {k: v for k, v in user.items() if k != "password"}
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        """Remove o usuário do cache após uma escrita."""
+        with self._lock:
+            if self._entries.pop(str(user_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Contadores de uso (para monitoramento)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(user_id):
+    """Atalho usado pelas funções que alteram documentos de usuários."""
+    user_cache.invalidate(user_id)
@@ -1,6 +1,8 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from app.db.mongo_client import db
+from app.models.user.cache import user_cache, invalidate_user, USER_PROJECTION
 
 
 def create_user(username, email, password_hash, first_name="", last_name=""):
@@ -25,6 +27,7 @@ def create_user(username, email, password_hash, first_name="", last_name=""):
         "last_login": None,
         "is_active": True,
         "is_verified": False,
+        "token_version": 0,
         "verification_token": None,
         "reset_password_token": None,
         "reset_password_expires": None
@@ -52,26 +55,66 @@ def get_user_by_username(username):
 
 
 def get_user_by_id(user_id):
-    """Busca um usuário pelo ID."""
+    """Busca um usuário pelo ID (sem o hash da senha).
+
+    Passa pelo cache em memória; quem precisar da senha deve consultar
+    db.users diretamente.
+    """
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
     try:
-        user = db.users.find_one({"_id": ObjectId(user_id)})
+        user = db.users.find_one({"_id": ObjectId(user_id)}, USER_PROJECTION)
         if user:
             user["_id"] = str(user["_id"])
+            user_cache.set(user["_id"], user)
         return user
     except:
         return None
 
 
+def get_users_by_ids(user_ids):
+    """Busca vários usuários de uma vez (cache primeiro, depois um único $in).
+
+    Returns:
+        dict: {id do usuário (str): documento} apenas para os encontrados.
+    """
+    users = {}
+    missing = []
+    for user_id in {str(user_id) for user_id in user_ids if user_id}:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            users[user_id] = cached
+        elif ObjectId.is_valid(user_id):
+            missing.append(ObjectId(user_id))
+
+    if missing:
+        for user in db.users.find({"_id": {"$in": missing}}, USER_PROJECTION):
+            user["_id"] = str(user["_id"])
+            user_cache.set(user["_id"], user)
+            users[user["_id"]] = dict(user)
+
+    return users
+
+
 def update_user(user_id, data):
     """Atualiza dados do usuário."""
     try:
         update_data = {k: v for k, v in data.items() if k not in ["_id", "password"]}
         update_data["updated_at"] = datetime.utcnow()
 
-        db.users.update_one(
+        # Documento anterior: a foto de perfil trocada libera a referência do upload
+        previous = db.users.find_one_and_update(
             {"_id": ObjectId(user_id)},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"profile_pic": 1}
         )
+        invalidate_user(user_id)
+
+        if previous is not None and "profile_pic" in update_data:
+            from app.services.upload import blob_store
+            blob_store.swap_reference(previous.get("profile_pic"), update_data["profile_pic"])
 
         return get_user_by_id(user_id)
     except:
@@ -88,11 +131,51 @@ def update_password(user_id, password_hash):
                 "updated_at": datetime.utcnow()
             }}
         )
+        # Sessões abertas com a senha anterior deixam de valer
+        bump_token_version(user_id)
         return True
     except:
         return False
 
 
+def replace_password_hash(user_id, old_hash, new_hash):
+    """Troca o hash da mesma senha (rehash com outro custo).
+
+    Não revoga tokens e só grava se o hash ainda for o antigo (a senha pode
+    ter sido alterada enquanto o novo hash era gerado).
+    """
+    result = db.users.update_one(
+        {"_id": ObjectId(user_id), "password": old_hash},
+        {"$set": {"password": new_hash}}
+    )
+    return result.modified_count > 0
+
+
+def bump_token_version(user_id):
+    """Invalida todos os tokens já emitidos para o usuário.
+
+    Chamado ao desativar a conta, trocar o papel ou a senha. Retorna a nova
+    versão (ou None se o usuário não existir).
+    """
+    from app.utils.security.token_revocation import token_revocation
+
+    user = db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {
+            "$inc": {"token_version": 1},
+            "$set": {"token_version_updated_at": datetime.utcnow()}
+        },
+        projection={"token_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    invalidate_user(user_id)
+    if not user:
+        return None
+
+    token_revocation.note(user_id, user["token_version"])
+    return user["token_version"]
+
+
 def update_last_login(user_id):
     """Atualiza o timestamp do último login."""
     try:
@@ -100,6 +183,7 @@ def update_last_login(user_id):
             {"_id": ObjectId(user_id)},
             {"$set": {"last_login": datetime.utcnow()}}
         )
+        invalidate_user(user_id)
         return True
     except:
         return False
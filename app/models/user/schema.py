@@ -1,7 +1,15 @@
 # Define os índices para a coleção de usuários
 user_indexes = [
     {"key": "email", "unique": True},
-    {"key": "username", "unique": True}
+    {"key": "username", "unique": True},
+    # Busca de administradores para notificações
+    {"key": "role"},
+    # Token de recuperação de senha (apenas usuários com token pendente)
+    {"key": "reset_password_token", "partial": {"reset_password_token": {"$type": "string"}}},
+    # Paginação por cursor na listagem administrativa
+    {"key": [("created_at", -1), ("_id", -1)]},
+    # Leitura incremental da tabela de revogação de tokens (só usuários com bump)
+    {"key": "token_version_updated_at", "sparse": True}
 ]
 
 # Exemplo de documento de usuário
@@ -23,6 +31,8 @@ user_schema_example = {
     "last_login": "2023-05-01T12:00:00Z",
     "is_active": True,
     "is_verified": True,
+    "token_version": 0,  # incrementado ao desativar, trocar papel ou senha (claim "tv")
+    "token_version_updated_at": "2023-05-01T12:00:00Z",
     "verification_token": None,
     "reset_password_token": None,
     "reset_password_expires": None
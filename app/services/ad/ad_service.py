@@ -1,7 +1,15 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from app.db.mongo_client import db
 from app.models.user.crud import get_user_by_id
+from app.services.search import search_service
+from app.services.game import game_counter_service
+from app.services.ad.view_counter import view_counter
+from app.services.favorites.favorites_service import get_favorited_ad_ids
+from app.services.upload import blob_store
+from app.utils.helpers.pagination import paginate_find, InvalidCursorError
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,64 +43,43 @@ def check_ad_ownership(ad_id, user_id):
         return False
 
 
-def get_user_stats(user_id):
-    """Busca estatísticas do usuário (vendas, avaliações, etc)."""
-    try:
-        if not validate_object_id(user_id):
-            return {}
+def build_user_stats(sales_count, user):
+    """Monta as estatísticas do vendedor a partir das vendas e do documento do usuário."""
+    # Data de criação do usuário
+    member_since = user.get("created_at", datetime.utcnow()).year
 
-        # Buscar estatísticas de vendas
-        sales_count = db.orders.count_documents({
-            "seller_id": ObjectId(user_id),
-            "status": "delivered"
-        })
-
-        # Buscar dados reais do usuário
-        user = db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            return {}
+    # Por enquanto, usar valores baseados em vendas (depois implementar sistema de avaliações)
+    avg_rating = min(5.0, sales_count * 0.2) if sales_count > 0 else 0  # Rating baseado em vendas
+    rating_count = sales_count
 
-        # Data de criação do usuário
-        member_since = user.get("created_at", datetime.utcnow()).year
+    return {
+        "sales_count": sales_count,
+        "avg_rating": round(avg_rating, 1),
+        "rating_count": rating_count,
+        "member_since": member_since
+    }
 
-        # Por enquanto, usar valores baseados em vendas (depois implementar sistema de avaliações)
-        avg_rating = min(5.0, sales_count * 0.2) if sales_count > 0 else 0  # Rating baseado em vendas
-        rating_count = sales_count
-
-        return {
-            "sales_count": sales_count,
-            "avg_rating": round(avg_rating, 1),
-            "rating_count": rating_count,
-            "member_since": member_since
-        }
-
-    except Exception as e:
-        logger.error(f"Erro ao buscar estatísticas do usuário: {e}")
-        return {
-            "sales_count": 0,
-            "avg_rating": 0,
-            "rating_count": 0,
-            "member_since": datetime.utcnow().year
-        }
 
+def get_favorites_info(ad_id, user_id=None, total=None):
+    """Busca informações de favoritos do anúncio.
 
-def get_favorites_info(ad_id, user_id=None):
-    """Busca informações de favoritos do anúncio."""
+    O total vem de favorites_count no anúncio (passe total quando o documento
+    já foi carregado); só o status do usuário atual consulta favorites.
+    """
     try:
         if not validate_object_id(ad_id):
             return {"total": 0, "user_favorited": False}
 
-        # Contar total de favoritos
-        total_favorites = db.favorites.count_documents({"ad_id": ObjectId(ad_id)})
+        total_favorites = total
+        if total_favorites is None:
+            ad = db.ads.find_one({"_id": ObjectId(ad_id)}, {"favorites_count": 1})
+            total_favorites = ad.get("favorites_count", 0) if ad else 0
+        total_favorites = max(total_favorites, 0)
 
         # Verificar se o usuário atual favoritou
         user_favorited = False
         if user_id and validate_object_id(user_id):
-            user_favorite = db.favorites.find_one({
-                "user_id": ObjectId(user_id),
-                "ad_id": ObjectId(ad_id)
-            })
-            user_favorited = user_favorite is not None
+            user_favorited = bool(get_favorited_ad_ids(user_id, [ad_id]))
 
         return {
             "total": total_favorites,
@@ -122,8 +109,14 @@ def is_ad_in_user_cart(ad_id, user_id):
         return False
 
 
-def format_ad_response(ad, game=None, user=None, current_user_id=None):
-    """Formata resposta do anúncio com todas as informações necessárias."""
+def format_ad_response(ad, game=None, user=None, current_user_id=None,
+                       favorites_info=None, in_cart=None, user_stats=None, liked=None):
+    """Formata resposta do anúncio com todas as informações necessárias.
+
+    Os parâmetros favorites_info, in_cart, user_stats e liked permitem
+    reaproveitar dados já carregados em lote (ver hydrate_ads); quando
+    ausentes, são buscados individualmente no banco.
+    """
     try:
         if not ad or not ad.get("_id"):
             raise ValueError("Anúncio inválido ou sem ID")
@@ -166,17 +159,29 @@ def format_ad_response(ad, game=None, user=None, current_user_id=None):
             ad_data["image_url"] = ad["image_url"]
 
         # Buscar informações de favoritos
-        favorites_info = get_favorites_info(ad_id_str, current_user_id)
+        if favorites_info is None:
+            favorites_info = get_favorites_info(ad_id_str, current_user_id, total=ad.get("favorites_count", 0))
         ad_data["favorites_count"] = favorites_info["total"]
         ad_data["is_favorited"] = favorites_info["user_favorited"]
         ad_data["user_favorited"] = favorites_info["user_favorited"]  # Alias para compatibilidade
 
         # Verificar se está no carrinho
         if current_user_id:
-            ad_data["is_in_cart"] = is_ad_in_user_cart(ad_id_str, current_user_id)
+            if in_cart is None:
+                in_cart = is_ad_in_user_cart(ad_id_str, current_user_id)
+            ad_data["is_in_cart"] = in_cart
         else:
             ad_data["is_in_cart"] = False
 
+        # Curtidas (total desnormalizado; curtida do usuário em ad_likes)
+        ad_data["likes_count"] = max(ad.get("likes_count", 0), 0)
+        if current_user_id:
+            if liked is None:
+                liked = bool(get_liked_ad_ids(current_user_id, [ad["_id"]]))
+            ad_data["user_liked"] = liked
+        else:
+            ad_data["user_liked"] = False
+
         # Adicionar dados do jogo
         if game:
             ad_data["game"] = {
@@ -187,7 +192,8 @@ def format_ad_response(ad, game=None, user=None, current_user_id=None):
 
         # Adicionar dados do usuário com estatísticas dinâmicas
         if user:
-            user_stats = get_user_stats(ad_user_id) if ad_user_id else {}
+            if user_stats is None:
+                user_stats = get_user_stats(ad_user_id) if ad_user_id else {}
 
             ad_data["user"] = {
                 "_id": str(user["_id"]) if user.get("_id") else None,
@@ -228,8 +234,115 @@ def format_ad_response(ad, game=None, user=None, current_user_id=None):
         }
 
 
-def get_ad_by_id(ad_id, increment_view=True, user_id=None):
-    """Busca um anúncio específico com todas as informações."""
+def _to_object_id(value):
+    """Converte um valor para ObjectId, retornando None se for inválido."""
+    if isinstance(value, ObjectId):
+        return value
+    return ObjectId(value) if validate_object_id(value) else None
+
+
+def hydrate_ads(ads, current_user_id=None, include_user=False, require_game=False):
+    """Formata uma página inteira de anúncios com um número fixo de consultas.
+
+    Em vez de chamar format_ad_response com consultas individuais por anúncio,
+    carrega jogos, vendedores, contagem de favoritos, favoritos/carrinho do
+    usuário atual e vendas dos vendedores usando $in/$group, e então formata
+    cada anúncio com os dados já em memória. O formato do JSON é o mesmo de
+    format_ad_response.
+
+    Args:
+        ads (list): Documentos de anúncios já buscados.
+        current_user_id (str): Usuário que está visualizando a página.
+        include_user (bool): Se deve incluir os dados do vendedor.
+        require_game (bool): Se deve descartar anúncios cujo jogo não existe.
+    """
+    ads = [ad for ad in ads if ad and ad.get("_id")]
+    if not ads:
+        return []
+
+    ad_ids = [ad["_id"] for ad in ads]
+
+    # Jogos
+    game_ids = list({ad["game_id"] for ad in ads if ad.get("game_id")})
+    games = {}
+    if game_ids:
+        for game in db.games.find({"_id": {"$in": game_ids}}):
+            games[game["_id"]] = game
+
+    # Favoritos, curtidas e carrinho do usuário atual
+    viewer_id = _to_object_id(current_user_id) if current_user_id else None
+    viewer_favorites = set()
+    viewer_cart = set()
+    viewer_likes = set()
+    if viewer_id:
+        viewer_likes = get_liked_ad_ids(viewer_id, ad_ids)
+        viewer_favorites = get_favorited_ad_ids(viewer_id, ad_ids)
+        viewer_cart = {
+            item["ad_id"] for item in db.cart.find(
+                {"user_id": viewer_id, "ad_id": {"$in": ad_ids}},
+                {"ad_id": 1}
+            )
+        }
+
+    # Vendedores e estatísticas de vendas
+    sellers = {}
+    sales_counts = {}
+    if include_user:
+        seller_ids = list({
+            oid for oid in (_to_object_id(ad.get("user_id")) for ad in ads) if oid
+        })
+        if seller_ids:
+            for seller in db.users.find({"_id": {"$in": seller_ids}}, {"password": 0}):
+                sellers[str(seller["_id"])] = seller
+            for row in db.orders.aggregate([
+                {"$match": {"seller_id": {"$in": seller_ids}, "status": "delivered"}},
+                {"$group": {"_id": "$seller_id", "total": {"$sum": 1}}}
+            ]):
+                sales_counts[str(row["_id"])] = row["total"]
+
+    formatted = []
+    for ad in ads:
+        try:
+            game = games.get(ad.get("game_id"))
+            if require_game and not game:
+                logger.warning(f"Jogo não encontrado para anúncio {ad.get('_id')}")
+                continue
+
+            user = None
+            user_stats = None
+            if include_user and ad.get("user_id"):
+                seller_id = str(ad["user_id"])
+                user = sellers.get(seller_id)
+                user_stats = build_user_stats(sales_counts.get(seller_id, 0), user) if user else {}
+
+            user_favorited = ad["_id"] in viewer_favorites
+            ad_data = format_ad_response(
+                ad, game, user, current_user_id,
+                favorites_info={
+                    "total": max(ad.get("favorites_count", 0), 0),
+                    "user_favorited": user_favorited
+                },
+                in_cart=ad["_id"] in viewer_cart,
+                user_stats=user_stats,
+                liked=ad["_id"] in viewer_likes
+            )
+
+            if ad_data and ad_data.get("_id"):
+                formatted.append(ad_data)
+
+        except Exception as e:
+            logger.error(f"Erro ao processar anúncio {ad.get('_id')}: {e}")
+            continue
+
+    return formatted
+
+
+def get_ad_by_id(ad_id, increment_view=True, user_id=None, viewer=None):
+    """Busca um anúncio específico com todas as informações.
+
+    A visualização vai para o buffer de view_counter (gravado em lote);
+    viewer identifica o visitante anônimo (IP) para descartar repetições.
+    """
     try:
         if not validate_object_id(ad_id):
             return {"success": False, "message": "ID de anúncio inválido"}
@@ -255,19 +368,12 @@ def get_ad_by_id(ad_id, increment_view=True, user_id=None):
         current_user_str = str(user_id) if user_id else None
         is_owner = ad_owner_id == current_user_str
 
-        # Incrementar contador de visualizações apenas se não for o próprio dono
-        current_view_count = ad.get("view_count", 0)
-        if increment_view and not is_owner:
-            try:
-                updated_ad = db.ads.find_one_and_update(
-                    {"_id": ObjectId(ad_id)},
-                    {"$inc": {"view_count": 1}},
-                    return_document=True
-                )
-                current_view_count = updated_ad.get("view_count", current_view_count + 1)
-                logger.info(f"View count incrementado para {current_view_count}")
-            except Exception as e:
-                logger.error(f"Erro ao incrementar view count: {e}")
+        # Contabilizar a visualização apenas se não for o próprio dono
+        counted = increment_view and not is_owner and view_counter.record(ad_id, current_user_str or viewer)
+        current_view_count = ad.get("view_count", 0) + view_counter.pending_views(ad_id)
+        if counted and view_counter.flush_interval <= 0:
+            # Gravada na hora (sem buffer): já não aparece em pending_views
+            current_view_count += 1
 
         # Formatar resposta com todas as informações
         ad_data = format_ad_response(ad, game, user, user_id)
@@ -296,7 +402,7 @@ def like_ad(ad_id, user_id):
             return {"success": False, "message": "ID de usuário inválido"}
 
         # Verificar se o anúncio existe
-        ad = db.ads.find_one({"_id": ObjectId(ad_id)})
+        ad = db.ads.find_one({"_id": ObjectId(ad_id)}, {"user_id": 1})
         if not ad:
             return {"success": False, "message": "Anúncio não encontrado"}
 
@@ -307,29 +413,29 @@ def like_ad(ad_id, user_id):
         if ad_owner_id == current_user_str:
             return {"success": False, "message": "Você não pode curtir seu próprio anúncio"}
 
-        user_object_id = ObjectId(user_id)
+        like_key = {"ad_id": ObjectId(ad_id), "user_id": ObjectId(user_id)}
 
-        # Tentar remover a curtida primeiro
-        remove_result = db.ads.update_one(
-            {"_id": ObjectId(ad_id), "likes": user_object_id},
-            {"$pull": {"likes": user_object_id}}
-        )
-
-        if remove_result.modified_count > 0:
-            liked = False
-            message = "Curtida removida"
-        else:
-            # Adicionar curtida
-            db.ads.update_one(
-                {"_id": ObjectId(ad_id)},
-                {"$addToSet": {"likes": user_object_id}}
-            )
+        # Alternar a curtida em ad_likes: o índice único decide entre curtir e
+        # descurtir, e o total só muda pelo que de fato foi gravado/removido
+        try:
+            db.ad_likes.insert_one({**like_key, "created_at": datetime.utcnow()})
             liked = True
+            delta = 1
             message = "Anúncio curtido"
+        except DuplicateKeyError:
+            removed = db.ad_likes.delete_one(like_key)
+            liked = False
+            delta = -removed.deleted_count
+            message = "Curtida removida"
 
-        # Contar total de curtidas
-        updated_ad = db.ads.find_one({"_id": ObjectId(ad_id)})
-        total_likes = len(updated_ad.get("likes", []))
+        # Total desnormalizado no anúncio
+        updated_ad = db.ads.find_one_and_update(
+            {"_id": ObjectId(ad_id)},
+            {"$inc": {"likes_count": delta}},
+            projection={"likes_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        total_likes = max(updated_ad.get("likes_count", 0), 0) if updated_ad else 0
 
         return {
             "success": True,
@@ -384,7 +490,8 @@ def create_ad(user_id, ad_data):
             "is_boosted": False,
             "boost_expires_at": None,
             "view_count": 0,
-            "likes": [],
+            "likes_count": 0,
+            "favorites_count": 0,
             "created_at": now,
             "updated_at": now
         }
@@ -412,6 +519,11 @@ def create_ad(user_id, ad_data):
         if not result.inserted_id:
             return {"success": False, "message": "Erro ao salvar anúncio no banco de dados"}
 
+        # Atualizar índice de busca e contadores do jogo
+        search_service.index_ad(result.inserted_id, ad)
+        game_counter_service.on_ad_created(ad)
+        blob_store.acquire(ad["image_url"])
+
         # Formatar resposta
         ad_response = format_ad_response(ad, game, user, user_id)
         ad_response["_id"] = str(result.inserted_id)
@@ -461,6 +573,11 @@ def update_ad(ad_id, user_id, update_data):
 
         update_fields["updated_at"] = datetime.utcnow()
 
+        # Imagem anterior (para ajustar as referências do upload)
+        previous = None
+        if "image_url" in update_fields:
+            previous = db.ads.find_one({"_id": ObjectId(ad_id)}, {"image_url": 1})
+
         # Atualizar no banco
         result = db.ads.update_one(
             {"_id": ObjectId(ad_id)},
@@ -468,6 +585,9 @@ def update_ad(ad_id, user_id, update_data):
         )
 
         if result.modified_count > 0:
+            if previous is not None:
+                blob_store.swap_reference(previous.get("image_url"), update_fields["image_url"])
+            search_service.index_ad(ad_id)
             return {"success": True, "message": "Anúncio atualizado com sucesso"}
         else:
             return {"success": True, "message": "Nenhuma alteração foi feita"}
@@ -477,6 +597,24 @@ def update_ad(ad_id, user_id, update_data):
         return {"success": False, "message": f"Erro ao atualizar anúncio: {str(e)}"}
 
 
+# Campos do anúncio removido usados por on_ad_deleted
+DELETED_AD_PROJECTION = {"game_id": 1, "status": 1, "image_url": 1}
+
+
+def on_ad_deleted(deleted_ad):
+    """Efeitos da remoção de um anúncio, pelo dono ou pelo admin.
+
+    Tira o anúncio da busca, ajusta os contadores do jogo, libera a
+    referência da imagem e apaga as curtidas. deleted_ad precisa dos campos
+    de DELETED_AD_PROJECTION.
+    """
+    ad_id = deleted_ad["_id"]
+    search_service.remove_ad(ad_id)
+    game_counter_service.on_ad_deleted(deleted_ad)
+    blob_store.release(deleted_ad.get("image_url"))
+    db.ad_likes.delete_many({"ad_id": ad_id})
+
+
 def delete_ad(ad_id, user_id):
     """Remove um anúncio com verificação de propriedade."""
     try:
@@ -491,10 +629,14 @@ def delete_ad(ad_id, user_id):
         if not check_ad_ownership(ad_id, user_id):
             return {"success": False, "message": "Anúncio não encontrado ou acesso negado"}
 
-        # Remover do banco
-        result = db.ads.delete_one({"_id": ObjectId(ad_id)})
+        # Remover do banco (o documento removido é usado para ajustar os contadores)
+        deleted_ad = db.ads.find_one_and_delete(
+            {"_id": ObjectId(ad_id)},
+            projection=DELETED_AD_PROJECTION
+        )
 
-        if result.deleted_count > 0:
+        if deleted_ad:
+            on_ad_deleted(deleted_ad)
             return {"success": True, "message": "Anúncio removido com sucesso"}
         else:
             return {"success": False, "message": "Erro ao remover anúncio"}
@@ -510,16 +652,15 @@ def get_ad_likes(ad_id, user_id=None):
         if not validate_object_id(ad_id):
             return {"success": False, "message": "ID de anúncio inválido"}
 
-        ad = db.ads.find_one({"_id": ObjectId(ad_id)})
+        ad = db.ads.find_one({"_id": ObjectId(ad_id)}, {"likes_count": 1})
         if not ad:
             return {"success": False, "message": "Anúncio não encontrado"}
 
-        likes = ad.get("likes", [])
-        total_likes = len(likes)
+        total_likes = max(ad.get("likes_count", 0), 0)
 
         user_liked = False
         if user_id and validate_object_id(user_id):
-            user_liked = ObjectId(user_id) in likes
+            user_liked = bool(get_liked_ad_ids(user_id, [ad_id]))
 
         return {
             "success": True,
@@ -532,74 +673,56 @@ def get_ad_likes(ad_id, user_id=None):
         return {"success": False, "message": f"Erro ao buscar curtidas: {str(e)}"}
 
 
-def get_user_ads(user_id, limit=20, skip=0):
-    """Busca anúncios do usuário com validação rigorosa."""
+def get_liked_ad_ids(user_id, ad_ids):
+    """Quais dos anúncios o usuário curtiu (uma consulta para a página inteira).
+
+    Returns:
+        set: ObjectIds dos anúncios curtidos entre ad_ids.
+    """
+    viewer_id = _to_object_id(user_id)
+    ad_oids = [oid for oid in (_to_object_id(ad_id) for ad_id in ad_ids) if oid]
+    if not viewer_id or not ad_oids:
+        return set()
+
+    return {
+        like["ad_id"] for like in db.ad_likes.find(
+            {"ad_id": {"$in": ad_oids}, "user_id": viewer_id},
+            {"ad_id": 1, "_id": 0}
+        )
+    }
+
+
+def get_user_ads(user_id, limit=20, skip=0, cursor=None):
+    """Busca anúncios do usuário com validação rigorosa.
+
+    Paginação por cursor (next_cursor); skip é usado apenas sem cursor.
+    """
     try:
         if not validate_object_id(user_id):
             return {"success": False, "message": "ID de usuário inválido"}
 
         # Buscar anúncios do usuário
-        ads_cursor = db.ads.find(
-            {"user_id": ObjectId(user_id)}
-        ).sort("created_at", -1).skip(skip).limit(limit)
-
-        ads = []
-        for ad in ads_cursor:
-            try:
-                # Buscar dados do jogo
-                game = None
-                if ad.get("game_id"):
-                    game = db.games.find_one({"_id": ad["game_id"]})
-
-                # Formatar anúncio
-                ad_data = format_ad_response(ad, game, None, user_id)
-                ads.append(ad_data)
-
-            except Exception as e:
-                logger.error(f"Erro ao processar anúncio {ad.get('_id')}: {e}")
-                continue
+        user_ads, next_cursor = paginate_find(
+            db.ads, {"user_id": ObjectId(user_id)}, limit, cursor=cursor, skip=skip
+        )
+
+        # Formatar anúncios em lote
+        ads = hydrate_ads(user_ads, current_user_id=user_id)
 
         return {
             "success": True,
             "ads": ads,
-            "total": len(ads)
+            "total": len(ads),
+            "next_cursor": next_cursor
         }
 
+    except InvalidCursorError:
+        return {"success": False, "message": "Cursor de paginação inválido"}
     except Exception as e:
         logger.error(f"Erro ao buscar anúncios do usuário: {e}")
         return {"success": False, "message": f"Erro ao buscar anúncios: {str(e)}"}
 
 
-def get_favorites_info(ad_id, user_id=None):
-    """Busca informações de favoritos do anúncio - CORRIGIDO."""
-    try:
-        if not validate_object_id(ad_id):
-            return {"total": 0, "user_favorited": False}
-
-        # Contar total de favoritos
-        total_favorites = db.favorites.count_documents({"ad_id": ObjectId(ad_id)})
-
-        # Verificar se o usuário atual favoritou
-        user_favorited = False
-        if user_id and validate_object_id(user_id):
-            user_favorite = db.favorites.find_one({
-                "user_id": ObjectId(user_id),
-                "ad_id": ObjectId(ad_id)
-            })
-            user_favorited = user_favorite is not None
-
-        print(f"📊 Favoritos - Total: {total_favorites}, Usuário favoritou: {user_favorited}")
-
-        return {
-            "total": total_favorites,
-            "user_favorited": user_favorited
-        }
-
-    except Exception as e:
-        logger.error(f"Erro ao buscar favoritos: {e}")
-        return {"total": 0, "user_favorited": False}
-
-
 def get_user_stats(user_id):
     """Busca estatísticas do usuário - MELHORADO."""
     try:
@@ -617,19 +740,7 @@ def get_user_stats(user_id):
         if not user:
             return {}
 
-        # Data de criação do usuário
-        member_since = user.get("created_at", datetime.utcnow()).year
-
-        # Por enquanto, usar valores baseados em vendas (depois implementar sistema de avaliações)
-        avg_rating = min(5.0, sales_count * 0.2) if sales_count > 0 else 0  # Rating baseado em vendas
-        rating_count = sales_count
-
-        return {
-            "sales_count": sales_count,
-            "avg_rating": round(avg_rating, 1),
-            "rating_count": rating_count,
-            "member_since": member_since
-        }
+        return build_user_stats(sales_count, user)
 
     except Exception as e:
         logger.error(f"Erro ao buscar estatísticas do usuário: {e}")
@@ -0,0 +1,167 @@
+"""Migração dos arrays likes dos anúncios para a coleção ad_likes.
+
+Antes, cada anúncio guardava em likes os ObjectIds de quem o curtiu. Agora
+cada curtida é um documento em ad_likes (único por ad_id + user_id) e o
+anúncio guarda só o total em likes_count.
+
+O alternar de curtidas (like_ad) depende do índice único (ad_id, user_id):
+a migração remove curtidas duplicadas e cria o índice antes de copiar os
+arrays, e ensure_ad_likes_migrated garante o índice a cada inicialização,
+em qualquer configuração.
+
+As curtidas são gravadas com upsert e likes_count é recalculado a partir de
+ad_likes, então a migração pode ser executada mais de uma vez. Os arrays
+antigos são removidos dos anúncios, a não ser com --keep-likes.
+
+Uso:
+    python -m app.services.ad.likes_migration --uri mongodb://localhost:27017 --db gameunite
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_ID = "ad_likes_collection"
+BATCH_SIZE = 1000
+
+
+def _database(database):
+    if database is not None:
+        return database
+    from app.db.mongo_client import db
+    return db
+
+
+def _bulk(collection, operations):
+    written = 0
+    for start in range(0, len(operations), BATCH_SIZE):
+        result = collection.bulk_write(operations[start:start + BATCH_SIZE], ordered=False)
+        written += result.upserted_count + result.modified_count
+    return written
+
+
+def _ensure_indexes(database):
+    from app.models import create_indexes
+    from app.models.ad_likes.schema import ad_likes_indexes
+    create_indexes(database.ad_likes, ad_likes_indexes)
+
+
+def _remove_duplicates(database):
+    duplicate_ids = []
+    for row in database.ad_likes.aggregate([
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"ad_id": "$ad_id", "user_id": "$user_id"},
+            "ids": {"$push": "$_id"},
+            "total": {"$sum": 1}
+        }},
+        {"$match": {"total": {"$gt": 1}}}
+    ], allowDiskUse=True):
+        duplicate_ids.extend(row["ids"][1:])
+
+    removed = 0
+    for start in range(0, len(duplicate_ids), BATCH_SIZE):
+        result = database.ad_likes.delete_many({"_id": {"$in": duplicate_ids[start:start + BATCH_SIZE]}})
+        removed += result.deleted_count
+    return removed
+
+
+def migrate_ad_likes(database=None, drop_likes=True):
+    """Garante o índice único, copia likes para ad_likes, recalcula likes_count e registra a migração.
+
+    Returns:
+        dict: Curtidas gravadas, duplicadas removidas, anúncios com total
+        atualizado e arrays removidos.
+    """
+    database = _database(database)
+    now = datetime.utcnow()
+
+    # Curtidas gravadas sem o índice (o alternar passa a depender dele)
+    duplicates_removed = _remove_duplicates(database)
+    _ensure_indexes(database)
+
+    like_operations = []
+    migrated_ad_ids = []
+    for ad in database.ads.find({"likes.0": {"$exists": True}}, {"likes": 1, "updated_at": 1}):
+        migrated_ad_ids.append(ad["_id"])
+        for user_id in set(ad["likes"]):
+            like_operations.append(UpdateOne(
+                {"ad_id": ad["_id"], "user_id": user_id},
+                {"$setOnInsert": {"created_at": ad.get("updated_at") or now}},
+                upsert=True
+            ))
+    likes_written = _bulk(database.ad_likes, like_operations)
+
+    # Total a partir da coleção (inclui curtidas feitas após uma execução anterior)
+    count_operations = [
+        UpdateOne({"_id": row["_id"]}, {"$set": {"likes_count": row["total"]}})
+        for row in database.ad_likes.aggregate([
+            {"$group": {"_id": "$ad_id", "total": {"$sum": 1}}}
+        ], allowDiskUse=True)
+    ]
+    counts_written = _bulk(database.ads, count_operations)
+    database.ads.update_many({"likes_count": {"$exists": False}}, {"$set": {"likes_count": 0}})
+
+    ads_cleaned = 0
+    if drop_likes and migrated_ad_ids:
+        for start in range(0, len(migrated_ad_ids), BATCH_SIZE):
+            result = database.ads.update_many(
+                {"_id": {"$in": migrated_ad_ids[start:start + BATCH_SIZE]}},
+                {"$unset": {"likes": ""}}
+            )
+            ads_cleaned += result.modified_count
+
+    database.migrations.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {
+            "completed_at": datetime.utcnow(),
+            "likes_written": likes_written,
+            "duplicates_removed": duplicates_removed,
+            "likes_dropped": drop_likes
+        }},
+        upsert=True
+    )
+    logger.info(f"Migração de curtidas: {likes_written} curtidas gravadas em ad_likes")
+
+    return {
+        "likes_written": likes_written,
+        "duplicates_removed": duplicates_removed,
+        "counts_written": counts_written,
+        "ads_cleaned": ads_cleaned
+    }
+
+
+def ensure_ad_likes_migrated(database=None):
+    """Executa a migração uma única vez; o índice único é garantido sempre."""
+    database = _database(database)
+    if database.migrations.find_one({"_id": MIGRATION_ID}, {"_id": 1}):
+        _ensure_indexes(database)
+        return None
+    return migrate_ad_likes(database)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migra likes dos anúncios para a coleção ad_likes.")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="gameunite")
+    parser.add_argument("--keep-likes", action="store_true",
+                        help="Mantém os arrays likes nos anúncios após a migração")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    result = migrate_ad_likes(client[args.db], drop_likes=not args.keep_likes)
+    print(f"{result['likes_written']} curtidas gravadas, {result['duplicates_removed']} duplicadas removidas, "
+          f"{result['counts_written']} totais atualizados, {result['ads_cleaned']} anúncios sem likes")
+
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Contador de visualizações dos anúncios com gravação em lote.
+
+get_ad_by_id não grava mais nada na requisição: cada visualização soma 1 em
+um buffer em memória (id do anúncio -> incremento) e um job em segundo plano
+grava o buffer a cada AD_VIEW_FLUSH_SECONDS com um único bulk_write de $inc.
+O buffer também é gravado quando passa de AD_VIEW_MAX_PENDING anúncios e ao
+encerrar o processo. A resposta mostra view_count + o que ainda está no
+buffer deste processo.
+
+Com AD_VIEW_DEDUPE_WINDOW_SECONDS > 0 visualizações repetidas do mesmo
+visitante (usuário ou IP) no mesmo anúncio dentro da janela não contam. O
+controle usa dois filtros de Bloom que se alternam (atual e anterior), com
+memória fixa definida por AD_VIEW_DEDUPE_CAPACITY e
+AD_VIEW_DEDUPE_ERROR_RATE; um falso positivo apenas deixa de contar uma
+visualização. Visitantes anônimos são identificados por request.remote_addr:
+atrás de proxy reverso é preciso configurar PROXY_FIX_X_FOR, senão todos
+compartilham o IP do proxy e só a primeira visualização de cada anúncio na
+janela conta.
+
+Com AD_VIEW_FLUSH_SECONDS = 0 cada visualização é gravada na hora.
+"""
+import atexit
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+_flush_timer = None
+
+
+class BloomFilter:
+    """Filtro de Bloom em um bytearray (hash duplo sobre blake2b)."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+class ViewDeduper:
+    """Visualizações já vistas na janela: filtro atual + anterior, trocados a cada janela."""
+
+    def __init__(self, window_seconds, capacity=200000, error_rate=0.01):
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = time.monotonic()
+
+    def _rotate_if_needed(self):
+        # Janela vencida ou filtro cheio (a taxa de falsos positivos subiria)
+        if time.monotonic() - self._rotated_at >= self.window_seconds or self._current.count >= self.capacity:
+            self._previous = self._current
+            self._current = BloomFilter(self.capacity, self.error_rate)
+            self._rotated_at = time.monotonic()
+
+    def seen(self, key):
+        """Registra a visualização e retorna True se ela já tinha sido vista."""
+        self._rotate_if_needed()
+        if key in self._current or key in self._previous:
+            return True
+        self._current.add(key)
+        return False
+
+    def stats(self):
+        return {
+            "window_seconds": self.window_seconds,
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "entries": self._current.count,
+            "memory_bytes": len(self._current.bits) * 2
+        }
+
+
+class ViewCounter:
+    """Buffer de incrementos de view_count por anúncio."""
+
+    def __init__(self, flush_interval=5.0, max_pending=5000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.deduper = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.recorded = 0
+        self.deduplicated = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.failed = 0
+
+    def configure(self, flush_interval=None, max_pending=None, dedupe_window=None,
+                  dedupe_capacity=200000, dedupe_error_rate=0.01):
+        with self._lock:
+            if flush_interval is not None:
+                self.flush_interval = flush_interval
+            if max_pending is not None:
+                self.max_pending = max_pending
+            if dedupe_window is not None:
+                self.deduper = ViewDeduper(dedupe_window, dedupe_capacity, dedupe_error_rate) if dedupe_window > 0 else None
+
+    def record(self, ad_id, viewer=None):
+        """Contabiliza uma visualização. Retorna False se ela foi descartada como repetida."""
+        ad_id = str(ad_id)
+        with self._lock:
+            if self.deduper is not None and viewer and self.deduper.seen(f"{ad_id}:{viewer}"):
+                self.deduplicated += 1
+                return False
+            self._pending[ad_id] = self._pending.get(ad_id, 0) + 1
+            self.recorded += 1
+            flush_now = self.flush_interval <= 0 or len(self._pending) >= self.max_pending
+
+        if flush_now:
+            self.flush()
+        return True
+
+    def pending_views(self, ad_id):
+        """Visualizações do anúncio ainda não gravadas por este processo."""
+        return self._pending.get(str(ad_id), 0)
+
+    def flush(self):
+        """Grava o buffer com um bulk_write de $inc (devolve ao buffer se falhar)."""
+        from app.db.mongo_client import db
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            operations = [
+                UpdateOne({"_id": ObjectId(ad_id)}, {"$inc": {"view_count": views}})
+                for ad_id, views in pending.items()
+            ]
+            try:
+                db.ads.bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.error(f"Erro ao gravar visualizações de {len(pending)} anúncios: {e}")
+                with self._lock:
+                    self.failed += 1
+                    for ad_id, views in pending.items():
+                        self._pending[ad_id] = self._pending.get(ad_id, 0) + views
+                return 0
+
+            views = sum(pending.values())
+            with self._lock:
+                self.flushed += views
+                self.flushes += 1
+            return views
+
+    def stats(self):
+        with self._lock:
+            return {
+                "flush_interval": self.flush_interval,
+                "pending_ads": len(self._pending),
+                "pending_views": sum(self._pending.values()),
+                "max_pending": self.max_pending,
+                "recorded": self.recorded,
+                "deduplicated": self.deduplicated,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "failed": self.failed,
+                "dedupe": self.deduper.stats() if self.deduper else None
+            }
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter.flush)
+
+
+def start_view_flush_job(interval_seconds):
+    """Grava o buffer de visualizações em segundo plano a cada intervalo (em segundos)."""
+    global _flush_timer
+
+    if interval_seconds <= 0 or _flush_timer is not None:
+        return
+
+    def run():
+        global _flush_timer
+        try:
+            view_counter.flush()
+        except Exception as e:
+            logger.error(f"Erro ao gravar visualizações: {e}")
+        _flush_timer = threading.Timer(interval_seconds, run)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+    _flush_timer = threading.Timer(interval_seconds, run)
+    _flush_timer.daemon = True
+    _flush_timer.start()
+
+
+def init_view_counter(app):
+    """Configura o buffer de visualizações e inicia a gravação periódica."""
+    flush_interval = app.config.get("AD_VIEW_FLUSH_SECONDS", 5)
+    view_counter.configure(
+        flush_interval=flush_interval,
+        max_pending=app.config.get("AD_VIEW_MAX_PENDING", 5000),
+        dedupe_window=app.config.get("AD_VIEW_DEDUPE_WINDOW_SECONDS", 0),
+        dedupe_capacity=app.config.get("AD_VIEW_DEDUPE_CAPACITY", 200000),
+        dedupe_error_rate=app.config.get("AD_VIEW_DEDUPE_ERROR_RATE", 0.01)
+    )
+    start_view_flush_job(flush_interval)
+    return view_counter
@@ -0,0 +1,212 @@
+"""Retenção e agregação dos logs de auditoria e segurança.
+
+audit_logs, security_logs e data_access_logs expiram por índice TTL em
+timestamp, com retenção própria por tipo (LOG_RETENTION_DAYS_AUDIT,
+_SECURITY, _DATA_ACCESS). apply_log_retention é o único ponto que cria
+esses índices (na inicialização, após setup_indexes) e ajusta o
+expireAfterSeconds dos já existentes (collMod) quando a configuração muda.
+
+rollup_security_events agrega os eventos de segurança por hora, IP, tipo e
+severidade na coleção security_event_rollups ($merge), que alimenta o
+resumo do painel admin sem varrer os eventos individuais. Cada execução
+recalcula a partir da hora da última execução, então horas parciais são
+substituídas pela contagem completa na execução seguinte.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from app.db.mongo_client import db
+from app.models.audit_log.schema import DEFAULT_LOG_RETENTION_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "security_event_rollups"
+ROLLUP_STATE_ID = "security_events"
+
+# Índice TTL de cada coleção (campo de data)
+TTL_FIELDS = {
+    "audit_logs": "timestamp",
+    "security_logs": "timestamp",
+    "data_access_logs": "timestamp",
+    ROLLUP_COLLECTION: "hour",
+}
+
+_maintenance_timer = None
+
+
+def retention_from_config(config):
+    """Retenção em segundos por coleção a partir da configuração (dias)."""
+    days = {
+        "audit_logs": config.get("LOG_RETENTION_DAYS_AUDIT"),
+        "security_logs": config.get("LOG_RETENTION_DAYS_SECURITY"),
+        "data_access_logs": config.get("LOG_RETENTION_DAYS_DATA_ACCESS"),
+        ROLLUP_COLLECTION: config.get("LOG_RETENTION_DAYS_ROLLUPS"),
+    }
+    return {
+        name: int(value * 86400) if value else DEFAULT_LOG_RETENTION_SECONDS[name]
+        for name, value in days.items()
+    }
+
+
+def _hour_floor(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def apply_log_retention(retention=None):
+    """Cria/ajusta os índices TTL conforme a retenção configurada.
+
+    Returns:
+        dict: {"success": True, "changed": [coleções alteradas]}
+    """
+    retention = retention or DEFAULT_LOG_RETENTION_SECONDS
+    changed = []
+    try:
+        for collection_name, field in TTL_FIELDS.items():
+            seconds = retention.get(collection_name, DEFAULT_LOG_RETENTION_SECONDS[collection_name])
+            collection = db[collection_name]
+            existing = next(
+                (index for index in collection.list_indexes() if dict(index["key"]) == {field: 1}),
+                None
+            )
+            if existing is None:
+                collection.create_index(field, expireAfterSeconds=seconds, background=True)
+                changed.append(collection_name)
+            elif existing.get("expireAfterSeconds") != seconds:
+                db.command("collMod", collection_name, index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds})
+                changed.append(collection_name)
+
+        if changed:
+            logger.info(f"Retenção de logs ajustada em: {', '.join(changed)}")
+        return {"success": True, "changed": changed}
+
+    except Exception as e:
+        logger.error(f"Erro ao aplicar retenção dos logs: {e}")
+        return {"success": False, "message": f"Erro ao aplicar retenção: {str(e)}"}
+
+
+def rollup_security_events(now=None, max_lookback_hours=24 * 7):
+    """Agrega os eventos de segurança por hora/IP/tipo/severidade desde a última execução."""
+    try:
+        now = now or datetime.utcnow()
+        state = db.log_rollup_state.find_one({"_id": ROLLUP_STATE_ID}) or {}
+        since = state.get("until")
+        oldest = _hour_floor(now) - timedelta(hours=max_lookback_hours)
+        since = _hour_floor(since) if since else oldest
+        since = max(since, oldest)
+
+        db.security_logs.aggregate([
+            {"$match": {"timestamp": {"$gte": since, "$lt": now}}},
+            {"$group": {
+                "_id": {
+                    "hour": {"$dateTrunc": {"date": "$timestamp", "unit": "hour"}},
+                    "ip_address": "$ip_address",
+                    "event_type": "$event_type",
+                    "severity": "$severity"
+                },
+                "count": {"$sum": 1},
+                "users": {"$addToSet": "$user_id"},
+                "first_seen": {"$min": "$timestamp"},
+                "last_seen": {"$max": "$timestamp"}
+            }},
+            {"$set": {
+                "hour": "$_id.hour",
+                "ip_address": "$_id.ip_address",
+                "event_type": "$_id.event_type",
+                "severity": "$_id.severity",
+                "users": {"$filter": {"input": "$users", "cond": {"$ne": ["$$this", None]}}}
+            }},
+            {"$merge": {"into": ROLLUP_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ])
+
+        db.log_rollup_state.update_one(
+            {"_id": ROLLUP_STATE_ID},
+            {"$set": {"until": now, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        return {"success": True, "since": since, "until": now}
+
+    except Exception as e:
+        logger.error(f"Erro ao agregar eventos de segurança: {e}")
+        return {"success": False, "message": f"Erro ao agregar eventos de segurança: {str(e)}"}
+
+
+def get_security_summary(hours=24, ip_address=None, severity=None, top=20):
+    """Resumo dos eventos de segurança recentes a partir das agregações por hora.
+
+    Returns:
+        dict: totais por severidade, série por hora e IPs com mais eventos
+    """
+    since = _hour_floor(datetime.utcnow()) - timedelta(hours=max(hours - 1, 0))
+    match = {"hour": {"$gte": since}}
+    if ip_address:
+        match["ip_address"] = ip_address
+    if severity:
+        match["severity"] = severity
+
+    result = next(db[ROLLUP_COLLECTION].aggregate([
+        {"$match": match},
+        {"$facet": {
+            "by_severity": [
+                {"$group": {"_id": "$severity", "count": {"$sum": "$count"}}},
+                {"$sort": {"count": -1}}
+            ],
+            "by_event_type": [
+                {"$group": {"_id": "$event_type", "count": {"$sum": "$count"}}},
+                {"$sort": {"count": -1}}
+            ],
+            "by_hour": [
+                {"$group": {"_id": "$hour", "count": {"$sum": "$count"}}},
+                {"$sort": {"_id": 1}}
+            ],
+            "top_ips": [
+                {"$group": {
+                    "_id": "$ip_address",
+                    "count": {"$sum": "$count"},
+                    "event_types": {"$addToSet": "$event_type"},
+                    "last_seen": {"$max": "$last_seen"}
+                }},
+                {"$sort": {"count": -1}},
+                {"$limit": top}
+            ]
+        }}
+    ]), {})
+
+    return {
+        "since": since.isoformat(),
+        "hours": hours,
+        "by_severity": {row["_id"]: row["count"] for row in result.get("by_severity", [])},
+        "by_event_type": {row["_id"]: row["count"] for row in result.get("by_event_type", [])},
+        "by_hour": [{"hour": row["_id"].isoformat(), "count": row["count"]} for row in result.get("by_hour", [])],
+        "top_ips": [
+            {
+                "ip_address": row["_id"],
+                "count": row["count"],
+                "event_types": row["event_types"],
+                "last_seen": row["last_seen"].isoformat() if row.get("last_seen") else None
+            }
+            for row in result.get("top_ips", [])
+        ]
+    }
+
+
+def start_log_maintenance_job(interval_seconds, retention=None):
+    """Retenção + agregação dos eventos de segurança em segundo plano a cada intervalo."""
+    global _maintenance_timer
+
+    if interval_seconds <= 0 or _maintenance_timer is not None:
+        return
+
+    def run(first=False):
+        global _maintenance_timer
+        if first:
+            apply_log_retention(retention)
+        rollup_security_events()
+        _maintenance_timer = threading.Timer(interval_seconds, run)
+        _maintenance_timer.daemon = True
+        _maintenance_timer.start()
+
+    # Primeira execução após a criação dos índices da inicialização
+    _maintenance_timer = threading.Timer(30, run, kwargs={"first": True})
+    _maintenance_timer.daemon = True
+    _maintenance_timer.start()
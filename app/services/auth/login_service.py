@@ -1,7 +1,10 @@
 from datetime import datetime
 from flask_jwt_extended import create_access_token, create_refresh_token
-from app.models.user.crud import get_user_by_email, update_last_login
-from app.utils.helpers.password_helpers import verify_password
+from app.models.user.crud import get_user_by_email, get_user_by_id, update_last_login, replace_password_hash
+from app.utils.helpers.password_helpers import (
+    verify_password, needs_rehash, password_hasher, PasswordHasherBusy
+)
+from app.utils.security.token_revocation import token_claims, token_revocation
 
 
 def login_user(email, password):
@@ -12,20 +15,31 @@ def login_user(email, password):
     if not user:
         return {"success": False, "message": "Email ou senha inválidos"}
 
-    # Verificar senha
-    if not verify_password(password, user["password"]):
-        return {"success": False, "message": "Email ou senha inválidos"}
+    # Verificar senha (no pool do bcrypt; 503 se a fila estiver cheia)
+    try:
+        if not verify_password(password, user["password"]):
+            return {"success": False, "message": "Email ou senha inválidos"}
+    except PasswordHasherBusy:
+        return {"success": False, "message": "Muitas tentativas de login no momento, tente novamente", "status_code": 503}
 
     # Verificar se usuário está ativo
     if not user.get("is_active", False):
         return {"success": False, "message": "Conta inativa"}
 
+    # Hash gerado com custo menor: refazer com o custo atual sem atrasar o login
+    if needs_rehash(user["password"]):
+        old_hash = user["password"]
+        password_hasher.rehash_in_background(
+            password, lambda new_hash: replace_password_hash(user["_id"], old_hash, new_hash)
+        )
+
     # Atualizar timestamp do último login
     update_last_login(user["_id"])
 
-    # Gerar tokens
-    access_token = create_access_token(identity=user["_id"])
-    refresh_token = create_refresh_token(identity=user["_id"])
+    # Gerar tokens (papel, status e versão vão nas claims)
+    claims = token_claims(user)
+    access_token = create_access_token(identity=user["_id"], additional_claims=claims)
+    refresh_token = create_refresh_token(identity=user["_id"], additional_claims=claims)
 
     # Remover senha antes de retornar
     user.pop("password", None)
@@ -39,7 +53,19 @@ def login_user(email, password):
     }
 
 
-def refresh_auth_token(user_id):
-    """Gera um novo token de acesso a partir do token de refresh."""
-    access_token = create_access_token(identity=user_id)
+def refresh_auth_token(user_id, token_version=None):
+    """Gera um novo token de acesso a partir do token de refresh.
+
+    As claims são relidas do usuário; um token anterior ao último bump de
+    token_version (desativação, troca de papel ou senha) não é renovado.
+    """
+    user = get_user_by_id(user_id)
+    if not user or not user.get("is_active", False):
+        return {"success": False, "message": "Conta inativa ou inexistente"}
+
+    current_version = max(user.get("token_version", 0), token_revocation.current_version(user_id))
+    if token_version is not None and current_version > token_version:
+        return {"success": False, "message": "Sessão expirada, faça login novamente"}
+
+    access_token = create_access_token(identity=user_id, additional_claims=token_claims(user))
     return {"success": True, "access_token": access_token}
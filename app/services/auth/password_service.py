@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timedelta
 from app.models.user.crud import get_user_by_email, update_user, update_password
-from app.utils.helpers.password_helpers import hash_password, verify_password
+from app.utils.helpers.password_helpers import hash_password, verify_password, PasswordHasherBusy
 
 
 def request_password_reset(email):
@@ -55,11 +55,15 @@ def reset_password(token, new_password):
         return {"success": False, "message": error_message}
 
     # Gerar hash da nova senha
-    password_hash = hash_password(new_password)
-
-    # Atualizar senha e limpar token
+    try:
+        password_hash = hash_password(new_password)
+    except PasswordHasherBusy:
+        return {"success": False, "message": "Serviço sobrecarregado, tente novamente", "status_code": 503}
+
+    # Atualizar senha (invalida os tokens emitidos) e limpar token
+    # (update_user ignora o campo password)
+    update_password(str(user["_id"]), password_hash)
     update_user(str(user["_id"]), {
-        "password": password_hash,
         "reset_password_token": None,
         "reset_password_expires": None
     })
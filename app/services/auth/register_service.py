@@ -1,6 +1,6 @@
 import re
 from app.models.user.crud import create_user, get_user_by_email, get_user_by_username
-from app.utils.helpers.password_helpers import hash_password
+from app.utils.helpers.password_helpers import hash_password, PasswordHasherBusy
 
 
 def validate_email(email):
@@ -42,8 +42,11 @@ def register_user(username, email, password, first_name="", last_name=""):
     if get_user_by_username(username):
         return {"success": False, "message": "Nome de usuário já está em uso"}
 
-    # Gerar hash da senha
-    password_hash = hash_password(password)
+    # Gerar hash da senha (no pool do bcrypt; 503 se a fila estiver cheia)
+    try:
+        password_hash = hash_password(password)
+    except PasswordHasherBusy:
+        return {"success": False, "message": "Muitos cadastros no momento, tente novamente", "status_code": 503}
 
     # Criar usuário
     user = create_user(
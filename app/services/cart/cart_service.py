@@ -2,6 +2,17 @@ from datetime import datetime, timedelta
 from bson import ObjectId
 from app.db.mongo_client import db
 from app.models.user.crud import get_user_by_id
+from app.services.upload import blob_store
+
+
+def _delete_cart_items(query):
+    """Remove itens do carrinho liberando a imagem do snapshot de cada um."""
+    removed = 0
+    for item in db.cart.find(query, {"ad_snapshot.image_url": 1}):
+        if db.cart.delete_one({"_id": item["_id"]}).deleted_count:
+            blob_store.release(item.get("ad_snapshot", {}).get("image_url"))
+            removed += 1
+    return removed
 
 
 def add_to_cart(user_id, ad_id, quantity=1):
@@ -68,6 +79,7 @@ def add_to_cart(user_id, ad_id, quantity=1):
         }
 
         result = db.cart.insert_one(cart_item)
+        blob_store.acquire(cart_item["ad_snapshot"]["image_url"])
         cart_item["_id"] = str(result.inserted_id)
         cart_item["user_id"] = str(cart_item["user_id"])
         cart_item["ad_id"] = str(cart_item["ad_id"])
@@ -86,7 +98,7 @@ def get_user_cart(user_id):
     """Busca o carrinho do usuário."""
     try:
         # Limpar itens expirados
-        db.cart.delete_many({"expires_at": {"$lt": datetime.utcnow()}})
+        _delete_cart_items({"expires_at": {"$lt": datetime.utcnow()}})
 
         # Buscar itens do carrinho
         cart_items = list(db.cart.find({"user_id": ObjectId(user_id)}).sort("created_at", -1))
@@ -145,12 +157,7 @@ def update_cart_item(user_id, ad_id, quantity):
 def remove_from_cart(user_id, ad_id):
     """Remove um item do carrinho."""
     try:
-        result = db.cart.delete_one({
-            "user_id": ObjectId(user_id),
-            "ad_id": ObjectId(ad_id)
-        })
-
-        if result.deleted_count > 0:
+        if _delete_cart_items({"user_id": ObjectId(user_id), "ad_id": ObjectId(ad_id)}):
             return {"success": True, "message": "Item removido do carrinho"}
         else:
             return {"success": False, "message": "Item não encontrado no carrinho"}
@@ -162,11 +169,11 @@ def remove_from_cart(user_id, ad_id):
 def clear_cart(user_id):
     """Limpa todo o carrinho do usuário."""
     try:
-        result = db.cart.delete_many({"user_id": ObjectId(user_id)})
+        removed = _delete_cart_items({"user_id": ObjectId(user_id)})
 
         return {
             "success": True,
-            "message": f"{result.deleted_count} itens removidos do carrinho"
+            "message": f"{removed} itens removidos do carrinho"
         }
 
     except Exception as e:
@@ -203,7 +210,7 @@ def validate_cart(user_id):
             else:
                 invalid_items.append(item)
                 # Remover item inválido
-                db.cart.delete_one({"_id": ObjectId(item["_id"])})
+                _delete_cart_items({"_id": ObjectId(item["_id"])})
 
         return {
             "success": True,
@@ -223,7 +230,7 @@ def get_cart_count(user_id):
     """Retorna o número de itens no carrinho."""
     try:
         # Limpar itens expirados
-        db.cart.delete_many({"expires_at": {"$lt": datetime.utcnow()}})
+        _delete_cart_items({"expires_at": {"$lt": datetime.utcnow()}})
 
         count = db.cart.count_documents({"user_id": ObjectId(user_id)})
         return {"success": True, "count": count}
@@ -1,7 +1,102 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from app.db.mongo_client import db
-from app.models.user.crud import get_user_by_id
+from app.models.user.crud import get_user_by_id, get_users_by_ids
+from app.utils.helpers.pagination import paginate_find, InvalidCursorError
+
+
+def _last_message_summary(message):
+    """Resumo da última mensagem guardado na própria sala (last_message)."""
+    return {
+        "message_id": str(message["_id"]),
+        "content": message["content"],
+        "created_at": message["created_at"],
+        "is_system": message.get("is_system", False),
+        "user_id": str(message["user_id"]) if message.get("user_id") else None
+    }
+
+
+def _watermark(message):
+    """Marca de leitura: a mensagem mais recente que o usuário já viu."""
+    return {"message_id": str(message["_id"]), "created_at": message["created_at"]}
+
+
+def _record_room_message(room, message):
+    """Atualiza last_message e os contadores de não lidas da sala.
+
+    Cada participante que não enviou a mensagem ganha +1 em
+    unread_counts.<id>; mensagens do sistema contam para os dois. Quem envia
+    já viu a sala inteira, então sua marca de leitura avança até a mensagem.
+    """
+    increments = {
+        f"unread_counts.{participant}": 1
+        for participant in (room["buyer_id"], room["seller_id"])
+        if participant != message.get("user_id")
+    }
+    update = {"$set": {
+        "updated_at": message["created_at"],
+        "last_message": _last_message_summary(message)
+    }}
+    if message.get("user_id"):
+        update["$set"][f"read_watermarks.{message['user_id']}"] = _watermark(message)
+        update["$set"][f"unread_counts.{message['user_id']}"] = 0
+    if increments:
+        update["$inc"] = increments
+
+    db.chat_rooms.update_one({"_id": room["_id"]}, update)
+
+
+def advance_read_watermark(room_id, user_id):
+    """Marca a sala como lida pelo usuário até a última mensagem.
+
+    Uma única atualização no documento da sala copia last_message para
+    read_watermarks.<id> e zera unread_counts.<id>; como é atômica em relação
+    ao $inc de send_message, nenhuma mensagem nova é perdida no meio.
+
+    Returns:
+        dict: A marca de leitura ({message_id, created_at}) ou None se a sala
+        não tiver mensagens.
+    """
+    room_oid = ObjectId(room_id)
+    key = str(user_id)
+
+    room = db.chat_rooms.find_one_and_update(
+        {"_id": room_oid, "last_message.message_id": {"$exists": True}},
+        [{"$set": {
+            f"read_watermarks.{key}": {
+                "message_id": "$last_message.message_id",
+                "created_at": "$last_message.created_at"
+            },
+            f"unread_counts.{key}": 0
+        }}],
+        projection={f"read_watermarks.{key}": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if room:
+        return room["read_watermarks"][key]
+
+    # Sala anterior a last_message.message_id: usar a mensagem mais recente
+    last_message = db.chat_messages.find_one(
+        {"room_id": room_oid}, {"created_at": 1}, sort=[("created_at", -1), ("_id", -1)]
+    )
+    watermark = _watermark(last_message) if last_message else None
+    update = {f"unread_counts.{key}": 0}
+    if watermark:
+        update[f"read_watermarks.{key}"] = watermark
+    db.chat_rooms.update_one({"_id": room_oid}, {"$set": update})
+    return watermark
+
+
+def serialize_watermarks(room):
+    """Converte read_watermarks da sala para {id do usuário: {message_id, read_at}}."""
+    return {
+        user_id: {
+            "message_id": watermark.get("message_id"),
+            "read_at": watermark["created_at"].isoformat() if watermark.get("created_at") else None
+        }
+        for user_id, watermark in (room.get("read_watermarks") or {}).items()
+    }
 
 
 def create_chat_room(order_id):
@@ -21,7 +116,19 @@ def create_chat_room(order_id):
         if not order:
             return {"success": False, "message": "Pedido não encontrado"}
 
-        # Criar sala de chat
+        now = datetime.utcnow()
+
+        # Mensagem de sistema de boas-vindas (não lida pelos dois participantes)
+        welcome_message = {
+            "_id": ObjectId(),
+            "user_id": None,
+            "user_role": None,
+            "content": f"💬 Chat criado para o pedido. Conversem sobre detalhes da transação.",
+            "is_system": True,
+            "created_at": now
+        }
+
+        # Criar sala de chat já com a última mensagem e os contadores
         chat_room = {
             "order_id": ObjectId(order_id),
             "buyer_id": order["buyer_id"],
@@ -29,8 +136,10 @@ def create_chat_room(order_id):
             "admin_id": None,
             "has_support_request": False,
             "status": "active",
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
+            "last_message": _last_message_summary(welcome_message),
+            "unread_counts": {str(order["buyer_id"]): 1, str(order["seller_id"]): 1},
+            "created_at": now,
+            "updated_at": now
         }
 
         result = db.chat_rooms.insert_one(chat_room)
@@ -38,17 +147,10 @@ def create_chat_room(order_id):
         chat_room["order_id"] = str(chat_room["order_id"])
         chat_room["buyer_id"] = str(chat_room["buyer_id"])
         chat_room["seller_id"] = str(chat_room["seller_id"])
+        chat_room.pop("last_message")
+        chat_room.pop("unread_counts")
 
-        # Adicionar mensagem de sistema de boas-vindas
-        welcome_message = {
-            "room_id": result.inserted_id,
-            "user_id": None,
-            "user_role": None,
-            "content": f"💬 Chat criado para o pedido. Conversem sobre detalhes da transação.",
-            "is_system": True,
-            "created_at": datetime.utcnow(),
-            "read_by": []
-        }
+        welcome_message["room_id"] = result.inserted_id
         db.chat_messages.insert_one(welcome_message)
 
         return {
@@ -89,8 +191,12 @@ def get_chat_room(order_id, user_id):
         return {"success": False, "message": f"Erro ao buscar sala de chat: {str(e)}"}
 
 
-def get_chat_messages(room_id, user_id, limit=50, skip=0):
-    """Busca mensagens de uma sala de chat."""
+def get_chat_messages(room_id, user_id, limit=50, skip=0, cursor=None):
+    """Busca mensagens de uma sala de chat.
+
+    As páginas andam para trás no tempo: next_cursor aponta para as mensagens
+    mais antigas que a primeira da página atual (skip apenas sem cursor).
+    """
     try:
         # Verificar se o usuário tem acesso à sala
         room = db.chat_rooms.find_one({"_id": ObjectId(room_id)})
@@ -100,15 +206,15 @@ def get_chat_messages(room_id, user_id, limit=50, skip=0):
         if str(room["buyer_id"]) != str(user_id) and str(room["seller_id"]) != str(user_id):
             return {"success": False, "message": "Acesso negado"}
 
-        # Buscar mensagens
-        messages_cursor = db.chat_messages.find({"room_id": ObjectId(room_id)}) \
-            .sort("created_at", -1) \
-            .skip(skip) \
-            .limit(limit)
-
-        messages = list(messages_cursor)
+        # Buscar mensagens (mais recentes primeiro)
+        messages, next_cursor = paginate_find(
+            db.chat_messages, {"room_id": ObjectId(room_id)}, limit, cursor=cursor, skip=skip
+        )
         messages.reverse()  # Inverter para ordem cronológica
 
+        # Autores da página em uma única busca (cache + $in)
+        authors = get_users_by_ids(message["user_id"] for message in messages)
+
         # Converter ObjectIds e adicionar dados do usuário
         for message in messages:
             message["_id"] = str(message["_id"])
@@ -116,28 +222,30 @@ def get_chat_messages(room_id, user_id, limit=50, skip=0):
 
             if message["user_id"]:
                 message["user_id"] = str(message["user_id"])
-                # Buscar dados do usuário
-                user = get_user_by_id(message["user_id"])
+                user = authors.get(message["user_id"])
                 message["user"] = {
                     "username": user["username"] if user else "Usuário",
                     "first_name": user.get("first_name", "") if user else "",
                     "profile_pic": user.get("profile_pic", "") if user else ""
                 }
 
-        # Marcar mensagens como lidas pelo usuário atual
-        db.chat_messages.update_many(
-            {
-                "room_id": ObjectId(room_id),
-                "read_by": {"$ne": ObjectId(user_id)}
-            },
-            {"$addToSet": {"read_by": ObjectId(user_id)}}
-        )
+        # Marcar a sala como lida pelo usuário atual (avança a marca de leitura)
+        watermarks = serialize_watermarks(room)
+        watermark = advance_read_watermark(room_id, user_id)
+        if watermark:
+            watermarks.update(serialize_watermarks({"read_watermarks": {str(user_id): watermark}}))
 
         return {
             "success": True,
-            "data": {"messages": messages}
+            "data": {
+                "messages": messages,
+                "next_cursor": next_cursor,
+                "read_watermarks": watermarks
+            }
         }
 
+    except InvalidCursorError:
+        return {"success": False, "message": "Cursor de paginação inválido"}
     except Exception as e:
         return {"success": False, "message": f"Erro ao buscar mensagens: {str(e)}"}
 
@@ -167,17 +275,13 @@ def send_message(room_id, user_id, content, user_role=None):
             "user_role": user_role,
             "content": content.strip(),
             "is_system": False,
-            "created_at": datetime.utcnow(),
-            "read_by": [ObjectId(user_id)]  # Marcado como lido pelo remetente
+            "created_at": datetime.utcnow()
         }
 
         result = db.chat_messages.insert_one(message)
 
-        # Atualizar timestamp da sala
-        db.chat_rooms.update_one(
-            {"_id": ObjectId(room_id)},
-            {"$set": {"updated_at": datetime.utcnow()}}
-        )
+        # Atualizar última mensagem e contadores de não lidas da sala
+        _record_room_message(room, message)
 
         # Preparar resposta
         message["_id"] = str(result.inserted_id)
@@ -211,12 +315,15 @@ def send_system_message(room_id, content):
             "user_role": None,
             "content": content,
             "is_system": True,
-            "created_at": datetime.utcnow(),
-            "read_by": []
+            "created_at": datetime.utcnow()
         }
 
         result = db.chat_messages.insert_one(message)
 
+        room = db.chat_rooms.find_one({"_id": ObjectId(room_id)}, {"buyer_id": 1, "seller_id": 1})
+        if room:
+            _record_room_message(room, message)
+
         message["_id"] = str(result.inserted_id)
         message["room_id"] = str(message["room_id"])
 
@@ -239,30 +346,53 @@ def get_user_chat_rooms(user_id):
                 {"seller_id": ObjectId(user_id)}
             ]
         }).sort("updated_at", -1)
+        rooms_list = list(rooms_cursor)
+
+        # Participantes de todas as salas em uma única busca (cache + $in)
+        participants = get_users_by_ids(
+            room["seller_id"] if str(room["buyer_id"]) == str(user_id) else room["buyer_id"]
+            for room in rooms_list
+        )
+
+        # Pedidos de todas as salas em uma única busca
+        orders = {
+            order["_id"]: order
+            for order in db.orders.find(
+                {"_id": {"$in": [room["order_id"] for room in rooms_list]}},
+                {"ad_snapshot.title": 1, "ad_snapshot.game_name": 1, "total_price": 1, "status": 1}
+            )
+        }
 
         rooms = []
-        for room in rooms_cursor:
-            # Buscar dados do pedido
-            order = db.orders.find_one({"_id": room["order_id"]})
+        for room in rooms_list:
+            order = orders.get(room["order_id"])
             if not order:
                 continue
 
-            # Buscar última mensagem
-            last_message = db.chat_messages.find_one(
-                {"room_id": room["_id"]},
-                sort=[("created_at", -1)]
-            )
-
-            # Contar mensagens não lidas
-            unread_count = db.chat_messages.count_documents({
-                "room_id": room["_id"],
-                "read_by": {"$ne": ObjectId(user_id)},
-                "user_id": {"$ne": ObjectId(user_id)}  # Não contar próprias mensagens
-            })
+            # Última mensagem e não lidas vêm da própria sala; salas antigas
+            # (ainda não reconciliadas) caem nas consultas originais
+            last_message = room.get("last_message")
+            if "last_message" not in room:
+                last_message = db.chat_messages.find_one(
+                    {"room_id": room["_id"]},
+                    sort=[("created_at", -1)]
+                )
+
+            if "unread_counts" in room:
+                unread_count = room["unread_counts"].get(str(user_id), 0)
+            else:
+                unread_query = {
+                    "room_id": room["_id"],
+                    "user_id": {"$ne": ObjectId(user_id)}  # Não contar próprias mensagens
+                }
+                watermark = (room.get("read_watermarks") or {}).get(str(user_id))
+                if watermark:
+                    unread_query["created_at"] = {"$gt": watermark["created_at"]}
+                unread_count = db.chat_messages.count_documents(unread_query)
 
             # Determinar o outro usuário
             other_user_id = room["seller_id"] if str(room["buyer_id"]) == str(user_id) else room["buyer_id"]
-            other_user = get_user_by_id(str(other_user_id))
+            other_user = participants.get(str(other_user_id))
 
             room_data = {
                 "_id": str(room["_id"]),
@@ -311,19 +441,19 @@ def mark_messages_as_read(room_id, user_id):
         if str(room["buyer_id"]) != str(user_id) and str(room["seller_id"]) != str(user_id):
             return {"success": False, "message": "Acesso negado"}
 
-        # Marcar todas as mensagens como lidas
-        result = db.chat_messages.update_many(
-            {
-                "room_id": ObjectId(room_id),
-                "read_by": {"$ne": ObjectId(user_id)}
-            },
-            {"$addToSet": {"read_by": ObjectId(user_id)}}
-        )
+        # Avançar a marca de leitura até a última mensagem
+        marked_count = (room.get("unread_counts") or {}).get(str(user_id), 0)
+        watermark = advance_read_watermark(room_id, user_id)
 
         return {
             "success": True,
-            "data": {"marked_count": result.modified_count},
-            "message": f"{result.modified_count} mensagens marcadas como lidas"
+            "data": {
+                "marked_count": marked_count,
+                "read_watermark": serialize_watermarks(
+                    {"read_watermarks": {str(user_id): watermark}}
+                )[str(user_id)] if watermark else None
+            },
+            "message": f"{marked_count} mensagens marcadas como lidas"
         }
 
     except Exception as e:
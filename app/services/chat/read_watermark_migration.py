@@ -0,0 +1,118 @@
+"""Migração dos arrays read_by das mensagens para marcas de leitura por sala.
+
+Antes, cada mensagem guardava em read_by os usuários que a leram. Agora cada
+sala guarda, por participante, a mensagem mais recente que ele já viu:
+
+    chat_rooms.read_watermarks.<id do usuário> = {message_id, created_at}
+
+A marca migrada é a mensagem mais recente cujo read_by contém o usuário.
+Marcas já existentes e mais novas são preservadas, então a migração pode ser
+executada mais de uma vez. Com --drop-read-by os arrays antigos são removidos.
+
+Uso:
+    python -m app.services.chat.read_watermark_migration --uri mongodb://localhost:27017 --db gameunite
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_ID = "chat_read_watermarks"
+
+
+def _database(database):
+    if database is not None:
+        return database
+    from app.db.mongo_client import db
+    return db
+
+
+def migrate_read_by_to_watermarks(database=None, drop_read_by=False):
+    """Converte read_by em read_watermarks e registra a migração.
+
+    Returns:
+        dict: Quantidade de marcas gravadas e de mensagens limpas.
+    """
+    database = _database(database)
+
+    operations = []
+    for row in database.chat_messages.aggregate([
+        {"$match": {"read_by.0": {"$exists": True}}},
+        {"$project": {"room_id": 1, "created_at": 1, "read_by": 1}},
+        {"$unwind": "$read_by"},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$group": {
+            "_id": {"room_id": "$room_id", "user_id": "$read_by"},
+            "message_id": {"$first": "$_id"},
+            "created_at": {"$first": "$created_at"}
+        }}
+    ], allowDiskUse=True):
+        field = f"read_watermarks.{row['_id']['user_id']}"
+        operations.append(UpdateOne(
+            {"_id": row["_id"]["room_id"], "$or": [
+                {field: {"$exists": False}},
+                {f"{field}.created_at": {"$lt": row["created_at"]}}
+            ]},
+            {"$set": {field: {"message_id": str(row["message_id"]), "created_at": row["created_at"]}}}
+        ))
+
+    watermarks_written = 0
+    for start in range(0, len(operations), 1000):
+        result = database.chat_rooms.bulk_write(operations[start:start + 1000], ordered=False)
+        watermarks_written += result.modified_count
+
+    messages_cleaned = 0
+    if drop_read_by:
+        result = database.chat_messages.update_many(
+            {"read_by": {"$exists": True}},
+            {"$unset": {"read_by": ""}}
+        )
+        messages_cleaned = result.modified_count
+
+    database.migrations.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {
+            "completed_at": datetime.utcnow(),
+            "watermarks_written": watermarks_written,
+            "read_by_dropped": drop_read_by
+        }},
+        upsert=True
+    )
+    logger.info(f"Migração de read_by: {watermarks_written} marcas de leitura gravadas")
+
+    return {"watermarks_written": watermarks_written, "messages_cleaned": messages_cleaned}
+
+
+def ensure_read_watermarks_migrated(database=None):
+    """Executa a migração uma única vez (antes do reparo dos contadores)."""
+    database = _database(database)
+    if database.migrations.find_one({"_id": MIGRATION_ID}, {"_id": 1}):
+        return None
+    return migrate_read_by_to_watermarks(database)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migra read_by das mensagens para marcas de leitura.")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="gameunite")
+    parser.add_argument("--drop-read-by", action="store_true",
+                        help="Remove os arrays read_by após a migração")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    result = migrate_read_by_to_watermarks(client[args.db], drop_read_by=args.drop_read_by)
+    print(f"{result['watermarks_written']} marcas de leitura gravadas, "
+          f"{result['messages_cleaned']} mensagens sem read_by")
+
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
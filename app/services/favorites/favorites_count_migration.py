@@ -0,0 +1,128 @@
+"""Preenche favorites_count nos anúncios a partir da coleção favorites.
+
+O total de favoritos passou a ficar no próprio anúncio (favorites_count),
+atualizado com $inc por add_to_favorites/remove_from_favorites/toggle_favorite.
+Esta migração calcula o total dos anúncios já existentes.
+
+Antes da contagem, favoritos duplicados (mesmo user_id + ad_id, possíveis
+com a antiga verificação seguida de inserção) são removidos, mantendo o mais
+antigo, e o índice único (user_id, ad_id) é criado caso tenha falhado por
+causa deles. add_to_favorites/toggle_favorite dependem desse índice, então
+ensure_favorites_count_migrated também o garante a cada inicialização, em
+qualquer configuração. Os totais são recalculados do zero, então a migração
+pode ser executada mais de uma vez.
+
+Uso:
+    python -m app.services.favorites.favorites_count_migration --uri mongodb://localhost:27017 --db gameunite
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_ID = "ads_favorites_count"
+BATCH_SIZE = 1000
+
+
+def _database(database):
+    if database is not None:
+        return database
+    from app.db.mongo_client import db
+    return db
+
+
+def _ensure_indexes(database):
+    from app.models import create_indexes
+    from app.models.favorites.schema import favorites_indexes
+    create_indexes(database.favorites, favorites_indexes)
+
+
+def _remove_duplicates(database):
+    duplicate_ids = []
+    for row in database.favorites.aggregate([
+        {"$sort": {"created_at": 1, "_id": 1}},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "ad_id": "$ad_id"},
+            "ids": {"$push": "$_id"},
+            "total": {"$sum": 1}
+        }},
+        {"$match": {"total": {"$gt": 1}}}
+    ], allowDiskUse=True):
+        duplicate_ids.extend(row["ids"][1:])
+
+    removed = 0
+    for start in range(0, len(duplicate_ids), BATCH_SIZE):
+        result = database.favorites.delete_many({"_id": {"$in": duplicate_ids[start:start + BATCH_SIZE]}})
+        removed += result.deleted_count
+    return removed
+
+
+def migrate_favorites_count(database=None):
+    """Remove duplicados, garante o índice único e recalcula favorites_count.
+
+    Returns:
+        dict: Favoritos duplicados removidos e anúncios com total atualizado.
+    """
+    database = _database(database)
+
+    duplicates_removed = _remove_duplicates(database)
+    _ensure_indexes(database)
+
+    count_operations = [
+        UpdateOne({"_id": row["_id"]}, {"$set": {"favorites_count": row["total"]}})
+        for row in database.favorites.aggregate([
+            {"$group": {"_id": "$ad_id", "total": {"$sum": 1}}}
+        ], allowDiskUse=True)
+    ]
+    counts_written = 0
+    for start in range(0, len(count_operations), BATCH_SIZE):
+        result = database.ads.bulk_write(count_operations[start:start + BATCH_SIZE], ordered=False)
+        counts_written += result.modified_count
+    database.ads.update_many({"favorites_count": {"$exists": False}}, {"$set": {"favorites_count": 0}})
+
+    database.migrations.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {
+            "completed_at": datetime.utcnow(),
+            "duplicates_removed": duplicates_removed,
+            "counts_written": counts_written
+        }},
+        upsert=True
+    )
+    logger.info(f"Migração de favoritos: {counts_written} totais atualizados, "
+                f"{duplicates_removed} duplicados removidos")
+
+    return {"duplicates_removed": duplicates_removed, "counts_written": counts_written}
+
+
+def ensure_favorites_count_migrated(database=None):
+    """Executa a migração uma única vez; o índice único é garantido sempre."""
+    database = _database(database)
+    if database.migrations.find_one({"_id": MIGRATION_ID}, {"_id": 1}):
+        _ensure_indexes(database)
+        return None
+    return migrate_favorites_count(database)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preenche favorites_count nos anúncios.")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="gameunite")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    result = migrate_favorites_count(client[args.db])
+    print(f"{result['counts_written']} totais atualizados, {result['duplicates_removed']} favoritos duplicados removidos")
+
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,59 +1,86 @@
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from app.db.mongo_client import db
 from app.models.user.crud import get_user_by_id
+from app.utils.helpers.pagination import pipeline_stages, page_result, clamp_limit, InvalidCursorError
 from app.services.notification.notification_service import notify_ad_favorited
 
 
+def _update_favorites_count(ad_id, delta):
+    """Soma delta em favorites_count do anúncio e retorna o novo total."""
+    updated_ad = db.ads.find_one_and_update(
+        {"_id": ObjectId(ad_id)},
+        {"$inc": {"favorites_count": delta}},
+        projection={"favorites_count": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return max(updated_ad.get("favorites_count", 0), 0) if updated_ad else 0
+
+
+def _insert_favorite(user_id, ad_id):
+    """Grava o favorito; o índice único (user_id, ad_id) barra duplicados.
+
+    Returns:
+        dict | None: Documento gravado, ou None se o anúncio já era favorito.
+    """
+    favorite = {
+        "user_id": ObjectId(user_id),
+        "ad_id": ObjectId(ad_id),
+        "created_at": datetime.utcnow()
+    }
+    try:
+        result = db.favorites.insert_one(favorite)
+    except DuplicateKeyError:
+        return None
+    favorite["_id"] = result.inserted_id
+    return favorite
+
+
+def _notify_favorited(user_id, ad):
+    """Avisa o dono do anúncio (apenas se não for o próprio usuário)."""
+    if str(ad["user_id"]) != str(user_id):
+        try:
+            user = get_user_by_id(str(user_id))
+            favoriter_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Usuário"
+            if not favoriter_name:
+                favoriter_name = user.get('username', 'Usuário') if user else "Usuário"
+
+            notify_ad_favorited(
+                ad_owner_id=str(ad["user_id"]),
+                favoriter_name=favoriter_name,
+                ad_title=ad.get("title", "Anúncio")
+            )
+        except Exception as notif_error:
+            print(f"⚠️ Erro ao criar notificação de favorito: {notif_error}")
+
+
 def add_to_favorites(user_id, ad_id):
     """Adiciona um anúncio aos favoritos do usuário."""
     try:
         # Verificar se o anúncio existe
-        ad = db.ads.find_one({"_id": ObjectId(ad_id)})
+        ad = db.ads.find_one({"_id": ObjectId(ad_id)}, {"user_id": 1, "title": 1})
         if not ad:
             return {"success": False, "message": "Anúncio não encontrado"}
 
-        # Verificar se já está nos favoritos
-        existing_favorite = db.favorites.find_one({
-            "user_id": ObjectId(user_id),
-            "ad_id": ObjectId(ad_id)
-        })
-
-        if existing_favorite:
+        # Adicionar aos favoritos (sem consulta prévia: o índice único decide)
+        favorite = _insert_favorite(user_id, ad_id)
+        if favorite is None:
             return {"success": False, "message": "Anúncio já está nos favoritos"}
 
-        # Adicionar aos favoritos
-        favorite = {
-            "user_id": ObjectId(user_id),
-            "ad_id": ObjectId(ad_id),
-            "created_at": datetime.utcnow()
-        }
-
-        result = db.favorites.insert_one(favorite)
-        favorite["_id"] = str(result.inserted_id)
+        favorites_count = _update_favorites_count(ad_id, 1)
+        favorite["_id"] = str(favorite["_id"])
         favorite["user_id"] = str(favorite["user_id"])
         favorite["ad_id"] = str(favorite["ad_id"])
 
-        # Criar notificação para o dono do anúncio (apenas se não for o próprio usuário)
-        if str(ad["user_id"]) != str(user_id):
-            try:
-                user = get_user_by_id(str(user_id))
-                favoriter_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Usuário"
-                if not favoriter_name:
-                    favoriter_name = user.get('username', 'Usuário') if user else "Usuário"
-                
-                notify_ad_favorited(
-                    ad_owner_id=str(ad["user_id"]),
-                    favoriter_name=favoriter_name,
-                    ad_title=ad.get("title", "Anúncio")
-                )
-            except Exception as notif_error:
-                print(f"⚠️ Erro ao criar notificação de favorito: {notif_error}")
+        _notify_favorited(user_id, ad)
 
         return {
             "success": True,
             "message": "Anúncio adicionado aos favoritos",
-            "data": {"favorite": favorite}
+            "data": {"favorite": favorite, "favorites_count": favorites_count}
         }
 
     except Exception as e:
@@ -69,7 +96,12 @@ def remove_from_favorites(user_id, ad_id):
         })
 
         if result.deleted_count > 0:
-            return {"success": True, "message": "Anúncio removido dos favoritos"}
+            favorites_count = _update_favorites_count(ad_id, -1)
+            return {
+                "success": True,
+                "message": "Anúncio removido dos favoritos",
+                "data": {"favorites_count": favorites_count}
+            }
         else:
             return {"success": False, "message": "Favorito não encontrado"}
 
@@ -77,68 +109,83 @@ def remove_from_favorites(user_id, ad_id):
         return {"success": False, "message": f"Erro ao remover favorito: {str(e)}"}
 
 
-def get_user_favorites(user_id, limit=20, skip=0):
-    """Busca os favoritos do usuário com detalhes dos anúncios."""
-    try:
-        # Pipeline de agregação para buscar favoritos com dados dos anúncios
-        pipeline = [
-            {"$match": {"user_id": ObjectId(user_id)}},
-            {"$sort": {"created_at": -1}},
-            {"$skip": skip},
-            {"$limit": limit},
-            {
-                "$lookup": {
-                    "from": "ads",
-                    "localField": "ad_id",
-                    "foreignField": "_id",
-                    "as": "ad"
-                }
-            },
-            {"$unwind": "$ad"},
-            {
-                "$lookup": {
-                    "from": "games",
-                    "localField": "ad.game_id",
-                    "foreignField": "_id",
-                    "as": "game"
-                }
-            },
-            {
-                "$addFields": {
-                    "ad.game": {"$arrayElemAt": ["$game", 0]}
-                }
-            },
-            {
-                "$project": {
-                    "_id": {"$toString": "$_id"},
-                    "user_id": {"$toString": "$user_id"},
-                    "ad_id": {"$toString": "$ad_id"},
+def _favorites_page_pipeline(user_id, limit, cursor=None, skip=0):
+    """Uma página de favoritos (pelo índice) enriquecida com anúncio e jogo."""
+    return pipeline_stages({"user_id": ObjectId(user_id)}, limit, cursor=cursor, skip=skip) + [
+        {
+            "$lookup": {
+                "from": "ads",
+                "localField": "ad_id",
+                "foreignField": "_id",
+                "as": "ad"
+            }
+        },
+        # Mantém favoritos de anúncios removidos para não quebrar o cursor
+        {"$unwind": {"path": "$ad", "preserveNullAndEmptyArrays": True}},
+        {
+            "$lookup": {
+                "from": "games",
+                "localField": "ad.game_id",
+                "foreignField": "_id",
+                "as": "game"
+            }
+        },
+        {
+            "$addFields": {
+                "ad.game": {"$arrayElemAt": ["$game", 0]}
+            }
+        },
+        {
+            "$project": {
+                "_id": {"$toString": "$_id"},
+                "user_id": {"$toString": "$user_id"},
+                "ad_id": {"$toString": "$ad_id"},
+                "created_at": 1,
+                "ad": {
+                    "_id": {"$toString": "$ad._id"},
+                    "title": 1,
+                    "description": 1,
+                    "ad_type": 1,
+                    "platform": 1,
+                    "condition": 1,
+                    "price": "$ad.price_per_hour",
+                    "image_url": 1,
+                    "is_boosted": 1,
+                    "view_count": 1,
+                    "status": 1,
                     "created_at": 1,
-                    "ad": {
-                        "_id": {"$toString": "$ad._id"},
-                        "title": 1,
-                        "description": 1,
-                        "ad_type": 1,
-                        "platform": 1,
-                        "condition": 1,
-                        "price": "$ad.price_per_hour",
-                        "image_url": 1,
-                        "is_boosted": 1,
-                        "view_count": 1,
-                        "status": 1,
-                        "created_at": 1,
-                        "game": {
-                            "_id": {"$toString": "$ad.game._id"},
-                            "name": "$ad.game.name",
-                            "image_url": "$ad.game.image_url"
-                        }
+                    "game": {
+                        "_id": {"$toString": "$ad.game._id"},
+                        "name": "$ad.game.name",
+                        "image_url": "$ad.game.image_url"
                     }
                 }
             }
-        ]
+        }
+    ]
 
-        favorites_cursor = db.favorites.aggregate(pipeline)
-        favorites = list(favorites_cursor)
+
+def get_user_favorites(user_id, limit=20, skip=0, cursor=None):
+    """Busca os favoritos do usuário com detalhes dos anúncios.
+
+    Paginação por cursor (next_cursor); skip é usado apenas sem cursor.
+    Favoritos de anúncios removidos são pulados: a página é completada com
+    os favoritos seguintes, então só a última página tem menos de limit itens.
+    """
+    try:
+        limit = clamp_limit(limit)
+        favorites = []
+        page_cursor, page_skip = cursor, skip
+        while True:
+            wanted = limit - len(favorites)
+            page, next_cursor = page_result(
+                list(db.favorites.aggregate(_favorites_page_pipeline(user_id, wanted, page_cursor, page_skip))),
+                wanted
+            )
+            favorites.extend(favorite for favorite in page if favorite.get("ad", {}).get("_id"))
+            if next_cursor is None or len(favorites) >= limit:
+                break
+            page_cursor, page_skip = next_cursor, 0
 
         # Contar total de favoritos
         total_favorites = db.favorites.count_documents({"user_id": ObjectId(user_id)})
@@ -149,10 +196,13 @@ def get_user_favorites(user_id, limit=20, skip=0):
                 "favorites": favorites,
                 "total": total_favorites,
                 "limit": limit,
-                "skip": skip
+                "skip": skip,
+                "next_cursor": next_cursor
             }
         }
 
+    except InvalidCursorError:
+        return {"success": False, "message": "Cursor de paginação inválido"}
     except Exception as e:
         return {"success": False, "message": f"Erro ao buscar favoritos: {str(e)}"}
 
@@ -174,34 +224,78 @@ def is_ad_favorited(user_id, ad_id):
         return {"success": False, "message": f"Erro ao verificar favorito: {str(e)}"}
 
 
+def get_favorited_ad_ids(user_id, ad_ids):
+    """Quais dos anúncios o usuário favoritou (uma consulta para a página inteira).
+
+    Returns:
+        set: ObjectIds dos anúncios favoritados entre ad_ids.
+    """
+    try:
+        viewer_id = ObjectId(user_id)
+    except (InvalidId, TypeError):
+        return set()
+
+    ad_oids = []
+    for ad_id in ad_ids:
+        try:
+            ad_oids.append(ObjectId(ad_id))
+        except (InvalidId, TypeError):
+            continue
+    if not ad_oids:
+        return set()
+
+    return {
+        favorite["ad_id"] for favorite in db.favorites.find(
+            {"user_id": viewer_id, "ad_id": {"$in": ad_oids}},
+            {"ad_id": 1, "_id": 0}
+        )
+    }
+
+
+def get_favorites_status(user_id, ad_ids):
+    """Status de favorito de uma lista de anúncios (grades do front-end)."""
+    try:
+        favorited = get_favorited_ad_ids(user_id, ad_ids)
+        status = {}
+        for ad_id in ad_ids:
+            try:
+                status[str(ad_id)] = ObjectId(ad_id) in favorited
+            except (InvalidId, TypeError):
+                continue
+
+        return {"success": True, "data": {"favorited": status}}
+
+    except Exception as e:
+        return {"success": False, "message": f"Erro ao verificar favoritos: {str(e)}"}
+
+
 def toggle_favorite(user_id, ad_id):
     """Alterna favorito - adiciona se não existe, remove se existe."""
     try:
-        # Verificar se já está nos favoritos
-        existing_favorite = db.favorites.find_one({
-            "user_id": ObjectId(user_id),
-            "ad_id": ObjectId(ad_id)
-        })
+        ad = db.ads.find_one({"_id": ObjectId(ad_id)}, {"user_id": 1, "title": 1})
+        if not ad:
+            return {"success": False, "message": "Anúncio não encontrado"}
 
-        if existing_favorite:
-            # Remover dos favoritos
-            db.favorites.delete_one({"_id": existing_favorite["_id"]})
+        # Tenta gravar; se o índice único acusar duplicado, remove
+        if _insert_favorite(user_id, ad_id) is not None:
+            favorites_count = _update_favorites_count(ad_id, 1)
+            _notify_favorited(user_id, ad)
             return {
                 "success": True,
-                "message": "Anúncio removido dos favoritos",
-                "data": {"is_favorited": False, "action": "removed"}
+                "message": "Anúncio adicionado aos favoritos",
+                "data": {"is_favorited": True, "action": "added", "favorites_count": favorites_count}
             }
-        else:
-            # Adicionar aos favoritos
-            result = add_to_favorites(user_id, ad_id)
-            if result["success"]:
-                return {
-                    "success": True,
-                    "message": "Anúncio adicionado aos favoritos",
-                    "data": {"is_favorited": True, "action": "added"}
-                }
-            else:
-                return result
+
+        removed = db.favorites.delete_one({
+            "user_id": ObjectId(user_id),
+            "ad_id": ObjectId(ad_id)
+        })
+        favorites_count = _update_favorites_count(ad_id, -removed.deleted_count)
+        return {
+            "success": True,
+            "message": "Anúncio removido dos favoritos",
+            "data": {"is_favorited": False, "action": "removed", "favorites_count": favorites_count}
+        }
 
     except Exception as e:
         return {"success": False, "message": f"Erro ao alternar favorito: {str(e)}"}
@@ -210,7 +304,7 @@ def toggle_favorite(user_id, ad_id):
 def get_ad_favorites_count(ad_id):
     """Retorna a quantidade de usuários que favoritaram um anúncio."""
     try:
-        count = db.favorites.count_documents({"ad_id": ObjectId(ad_id)})
-        return {"success": True, "count": count}
+        ad = db.ads.find_one({"_id": ObjectId(ad_id)}, {"favorites_count": 1})
+        return {"success": True, "count": max(ad.get("favorites_count", 0), 0) if ad else 0}
     except Exception as e:
         return {"success": False, "message": f"Erro ao contar favoritos: {str(e)}"}
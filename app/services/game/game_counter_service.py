@@ -0,0 +1,154 @@
+"""Contadores de anúncios por jogo.
+
+Cada documento de jogo mantém dois contadores:
+    - ads_count: total de anúncios do jogo (qualquer status)
+    - active_ads_count: anúncios com status "active"
+
+Os contadores são ajustados com $inc quando um anúncio é criado, removido
+ou muda de status. reconcile_game_ad_counters recalcula tudo a partir da
+coleção de anúncios e corrige eventuais divergências.
+
+Jogos criados antes dos contadores não têm os campos: na inicialização
+ensure_game_counters_backfilled executa uma reconciliação completa (uma
+única vez, registrada em db.migrations).
+"""
+import logging
+import threading
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.db.mongo_client import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_ID = "game_ad_counters"
+
+_reconcile_timer = None
+
+
+def _to_object_id(value):
+    if isinstance(value, ObjectId):
+        return value
+    try:
+        return ObjectId(value)
+    except Exception:
+        return None
+
+
+def adjust_game_ad_counters(game_id, total_delta=0, active_delta=0):
+    """Aplica os deltas aos contadores do jogo."""
+    game_oid = _to_object_id(game_id)
+    if not game_oid or (not total_delta and not active_delta):
+        return
+
+    try:
+        db.games.update_one(
+            {"_id": game_oid},
+            {"$inc": {"ads_count": total_delta, "active_ads_count": active_delta}}
+        )
+    except Exception as e:
+        logger.error(f"Erro ao atualizar contadores do jogo {game_id}: {e}")
+
+
+def on_ad_created(ad):
+    """Contabiliza um anúncio recém-criado."""
+    adjust_game_ad_counters(
+        ad.get("game_id"),
+        total_delta=1,
+        active_delta=1 if ad.get("status") == "active" else 0
+    )
+
+
+def on_ad_deleted(ad):
+    """Descontabiliza um anúncio removido (precisa de game_id e status)."""
+    adjust_game_ad_counters(
+        ad.get("game_id"),
+        total_delta=-1,
+        active_delta=-1 if ad.get("status") == "active" else 0
+    )
+
+
+def on_ad_status_changed(game_id, old_status, new_status):
+    """Ajusta o contador de ativos quando o status do anúncio muda."""
+    if old_status == new_status:
+        return
+    if new_status == "active":
+        adjust_game_ad_counters(game_id, active_delta=1)
+    elif old_status == "active":
+        adjust_game_ad_counters(game_id, active_delta=-1)
+
+
+def reconcile_game_ad_counters():
+    """Recalcula os contadores de todos os jogos e corrige divergências.
+
+    Returns:
+        dict: Quantidade de jogos verificados e corrigidos.
+    """
+    try:
+        actual = {}
+        for row in db.ads.aggregate([
+            {"$group": {
+                "_id": "$game_id",
+                "total": {"$sum": 1},
+                "active": {"$sum": {"$cond": [{"$eq": ["$status", "active"]}, 1, 0]}}
+            }}
+        ]):
+            actual[row["_id"]] = (row["total"], row["active"])
+
+        operations = []
+        checked = 0
+        for game in db.games.find({}, {"ads_count": 1, "active_ads_count": 1}):
+            checked += 1
+            total, active = actual.get(game["_id"], (0, 0))
+            if game.get("ads_count") != total or game.get("active_ads_count") != active:
+                operations.append(UpdateOne(
+                    {"_id": game["_id"]},
+                    {"$set": {"ads_count": total, "active_ads_count": active}}
+                ))
+
+        if operations:
+            db.games.bulk_write(operations, ordered=False)
+            logger.info(f"Contadores de anúncios corrigidos em {len(operations)} jogos")
+
+        return {"success": True, "games_checked": checked, "games_fixed": len(operations)}
+
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar contadores de jogos: {e}")
+        return {"success": False, "message": f"Erro ao reconciliar contadores: {str(e)}"}
+
+
+def ensure_game_counters_backfilled():
+    """Preenche ads_count/active_ads_count dos jogos existentes (uma única vez)."""
+    if db.migrations.find_one({"_id": MIGRATION_ID}, {"_id": 1}):
+        return None
+
+    result = reconcile_game_ad_counters()
+    if result.get("success"):
+        db.migrations.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {"completed_at": datetime.utcnow(), "games_fixed": result["games_fixed"]}},
+            upsert=True
+        )
+    return result
+
+
+def start_reconciliation_job(interval_seconds):
+    """Executa a reconciliação em segundo plano a cada intervalo (em segundos)."""
+    global _reconcile_timer
+
+    if interval_seconds <= 0 or _reconcile_timer is not None:
+        return
+
+    def run():
+        global _reconcile_timer
+        reconcile_game_ad_counters()
+        _reconcile_timer = threading.Timer(interval_seconds, run)
+        _reconcile_timer.daemon = True
+        _reconcile_timer.start()
+
+    # Primeira execução logo após a inicialização para preencher jogos antigos
+    _reconcile_timer = threading.Timer(5, run)
+    _reconcile_timer.daemon = True
+    _reconcile_timer.start()
@@ -1,7 +1,9 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from app.db.mongo_client import db
 from app.models.notification.schema import NotificationCreate, ReportCreate
+from app.utils.helpers.pagination import paginate_find, InvalidCursorError
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,6 +18,55 @@ def validate_object_id(obj_id):
     except:
         return False
 
+def _adjust_notification_counters(user_id, total_delta=0, unread_delta=0):
+    """Aplica deltas aos contadores materializados em user_counters."""
+    result = db.user_counters.update_one(
+        {"_id": ObjectId(user_id)},
+        {
+            "$inc": {"notifications_total": total_delta, "notifications_unread": unread_delta},
+            "$set": {"updated_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        # Primeiro contador do usuário: notificações antigas ainda não contadas
+        from app.services.notification.unread_counter_service import recount_user_notifications
+        recount_user_notifications(user_id)
+
+
+def get_notification_counters(user_id):
+    """Lê os contadores de notificações do usuário (uma leitura pelo _id).
+
+    Usuários sem documento em user_counters ainda não receberam notificações
+    desde a criação dos contadores; nesse caso os valores são calculados e
+    gravados uma única vez.
+    """
+    counters = db.user_counters.find_one(
+        {"_id": ObjectId(user_id)},
+        {"notifications_total": 1, "notifications_unread": 1}
+    )
+    if counters is None:
+        from app.services.notification.unread_counter_service import recount_user_notifications
+        counters = recount_user_notifications(user_id)
+
+    return {
+        "total": max(counters.get("notifications_total", 0), 0),
+        "unread": max(counters.get("notifications_unread", 0), 0)
+    }
+
+
+def get_unread_count(user_id):
+    """Retorna o número de notificações não lidas do usuário."""
+    try:
+        if not validate_object_id(user_id):
+            return {"success": False, "message": "ID de usuário inválido"}
+
+        return {"success": True, "count": get_notification_counters(user_id)["unread"]}
+
+    except Exception as e:
+        logger.error(f"Erro ao buscar contador de não lidas: {e}")
+        return {"success": False, "message": "Erro interno ao buscar contador"}
+
 def create_notification(user_id, notification_type, title, message, data=None):
     """Cria uma nova notificação."""
     try:
@@ -36,6 +87,7 @@ def create_notification(user_id, notification_type, title, message, data=None):
         result = db.notifications.insert_one(notification_data)
         
         if result.inserted_id:
+            _adjust_notification_counters(user_id, total_delta=1, unread_delta=1)
             logger.info(f"Notificação criada para usuário {user_id}: {title}")
             
             # Removed real-time WebSocket notifications to prevent flooding
@@ -53,8 +105,8 @@ def create_notification(user_id, notification_type, title, message, data=None):
         logger.error(f"Erro ao criar notificação: {e}")
         return {"success": False, "message": "Erro interno ao criar notificação"}
 
-def get_user_notifications(user_id, limit=20, skip=0, filter_type=None):
-    """Busca notificações de um usuário."""
+def get_user_notifications(user_id, limit=20, skip=0, filter_type=None, cursor=None):
+    """Busca notificações de um usuário (paginação por cursor, skip sem cursor)."""
     try:
         if not validate_object_id(user_id):
             return {"success": False, "message": "ID de usuário inválido"}
@@ -66,10 +118,12 @@ def get_user_notifications(user_id, limit=20, skip=0, filter_type=None):
         elif filter_type == "read":
             query["read"] = True
 
-        notifications_cursor = db.notifications.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        notifications_page, next_cursor = paginate_find(
+            db.notifications, query, limit, cursor=cursor, skip=skip
+        )
         
         notifications = []
-        for notification in notifications_cursor:
+        for notification in notifications_page:
             notifications.append({
                 "_id": str(notification["_id"]),
                 "user_id": str(notification["user_id"]),
@@ -82,19 +136,26 @@ def get_user_notifications(user_id, limit=20, skip=0, filter_type=None):
                 "updated_at": notification["updated_at"].isoformat()
             })
 
-        total_count = db.notifications.count_documents(query)
-        unread_count = db.notifications.count_documents({
-            "user_id": ObjectId(user_id),
-            "read": False
-        })
+        # Totais vêm dos contadores materializados (sem count_documents)
+        counters = get_notification_counters(user_id)
+        unread_count = counters["unread"]
+        if filter_type == "unread":
+            total_count = unread_count
+        elif filter_type == "read":
+            total_count = max(counters["total"] - unread_count, 0)
+        else:
+            total_count = counters["total"]
 
         return {
             "success": True,
             "notifications": notifications,
             "total": total_count,
-            "unread_count": unread_count
+            "unread_count": unread_count,
+            "next_cursor": next_cursor
         }
 
+    except InvalidCursorError:
+        return {"success": False, "message": "Cursor de paginação inválido"}
     except Exception as e:
         logger.error(f"Erro ao buscar notificações: {e}")
         return {"success": False, "message": "Erro interno ao buscar notificações"}
@@ -105,7 +166,7 @@ def mark_notification_as_read(notification_id, user_id):
         if not validate_object_id(notification_id) or not validate_object_id(user_id):
             return {"success": False, "message": "IDs inválidos"}
 
-        result = db.notifications.update_one(
+        previous = db.notifications.find_one_and_update(
             {
                 "_id": ObjectId(notification_id),
                 "user_id": ObjectId(user_id)
@@ -115,10 +176,14 @@ def mark_notification_as_read(notification_id, user_id):
                     "read": True,
                     "updated_at": datetime.utcnow()
                 }
-            }
+            },
+            projection={"read": 1},
+            return_document=ReturnDocument.BEFORE
         )
 
-        if result.modified_count > 0:
+        if previous:
+            if not previous.get("read"):
+                _adjust_notification_counters(user_id, unread_delta=-1)
             return {"success": True, "message": "Notificação marcada como lida"}
         else:
             return {"success": False, "message": "Notificação não encontrada"}
@@ -145,6 +210,10 @@ def mark_all_notifications_as_read(user_id):
                 }
             }
         )
+        db.user_counters.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"notifications_unread": 0, "updated_at": datetime.utcnow()}}
+        )
 
         return {
             "success": True,
@@ -161,12 +230,18 @@ def delete_notification(notification_id, user_id):
         if not validate_object_id(notification_id) or not validate_object_id(user_id):
             return {"success": False, "message": "IDs inválidos"}
 
-        result = db.notifications.delete_one({
-            "_id": ObjectId(notification_id),
-            "user_id": ObjectId(user_id)
-        })
+        deleted = db.notifications.find_one_and_delete(
+            {
+                "_id": ObjectId(notification_id),
+                "user_id": ObjectId(user_id)
+            },
+            projection={"read": 1}
+        )
 
-        if result.deleted_count > 0:
+        if deleted:
+            _adjust_notification_counters(
+                user_id, total_delta=-1, unread_delta=0 if deleted.get("read") else -1
+            )
             return {"success": True, "message": "Notificação removida"}
         else:
             return {"success": False, "message": "Notificação não encontrada"}
@@ -235,17 +310,17 @@ def create_admin_notification(notification_type, title, message, data=None):
         logger.error(f"Erro ao criar notificações para admins: {e}")
         return {"success": False, "message": "Erro interno"}
 
-def get_reports(limit=50, skip=0, status_filter=None):
-    """Busca reports para administradores."""
+def get_reports(limit=50, skip=0, status_filter=None, cursor=None):
+    """Busca reports para administradores (paginação por cursor, skip sem cursor)."""
     try:
         query = {}
         if status_filter:
             query["status"] = status_filter
 
-        reports_cursor = db.reports.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        reports_page, next_cursor = paginate_find(db.reports, query, limit, cursor=cursor, skip=skip)
         
         reports = []
-        for report in reports_cursor:
+        for report in reports_page:
             # Buscar dados do reporter
             reporter = db.users.find_one({"_id": report["reporter_id"]})
             
@@ -276,9 +351,12 @@ def get_reports(limit=50, skip=0, status_filter=None):
         return {
             "success": True,
             "reports": reports,
-            "total": total_count
+            "total": total_count,
+            "next_cursor": next_cursor
         }
 
+    except InvalidCursorError:
+        return {"success": False, "message": "Cursor de paginação inválido"}
     except Exception as e:
         logger.error(f"Erro ao buscar reports: {e}")
         return {"success": False, "message": "Erro interno ao buscar reports"}
@@ -0,0 +1,212 @@
+"""Reparo dos contadores de não lidas (salas de chat e notificações).
+
+Os contadores são mantidos com $inc/$set pelas operações normais:
+    - chat_rooms.unread_counts.<id do usuário> e chat_rooms.last_message
+      (send_message, send_system_message, advance_read_watermark), calculados
+      a partir das marcas de leitura chat_rooms.read_watermarks
+    - user_counters.notifications_total / notifications_unread
+      (create_notification, mark_*_as_read, delete_notification)
+
+As funções deste módulo recalculam tudo a partir das coleções de origem e
+corrigem divergências (corridas entre leitura e envio, salas e usuários
+anteriores aos contadores).
+"""
+import logging
+import threading
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.db.mongo_client import db
+
+logger = logging.getLogger(__name__)
+
+_reconcile_timer = None
+
+
+def _watermark_at(participant_field):
+    """Expressão: created_at da marca de leitura do participante (ou null)."""
+    return {"$let": {
+        "vars": {"entry": {"$arrayElemAt": [{"$filter": {
+            "input": {"$objectToArray": {"$ifNull": ["$read_watermarks", {}]}},
+            "cond": {"$eq": ["$$this.k", {"$toString": participant_field}]}
+        }}, 0]}},
+        "in": "$$entry.v.created_at"
+    }}
+
+
+def _unread_for(participant, watermark_at):
+    """Expressão que conta mensagens não lidas por um participante da sala.
+
+    Não lidas são as mensagens de outros (ou do sistema) posteriores à marca
+    de leitura; sem marca, todas contam (datas são maiores que null no BSON).
+    """
+    return {"$sum": {"$cond": [
+        {"$and": [
+            {"$ne": ["$user_id", participant]},
+            {"$gt": ["$created_at", watermark_at]}
+        ]},
+        1, 0
+    ]}}
+
+
+def reconcile_chat_room_counters():
+    """Recalcula last_message e unread_counts de todas as salas."""
+    # As contagens dependem das marcas de leitura: migrar read_by antes
+    from app.services.chat.read_watermark_migration import ensure_read_watermarks_migrated
+    ensure_read_watermarks_migrated(db)
+
+    pipeline = [
+        {"$project": {
+            "buyer_id": 1, "seller_id": 1, "last_message": 1, "unread_counts": 1,
+            "buyer_read_at": _watermark_at("$buyer_id"),
+            "seller_read_at": _watermark_at("$seller_id")
+        }},
+        {"$lookup": {
+            "from": "chat_messages",
+            "let": {
+                "room": "$_id", "buyer": "$buyer_id", "seller": "$seller_id",
+                "buyer_read_at": "$buyer_read_at", "seller_read_at": "$seller_read_at"
+            },
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$room_id", "$$room"]}}},
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$group": {
+                    "_id": None,
+                    "buyer": _unread_for("$$buyer", "$$buyer_read_at"),
+                    "seller": _unread_for("$$seller", "$$seller_read_at"),
+                    "last": {"$first": {
+                        "message_id": "$_id",
+                        "content": "$content",
+                        "created_at": "$created_at",
+                        "is_system": "$is_system",
+                        "user_id": "$user_id"
+                    }}
+                }}
+            ],
+            "as": "source"
+        }}
+    ]
+
+    operations = []
+    checked = 0
+    for room in db.chat_rooms.aggregate(pipeline):
+        checked += 1
+        source = room["source"][0] if room["source"] else None
+
+        unread_counts = {
+            str(room["buyer_id"]): source["buyer"] if source else 0,
+            str(room["seller_id"]): source["seller"] if source else 0,
+        }
+        last_message = None
+        if source:
+            last = source["last"]
+            last_message = {
+                "message_id": str(last["message_id"]),
+                "content": last.get("content", ""),
+                "created_at": last.get("created_at"),
+                "is_system": last.get("is_system", False),
+                "user_id": str(last["user_id"]) if last.get("user_id") else None
+            }
+
+        if room.get("unread_counts") != unread_counts or room.get("last_message") != last_message:
+            operations.append(UpdateOne(
+                {"_id": room["_id"]},
+                {"$set": {"unread_counts": unread_counts, "last_message": last_message}}
+            ))
+
+    if operations:
+        db.chat_rooms.bulk_write(operations, ordered=False)
+        logger.info(f"Contadores de não lidas corrigidos em {len(operations)} salas de chat")
+
+    return {"rooms_checked": checked, "rooms_fixed": len(operations)}
+
+
+def reconcile_notification_counters():
+    """Recalcula user_counters a partir da coleção de notificações."""
+    actual = {}
+    for row in db.notifications.aggregate([
+        {"$group": {
+            "_id": "$user_id",
+            "total": {"$sum": 1},
+            "unread": {"$sum": {"$cond": [{"$eq": ["$read", False]}, 1, 0]}}
+        }}
+    ]):
+        actual[row["_id"]] = (row["total"], row["unread"])
+
+    operations = []
+    now = datetime.utcnow()
+    for counters in db.user_counters.find({}, {"notifications_total": 1, "notifications_unread": 1}):
+        total, unread = actual.pop(counters["_id"], (0, 0))
+        if counters.get("notifications_total") != total or counters.get("notifications_unread") != unread:
+            operations.append(UpdateOne(
+                {"_id": counters["_id"]},
+                {"$set": {"notifications_total": total, "notifications_unread": unread, "updated_at": now}}
+            ))
+
+    # Usuários com notificações e ainda sem documento de contadores
+    for user_id, (total, unread) in actual.items():
+        operations.append(UpdateOne(
+            {"_id": user_id},
+            {"$set": {"notifications_total": total, "notifications_unread": unread, "updated_at": now}},
+            upsert=True
+        ))
+
+    if operations:
+        db.user_counters.bulk_write(operations, ordered=False)
+        logger.info(f"Contadores de notificações corrigidos para {len(operations)} usuários")
+
+    return {"users_fixed": len(operations)}
+
+
+def recount_user_notifications(user_id):
+    """Recalcula e grava os contadores de notificações de um único usuário."""
+    user_oid = ObjectId(user_id)
+    total = db.notifications.count_documents({"user_id": user_oid})
+    unread = db.notifications.count_documents({"user_id": user_oid, "read": False})
+
+    counters = {"notifications_total": total, "notifications_unread": unread}
+    db.user_counters.update_one(
+        {"_id": user_oid},
+        {"$set": {**counters, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return counters
+
+
+def reconcile_unread_counters():
+    """Executa o reparo das salas de chat e das notificações.
+
+    Returns:
+        dict: Quantidade de salas/usuários verificados e corrigidos.
+    """
+    try:
+        result = {"success": True}
+        result.update(reconcile_chat_room_counters())
+        result.update(reconcile_notification_counters())
+        return result
+
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar contadores de não lidas: {e}")
+        return {"success": False, "message": f"Erro ao reconciliar contadores: {str(e)}"}
+
+
+def start_reconciliation_job(interval_seconds):
+    """Executa o reparo em segundo plano a cada intervalo (em segundos)."""
+    global _reconcile_timer
+
+    if interval_seconds <= 0 or _reconcile_timer is not None:
+        return
+
+    def run():
+        global _reconcile_timer
+        reconcile_unread_counters()
+        _reconcile_timer = threading.Timer(interval_seconds, run)
+        _reconcile_timer.daemon = True
+        _reconcile_timer.start()
+
+    # Primeira execução logo após a inicialização para preencher salas antigas
+    _reconcile_timer = threading.Timer(5, run)
+    _reconcile_timer.daemon = True
+    _reconcile_timer.start()
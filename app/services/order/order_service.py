@@ -4,6 +4,8 @@ from bson import ObjectId
 from app.db.mongo_client import db
 from app.models.user.crud import get_user_by_id
 from app.services.notification.notification_service import notify_order_status_change
+from app.services.upload import blob_store
+from app.utils.helpers.pagination import paginate_find, InvalidCursorError
 
 
 def create_order(buyer_id, order_data):
@@ -83,6 +85,8 @@ def create_order(buyer_id, order_data):
         }
 
         result = db.orders.insert_one(order)
+        # O snapshot do pedido passa a referenciar a imagem do anúncio
+        blob_store.acquire(order["ad_snapshot"]["image_url"])
         order["_id"] = str(result.inserted_id)
         order["buyer_id"] = str(order["buyer_id"])
         order["seller_id"] = str(order["seller_id"])
@@ -270,8 +274,11 @@ def get_order_by_id(order_id, user_id=None):
         return {"success": False, "message": f"Erro interno ao buscar pedido: {str(e)}"}
 
 
-def get_user_orders(user_id, role="all", limit=20, skip=0):
-    """Busca pedidos do usuário (como comprador ou vendedor)."""
+def get_user_orders(user_id, role="all", limit=20, skip=0, cursor=None):
+    """Busca pedidos do usuário (como comprador ou vendedor).
+
+    Paginação por cursor (next_cursor); skip é usado apenas sem cursor.
+    """
     try:
         # Validar parâmetros
         limit = max(1, min(limit, 100))  # Entre 1 e 100
@@ -291,10 +298,10 @@ def get_user_orders(user_id, role="all", limit=20, skip=0):
             }
 
         # Buscar pedidos
-        orders_cursor = db.orders.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        orders_page, next_cursor = paginate_find(db.orders, query, limit, cursor=cursor, skip=skip)
         orders = []
 
-        for order in orders_cursor:
+        for order in orders_page:
             try:
                 # Buscar dados do comprador e vendedor
                 buyer = get_user_by_id(str(order["buyer_id"]))
@@ -340,9 +347,12 @@ def get_user_orders(user_id, role="all", limit=20, skip=0):
         return {
             "success": True,
             "orders": orders,
-            "total": total
+            "total": total,
+            "next_cursor": next_cursor
         }
 
+    except InvalidCursorError:
+        return {"success": False, "message": "Cursor de paginação inválido"}
     except Exception as e:
         print(f"Erro ao buscar pedidos: {str(e)}")
         return {"success": False, "message": f"Erro interno ao buscar pedidos: {str(e)}"}
@@ -5,6 +5,7 @@ from pymongo import DESCENDING
 from app.db.mongo_client import db
 from app.models.report.schema import ReportSchema
 from app.utils.helpers.response_helpers import create_response
+from app.utils.helpers.pagination import pipeline_stages, page_result, InvalidCursorError
 
 
 class ReportService:
@@ -60,8 +61,8 @@ class ReportService:
             return create_response(False, 'Erro interno do servidor', status_code=500)
     
     @staticmethod
-    def get_reports(filters=None, page=1, limit=50):
-        """Get reports with optional filtering"""
+    def get_reports(filters=None, page=1, limit=50, cursor=None):
+        """Get reports with optional filtering (cursor pagination, page without cursor)"""
         try:
             # Check if reports collection exists
             if 'reports' not in db.list_collection_names():
@@ -108,8 +109,8 @@ class ReportService:
                 })
             
             # Aggregation pipeline to populate reporter data
-            pipeline = [
-                {'$match': query},
+            # Paginate before $lookup so only the current page is populated
+            pipeline = pipeline_stages(query, limit, cursor=cursor, skip=skip) + [
                 {'$lookup': {
                     'from': 'users',
                     'localField': 'reporter_id',
@@ -120,9 +121,7 @@ class ReportService:
                     'path': '$reporter',
                     'preserveNullAndEmptyArrays': True
                 }},
-                {'$sort': {'created_at': DESCENDING}},
-                {'$skip': skip},
-                {'$limit': limit},
+                {'$sort': {'created_at': DESCENDING, '_id': DESCENDING}},
                 {'$project': {
                     '_id': 1,
                     'reported_item_id': 1,
@@ -149,7 +148,7 @@ class ReportService:
             
             # Execute aggregation
             reports_cursor = db.reports.aggregate(pipeline)
-            reports = list(reports_cursor)
+            reports, next_cursor = page_result(list(reports_cursor), limit)
             
             # Convert ObjectIds to strings and handle missing reporter data
             for report in reports:
@@ -179,10 +178,13 @@ class ReportService:
                     'total_reports': total_reports,
                     'has_next': has_next,
                     'has_prev': has_prev,
-                    'per_page': limit
+                    'per_page': limit,
+                    'next_cursor': next_cursor
                 }
             })
             
+        except InvalidCursorError:
+            return create_response(False, 'Cursor de paginação inválido', status_code=400)
         except Exception as e:
             current_app.logger.error(f"Erro ao buscar reports: {str(e)}")
             return create_response(False, 'Erro interno do servidor', status_code=500)
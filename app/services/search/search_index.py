@@ -0,0 +1,237 @@
+"""Índice invertido em memória com ranking BM25.
+
+O índice não depende do Flask nem do MongoDB: recebe documentos já montados
+(lista de campos com peso + atributos para filtros) e responde consultas com
+tokenização em português sem acentos e correspondência por prefixo.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+# Palavras muito comuns em português que não ajudam no ranking
+STOPWORDS = frozenset({
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das",
+    "em", "no", "na", "nos", "nas", "por", "pelo", "pela", "pelos", "pelas", "para",
+    "pra", "com", "sem", "e", "ou", "que", "se", "ao", "aos", "mais", "muito", "muita",
+    "ja", "nao", "sim", "eu", "voce", "meu", "minha", "seu", "sua", "esse", "essa",
+    "este", "esta", "isso", "isto", "tem", "ter", "sao", "foi", "ser", "como",
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Termos curtos demais geram expansões de prefixo enormes
+MIN_PREFIX_LENGTH = 2
+# Penalidade aplicada a termos encontrados apenas por prefixo
+PREFIX_PENALTY = 0.85
+
+
+def fold_accents(text):
+    """Remove acentos e converte para minúsculas ("Ação" -> "acao")."""
+    normalized = unicodedata.normalize("NFKD", str(text))
+    return normalized.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def _singular(token):
+    """Reduz plurais simples do português ("jogos" -> "jogo", "edicoes" -> "edicao")."""
+    if len(token) < 4 or not token.isalpha():
+        return token
+    if token.endswith(("oes", "aes")):
+        return token[:-3] + "ao"
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Quebra o texto em termos normalizados, sem acentos e sem stopwords."""
+    if not text:
+        return []
+    return [
+        _singular(token)
+        for token in _TOKEN_RE.findall(fold_accents(text))
+        if token not in STOPWORDS
+    ]
+
+
+class InvertedIndex:
+    """Índice invertido thread-safe com atualização incremental.
+
+    Cada documento é identificado por uma string (ex: o ObjectId do anúncio)
+    e guarda, além das frequências dos termos, um dicionário de atributos
+    usado pelos filtros da busca.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, max_prefix_expansions=50):
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_expansions = max_prefix_expansions
+
+        self._lock = threading.RLock()
+        self._postings = {}     # termo -> {doc_id: frequência}
+        self._vocabulary = []   # termos ordenados (busca por prefixo com bisect)
+        self._docs = {}         # doc_id -> (tamanho, termos, atributos)
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def add(self, doc_id, fields, attrs=None):
+        """Indexa (ou reindexa) um documento.
+
+        Args:
+            doc_id (str): Identificador do documento.
+            fields (list): Pares (texto, peso); o peso multiplica a frequência.
+            attrs (dict): Atributos usados nos filtros.
+        """
+        frequencies = Counter()
+        for text, weight in fields:
+            for token in tokenize(text):
+                frequencies[token] += weight
+
+        length = sum(frequencies.values())
+
+        with self._lock:
+            self._remove_unlocked(doc_id)
+
+            for term, frequency in frequencies.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._vocabulary, term)
+                postings[doc_id] = frequency
+
+            self._docs[doc_id] = (length, tuple(frequencies), dict(attrs or {}))
+            self._total_length += length
+
+    def remove(self, doc_id):
+        """Remove um documento do índice (ignora documentos inexistentes)."""
+        with self._lock:
+            self._remove_unlocked(doc_id)
+
+    def _remove_unlocked(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+
+        length, terms, _ = doc
+        self._total_length -= length
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                position = bisect.bisect_left(self._vocabulary, term)
+                if position < len(self._vocabulary) and self._vocabulary[position] == term:
+                    del self._vocabulary[position]
+
+    def get_attrs(self, doc_id):
+        """Retorna os atributos de filtro de um documento indexado."""
+        doc = self._docs.get(doc_id)
+        return dict(doc[2]) if doc else None
+
+    def _expand(self, token):
+        """Retorna os termos do vocabulário que casam com o token e seu peso."""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+
+        if len(token) < MIN_PREFIX_LENGTH:
+            return matches
+
+        position = bisect.bisect_right(self._vocabulary, token)
+        expansions = 0
+        while position < len(self._vocabulary) and expansions < self.max_prefix_expansions:
+            term = self._vocabulary[position]
+            if not term.startswith(token):
+                break
+            matches.append((term, PREFIX_PENALTY))
+            position += 1
+            expansions += 1
+
+        return matches
+
+    def _idf(self, term, total_docs):
+        df = len(self._postings[term])
+        return math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+
+    def search(self, query, filter_fn=None, limit=20, offset=0):
+        """Busca documentos que contenham todos os termos da consulta.
+
+        Cada termo da consulta casa com o termo exato ou com termos que
+        começam com ele; o documento recebe, por termo da consulta, a melhor
+        pontuação BM25 entre as variações encontradas. Os filtros são
+        aplicados sobre os atributos depois da interseção.
+
+        Returns:
+            tuple: (total de resultados, lista de (doc_id, score)).
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return 0, []
+
+        with self._lock:
+            total_docs = len(self._docs)
+            if total_docs == 0:
+                return 0, []
+            avg_length = (self._total_length / total_docs) or 1.0
+
+            # Para cada termo da consulta: [(postings, peso * idf * (k1 + 1)), ...]
+            expanded = []
+            for token in query_tokens:
+                variants = [
+                    (self._postings[term], weight * self._idf(term, total_docs) * (self.k1 + 1))
+                    for term, weight in self._expand(token)
+                ]
+                if not variants:
+                    return 0, []
+                expanded.append(variants)
+
+            # Começa pelo termo mais raro; os demais só são consultados para
+            # os documentos candidatos (interseção sem percorrer listas grandes)
+            expanded.sort(key=lambda variants: sum(len(postings) for postings, _ in variants))
+            docs = self._docs
+            # norm = k1 * (1 - b + b * tamanho / média) = base + scale * tamanho
+            base = self.k1 * (1 - self.b)
+            scale = self.k1 * self.b / avg_length
+
+            results = {}
+            for postings, factor in expanded[0]:
+                for doc_id, frequency in postings.items():
+                    score = factor * frequency / (frequency + base + scale * docs[doc_id][0])
+                    if score > results.get(doc_id, 0.0):
+                        results[doc_id] = score
+
+            for variants in expanded[1:]:
+                narrowed = {}
+                for doc_id, total in results.items():
+                    best = 0.0
+                    for postings, factor in variants:
+                        frequency = postings.get(doc_id)
+                        if frequency is not None:
+                            score = factor * frequency / (frequency + base + scale * docs[doc_id][0])
+                            if score > best:
+                                best = score
+                    if best:
+                        narrowed[doc_id] = total + best
+                results = narrowed
+                if not results:
+                    return 0, []
+
+            if filter_fn is not None:
+                results = {
+                    doc_id: score for doc_id, score in results.items()
+                    if filter_fn(docs[doc_id][2])
+                }
+
+        top = heapq.nlargest(offset + limit, results.items(), key=lambda item: (item[1], item[0]))
+        return len(results), top[offset:offset + limit]
@@ -0,0 +1,377 @@
+"""Serviço de busca de anúncios e jogos.
+
+Mantém dois índices invertidos em memória (anúncios ativos e jogos ativos),
+construídos a partir do MongoDB em uma thread de fundo e atualizados
+incrementalmente pelos serviços de anúncios e jogos através das funções
+index_ad/remove_ad/index_game/remove_game.
+
+A reconstrução nunca roda na requisição: as buscas usam o índice atual
+enquanto o novo é montado (antes da primeira construção elas retornam vazio
+com index_ready = False), e as atualizações recebidas durante a varredura
+são reaplicadas no índice novo antes da troca.
+
+Observação: o índice é local ao processo. Com vários workers, cada um mantém
+sua própria cópia; SEARCH_INDEX_REFRESH_SECONDS força a reconstrução
+periódica para que alterações feitas em outros processos apareçam.
+"""
+import logging
+import threading
+import time
+
+from bson import ObjectId
+from flask import current_app, has_app_context
+
+from app.db.mongo_client import db
+from app.services.search.search_index import InvertedIndex, fold_accents
+
+logger = logging.getLogger(__name__)
+
+VALID_AD_TYPES = ("venda", "troca", "procura")
+VALID_SEARCH_TYPES = ("all", "ads", "games")
+
+AD_PROJECTION = {
+    "title": 1, "description": 1, "platform": 1, "ad_type": 1, "status": 1,
+    "price_per_hour": 1, "game_id": 1, "desired_games": 1
+}
+GAME_PROJECTION = {"name": 1, "description": 1, "category": 1, "platform": 1, "is_active": 1}
+
+_state_lock = threading.Lock()
+_ads_index = InvertedIndex()
+_games_index = InvertedIndex()
+_game_names = {}
+_built_at = None
+_rebuilding = False
+_pending_updates = []
+_rebuild_timer = None
+_refresh_timer = None
+
+
+def _to_object_id(value):
+    if isinstance(value, ObjectId):
+        return value
+    try:
+        return ObjectId(value)
+    except Exception:
+        return None
+
+
+def _ad_document(ad, game_name=None):
+    """Monta os campos ponderados e os atributos de filtro de um anúncio."""
+    fields = [
+        (ad.get("title"), 3),
+        (game_name, 2),
+        (ad.get("description"), 1),
+        (ad.get("platform"), 1),
+        (ad.get("desired_games"), 1),
+    ]
+    attrs = {
+        "ad_type": ad.get("ad_type"),
+        "platform": fold_accents(ad.get("platform") or ""),
+        "price": ad.get("price_per_hour"),
+        "game_id": str(ad["game_id"]) if ad.get("game_id") else None,
+    }
+    return fields, attrs
+
+
+def _game_document(game):
+    """Monta os campos ponderados e os atributos de filtro de um jogo."""
+    fields = [
+        (game.get("name"), 3),
+        (game.get("category"), 1),
+        (game.get("description"), 1),
+    ]
+    attrs = {"platform": fold_accents(game.get("platform") or "")}
+    return fields, attrs
+
+
+def _apply_update(update, ads_index, games_index, game_names):
+    """Aplica uma atualização incremental ("ad"/"game", id, documento ou None)."""
+    kind, doc_id, doc = update
+    if kind == "ad":
+        if not doc or doc.get("status") != "active":
+            ads_index.remove(doc_id)
+            return
+        fields, attrs = _ad_document(doc, game_names.get(str(doc.get("game_id"))))
+        ads_index.add(doc_id, fields, attrs)
+    else:
+        if not doc:
+            games_index.remove(doc_id)
+            game_names.pop(doc_id, None)
+            return
+        game_names[doc_id] = doc.get("name", "")
+        if doc.get("is_active", True):
+            fields, attrs = _game_document(doc)
+            games_index.add(doc_id, fields, attrs)
+        else:
+            games_index.remove(doc_id)
+
+
+def _record_update(update):
+    """Aplica a atualização no índice atual e a guarda se houver reconstrução em andamento."""
+    with _state_lock:
+        if _built_at is not None:
+            _apply_update(update, _ads_index, _games_index, _game_names)
+        if _rebuilding:
+            _pending_updates.append(update)
+
+
+def rebuild_index():
+    """Reconstrói os índices a partir do banco e substitui os atuais.
+
+    As buscas continuam usando o índice atual durante a varredura. As
+    atualizações incrementais recebidas nesse meio-tempo são reaplicadas no
+    índice novo antes da troca.
+
+    Returns:
+        bool: False se já havia uma reconstrução em andamento.
+    """
+    global _ads_index, _games_index, _game_names, _built_at, _rebuilding, _pending_updates
+
+    with _state_lock:
+        if _rebuilding:
+            return False
+        _rebuilding = True
+        _pending_updates = []
+
+    try:
+        started = time.time()
+        ads_index = InvertedIndex()
+        games_index = InvertedIndex()
+        game_names = {}
+
+        for game in db.games.find({}, GAME_PROJECTION):
+            game_id = str(game["_id"])
+            game_names[game_id] = game.get("name", "")
+            if game.get("is_active", True):
+                fields, attrs = _game_document(game)
+                games_index.add(game_id, fields, attrs)
+
+        for ad in db.ads.find({"status": "active"}, AD_PROJECTION).batch_size(1000):
+            game_name = game_names.get(str(ad.get("game_id")))
+            fields, attrs = _ad_document(ad, game_name)
+            ads_index.add(str(ad["_id"]), fields, attrs)
+
+        with _state_lock:
+            replayed = len(_pending_updates)
+            for update in _pending_updates:
+                _apply_update(update, ads_index, games_index, game_names)
+            _ads_index = ads_index
+            _games_index = games_index
+            _game_names = game_names
+            _built_at = time.time()
+    finally:
+        with _state_lock:
+            _rebuilding = False
+            _pending_updates = []
+
+    logger.info(
+        f"Índice de busca reconstruído: {len(ads_index)} anúncios, "
+        f"{len(games_index)} jogos em {time.time() - started:.2f}s "
+        f"({replayed} atualizações reaplicadas)"
+    )
+    return True
+
+
+def _run_rebuild():
+    try:
+        rebuild_index()
+    except Exception as e:
+        logger.error(f"Erro ao reconstruir índice de busca: {e}")
+
+
+def schedule_rebuild(delay_seconds=0):
+    """Agenda uma reconstrução em segundo plano (ignorada se já houver uma pendente)."""
+    global _rebuild_timer
+
+    with _state_lock:
+        if _rebuilding or (_rebuild_timer is not None and _rebuild_timer.is_alive()):
+            return False
+        _rebuild_timer = threading.Timer(delay_seconds, _run_rebuild)
+        _rebuild_timer.daemon = True
+        _rebuild_timer.start()
+    return True
+
+
+def ensure_index():
+    """Agenda a reconstrução se o índice não existe ou está vencido, sem bloquear a busca."""
+    refresh_seconds = 0
+    if has_app_context():
+        refresh_seconds = current_app.config.get("SEARCH_INDEX_REFRESH_SECONDS", 0)
+
+    if _built_at is None or (refresh_seconds and time.time() - _built_at > refresh_seconds):
+        schedule_rebuild()
+
+
+def start_search_index_job(interval_seconds):
+    """Constrói o índice logo após a inicialização e o reconstrói a cada intervalo (em segundos)."""
+    global _refresh_timer
+
+    schedule_rebuild()
+    if interval_seconds <= 0 or _refresh_timer is not None:
+        return
+
+    def run():
+        global _refresh_timer
+        _run_rebuild()
+        _refresh_timer = threading.Timer(interval_seconds, run)
+        _refresh_timer.daemon = True
+        _refresh_timer.start()
+
+    _refresh_timer = threading.Timer(interval_seconds, run)
+    _refresh_timer.daemon = True
+    _refresh_timer.start()
+
+
+def _is_built():
+    return _built_at is not None
+
+
+def _accepts_updates():
+    return _built_at is not None or _rebuilding
+
+
+def index_ad(ad_id, ad=None):
+    """Atualiza o anúncio no índice (remove se não estiver mais ativo).
+
+    Se o documento não for informado, ele é buscado no banco.
+    """
+    if not _accepts_updates():
+        return
+    try:
+        if ad is None:
+            ad = db.ads.find_one({"_id": _to_object_id(ad_id)}, AD_PROJECTION)
+        _record_update(("ad", str(ad_id), ad))
+    except Exception as e:
+        logger.error(f"Erro ao indexar anúncio {ad_id}: {e}")
+
+
+def remove_ad(ad_id):
+    """Remove o anúncio do índice."""
+    if _accepts_updates():
+        _record_update(("ad", str(ad_id), None))
+
+
+def index_game(game_id, game=None):
+    """Atualiza o jogo no índice e reindexa seus anúncios se o nome mudou."""
+    if not _accepts_updates():
+        return
+    try:
+        game_id = str(game_id)
+        if game is None:
+            game = db.games.find_one({"_id": _to_object_id(game_id)}, GAME_PROJECTION)
+
+        previous_name = _game_names.get(game_id)
+        _record_update(("game", game_id, game))
+
+        if game and previous_name is not None and previous_name != game.get("name", ""):
+            for ad in db.ads.find({"game_id": _to_object_id(game_id), "status": "active"}, AD_PROJECTION):
+                index_ad(ad["_id"], ad)
+    except Exception as e:
+        logger.error(f"Erro ao indexar jogo {game_id}: {e}")
+
+
+def remove_game(game_id):
+    """Remove o jogo do índice."""
+    if _accepts_updates():
+        _record_update(("game", str(game_id), None))
+
+
+def _build_ad_filter(filters):
+    """Cria a função de filtro dos anúncios a partir dos parâmetros da busca."""
+    platform = fold_accents(filters.get("platform") or "")
+    ad_type = filters.get("ad_type")
+    game_id = filters.get("game_id")
+    min_price = filters.get("min_price")
+    max_price = filters.get("max_price")
+
+    if not any([platform, ad_type, game_id, min_price is not None, max_price is not None]):
+        return None
+
+    def matches(attrs):
+        if platform and attrs.get("platform") != platform:
+            return False
+        if ad_type and attrs.get("ad_type") != ad_type:
+            return False
+        if game_id and attrs.get("game_id") != game_id:
+            return False
+        if min_price is not None or max_price is not None:
+            price = attrs.get("price")
+            if price is None:
+                return False
+            if min_price is not None and price < min_price:
+                return False
+            if max_price is not None and price > max_price:
+                return False
+        return True
+
+    return matches
+
+
+def search_catalog(query, search_type="all", filters=None, page=1, limit=20, current_user_id=None):
+    """Busca anúncios e jogos ranqueados por BM25.
+
+    Args:
+        query (str): Texto da busca.
+        search_type (str): "all", "ads" ou "games".
+        filters (dict): platform, ad_type, game_id, min_price, max_price.
+        page (int): Página (começa em 1).
+        limit (int): Resultados por página.
+        current_user_id (str): Usuário que está buscando (favoritos/carrinho).
+    """
+    try:
+        from app.services.ad.ad_service import hydrate_ads
+
+        filters = filters or {}
+        offset = (page - 1) * limit
+        ensure_index()
+
+        result = {"success": True, "query": query, "page": page, "limit": limit, "index_ready": _is_built()}
+
+        if search_type in ("all", "ads"):
+            total_ads, hits = _ads_index.search(
+                query, filter_fn=_build_ad_filter(filters), limit=limit, offset=offset
+            )
+            ads = []
+            if hits:
+                ad_ids = [ObjectId(doc_id) for doc_id, _ in hits]
+                ads_by_id = {ad["_id"]: ad for ad in db.ads.find({"_id": {"$in": ad_ids}})}
+                ordered = [ads_by_id[ad_id] for ad_id in ad_ids if ad_id in ads_by_id]
+                ads = hydrate_ads(ordered, current_user_id=current_user_id)
+            result["ads"] = ads
+            result["total_ads"] = total_ads
+
+        if search_type in ("all", "games"):
+            platform = fold_accents(filters.get("platform") or "")
+            game_filter = (lambda attrs: attrs.get("platform") == platform) if platform else None
+            total_games, hits = _games_index.search(
+                query, filter_fn=game_filter, limit=limit, offset=offset
+            )
+            games = []
+            if hits:
+                game_ids = [ObjectId(doc_id) for doc_id, _ in hits]
+                games_by_id = {game["_id"]: game for game in db.games.find({"_id": {"$in": game_ids}})}
+                for game_id in game_ids:
+                    game = games_by_id.get(game_id)
+                    if game:
+                        game["_id"] = str(game["_id"])
+                        games.append(game)
+            result["games"] = games
+            result["total_games"] = total_games
+
+        return result
+
+    except Exception as e:
+        logger.error(f"Erro na busca: {e}")
+        return {"success": False, "message": f"Erro ao realizar busca: {str(e)}"}
+
+
+def get_index_stats():
+    """Retorna o tamanho dos índices e quando foram construídos."""
+    return {
+        "built": _is_built(),
+        "built_at": _built_at,
+        "rebuilding": _rebuilding,
+        "pending_updates": len(_pending_updates),
+        "ads_indexed": len(_ads_index),
+        "games_indexed": len(_games_index),
+    }
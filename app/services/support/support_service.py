@@ -1,6 +1,9 @@
 from datetime import datetime
 from bson import ObjectId
 from app.db.mongo_client import db
+from app.services.search import search_service
+from app.services.upload import blob_store
+from app.utils.helpers.pagination import pipeline_stages, page_result
 from app.models.support_ticket.schema import (
     SupportTicket, SupportTicketCreate, SupportTicketUpdate,
     SellerRating, SellerRatingCreate, GameCategory, GameCategoryCreate, GameCategoryUpdate
@@ -251,7 +254,8 @@ class SupportService:
             return None
     
     @staticmethod
-    def get_all_tickets(page=1, limit=10, status=None, category=None, priority=None):
+    def get_all_tickets(page=1, limit=10, status=None, category=None, priority=None, cursor=None):
+        """Lista tickets (paginação por cursor; page é usado apenas sem cursor)."""
         query = {}
         if status:
             query["status"] = status
@@ -262,8 +266,8 @@ class SupportService:
         
         skip = (page - 1) * limit
         
-        pipeline = [
-            {"$match": query},
+        # Paginação antes do $lookup: só os tickets da página são enriquecidos
+        pipeline = pipeline_stages(query, limit, cursor=cursor, skip=skip) + [
             # Converter user_id para ObjectId se for string
             {"$addFields": {
                 "user_id_object": {
@@ -287,12 +291,10 @@ class SupportService:
                 "as": "user"
             }},
             {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
-            {"$sort": {"created_at": -1}},
-            {"$skip": skip},
-            {"$limit": limit}
+            {"$sort": {"created_at": -1, "_id": -1}}
         ]
         
-        tickets = list(db.support_tickets.aggregate(pipeline))
+        tickets, next_cursor = page_result(list(db.support_tickets.aggregate(pipeline)), limit)
         total = db.support_tickets.count_documents(query)
         
         for ticket in tickets:
@@ -309,7 +311,8 @@ class SupportService:
             "total": total,
             "page": page,
             "limit": limit,
-            "total_pages": (total + limit - 1) // limit
+            "total_pages": (total + limit - 1) // limit,
+            "next_cursor": next_cursor
         }
         
         # Converter todos os ObjectIds recursivamente
@@ -358,11 +361,15 @@ class SupportService:
             "category": data.get("category", ""),
             "platform": data.get("platform", "PC"),
             "is_active": True,
+            "ads_count": 0,
+            "active_ads_count": 0,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
         
         result = db.games.insert_one(game)
+        search_service.index_game(result.inserted_id, game)
+        blob_store.acquire(game["image_url"])
         game["_id"] = str(result.inserted_id)
         
         return game
@@ -386,6 +393,8 @@ class SupportService:
         
         update_fields["updated_at"] = datetime.utcnow()
         
+        previous = db.games.find_one({"_id": ObjectId(game_id)}, {"image_url": 1}) if "image_url" in update_fields else None
+        
         result = db.games.find_one_and_update(
             {"_id": ObjectId(game_id)},
             {"$set": update_fields},
@@ -393,6 +402,9 @@ class SupportService:
         )
         
         if result:
+            if previous is not None:
+                blob_store.swap_reference(previous.get("image_url"), update_fields["image_url"])
+            search_service.index_game(game_id, result)
             result["_id"] = str(result["_id"])
         
         return result
@@ -403,6 +415,7 @@ class SupportService:
             {"_id": ObjectId(game_id)},
             {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
         )
+        search_service.index_game(game_id)
     
     @staticmethod
     def get_all_categories():
@@ -0,0 +1,377 @@
+"""Armazenamento endereçado por conteúdo dos uploads.
+
+Cada upload é gravado como uploads/<categoria>/<sha256>.<ext>: reenviar a
+mesma imagem (a mesma capa em dezenas de anúncios) reaproveita o arquivo e
+as variantes já geradas em vez de gravar e redimensionar tudo de novo.
+
+A coleção upload_blobs guarda um documento por arquivo (_id
+"<categoria>/<arquivo>") com ref_count: quantos anúncios (image_url),
+perfis (profile_pic), jogos (image_url/cover_url), pedidos e itens de
+carrinho (ad_snapshot.image_url, a imagem do anúncio na compra) apontam
+para ele. Os serviços chamam acquire/release/swap_reference ao gravar esses
+campos (itens de carrinho expirados pelo TTL não liberam a referência:
+a contagem fica maior, nunca menor, até a próxima reconciliação), e
+reconcile_blob_refcounts recalcula tudo a partir das coleções (a contagem
+incremental é só uma aproximação entre uma varredura e outra).
+
+collect_garbage remove, em lotes, os arquivos sem referência há mais de
+UPLOAD_GC_GRACE_SECONDS (o período de carência cobre o intervalo entre o
+upload e a criação do anúncio). Arquivos que não seguem os padrões de nome
+gerados pelo upload (placeholders, imagens de jogos versionadas) nunca são
+coletados. Os arquivos são removidos pelo backend de armazenamento ativo
+(disco local ou bucket S3).
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_FOLDER = "uploads"
+CATEGORIES = ("ads", "profiles", "games")
+VARIANT_NAMES = ("thumbnail", "medium", "large")
+ALTERNATE_FORMATS = ("webp", "avif")
+
+# Campos que referenciam uploads, por coleção
+REFERENCE_FIELDS = {
+    "ads": ["image_url"],
+    "users": ["profile_pic"],
+    "games": ["image_url", "cover_url"],
+    # Snapshots do anúncio: o histórico de pedidos e o carrinho continuam
+    # mostrando a imagem depois que o anúncio é removido ou troca de imagem
+    "orders": ["ad_snapshot.image_url"],
+    "cart": ["ad_snapshot.image_url"],
+}
+
+# URL (ou caminho) de um upload: .../api/upload/<categoria>[/<variante>]/<arquivo>
+_URL_PATTERN = re.compile(
+    r"/(?:api/upload|uploads)/(ads|profiles|games)/(?:(?:thumbnail|medium|large)/)?([^/?#]+)$"
+)
+# Nomes gerados pelo upload (sha256 atual e o formato antigo com uuid)
+_BLOB_NAME = re.compile(r"^[0-9a-f]{64}\.\w+$")
+_LEGACY_NAME = re.compile(r"^(ads|profiles|games)_[0-9a-f]{32}_\d+\.\w+$")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_gc_timer = None
+
+
+def _collection():
+    from app.db.mongo_client import db
+    return db.upload_blobs
+
+
+def blob_id(category, filename):
+    return f"{category}/{filename}"
+
+
+def blob_filename(digest, ext):
+    return f"{digest}.{ext}"
+
+
+def hash_stream(stream):
+    """sha256 e tamanho do conteúdo (lido em blocos; a posição é restaurada)."""
+    position = stream.tell()
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(position)
+    return digest.hexdigest(), size
+
+
+def parse_upload_url(url):
+    """(categoria, arquivo) de uma URL de upload, ou None se não for um upload local."""
+    if not url or not isinstance(url, str):
+        return None
+    match = _URL_PATTERN.search(url.split("?", 1)[0])
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+def is_collectable_name(filename):
+    return bool(_BLOB_NAME.match(filename) or _LEGACY_NAME.match(filename))
+
+
+def blob_files(category, filename):
+    """Chaves do original, das variantes e dos formatos alternativos de um arquivo."""
+    files = [f"{category}/{filename}"]
+    for size_name in VARIANT_NAMES:
+        variant = f"{category}/{size_name}/{filename}"
+        files.append(variant)
+        files.extend(f"{variant}.{fmt}" for fmt in ALTERNATE_FORMATS)
+    return files
+
+
+def remove_blob_files(category, filename):
+    """Remove do armazenamento todas as versões de um arquivo. Retorna quantas foram removidas."""
+    from app.services.upload.storage import get_storage
+    return get_storage().delete(blob_files(category, filename))
+
+
+# ---------------------------------------------------------------- registro
+
+def register_blob(category, filename, digest, size_bytes):
+    """Registra um upload. Retorna True se o mesmo conteúdo já estava armazenado.
+
+    Um conteúdo reenviado sem referências tem a carência renovada, para não ser
+    coletado entre o upload e a gravação do anúncio.
+    """
+    now = datetime.utcnow()
+    before = _collection().find_one_and_update(
+        {"_id": blob_id(category, filename)},
+        [
+            {"$set": {
+                "category": category,
+                "filename": filename,
+                "sha256": digest,
+                "size_bytes": size_bytes,
+                "ref_count": {"$ifNull": ["$ref_count", 0]},
+                "created_at": {"$ifNull": ["$created_at", now]},
+                "last_uploaded_at": now,
+                "upload_count": {"$add": [{"$ifNull": ["$upload_count", 0]}, 1]}
+            }},
+            {"$set": {
+                "unreferenced_since": {"$cond": [{"$gt": ["$ref_count", 0]}, None, now]}
+            }}
+        ],
+        upsert=True
+    )
+    return before is not None
+
+
+def _adjust(url, delta):
+    parsed = parse_upload_url(url)
+    if not parsed:
+        return
+    try:
+        _collection().update_one(
+            {"_id": blob_id(*parsed)},
+            [
+                {"$set": {"ref_count": {"$max": [0, {"$add": ["$ref_count", delta]}]}}},
+                {"$set": {"unreferenced_since": {"$cond": [
+                    {"$gt": ["$ref_count", 0]},
+                    None,
+                    {"$ifNull": ["$unreferenced_since", "$$NOW"]}
+                ]}}}
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Erro ao ajustar referências de {url}: {e}")
+
+
+def acquire(url):
+    """Uma entidade passou a apontar para o upload."""
+    _adjust(url, 1)
+
+
+def release(url):
+    """Uma entidade deixou de apontar para o upload."""
+    _adjust(url, -1)
+
+
+def swap_reference(old_url, new_url):
+    """Troca de imagem em um campo (anúncio, perfil ou jogo)."""
+    if old_url == new_url:
+        return
+    release(old_url)
+    acquire(new_url)
+
+
+def claim_unreferenced(category, filename, grace_cutoff=None):
+    """Remove o registro de um arquivo sem referências (quem remove apaga os arquivos).
+
+    Arquivos sem registro (anteriores a este armazenamento) também podem ser
+    apagados. Retorna False se o arquivo ainda for usado por alguém.
+    """
+    query = {"_id": blob_id(category, filename), "ref_count": {"$lte": 0}}
+    if grace_cutoff is not None:
+        query["unreferenced_since"] = {"$lt": grace_cutoff}
+
+    if _collection().delete_one(query).deleted_count:
+        return True
+    return _collection().count_documents({"_id": blob_id(category, filename)}, limit=1) == 0
+
+
+# ---------------------------------------------------------------- reconciliação
+
+def count_references():
+    """Referências atuais por arquivo, contadas nas coleções de origem."""
+    from app.db.mongo_client import db
+
+    counts = {}
+    for collection_name, fields in REFERENCE_FIELDS.items():
+        for field in fields:
+            rows = db[collection_name].aggregate([
+                {"$match": {field: {"$type": "string", "$ne": ""}}},
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+            ])
+            for row in rows:
+                parsed = parse_upload_url(row["_id"])
+                if parsed:
+                    key = blob_id(*parsed)
+                    counts[key] = counts.get(key, 0) + row["count"]
+    return counts
+
+
+def _register_legacy_files(known_ids, upload_folder):
+    """Registra arquivos gerados antes deste armazenamento (nomes com uuid, só em disco local)."""
+    now = datetime.utcnow()
+    documents = []
+    for category in CATEGORIES:
+        category_path = os.path.join(upload_folder, category)
+        if not os.path.isdir(category_path):
+            continue
+        for filename in os.listdir(category_path):
+            if blob_id(category, filename) in known_ids or not _LEGACY_NAME.match(filename):
+                continue
+            path = os.path.join(category_path, filename)
+            if not os.path.isfile(path):
+                continue
+            documents.append({
+                "_id": blob_id(category, filename),
+                "category": category,
+                "filename": filename,
+                "sha256": None,
+                "size_bytes": os.path.getsize(path),
+                "ref_count": 0,
+                "legacy": True,
+                "created_at": now,
+                "unreferenced_since": now
+            })
+    if documents:
+        _collection().insert_many(documents, ordered=False)
+    return len(documents)
+
+
+def reconcile_blob_refcounts(upload_folder=UPLOAD_FOLDER):
+    """Recalcula ref_count de todos os arquivos a partir das coleções em REFERENCE_FIELDS."""
+    try:
+        counts = count_references()
+        known = {blob["_id"]: blob.get("ref_count", 0) for blob in _collection().find({}, {"ref_count": 1})}
+        legacy_registered = _register_legacy_files(set(known), upload_folder)
+
+        operations = []
+        for key, current in known.items():
+            expected = counts.get(key, 0)
+            if current == expected:
+                continue
+            operations.append(UpdateOne({"_id": key}, [{"$set": {
+                "ref_count": expected,
+                "unreferenced_since": {"$cond": [
+                    {"$gt": [expected, 0]}, None, {"$ifNull": ["$unreferenced_since", "$$NOW"]}
+                ]}
+            }}]))
+        # Arquivos legados recém-registrados que ainda são usados
+        for key in counts:
+            if key not in known:
+                operations.append(UpdateOne(
+                    {"_id": key},
+                    {"$set": {"ref_count": counts[key], "unreferenced_since": None}}
+                ))
+
+        if operations:
+            _collection().bulk_write(operations, ordered=False)
+            logger.info(f"Referências de uploads corrigidas em {len(operations)} arquivos")
+
+        return {
+            "success": True,
+            "blobs_checked": len(known),
+            "blobs_fixed": len(operations),
+            "legacy_registered": legacy_registered
+        }
+
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar referências de uploads: {e}")
+        return {"success": False, "message": f"Erro ao reconciliar referências: {str(e)}"}
+
+
+def collect_garbage(grace_seconds=86400, batch_size=200, max_batches=10):
+    """Apaga, em lotes, arquivos sem referência há mais que a carência."""
+    from app.services.upload.image_pipeline import delete_manifest
+
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        query = {"ref_count": {"$lte": 0}, "unreferenced_since": {"$lt": cutoff}}
+        collected, files_removed, bytes_freed = 0, 0, 0
+
+        for _batch in range(max_batches):
+            candidates = list(_collection().find(query, {"category": 1, "filename": 1, "size_bytes": 1})
+                              .sort("unreferenced_since", 1).limit(batch_size))
+            if not candidates:
+                break
+
+            for blob in candidates:
+                category, filename = blob["category"], blob["filename"]
+                if not is_collectable_name(filename):
+                    continue
+                # A remoção do registro é a "trava": um reupload no meio renova a carência
+                if not _collection().delete_one({**query, "_id": blob["_id"]}).deleted_count:
+                    continue
+                files_removed += remove_blob_files(category, filename)
+                delete_manifest(category, filename)
+                bytes_freed += blob.get("size_bytes") or 0
+                collected += 1
+
+            if len(candidates) < batch_size:
+                break
+
+        if collected:
+            logger.info(f"Coleta de uploads: {collected} arquivos ({files_removed} versões) removidos")
+
+        return {
+            "success": True,
+            "collected": collected,
+            "files_removed": files_removed,
+            "bytes_freed": bytes_freed
+        }
+
+    except Exception as e:
+        logger.error(f"Erro na coleta de uploads sem referência: {e}")
+        return {"success": False, "message": f"Erro na coleta de uploads: {str(e)}"}
+
+
+def get_blob_stats():
+    """Totais do armazenamento: arquivos únicos, bytes, uploads e sem referência."""
+    rows = list(_collection().aggregate([
+        {"$group": {
+            "_id": "$category",
+            "blobs": {"$sum": 1},
+            "bytes": {"$sum": {"$ifNull": ["$size_bytes", 0]}},
+            "uploads": {"$sum": {"$ifNull": ["$upload_count", 1]}},
+            "references": {"$sum": "$ref_count"},
+            "unreferenced": {"$sum": {"$cond": [{"$lte": ["$ref_count", 0]}, 1, 0]}}
+        }}
+    ]))
+    return {row.pop("_id"): row for row in rows}
+
+
+def start_gc_job(interval_seconds, grace_seconds=86400, batch_size=200):
+    """Reconciliação + coleta em segundo plano a cada intervalo (em segundos)."""
+    global _gc_timer
+
+    if interval_seconds <= 0 or _gc_timer is not None:
+        return
+
+    def run():
+        global _gc_timer
+        # A coleta só confia em ref_count recém-recalculado
+        if reconcile_blob_refcounts().get("success"):
+            collect_garbage(grace_seconds, batch_size)
+        _gc_timer = threading.Timer(interval_seconds, run)
+        _gc_timer.daemon = True
+        _gc_timer.start()
+
+    _gc_timer = threading.Timer(60, run)
+    _gc_timer.daemon = True
+    _gc_timer.start()
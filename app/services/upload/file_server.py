@@ -0,0 +1,230 @@
+"""Entrega dos arquivos de /api/upload/<path> com cache HTTP.
+
+- Arquivos com nome único (sha256 ou o formato antigo com uuid) nunca mudam
+  de conteúdo: recebem Cache-Control immutable de um ano e ETag forte. Para
+  nomes sha256 a ETag vem do próprio nome, então um If-None-Match do formato
+  preferido é respondido com 304 sem tocar no disco.
+- Range e If-None-Match/If-Modified-Since são tratados pelo send_file.
+- Placeholders (imagem padrão de anúncio/perfil/jogo) ficam em memória.
+- Com UPLOAD_ACCEL_REDIRECT_PREFIX a transferência é entregue ao nginx via
+  X-Accel-Redirect; com USE_X_SENDFILE (opção do Flask) o send_file responde
+  com X-Sendfile. Em ambos o Python só decide qual arquivo servir.
+- Com armazenamento S3 a resposta é um redirect para o bucket (URL pública
+  ou GET pré-assinado); o formato da variante é escolhido pelo manifesto,
+  sem consultar o bucket.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response, current_app, request, send_file, abort
+
+from app.services.upload.blob_store import VARIANT_NAMES, is_collectable_name
+from app.services.upload.storage import get_storage
+
+IMMUTABLE_MAX_AGE = 31536000
+DEFAULT_MAX_AGE = 3600
+PLACEHOLDER_MAX_AGE = 60
+# Redirects para o bucket (URLs pré-assinadas expiram)
+REDIRECT_MAX_AGE = 300
+
+# Formatos alternativos das variantes, em ordem de preferência
+MODERN_FORMATS = [("avif", "image/avif"), ("webp", "image/webp")]
+
+PLACEHOLDERS = {
+    "profiles": "profiles/medium/no-user-image.jpg",
+    "ads": "ads/medium/no-ads-image.jpg",
+    "games": "games/medium/valorant.jpg",
+}
+
+_SHA256_NAME = re.compile(r"^([0-9a-f]{64})\.\w+$")
+_UNIQUE_NAME = re.compile(r"^(?:[0-9a-f]{64}|(?:ads|profiles|games)_[0-9a-f]{32}_\d+)\.\w+$")
+
+
+def accepts(mimetype):
+    """O cliente lista o tipo explicitamente no Accept (curingas não contam)."""
+    return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+class PlaceholderCache:
+    """Conteúdo das imagens padrão em memória (carregado uma vez por processo)."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, upload_folder, relative_path):
+        key = (upload_folder, relative_path)
+        entry = self._entries.get(key)
+        if entry is None:
+            path = os.path.join(upload_folder, relative_path)
+            if not os.path.isfile(path):
+                return None
+            with open(path, "rb") as handle:
+                data = handle.read()
+            entry = {
+                "data": data,
+                "etag": hashlib.sha256(data).hexdigest()[:32],
+                "mimetype": mimetypes.guess_type(path)[0] or "application/octet-stream"
+            }
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+placeholder_cache = PlaceholderCache()
+
+
+def _candidates(parts):
+    """Arquivos que podem atender o caminho, em ordem de preferência.
+
+    Returns:
+        list: [(caminho_relativo, mimetype, formato)]
+    """
+    relative = "/".join(parts)
+    if len(parts) != 3 or parts[1] not in VARIANT_NAMES:
+        return [(relative, None, None)]
+
+    candidates = [
+        (f"{relative}.{fmt}", mimetype, fmt)
+        for fmt, mimetype in MODERN_FORMATS
+        if accepts(mimetype)
+    ]
+    # Variantes são sempre JPEG, mesmo quando o nome termina em .png
+    candidates.append((relative, "image/jpeg", "jpeg"))
+    return candidates
+
+
+def _etag(parts, fmt):
+    """ETag derivada do nome para arquivos endereçados por conteúdo (ou None)."""
+    match = _SHA256_NAME.match(parts[-1])
+    if not match:
+        return None
+    variant = parts[1] if len(parts) == 3 else "original"
+    return f"{match.group(1)}-{variant}-{fmt or 'original'}"
+
+
+def _cache_control(immutable, max_age):
+    if immutable:
+        return f"public, max-age={max_age}, immutable"
+    return f"public, max-age={max_age}"
+
+
+def _not_modified(etag, headers):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers.update(headers)
+    return response
+
+
+def _send(upload_folder, relative, mimetype, etag, headers):
+    accel_prefix = current_app.config.get("UPLOAD_ACCEL_REDIRECT_PREFIX")
+    path = os.path.join(upload_folder, relative)
+
+    if accel_prefix:
+        # O nginx lê o arquivo (e trata Range/condicionais); o Flask só aponta qual
+        response = Response(status=200)
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{relative}"
+        response.headers["Content-Type"] = mimetype or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if etag:
+            response.set_etag(etag)
+    else:
+        # send_file trata Range e condicionais; com USE_X_SENDFILE responde com X-Sendfile
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            etag=etag if etag else True,
+            conditional=True,
+            max_age=None
+        )
+
+    response.headers.update(headers)
+    return response
+
+
+def _redirect_key(parts, candidates):
+    """Chave servida pelo bucket: a variante no melhor formato pronto, ou o original."""
+    from app.services.upload.image_pipeline import get_manifest, STATUS_READY
+
+    if len(candidates) == 1:
+        return candidates[0][0], None
+
+    manifest = get_manifest(parts[0], parts[2])
+    variant = (manifest or {}).get("variants", {}).get(parts[1], {})
+    if variant.get("status") != STATUS_READY:
+        return f"{parts[0]}/{parts[2]}", None
+
+    formats = manifest.get("formats", ["jpeg"])
+    for relative, _mimetype, fmt in candidates:
+        if fmt in formats:
+            return relative, fmt
+    return candidates[-1][0], "jpeg"
+
+
+def _redirect(storage, parts, candidates, headers):
+    key, fmt = _redirect_key(parts, candidates)
+    response = Response(status=302)
+    response.headers["Location"] = storage.download_url(key)
+    response.headers.update(headers)
+    # Variante ainda em geração: sem cache (a URL passará a ter a variante)
+    final = fmt is not None or len(candidates) == 1
+    response.headers["Cache-Control"] = f"private, max-age={REDIRECT_MAX_AGE}" if final else "no-cache"
+    return response
+
+
+def serve_upload(filename):
+    """Resposta para /api/upload/<filename>."""
+    upload_folder = current_app.config.get("UPLOAD_FOLDER", "uploads")
+    max_age = current_app.config.get("UPLOAD_CACHE_MAX_AGE", IMMUTABLE_MAX_AGE)
+
+    parts = filename.split("/")
+    if any(part in ("", ".", "..") for part in parts):
+        abort(404)
+
+    is_variant = len(parts) == 3 and parts[1] in VARIANT_NAMES
+    immutable = bool(_UNIQUE_NAME.match(parts[-1]))
+    headers = {"Cache-Control": _cache_control(immutable, max_age if immutable else DEFAULT_MAX_AGE)}
+    if is_variant:
+        headers["Vary"] = "Accept"
+
+    candidates = _candidates(parts)
+
+    # 304 sem acesso ao disco: o cliente já tem o formato preferido deste conteúdo
+    preferred_etag = _etag(parts, candidates[0][2])
+    if preferred_etag and preferred_etag in request.if_none_match:
+        return _not_modified(preferred_etag, headers)
+
+    storage = get_storage()
+    if storage.name != "local" and is_collectable_name(parts[-1]):
+        return _redirect(storage, parts, candidates, headers)
+
+    for relative, mimetype, fmt in candidates:
+        if os.path.isfile(os.path.join(upload_folder, relative)):
+            return _send(upload_folder, relative, mimetype, _etag(parts, fmt), headers)
+
+    # Variante ainda em geração: o original, sem cache (a URL passará a ter a variante)
+    if is_variant:
+        original = f"{parts[0]}/{parts[2]}"
+        if os.path.isfile(os.path.join(upload_folder, original)):
+            fallback_headers = {"Cache-Control": "no-cache", "Vary": "Accept"}
+            return _send(upload_folder, original, None, None, fallback_headers)
+
+    # Imagem padrão baseada no tipo, servida da memória
+    placeholder = placeholder_cache.get(upload_folder, PLACEHOLDERS.get(parts[0], PLACEHOLDERS["ads"]))
+    if placeholder is None:
+        abort(404)
+
+    placeholder_headers = {"Cache-Control": _cache_control(False, PLACEHOLDER_MAX_AGE)}
+    if placeholder["etag"] in request.if_none_match:
+        return _not_modified(placeholder["etag"], placeholder_headers)
+
+    response = Response(placeholder["data"], mimetype=placeholder["mimetype"])
+    response.set_etag(placeholder["etag"])
+    response.headers.update(placeholder_headers)
+    return response.make_conditional(request)
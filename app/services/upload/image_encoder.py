@@ -0,0 +1,169 @@
+"""Codificação das variantes de imagem a partir de uma única decodificação.
+
+O original é decodificado uma vez, já reduzido: em JPEG o draft mode pede ao
+decoder uma escala 1/2, 1/4 ou 1/8 próxima da maior variante, e nos demais
+formatos reduce() faz a primeira redução inteira. Dessa imagem sai um
+intermediário no tamanho da maior variante, e todas as variantes são
+derivadas dele, da maior para a menor.
+
+Cada variante é gravada em JPEG (no caminho de sempre) e nos formatos
+modernos habilitados, com a extensão acrescentada ao nome
+(foto.jpg -> foto.jpg.webp, foto.jpg.avif). AVIF só é gerado quando o Pillow
+instalado tem o codec.
+
+Este módulo só depende do Pillow: roda nos processos do pool de
+image_pipeline sem carregar a aplicação.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+# Limite padrão de pixels do original (proteção contra decompression bombs)
+DEFAULT_MAX_PIXELS = 40_000_000
+
+JPEG_OPTIONS = {"quality": 85, "optimize": True, "progressive": True}
+FORMAT_OPTIONS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", {"quality": 60, "speed": 6}),
+}
+MIMETYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+}
+
+
+class ImageTooLargeError(ValueError):
+    """Imagem com mais pixels que o limite configurado."""
+
+
+def supported_formats(requested=("webp", "avif")):
+    """Formatos modernos pedidos que o Pillow instalado sabe gravar."""
+    Image.init()
+    return [fmt for fmt in requested if fmt in FORMAT_OPTIONS and FORMAT_OPTIONS[fmt][0] in Image.SAVE]
+
+
+def alternate_path(path, fmt):
+    """Caminho da variante em outro formato (foto.jpg -> foto.jpg.webp)."""
+    return f"{path}.{fmt}"
+
+
+def check_dimensions(size, max_pixels=DEFAULT_MAX_PIXELS):
+    width, height = size
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLargeError(f"Imagem com {width}x{height} pixels excede o limite de {max_pixels}")
+
+
+# Extensão gravada para cada formato detectado no upload
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+
+def read_image_header(stream, max_pixels=DEFAULT_MAX_PIXELS):
+    """Lê apenas o cabeçalho da imagem e valida tamanho (sem decodificar os pixels).
+
+    Returns:
+        tuple: ((largura, altura), formato do Pillow, ex. "JPEG")
+    """
+    position = stream.tell()
+    try:
+        with Image.open(stream) as img:
+            check_dimensions(img.size, max_pixels)
+            return img.size, img.format
+    finally:
+        stream.seek(position)
+
+
+def _decode(image_path, target, max_pixels):
+    """Abre o original já reduzido para algo próximo (e não menor) de target."""
+    with Image.open(image_path) as source:
+        check_dimensions(source.size, max_pixels)
+        if source.format == "JPEG":
+            # O decoder JPEG escala por 1/2, 1/4 ou 1/8 sem decodificar a resolução cheia
+            source.draft("RGB", target)
+        source.load()
+        img = ImageOps.exif_transpose(source)
+        if img is source:
+            # O arquivo é fechado ao sair do with
+            img = source.copy()
+
+    if img.mode not in ("RGB", "L"):
+        if img.mode in ("RGBA", "LA", "P"):
+            # Transparência vira fundo branco, como nas variantes JPEG de sempre
+            rgba = img.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            img = background
+        else:
+            img = img.convert("RGB")
+
+    # Redução inteira barata antes do LANCZOS (formatos sem draft mode)
+    factor = min(img.size[0] // max(target[0], 1), img.size[1] // max(target[1], 1)) // 2
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
+
+
+def _fit(img, size):
+    """Redimensiona mantendo proporção e centraliza em fundo branco do tamanho exato."""
+    fitted = img.copy()
+    fitted.thumbnail(size, Image.Resampling.LANCZOS)
+    if fitted.size == size and fitted.mode == "RGB":
+        return fitted
+
+    canvas = Image.new("RGB", size, (255, 255, 255))
+    canvas.paste(fitted.convert("RGB"), ((size[0] - fitted.size[0]) // 2, (size[1] - fitted.size[1]) // 2))
+    return canvas
+
+
+def _save(img, path, fmt):
+    # Grava em arquivo temporário e renomeia: quem serve nunca vê arquivo pela metade
+    tmp_path = f"{path}.tmp"
+    if fmt == "jpeg":
+        img.save(tmp_path, "JPEG", **JPEG_OPTIONS)
+    else:
+        pil_format, options = FORMAT_OPTIONS[fmt]
+        img.save(tmp_path, pil_format, **options)
+    os.replace(tmp_path, path)
+
+
+def encode_variants(image_path, outputs, formats=(), max_pixels=DEFAULT_MAX_PIXELS):
+    """Gera todas as variantes de uma imagem com uma única decodificação.
+
+    Args:
+        image_path: Caminho do original.
+        outputs: {nome: ((largura, altura), caminho_jpeg)}.
+        formats: Formatos adicionais ("webp", "avif"); os não suportados são ignorados.
+        max_pixels: Limite de pixels do original.
+
+    Returns:
+        dict: {nome: True/False}
+    """
+    if not outputs:
+        return {}
+
+    formats = supported_formats(formats)
+    largest = (max(size[0] for size, _ in outputs.values()), max(size[1] for size, _ in outputs.values()))
+
+    try:
+        img = _decode(image_path, largest, max_pixels)
+
+        # Intermediário compartilhado no tamanho da maior variante
+        intermediate = img.copy()
+        intermediate.thumbnail(largest, Image.Resampling.LANCZOS)
+    except Exception as e:
+        print(f"Erro ao decodificar imagem {image_path}: {e}")
+        return {name: False for name in outputs}
+
+    results = {}
+    ordered = sorted(outputs.items(), key=lambda item: item[1][0][0] * item[1][0][1], reverse=True)
+    for name, (size, output_path) in ordered:
+        try:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            variant = _fit(intermediate, tuple(size))
+            _save(variant, output_path, "jpeg")
+            for fmt in formats:
+                _save(variant, alternate_path(output_path, fmt), fmt)
+            results[name] = True
+        except Exception as e:
+            print(f"Erro ao gerar variante {name} de {image_path}: {e}")
+            results[name] = False
+    return results
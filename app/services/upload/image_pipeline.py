@@ -0,0 +1,385 @@
+"""Geração das variantes de imagem (thumbnail/medium/large) fora da requisição.
+
+O upload só grava o original e registra um manifesto na coleção
+upload_variants; as variantes são geradas em um pool de processos limitado
+(UPLOAD_PIPELINE_WORKERS processos, no máximo UPLOAD_PIPELINE_MAX_PENDING
+trabalhos na fila por worker web). Quando a fila está cheia o manifesto fica
+pendente e é reenfileirado pela varredura periódica, que também refaz
+trabalhos perdidos (processo reiniciado no meio da geração). Se um processo
+do pool morre (BrokenProcessPool), o pool é descartado e recriado no
+próximo envio.
+
+Enquanto uma variante não fica pronta, /api/upload/<path> serve o original.
+Com UPLOAD_PIPELINE_WORKERS = 0 as variantes são geradas na própria
+requisição (comportamento anterior).
+
+Originais e variantes são chaves do armazenamento ("ads/<arquivo>",
+"ads/medium/<arquivo>"); os processos do pool recebem a configuração do
+backend (storage_config) e leem/gravam nele diretamente.
+"""
+import contextlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from app.services.upload import image_encoder
+from app.services.upload.storage import get_storage, storage_config, storage_from_config
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+MAX_ATTEMPTS = 3
+
+_retry_timer = None
+
+
+def resize_image(image_path, size, output_path):
+    """Redimensiona imagem mantendo proporção (uma única variante, só JPEG)."""
+    return image_encoder.encode_variants(image_path, {"variant": (size, output_path)})["variant"]
+
+
+def generate_variants(original_key, outputs, formats=(), max_pixels=image_encoder.DEFAULT_MAX_PIXELS,
+                      storage_cfg=None):
+    """Gera as variantes de uma imagem (executado no processo do pool).
+
+    Args:
+        original_key: Chave do original no armazenamento.
+        outputs: {nome_da_variante: ((largura, altura), chave_de_saida)}.
+        formats: Formatos gravados além do JPEG ("webp", "avif").
+        max_pixels: Limite de pixels do original.
+        storage_cfg: Configuração do armazenamento (padrão: a do processo).
+
+    Returns:
+        dict: {nome_da_variante: True/False}
+    """
+    storage = storage_from_config(storage_cfg) if storage_cfg else get_storage()
+    with contextlib.ExitStack() as stack:
+        source = stack.enter_context(storage.local_copy(original_key))
+        paths = {
+            name: (size, stack.enter_context(storage.local_output(key)))
+            for name, (size, key) in outputs.items()
+        }
+        return image_encoder.encode_variants(source, paths, formats, max_pixels)
+
+
+def variant_files(key):
+    """Todas as chaves de uma variante (JPEG e formatos alternativos)."""
+    return [key] + [image_encoder.alternate_path(key, fmt) for fmt in image_encoder.FORMAT_OPTIONS]
+
+
+# ---------------------------------------------------------------- manifesto
+
+def _collection():
+    from app.db.mongo_client import db
+    return db.upload_variants
+
+
+def create_manifest(category, filename, original_key, outputs, urls):
+    """Registra o upload com todas as variantes pendentes. Retorna o _id ou None."""
+    now = datetime.utcnow()
+    try:
+        result = _collection().insert_one({
+            "category": category,
+            "filename": filename,
+            "original_key": original_key,
+            "outputs": {name: {"size": list(size), "key": key} for name, (size, key) in outputs.items()},
+            "formats": ["jpeg"] + image_encoder.supported_formats(image_pipeline.formats),
+            "status": STATUS_PENDING,
+            "queued": False,
+            "attempts": 0,
+            "variants": {name: {"status": STATUS_PENDING, "url": urls[name]} for name in outputs},
+            "created_at": now,
+            "updated_at": now
+        })
+        return result.inserted_id
+    except Exception as e:
+        logger.error(f"Erro ao registrar manifesto de {category}/{filename}: {e}")
+        return None
+
+
+def _key_from_path(path):
+    # Manifestos anteriores ao armazenamento plugável guardavam caminhos locais
+    parts = path.replace(os.sep, "/").split("/")
+    return "/".join(parts[parts.index("uploads") + 1:] if "uploads" in parts else parts[-3:])
+
+
+def _original_key(manifest):
+    return manifest.get("original_key") or _key_from_path(manifest["original_path"])
+
+
+def _outputs_from_manifest(manifest):
+    return {
+        name: (tuple(output["size"]), output.get("key") or _key_from_path(output["path"]))
+        for name, output in manifest.get("outputs", {}).items()
+    }
+
+
+def record_variant_results(manifest_id, outputs, results):
+    """Grava o resultado da geração no manifesto.
+
+    Se o manifesto foi removido enquanto as variantes eram geradas (imagem
+    apagada ou substituída), os arquivos recém-criados são descartados, a
+    não ser os de variantes que outro manifesto ativo usa (o mesmo conteúdo
+    enviado de novo gera as mesmas chaves).
+    """
+    if manifest_id is None:
+        return
+
+    update = {f"variants.{name}.status": STATUS_READY if ok else STATUS_FAILED for name, ok in results.items()}
+    if all(results.values()):
+        update["status"] = STATUS_READY
+        update["completed_at"] = datetime.utcnow()
+    update["queued"] = False
+    update["updated_at"] = datetime.utcnow()
+
+    try:
+        manifest = _collection().find_one_and_update({"_id": manifest_id}, {"$set": update})
+    except Exception as e:
+        logger.error(f"Erro ao atualizar manifesto {manifest_id}: {e}")
+        return
+
+    if manifest is None:
+        try:
+            orphaned = [key for name, (_size, key) in outputs.items() if not _key_in_live_manifest(name, key)]
+            if orphaned:
+                get_storage().delete([file_key for key in orphaned for file_key in variant_files(key)])
+        except Exception as e:
+            logger.warning(f"Não foi possível remover variantes descartadas do manifesto {manifest_id}: {e}")
+    elif not all(results.values()) and manifest.get("attempts", 0) >= MAX_ATTEMPTS:
+        _collection().update_one({"_id": manifest_id}, {"$set": {"status": STATUS_FAILED}})
+
+
+def _key_in_live_manifest(name, key):
+    """Se algum manifesto existente gera a variante `name` com esta chave."""
+    return _collection().find_one({f"outputs.{name}.key": key}, {"_id": 1}) is not None
+
+
+def get_manifest(category, filename):
+    return _collection().find_one({"category": category, "filename": filename})
+
+
+def delete_manifest(category, filename):
+    try:
+        _collection().delete_one({"category": category, "filename": filename})
+    except Exception as e:
+        logger.error(f"Erro ao remover manifesto de {category}/{filename}: {e}")
+
+
+def serialize_manifest(manifest):
+    """Formato público do manifesto (status por variante e URLs)."""
+    return {
+        "filename": manifest["filename"],
+        "category": manifest["category"],
+        "status": manifest["status"],
+        "formats": manifest.get("formats", ["jpeg"]),
+        "variants": manifest.get("variants", {}),
+        "created_at": manifest["created_at"].isoformat(),
+        "completed_at": manifest["completed_at"].isoformat() if manifest.get("completed_at") else None
+    }
+
+
+# ---------------------------------------------------------------- pool
+
+class ImagePipeline:
+    """Pool de processos limitado para a geração das variantes."""
+
+    def __init__(self, workers=2, max_pending=64, start_method="spawn",
+                 formats=("webp", "avif"), max_pixels=image_encoder.DEFAULT_MAX_PIXELS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.start_method = start_method
+        self.formats = tuple(formats)
+        self.max_pixels = max_pixels
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+
+    def configure(self, workers=None, max_pending=None, start_method=None, formats=None, max_pixels=None):
+        with self._lock:
+            if formats is not None:
+                self.formats = tuple(formats)
+            if max_pixels is not None:
+                self.max_pixels = max_pixels
+            if workers is not None:
+                self.workers = workers
+            if max_pending is not None:
+                self.max_pending = max_pending
+            if start_method is not None:
+                self.start_method = start_method
+
+    def _get_executor(self):
+        # Criado no primeiro upload, já dentro do processo do worker web
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._executor
+
+    def _discard_executor(self, executor):
+        """Descarta um pool quebrado (o próximo envio cria outro)."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.restarts += 1
+        logger.warning("Pool de variantes de imagem quebrado; será recriado")
+        executor.shutdown(wait=False)
+
+    def submit(self, manifest_id, original_key, outputs):
+        """Enfileira a geração das variantes.
+
+        Returns:
+            bool: False se a fila estiver cheia (o manifesto continua pendente
+            e será reenfileirado pela varredura).
+        """
+        if self.workers <= 0:
+            self._finish(manifest_id, outputs,
+                         generate_variants(original_key, outputs, self.formats, self.max_pixels))
+            return True
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                return False
+            self._pending += 1
+            self.submitted += 1
+            executor = self._get_executor()
+
+        _mark_queued(manifest_id)
+        args = (generate_variants, original_key, outputs, self.formats, self.max_pixels, storage_config())
+        try:
+            try:
+                future = executor.submit(*args)
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                with self._lock:
+                    executor = self._get_executor()
+                future = executor.submit(*args)
+        except Exception as e:
+            logger.error(f"Erro ao enfileirar variantes de {original_key}: {e}")
+            with self._lock:
+                self._pending -= 1
+            return False
+
+        future.add_done_callback(lambda done: self._on_done(manifest_id, outputs, done, executor))
+        return True
+
+    def _on_done(self, manifest_id, outputs, future, executor=None):
+        with self._lock:
+            self._pending -= 1
+        try:
+            results = future.result()
+        except BrokenProcessPool as e:
+            logger.error(f"Processo do pool de variantes morreu (manifesto {manifest_id}): {e}")
+            if executor is not None:
+                self._discard_executor(executor)
+            results = {name: False for name in outputs}
+        except Exception as e:
+            # A imagem derrubou o decoder ou a geração falhou
+            logger.error(f"Erro ao gerar variantes (manifesto {manifest_id}): {e}")
+            results = {name: False for name in outputs}
+        self._finish(manifest_id, outputs, results)
+
+    def _finish(self, manifest_id, outputs, results):
+        with self._lock:
+            if all(results.values()):
+                self.completed += 1
+            else:
+                self.failed += 1
+        record_variant_results(manifest_id, outputs, results)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "formats": ["jpeg"] + image_encoder.supported_formats(self.formats),
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "restarts": self.restarts
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+image_pipeline = ImagePipeline()
+
+
+def _mark_queued(manifest_id):
+    if manifest_id is None:
+        return
+    try:
+        _collection().update_one(
+            {"_id": manifest_id},
+            {"$set": {"queued": True, "updated_at": datetime.utcnow()}, "$inc": {"attempts": 1}}
+        )
+    except Exception as e:
+        logger.error(f"Erro ao marcar manifesto {manifest_id} como enfileirado: {e}")
+
+
+def retry_pending_variants(stale_seconds=600, limit=100):
+    """Reenfileira manifestos pendentes que não entraram na fila ou ficaram presos."""
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        query = {
+            "status": STATUS_PENDING,
+            "$or": [{"queued": False}, {"updated_at": {"$lt": cutoff}}]
+        }
+        requeued, failed = 0, 0
+        storage = get_storage()
+        for manifest in _collection().find(query).sort("created_at", 1).limit(limit):
+            original_key = _original_key(manifest)
+            if manifest.get("attempts", 0) >= MAX_ATTEMPTS or not storage.exists(original_key):
+                _collection().update_one({"_id": manifest["_id"]}, {"$set": {"status": STATUS_FAILED}})
+                failed += 1
+                continue
+            if not image_pipeline.submit(manifest["_id"], original_key, _outputs_from_manifest(manifest)):
+                break
+            requeued += 1
+
+        if requeued or failed:
+            logger.info(f"Variantes pendentes: {requeued} reenfileiradas, {failed} marcadas como falha")
+        return {"success": True, "requeued": requeued, "failed": failed}
+
+    except Exception as e:
+        logger.error(f"Erro ao reenfileirar variantes pendentes: {e}")
+        return {"success": False, "message": f"Erro ao reenfileirar variantes: {str(e)}"}
+
+
+def start_retry_job(interval_seconds, stale_seconds=600):
+    """Executa retry_pending_variants em segundo plano a cada intervalo (em segundos)."""
+    global _retry_timer
+
+    if interval_seconds <= 0 or _retry_timer is not None:
+        return
+
+    def run():
+        global _retry_timer
+        retry_pending_variants(stale_seconds)
+        _retry_timer = threading.Timer(interval_seconds, run)
+        _retry_timer.daemon = True
+        _retry_timer.start()
+
+    _retry_timer = threading.Timer(5, run)
+    _retry_timer.daemon = True
+    _retry_timer.start()
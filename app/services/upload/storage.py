@@ -0,0 +1,296 @@
+"""Backends de armazenamento dos uploads.
+
+Os arquivos são identificados por chaves relativas ("ads/<arquivo>",
+"ads/medium/<arquivo>") e gravados em:
+
+    - "local": pasta uploads/ do servidor (padrão, um único host)
+    - "s3": bucket S3 ou compatível (MinIO, LocalStack... via
+      UPLOAD_S3_ENDPOINT_URL), o que permite vários hosts e uploads direto
+      do navegador para o bucket com URLs de PUT pré-assinadas
+
+O backend é escolhido por UPLOAD_STORAGE_BACKEND. A configuração é um dict
+simples (storage_config) para que os processos do pool de variantes
+recriem o mesmo backend sem carregar a aplicação.
+"""
+import contextlib
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "http://127.0.0.1:5000/api/upload"
+
+
+class LocalStorage:
+    """Arquivos na pasta de uploads do próprio servidor."""
+
+    name = "local"
+    # Sem presigned_upload: o upload passa sempre pela aplicação
+    supports_presigned_upload = False
+
+    def __init__(self, root="uploads", base_url=DEFAULT_BASE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def save(self, key, stream, content_type=None):
+        """Grava o conteúdo em blocos (temporário + rename: nunca há arquivo pela metade)."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as handle:
+            shutil.copyfileobj(stream, handle, 1024 * 1024)
+        os.replace(tmp_path, path)
+
+    def save_file(self, key, local_path, content_type=None):
+        path = self.path(key)
+        if os.path.abspath(path) == os.path.abspath(local_path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(local_path, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except OSError:
+            return None
+
+    def delete(self, keys):
+        """Remove as chaves existentes. Retorna quantas foram removidas."""
+        removed = 0
+        for key in keys:
+            path = self.path(key)
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Não foi possível remover {path}: {e}")
+        return removed
+
+    @contextlib.contextmanager
+    def local_copy(self, key):
+        """Caminho local para leitura (no backend local, o próprio arquivo)."""
+        yield self.path(key)
+
+    @contextlib.contextmanager
+    def local_output(self, key):
+        """Caminho local para gravação (no backend local, o destino final)."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        yield path
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    def download_url(self, key):
+        """URL para o navegador baixar o arquivo sem passar pelo Flask (None: servir localmente)."""
+        return None
+
+
+class S3Storage:
+    """Bucket S3 (ou compatível). Requer boto3."""
+
+    name = "s3"
+    supports_presigned_upload = True
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, region=None,
+                 base_url=DEFAULT_BASE_URL, public_base_url=None, multipart_threshold=8 * 1024 * 1024):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.base_url = base_url.rstrip("/")
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        # Arquivos acima do limite são enviados em partes, sem carregar tudo em memória
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_threshold
+        )
+
+    def object_key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _extra_args(self, key, content_type):
+        content_type = content_type or mimetypes.guess_type(key)[0] or "application/octet-stream"
+        return {"ContentType": content_type, "CacheControl": "public, max-age=31536000, immutable"}
+
+    def save(self, key, stream, content_type=None):
+        self.client.upload_fileobj(
+            stream, self.bucket, self.object_key(key),
+            ExtraArgs=self._extra_args(key, content_type),
+            Config=self.transfer_config
+        )
+
+    def save_file(self, key, local_path, content_type=None):
+        self.client.upload_file(
+            local_path, self.bucket, self.object_key(key),
+            ExtraArgs=self._extra_args(key, content_type),
+            Config=self.transfer_config
+        )
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        return head["ContentLength"] if head else None
+
+    def delete(self, keys):
+        keys = list(keys)
+        removed = 0
+        # delete_objects aceita até 1000 chaves por chamada
+        for start in range(0, len(keys), 1000):
+            batch = keys[start:start + 1000]
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": self.object_key(key)} for key in batch], "Quiet": True}
+            )
+            removed += len(batch) - len(response.get("Errors", []))
+        return removed
+
+    @contextlib.contextmanager
+    def local_copy(self, key):
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self.object_key(key), path)
+            yield path
+        finally:
+            os.remove(path)
+
+    @contextlib.contextmanager
+    def local_output(self, key):
+        """Arquivo temporário enviado ao bucket ao sair do bloco.
+
+        Arquivos gravados ao lado dele (foto.jpg.webp, foto.jpg.avif) também
+        são enviados, com a chave correspondente.
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, os.path.basename(key))
+        prefix = key.rsplit("/", 1)[0] + "/" if "/" in key else ""
+        try:
+            yield path
+            for name in os.listdir(directory):
+                if not name.endswith(".tmp"):
+                    self.save_file(prefix + name, os.path.join(directory, name))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def url(self, key):
+        # URLs sempre pela aplicação: ela escolhe o formato e cai no original se a variante não existir
+        return f"{self.base_url}/{key}"
+
+    def download_url(self, key, expires_in=3600):
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self.object_key(key)}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.object_key(key)},
+            ExpiresIn=expires_in
+        )
+
+    def presigned_upload(self, key, content_type, checksum_sha256=None, expires_in=900):
+        """URL de PUT pré-assinada para o navegador enviar o arquivo direto ao bucket.
+
+        Com checksum_sha256 (base64) o bucket recusa conteúdo diferente do declarado.
+        """
+        params = {
+            "Bucket": self.bucket,
+            "Key": self.object_key(key),
+            "ContentType": content_type,
+            "CacheControl": "public, max-age=31536000, immutable"
+        }
+        headers = {
+            "Content-Type": content_type,
+            "Cache-Control": "public, max-age=31536000, immutable"
+        }
+        if checksum_sha256:
+            params["ChecksumSHA256"] = checksum_sha256
+            headers["x-amz-checksum-sha256"] = checksum_sha256
+
+        url = self.client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+        return {"method": "PUT", "url": url, "headers": headers, "expires_in": expires_in}
+
+
+# ---------------------------------------------------------------- configuração
+
+_config = {"backend": "local", "root": "uploads", "base_url": DEFAULT_BASE_URL}
+_storage = None
+_storage_config = None
+
+
+def storage_from_config(config):
+    """Cria o backend descrito por um dict de configuração (reaproveitado por processo)."""
+    global _storage, _storage_config
+
+    if _storage is not None and _storage_config == config:
+        return _storage
+
+    backend = config.get("backend", "local")
+    if backend == "local":
+        storage = LocalStorage(config.get("root", "uploads"), config.get("base_url", DEFAULT_BASE_URL))
+    elif backend == "s3":
+        if not config.get("bucket"):
+            raise ValueError("UPLOAD_S3_BUCKET é obrigatório com UPLOAD_STORAGE_BACKEND=s3")
+        storage = S3Storage(
+            bucket=config["bucket"],
+            prefix=config.get("prefix", ""),
+            endpoint_url=config.get("endpoint_url"),
+            region=config.get("region"),
+            base_url=config.get("base_url", DEFAULT_BASE_URL),
+            public_base_url=config.get("public_base_url")
+        )
+    else:
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+
+    _storage, _storage_config = storage, dict(config)
+    return storage
+
+
+def init_storage(app):
+    """Lê a configuração da aplicação e cria o backend deste processo."""
+    global _config
+
+    _config = {
+        "backend": app.config.get("UPLOAD_STORAGE_BACKEND", "local"),
+        "root": app.config.get("UPLOAD_FOLDER", "uploads"),
+        "base_url": app.config.get("UPLOAD_BASE_URL", DEFAULT_BASE_URL),
+        "bucket": app.config.get("UPLOAD_S3_BUCKET"),
+        "prefix": app.config.get("UPLOAD_S3_PREFIX", ""),
+        "endpoint_url": app.config.get("UPLOAD_S3_ENDPOINT_URL"),
+        "region": app.config.get("UPLOAD_S3_REGION"),
+        "public_base_url": app.config.get("UPLOAD_PUBLIC_BASE_URL")
+    }
+    return storage_from_config(_config)
+
+
+def storage_config():
+    """Configuração ativa (enviada aos processos do pool de variantes)."""
+    return dict(_config)
+
+
+def get_storage():
+    """Backend ativo (use em vez de guardar a instância)."""
+    return storage_from_config(_config)
@@ -1,11 +1,28 @@
+import base64
 import os
+import re
 import uuid
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from PIL import Image
+from app.services.upload import image_pipeline as pipeline
+from app.services.upload import blob_store
+from app.services.upload.image_encoder import read_image_header, ImageTooLargeError, EXTENSIONS
+from app.services.upload.storage import get_storage
+
+# Tipos aceitos no upload direto para o armazenamento e a extensão gravada
+DIRECT_UPLOAD_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp'
+}
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
 
 
 class UploadService:
+    # Variantes servidas em /api/upload/<categoria>/<variante>/<arquivo>
+    VARIANT_NAMES = blob_store.VARIANT_NAMES
+
     def __init__(self, app=None):
         self.app = app
         self.allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -16,13 +33,16 @@ class UploadService:
             'large': (1200, 900)
         }
 
-        # Configurações locais (para desenvolvimento)
-        self.upload_folder = 'uploads'
-        self.base_url = "http://127.0.0.1:5000/api/upload"
+        # Backend de armazenamento (UPLOAD_STORAGE_BACKEND) e URL pública (UPLOAD_BASE_URL)
+        self.storage = get_storage()
+        self.upload_folder = getattr(self.storage, 'root', 'uploads')
+        self.base_url = self.storage.base_url
         self.create_upload_folders()
 
     def create_upload_folders(self):
-        """Cria pastas de upload se não existirem."""
+        """Cria pastas de upload se não existirem (armazenamento local)."""
+        if self.storage.name != 'local':
+            return
         folders = ['ads', 'profiles', 'games']
         for folder in folders:
             path = os.path.join(self.upload_folder, folder)
@@ -50,28 +70,7 @@ class UploadService:
 
     def resize_image(self, image_path, size, output_path):
         """Redimensiona imagem mantendo proporção."""
-        try:
-            with Image.open(image_path) as img:
-                # Converter para RGB se necessário
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-
-                # Redimensionar mantendo proporção
-                img.thumbnail(size, Image.Resampling.LANCZOS)
-
-                # Criar nova imagem com fundo branco se necessário
-                if img.size != size:
-                    new_img = Image.new('RGB', size, (255, 255, 255))
-                    paste_x = (size[0] - img.size[0]) // 2
-                    paste_y = (size[1] - img.size[1]) // 2
-                    new_img.paste(img, (paste_x, paste_y))
-                    img = new_img
-
-                img.save(output_path, 'JPEG', quality=85, optimize=True)
-                return True
-        except Exception as e:
-            print(f"Erro ao redimensionar imagem: {e}")
-            return False
+        return pipeline.resize_image(image_path, size, output_path)
 
     def delete_existing_images(self, filename, category='ads'):
         """Remove imagens existentes antes de fazer novo upload."""
@@ -83,18 +82,17 @@ class UploadService:
             if filename.startswith('http'):
                 filename = filename.split('/')[-1]
 
-            # Remover arquivo original
-            original_path = os.path.join(self.upload_folder, category, filename)
-            if os.path.exists(original_path):
-                os.remove(original_path)
-                print(f"Removido arquivo original: {original_path}")
+            # O mesmo conteúdo pode estar em uso por outros anúncios/perfis;
+            # nesse caso a coleta remove quando a última referência sair
+            if not blob_store.claim_unreferenced(category, filename):
+                print(f"Arquivo {category}/{filename} ainda referenciado, mantido")
+                return True
+
+            removed = blob_store.remove_blob_files(category, filename)
+            print(f"Removidos {removed} arquivos de {category}/{filename}")
 
-            # Remover versões redimensionadas
-            for size_name in self.image_sizes.keys():
-                size_path = os.path.join(self.upload_folder, category, size_name, filename)
-                if os.path.exists(size_path):
-                    os.remove(size_path)
-                    print(f"Removido arquivo redimensionado: {size_path}")
+            # Variantes ainda em geração são descartadas ao terminar
+            pipeline.delete_manifest(category, filename)
 
             return True
         except Exception as e:
@@ -102,7 +100,7 @@ class UploadService:
             return False
 
     def upload_local_file(self, file, category='ads', replace_existing=None):
-        """Upload local para desenvolvimento com opção de substituir arquivo existente."""
+        """Upload pela aplicação (multipart) com opção de substituir arquivo existente."""
         try:
             # Verificar se o arquivo é válido
             if not file or not file.filename:
@@ -119,53 +117,156 @@ class UploadService:
             if file_size > self.max_file_size:
                 return {"success": False, "message": "Arquivo muito grande (máximo 10MB)"}
 
+            # Validar o cabeçalho da imagem (dimensões) antes de gravar qualquer coisa
+            try:
+                _dimensions, image_format = read_image_header(file.stream, pipeline.image_pipeline.max_pixels)
+            except ImageTooLargeError:
+                return {"success": False, "message": "Imagem com resolução muito alta"}
+            except Exception:
+                return {"success": False, "message": "Arquivo de imagem inválido ou corrompido"}
+
             # Se há arquivo para substituir, remover primeiro
             if replace_existing:
                 self.delete_existing_images(replace_existing, category)
 
-            # Gerar nome único
-            filename = self.generate_filename(file.filename, category)
+            # Nome pelo conteúdo (sha256): o mesmo arquivo é armazenado uma única vez
+            digest, size_bytes = blob_store.hash_stream(file.stream)
+            ext = EXTENSIONS.get(image_format) or file.filename.rsplit('.', 1)[1].lower()
+            filename = blob_store.blob_filename(digest, ext)
+
+            original_key = f"{category}/{filename}"
+            deduplicated = blob_store.register_blob(category, filename, digest, size_bytes) \
+                and self.storage.exists(original_key)
+
+            if deduplicated:
+                print(f"Conteúdo já armazenado em: {original_key}")
+            else:
+                # Gravação em blocos (multipart no S3; temporário + rename em disco)
+                self.storage.save(original_key, file.stream, file.mimetype)
+                print(f"Arquivo salvo em: {original_key}")
+
+            return self._upload_result(category, filename, deduplicated)
+
+        except Exception as e:
+            print(f"Erro detalhado no upload: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {"success": False, "message": f"Erro no upload: {str(e)}"}
 
-            # Criar pasta da categoria se não existir
-            category_path = os.path.join(self.upload_folder, category)
-            os.makedirs(category_path, exist_ok=True)
+    def _upload_result(self, category, filename, deduplicated):
+        """Agenda as variantes (se preciso) e monta a resposta do upload."""
+        # Versões redimensionadas são geradas em segundo plano; até ficarem
+        # prontas, as URLs delas servem o original
+        image_urls = {}
+        outputs = {}
+
+        for size_name, size_dimensions in self.image_sizes.items():
+            key = f"{category}/{size_name}/{filename}"
+            outputs[size_name] = (size_dimensions, key)
+            image_urls[size_name] = self.storage.url(key)
+
+        # Variantes de um conteúdo repetido são reaproveitadas (prontas ou em geração)
+        original_key = f"{category}/{filename}"
+        manifest = pipeline.get_manifest(category, filename) if deduplicated else None
+        if manifest is None or manifest["status"] == pipeline.STATUS_FAILED:
+            pipeline.delete_manifest(category, filename)
+            manifest_id = pipeline.create_manifest(category, filename, original_key, outputs, image_urls)
+            pipeline.image_pipeline.submit(manifest_id, original_key, outputs)
+
+        # URL da imagem original
+        image_urls['original'] = self.storage.url(original_key)
+
+        return {
+            "success": True,
+            "message": "Upload realizado com sucesso",
+            "data": {
+                "filename": filename,
+                "urls": image_urls,
+                "main_url": image_urls.get('medium', image_urls['original']),
+                "variants": self.get_variant_status(filename, category)["variants"],
+                "deduplicated": deduplicated,
+                "status_url": f"{self.base_url}/status/{category}/{filename}"
+            }
+        }
 
-            # Salvar arquivo original
-            original_path = os.path.join(category_path, filename)
-            file.save(original_path)
-            print(f"Arquivo salvo em: {original_path}")
+    def create_direct_upload(self, category, content_type, sha256, size_bytes, expires_in=900):
+        """Prepara um upload direto do cliente para o armazenamento (URL de PUT pré-assinada).
 
-            # Gerar versões redimensionadas e URLs corretas
-            image_urls = {}
+        O cliente calcula o sha256 do arquivo; se o conteúdo já estiver
+        armazenado, nada precisa ser enviado. O PUT é assinado com o checksum,
+        então o armazenamento recusa um conteúdo diferente do declarado.
+        """
+        try:
+            if not self.storage.supports_presigned_upload:
+                return {"success": False, "message": "Upload direto indisponível neste armazenamento"}
 
-            for size_name, size_dimensions in self.image_sizes.items():
-                size_dir = os.path.join(category_path, size_name)
-                os.makedirs(size_dir, exist_ok=True)
+            ext = DIRECT_UPLOAD_TYPES.get(content_type)
+            if not ext:
+                return {"success": False, "message": "Tipo de arquivo não permitido. Use PNG, JPG, GIF, WebP"}
 
-                output_path = os.path.join(size_dir, filename)
+            sha256 = (sha256 or '').lower()
+            if not _SHA256.match(sha256):
+                return {"success": False, "message": "sha256 inválido"}
 
-                if self.resize_image(original_path, size_dimensions, output_path):
-                    image_urls[size_name] = f"{self.base_url}/{category}/{size_name}/{filename}"
-                    print(f"Criada versão {size_name}: {output_path}")
+            if not isinstance(size_bytes, int) or size_bytes <= 0:
+                return {"success": False, "message": "Tamanho do arquivo inválido"}
+            if size_bytes > self.max_file_size:
+                return {"success": False, "message": "Arquivo muito grande (máximo 10MB)"}
 
-            # URL da imagem original
-            image_urls['original'] = f"{self.base_url}/{category}/{filename}"
+            filename = blob_store.blob_filename(sha256, ext)
+            key = f"{category}/{filename}"
+
+            # Conteúdo já armazenado: o upload termina aqui
+            if self.storage.exists(key):
+                blob_store.register_blob(category, filename, sha256, size_bytes)
+                result = self._upload_result(category, filename, True)
+                result["data"]["exists"] = True
+                return result
+
+            checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+            upload = self.storage.presigned_upload(key, content_type, checksum, expires_in)
 
             return {
                 "success": True,
-                "message": "Upload realizado com sucesso",
+                "message": "Envie o arquivo para a URL informada e confirme o upload",
                 "data": {
+                    "exists": False,
                     "filename": filename,
-                    "urls": image_urls,
-                    "main_url": image_urls.get('medium', image_urls['original'])
+                    "upload": upload
                 }
             }
 
         except Exception as e:
-            print(f"Erro detalhado no upload: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {"success": False, "message": f"Erro no upload: {str(e)}"}
+            print(f"Erro ao preparar upload direto: {e}")
+            return {"success": False, "message": f"Erro ao preparar upload: {str(e)}"}
+
+    def complete_direct_upload(self, category, filename, replace_existing=None):
+        """Confirma um upload direto: registra o arquivo e agenda as variantes."""
+        try:
+            match = re.match(r'^([0-9a-f]{64})\.(\w+)$', filename or '')
+            if not match or match.group(2) not in DIRECT_UPLOAD_TYPES.values():
+                return {"success": False, "message": "Nome de arquivo inválido"}
+
+            key = f"{category}/{filename}"
+            size_bytes = self.storage.size(key)
+            if size_bytes is None:
+                return {"success": False, "message": "Arquivo não encontrado no armazenamento"}
+
+            if size_bytes > self.max_file_size:
+                # A URL pré-assinada não limita o tamanho: o excesso é descartado aqui
+                if blob_store.claim_unreferenced(category, filename):
+                    self.storage.delete([key])
+                return {"success": False, "message": "Arquivo muito grande (máximo 10MB)"}
+
+            if replace_existing and replace_existing.split('/')[-1] != filename:
+                self.delete_existing_images(replace_existing, category)
+
+            deduplicated = blob_store.register_blob(category, filename, match.group(1), size_bytes)
+            return self._upload_result(category, filename, deduplicated)
+
+        except Exception as e:
+            print(f"Erro ao confirmar upload direto: {e}")
+            return {"success": False, "message": f"Erro ao confirmar upload: {str(e)}"}
 
     def delete_local_file(self, filename, category='ads'):
         """Remove arquivo local e suas versões."""
@@ -177,22 +278,15 @@ class UploadService:
             if filename.startswith('http'):
                 filename = filename.split('/')[-1]
 
-            # Remover arquivo original
-            original_path = os.path.join(self.upload_folder, category, filename)
-            files_removed = 0
+            # Conteúdo compartilhado com outros anúncios/perfis não é apagado agora:
+            # a coleta remove quando não houver mais referências
+            if not blob_store.claim_unreferenced(category, filename):
+                return {"success": True, "message": "Imagem ainda em uso em outro item; será removida quando não for mais usada"}
 
-            if os.path.exists(original_path):
-                os.remove(original_path)
-                files_removed += 1
-                print(f"Removido: {original_path}")
+            files_removed = blob_store.remove_blob_files(category, filename)
+            print(f"Removidos {files_removed} arquivos de {category}/{filename}")
 
-            # Remover versões redimensionadas
-            for size_name in self.image_sizes.keys():
-                size_path = os.path.join(self.upload_folder, category, size_name, filename)
-                if os.path.exists(size_path):
-                    os.remove(size_path)
-                    files_removed += 1
-                    print(f"Removido: {size_path}")
+            pipeline.delete_manifest(category, filename)
 
             if files_removed > 0:
                 return {"success": True, "message": f"Arquivo removido com sucesso ({files_removed} arquivos)"}
@@ -211,7 +305,42 @@ class UploadService:
         if filename.startswith('http'):
             return filename
 
-        return f"{self.base_url}/{category}/{size}/{filename}"
+        return self.storage.url(f"{category}/{size}/{filename}")
+
+    def get_variant_status(self, filename, category='ads'):
+        """Status da geração das variantes de um upload (manifesto)."""
+        try:
+            manifest = pipeline.get_manifest(category, filename)
+        except Exception as e:
+            print(f"Erro ao buscar manifesto de {category}/{filename}: {e}")
+            manifest = None
+
+        if manifest:
+            return {"success": True, **pipeline.serialize_manifest(manifest)}
+
+        # Uploads anteriores ao pipeline não têm manifesto: consultar o armazenamento
+        if not self.storage.exists(f"{category}/{filename}"):
+            return {"success": False, "message": "Arquivo não encontrado"}
+
+        variants = {}
+        for size_name in self.image_sizes.keys():
+            key = f"{category}/{size_name}/{filename}"
+            variants[size_name] = {
+                "status": pipeline.STATUS_READY if self.storage.exists(key) else pipeline.STATUS_PENDING,
+                "url": self.storage.url(key)
+            }
+
+        return {
+            "success": True,
+            "filename": filename,
+            "category": category,
+            "status": pipeline.STATUS_READY if all(
+                v["status"] == pipeline.STATUS_READY for v in variants.values()
+            ) else pipeline.STATUS_PENDING,
+            "variants": variants,
+            "created_at": None,
+            "completed_at": None
+        }
 
     def validate_image_file(self, file):
         """Valida arquivo de imagem antes do upload."""
@@ -295,8 +424,11 @@ class UploadService:
             return {"success": False, "message": f"Erro ao obter estatísticas: {str(e)}"}
 
     def optimize_images(self, category=None):
-        """Otimiza imagens existentes criando variações de tamanho."""
+        """Otimiza imagens existentes criando variações de tamanho (armazenamento local)."""
         try:
+            if self.storage.name != 'local':
+                return {"success": False, "message": "Otimização disponível apenas no armazenamento local"}
+
             categories = [category] if category else ['ads', 'profiles', 'games']
             optimized_count = 0
             errors = []
@@ -312,16 +444,18 @@ class UploadService:
                         file_path = os.path.join(cat_path, filename)
                         if os.path.isfile(file_path):
                             try:
-                                # Criar variações de tamanho se não existirem
-                                for size_name, size_dims in self.image_sizes.items():
-                                    size_dir = os.path.join(cat_path, size_name)
-                                    os.makedirs(size_dir, exist_ok=True)
-
-                                    size_path = os.path.join(size_dir, filename)
-
-                                    if not os.path.exists(size_path):
-                                        if self.resize_image(file_path, size_dims, size_path):
-                                            optimized_count += 1
+                                # Criar variações de tamanho que não existirem (uma decodificação por arquivo)
+                                missing = {
+                                    size_name: (size_dims, f"{cat}/{size_name}/{filename}")
+                                    for size_name, size_dims in self.image_sizes.items()
+                                    if not os.path.exists(os.path.join(cat_path, size_name, filename))
+                                }
+                                results = pipeline.generate_variants(
+                                    f"{cat}/{filename}", missing,
+                                    pipeline.image_pipeline.formats,
+                                    pipeline.image_pipeline.max_pixels
+                                )
+                                optimized_count += sum(1 for ok in results.values() if ok)
 
                             except Exception as e:
                                 errors.append(f"Erro ao otimizar {filename}: {str(e)}")
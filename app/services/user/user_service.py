@@ -1,8 +1,9 @@
 from datetime import datetime
 from bson import ObjectId
 from app.db.mongo_client import db
-from app.models.user.crud import get_user_by_id, update_user, update_password
-from app.utils.helpers.password_helpers import hash_password, verify_password
+from app.models.user.crud import get_user_by_id, update_user, update_password, bump_token_version
+from app.models.user.cache import invalidate_user
+from app.utils.helpers.password_helpers import hash_password, verify_password, PasswordHasherBusy
 
 
 def get_user_profile(user_id):
@@ -116,13 +117,18 @@ def change_password(user_id, current_password, new_password):
                 "updated_at": datetime.utcnow()
             }}
         )
+        invalidate_user(user_id)
 
         if result.modified_count > 0:
+            # Tokens emitidos com a senha anterior deixam de valer (inclusive o atual)
+            bump_token_version(user_id)
             print("Debug - Senha alterada com sucesso")
             return {"success": True, "message": "Senha alterada com sucesso"}
         else:
             return {"success": False, "message": "Erro ao alterar senha no banco de dados"}
 
+    except PasswordHasherBusy:
+        return {"success": False, "message": "Serviço sobrecarregado, tente novamente", "status_code": 503}
     except Exception as e:
         print(f"Debug - Erro na alteração de senha: {str(e)}")
         import traceback
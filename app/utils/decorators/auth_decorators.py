@@ -1,8 +1,124 @@
 from functools import wraps
 from flask import g, jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 from bson import ObjectId
-from app.db.mongo_client import db
+from app.models.user.crud import get_user_by_id
+from app.utils.security.token_revocation import token_revocation
+
+
+class LazyUser(dict):
+    """g.user montado a partir das claims do token.
+
+    _id, role, is_active e token_version vêm do token; o documento completo
+    (get_user_by_id, com cache) só é carregado quando a rota lê outro campo.
+    """
+
+    CLAIM_FIELDS = ("_id", "role", "is_active", "token_version")
+
+    def __init__(self, user_id, claims):
+        super().__init__(
+            _id=str(user_id),
+            role=claims.get("role", "user"),
+            is_active=bool(claims.get("is_active", False)),
+            token_version=claims.get("tv", 0)
+        )
+        self._hydrated = False
+
+    def _hydrate(self):
+        if not self._hydrated:
+            self._hydrated = True
+            user = get_user_by_id(dict.__getitem__(self, "_id"))
+            if user:
+                # As claims do token continuam valendo durante a requisição
+                for key, value in user.items():
+                    if key not in self.CLAIM_FIELDS:
+                        dict.__setitem__(self, key, value)
+        return self
+
+    def __missing__(self, key):
+        self._hydrate()
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if not dict.__contains__(self, key):
+            self._hydrate()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        if not dict.__contains__(self, key):
+            self._hydrate()
+        return dict.__contains__(self, key)
+
+    def __bool__(self):
+        return True
+
+    def __iter__(self):
+        return dict.__iter__(self._hydrate())
+
+    def __len__(self):
+        return dict.__len__(self._hydrate())
+
+    def keys(self):
+        return dict.keys(self._hydrate())
+
+    def values(self):
+        return dict.values(self._hydrate())
+
+    def items(self):
+        return dict.items(self._hydrate())
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"LazyUser({dict.__repr__(self)})"
+
+
+def _deny(message, status_code):
+    return jsonify({
+        "success": False,
+        "message": message
+    }), status_code
+
+
+def _authenticate():
+    """Valida o JWT e retorna (usuário, None) ou (None, resposta de erro)."""
+    # Verificar se o JWT é válido
+    verify_jwt_in_request()
+
+    # Obter ID do usuário do token
+    user_id = get_jwt_identity()
+    if not ObjectId.is_valid(str(user_id)):
+        return None, _deny("ID de usuário inválido", 401)
+
+    # Token emitido antes de desativação, troca de papel ou de senha
+    claims = get_jwt()
+    token_version = claims.get("tv")
+    if token_revocation.is_revoked(user_id, token_version):
+        return None, _deny("Token revogado", 401)
+
+    # Caminho rápido: claims + tabela de revogação, sem consultar o MongoDB
+    if token_revocation.use_claims(claims):
+        if not claims.get("is_active", False):
+            return None, _deny("Conta inativa", 403)
+        return LazyUser(user_id, claims), None
+
+    # Buscar usuário (cache em memória, sem a senha)
+    user = get_user_by_id(user_id)
+    if not user:
+        return None, _deny("Usuário não encontrado", 401)
+
+    # Verificar se usuário está ativo
+    if not user.get("is_active", False):
+        return None, _deny("Conta inativa", 403)
+
+    if token_version is not None and user.get("token_version", 0) > token_version:
+        token_revocation.note(user_id, user["token_version"])
+        return None, _deny("Token revogado", 401)
+
+    return user, None
 
 
 def jwt_required(f):
@@ -11,36 +127,9 @@ def jwt_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         try:
-            # Verificar se o JWT é válido
-            verify_jwt_in_request()
-
-            # Obter ID do usuário do token
-            user_id = get_jwt_identity()
-
-            # Buscar usuário no banco de dados
-            try:
-                user = db.users.find_one({"_id": ObjectId(user_id)})
-            except:
-                return jsonify({
-                    "success": False,
-                    "message": "ID de usuário inválido"
-                }), 401
-
-            if not user:
-                return jsonify({
-                    "success": False,
-                    "message": "Usuário não encontrado"
-                }), 401
-
-            # Verificar se usuário está ativo
-            if not user.get("is_active", False):
-                return jsonify({
-                    "success": False,
-                    "message": "Conta inativa"
-                }), 403
-
-            # Converter ObjectId para string
-            user["_id"] = str(user["_id"])
+            user, denied = _authenticate()
+            if denied:
+                return denied
 
             # Armazenar usuário no contexto global
             g.user = user
@@ -63,43 +152,13 @@ def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         try:
-            # Verificar se o JWT é válido
-            verify_jwt_in_request()
-
-            # Obter ID do usuário do token
-            user_id = get_jwt_identity()
-
-            # Buscar usuário no banco de dados
-            try:
-                user = db.users.find_one({"_id": ObjectId(user_id)})
-            except:
-                return jsonify({
-                    "success": False,
-                    "message": "ID de usuário inválido"
-                }), 401
-
-            if not user:
-                return jsonify({
-                    "success": False,
-                    "message": "Usuário não encontrado"
-                }), 401
-
-            # Verificar se usuário está ativo
-            if not user.get("is_active", False):
-                return jsonify({
-                    "success": False,
-                    "message": "Conta inativa"
-                }), 403
-
-            # Verificar se é administrador
-            if user.get("role") not in ["admin", "support"]:
-                return jsonify({
-                    "success": False,
-                    "message": "Permissão negada. Acesso apenas para administradores."
-                }), 403
+            user, denied = _authenticate()
+            if denied:
+                return denied
 
-            # Converter ObjectId para string
-            user["_id"] = str(user["_id"])
+            # Verificar se é administrador (papel vem das claims no modo stateless)
+            if user.get("role") not in ["admin", "support"]:
+                return _deny("Permissão negada. Acesso apenas para administradores.", 403)
 
             # Armazenar usuário no contexto global
             g.user = user
@@ -1,52 +1,63 @@
 from functools import wraps
-from flask import request, jsonify, g
-from datetime import datetime, timedelta
-from collections import defaultdict
+from flask import request, jsonify, g, make_response
 import logging
 
-# Armazenamento em memória para rate limiting (em produção, usar Redis)
-rate_limit_storage = defaultdict(list)
+from app.utils.security.rate_limiter import rate_limiter
 
 logger = logging.getLogger(__name__)
 
-def rate_limit(requests_per_minute=60):
+
+def _client_id():
+    """Identificar cliente (usuário logado ou IP)."""
+    if hasattr(g, 'user') and g.user:
+        return f"user_{g.user['_id']}"
+    return f"ip_{request.remote_addr}"
+
+
+def _set_headers(response, result):
+    response.headers["X-RateLimit-Limit"] = str(result.limit)
+    response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+    response.headers["X-RateLimit-Reset"] = str(result.reset_after)
+    return response
+
+
+def rate_limit(requests_per_minute=60, period=60, algorithm=None, scope=None):
     """
     Decorator para implementar rate limiting baseado no IP ou usuário.
-    
+
+    O limite é contado por rota (scope, por padrão o nome da função) e pode
+    ser sobrescrito em RATE_LIMIT_POLICIES pelo endpoint ("support.create_ticket").
+
     Args:
-        requests_per_minute (int): Número máximo de requests por minuto
+        requests_per_minute (int): Número máximo de requests por período
+        period (int): Tamanho do período em segundos (padrão: 1 minuto)
+        algorithm (str): "sliding_window" ou "token_bucket" (padrão: RATE_LIMIT_ALGORITHM)
+        scope (str): Nome do limite (rotas com o mesmo scope compartilham o contador)
     """
     def decorator(f):
+        limit_scope = scope or f.__name__
+
         @wraps(f)
         def decorated(*args, **kwargs):
-            # Identificar cliente (usuário logado ou IP)
-            if hasattr(g, 'user') and g.user:
-                client_id = f"user_{g.user['_id']}"
-            else:
-                client_id = f"ip_{request.remote_addr}"
-            
-            current_time = datetime.utcnow()
-            
-            # Limpar requests antigos (mais de 1 minuto)
-            cutoff_time = current_time - timedelta(minutes=1)
-            rate_limit_storage[client_id] = [
-                req_time for req_time in rate_limit_storage[client_id] 
-                if req_time > cutoff_time
-            ]
-            
+            limit, limit_period, limit_algorithm = rate_limiter.policy(
+                request.endpoint or limit_scope, requests_per_minute, period, algorithm
+            )
+            client_id = _client_id()
+            result = rate_limiter.hit(f"{limit_scope}:{client_id}", limit, limit_period, limit_algorithm)
+
             # Verificar se excedeu o limite
-            if len(rate_limit_storage[client_id]) >= requests_per_minute:
-                logger.warning(f"Rate limit excedido para {client_id}")
-                return jsonify({
+            if not result.allowed:
+                logger.warning(f"Rate limit excedido para {client_id} em {limit_scope}")
+                response = jsonify({
                     "success": False,
                     "message": "Muitas requisições. Tente novamente em alguns minutos.",
-                    "retry_after": 60
-                }), 429
-            
-            # Adicionar request atual
-            rate_limit_storage[client_id].append(current_time)
-            
-            return f(*args, **kwargs)
+                    "retry_after": result.retry_after
+                })
+                response.status_code = 429
+                response.headers["Retry-After"] = str(result.retry_after)
+                return _set_headers(response, result)
+
+            return _set_headers(make_response(f(*args, **kwargs)), result)
         return decorated
     return decorator
 
@@ -60,4 +71,4 @@ def admin_rate_limit(requests_per_minute=120):
     """
     Rate limiting mais permissivo para admins
     """
-    return rate_limit(requests_per_minute)
\ No newline at end of file
+    return rate_limit(requests_per_minute)
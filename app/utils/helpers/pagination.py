@@ -0,0 +1,118 @@
+"""Paginação por cursor (keyset) para listagens ordenadas por (created_at, _id).
+
+Em vez de .skip(n), a próxima página começa depois do último documento da
+página atual: {created_at < último} ou {created_at == último e _id < último}.
+Com um índice composto terminando em (created_at, _id) o custo de qualquer
+página é constante, independentemente da profundidade.
+
+O cursor é opaco para o cliente (base64 de um JSON estendido do BSON) e é
+devolvido como next_cursor. O parâmetro skip continua aceito como
+compatibilidade quando nenhum cursor é enviado. O limit é sempre ajustado
+para o intervalo 1..MAX_PAGE_SIZE (clamp_limit).
+"""
+import base64
+import binascii
+
+from bson import json_util, ObjectId
+from pymongo import DESCENDING
+
+
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado ou adulterado."""
+
+
+def clamp_limit(limit, maximum=MAX_PAGE_SIZE):
+    """Tamanho de página entre 1 e maximum (limit=0 ou negativo vira 1)."""
+    return max(1, min(int(limit), maximum))
+
+
+def encode_cursor(document, sort_field="created_at"):
+    """Gera o cursor opaco que aponta para depois do documento informado."""
+    last_id = document["_id"]
+    if not isinstance(last_id, ObjectId):
+        last_id = ObjectId(last_id)
+    payload = json_util.dumps({"v": document.get(sort_field), "id": last_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodifica o cursor, retornando (valor do campo de ordenação, _id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        last_id = payload["id"]
+        if not isinstance(last_id, ObjectId):
+            raise InvalidCursorError("Cursor inválido")
+        return payload["v"], last_id
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
+
+
+def cursor_query(query, cursor, sort_field="created_at", direction=DESCENDING):
+    """Combina o filtro original com a condição de keyset do cursor."""
+    if not cursor:
+        return query
+
+    last_value, last_id = decode_cursor(cursor)
+    operator = "$lt" if direction == DESCENDING else "$gt"
+    keyset = {"$or": [
+        {sort_field: {operator: last_value}},
+        {sort_field: last_value, "_id": {operator: last_id}}
+    ]}
+
+    return {"$and": [query, keyset]} if query else keyset
+
+
+def sort_spec(sort_field="created_at", direction=DESCENDING):
+    """Ordenação estável usada pelas listagens paginadas (desempate por _id)."""
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def paginate_find(collection, query, limit, cursor=None, skip=0, sort_field="created_at",
+                  direction=DESCENDING, projection=None):
+    """Executa um find paginado por cursor (ou skip, se não houver cursor).
+
+    Busca limit + 1 documentos para saber se existe próxima página sem
+    precisar de count_documents.
+
+    Returns:
+        tuple: (documentos da página, next_cursor ou None)
+    """
+    limit = clamp_limit(limit)
+    find_query = cursor_query(query, cursor, sort_field, direction)
+    documents_cursor = collection.find(find_query, projection).sort(sort_spec(sort_field, direction))
+    if not cursor and skip:
+        documents_cursor = documents_cursor.skip(skip)
+
+    documents = list(documents_cursor.limit(limit + 1))
+    return page_result(documents, limit, sort_field)
+
+
+def pipeline_stages(query, limit, cursor=None, skip=0, sort_field="created_at", direction=DESCENDING):
+    """Estágios iniciais ($match/$sort/$skip/$limit) de uma agregação paginada.
+
+    Devem vir antes de qualquer $lookup para que o índice seja usado e só os
+    documentos da página sejam enriquecidos. O $limit busca limit + 1
+    documentos; use page_result no resultado.
+    """
+    limit = clamp_limit(limit)
+    stages = [
+        {"$match": cursor_query(query, cursor, sort_field, direction)},
+        {"$sort": dict(sort_spec(sort_field, direction))}
+    ]
+    if not cursor and skip:
+        stages.append({"$skip": skip})
+    stages.append({"$limit": limit + 1})
+    return stages
+
+
+def page_result(documents, limit, sort_field="created_at"):
+    """Corta o documento extra e calcula o next_cursor."""
+    limit = clamp_limit(limit)
+    if len(documents) > limit:
+        documents = documents[:limit]
+        return documents, encode_cursor(documents[-1], sort_field)
+    return documents, None
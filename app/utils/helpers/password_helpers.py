@@ -1,16 +1,261 @@
+"""Hash e verificação de senhas com bcrypt fora das threads de requisição.
+
+O bcrypt roda em um pool de processos dedicado (PASSWORD_HASH_WORKERS,
+padrão: um por núcleo), então um pico de logins/cadastros ocupa esses
+processos e não as threads do worker web. A fila é limitada
+(PASSWORD_HASH_MAX_PENDING): com ela cheia hash_password/verify_password
+levantam PasswordHasherBusy e as rotas respondem 503. Com
+PASSWORD_HASH_WORKERS = 0 o bcrypt roda na própria requisição.
+
+O custo (rounds) vem de PASSWORD_HASH_ROUNDS ou, se não definido, de uma
+calibração na inicialização que escolhe o maior custo cujo hash leva até
+PASSWORD_HASH_TARGET_MS nesta máquina, partindo de PASSWORD_HASH_MIN_ROUNDS
+(padrão: DEFAULT_ROUNDS, então a calibração só aumenta o custo numa máquina
+rápida, nunca o reduz numa lenta). Hashes com custo menor que o atual
+são refeitos em segundo plano no login (needs_rehash / rehash_in_background);
+um custo maior é mantido, para que uma calibração mais baixa em outra máquina
+não enfraqueça os hashes já gravados.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
 import bcrypt
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUNDS = 12
+MAX_ROUNDS = 16
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Fila do pool de hash de senhas cheia (responder 503)."""
+
+
+def _bcrypt_hash(password_bytes, rounds):
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=rounds))
+    return hashed, time.perf_counter() - started
+
+
+def _bcrypt_check(password_bytes, hashed_bytes):
+    started = time.perf_counter()
+    matches = bcrypt.checkpw(password_bytes, hashed_bytes)
+    return matches, time.perf_counter() - started
+
+
+def hash_rounds(hashed_password):
+    """Custo gravado em um hash bcrypt ("$2b$12$..." -> 12), ou None."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def calibrate_rounds(target_ms, min_rounds=DEFAULT_ROUNDS, max_rounds=MAX_ROUNDS):
+    """Maior custo cujo hash leva até target_ms nesta máquina (nunca abaixo de min_rounds)."""
+    rounds = min_rounds
+    sample = b"calibracao-de-custo"
+    while rounds < max_rounds:
+        _hashed, elapsed = _bcrypt_hash(sample, rounds + 1)
+        if elapsed * 1000 > target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000, 1)
+
+
+class PasswordHasher:
+    """Pool de processos limitado para o bcrypt, com métricas de fila e latência."""
+
+    def __init__(self, workers=None, max_pending=64, rounds=DEFAULT_ROUNDS, start_method="spawn", timeout=10.0):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.start_method = start_method
+        self.timeout = timeout
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._queue_waits = deque(maxlen=1000)
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.rehashed = 0
+
+    def configure(self, workers=None, max_pending=None, rounds=None, start_method=None, timeout=None):
+        with self._lock:
+            if workers is not None:
+                self.workers = workers
+            if max_pending is not None:
+                self.max_pending = max_pending
+            if rounds is not None:
+                self.rounds = rounds
+            if start_method is not None:
+                self.start_method = start_method
+            if timeout is not None:
+                self.timeout = timeout
+
+    def _get_executor(self):
+        # Criado na primeira senha, já dentro do processo do worker web
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._executor
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy("Fila de hash de senhas cheia")
+            self._pending += 1
+            self.submitted += 1
+            executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self.failed += 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def _run(self, fn, *args):
+        """Executa fn no pool (ou inline) e espera o resultado."""
+        started = time.perf_counter()
+        if self.workers <= 0:
+            result, elapsed = fn(*args)
+        else:
+            try:
+                result, elapsed = self._submit(fn, *args).result(timeout=self.timeout)
+            except FutureTimeoutError:
+                raise PasswordHasherBusy("Tempo de espera do hash de senha esgotado")
+        total = time.perf_counter() - started
+        with self._lock:
+            self._latencies.append(total)
+            self._queue_waits.append(max(total - elapsed, 0.0))
+        return result
+
+    def hash(self, password):
+        return self._run(_bcrypt_hash, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def verify(self, password, hashed_password):
+        return self._run(_bcrypt_check, password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def needs_rehash(self, hashed_password):
+        rounds = hash_rounds(hashed_password)
+        return rounds is not None and rounds < self.rounds
+
+    def rehash_in_background(self, password, on_hashed):
+        """Gera um hash com o custo atual sem bloquear a requisição.
+
+        on_hashed(novo_hash) roda na thread do pool quando o hash fica pronto
+        (sem pool, na própria requisição). Com a fila cheia o rehash fica
+        para o próximo login.
+        """
+        if self.workers <= 0:
+            on_hashed(self.hash(password))
+            with self._lock:
+                self.rehashed += 1
+            return True
+        try:
+            future = self._submit(_bcrypt_hash, password.encode('utf-8'), self.rounds)
+        except Exception:
+            return False
+
+        def done(finished):
+            try:
+                hashed, _elapsed = finished.result()
+                on_hashed(hashed.decode('utf-8'))
+                with self._lock:
+                    self.rehashed += 1
+            except Exception as e:
+                logger.error(f"Erro ao refazer hash de senha: {e}")
+
+        future.add_done_callback(done)
+        return True
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            queue_waits = list(self._queue_waits)
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rehashed": self.rehashed,
+                "latency_ms": {"p50": _percentile(latencies, 0.5), "p95": _percentile(latencies, 0.95)},
+                "queue_wait_ms": {"p50": _percentile(queue_waits, 0.5), "p95": _percentile(queue_waits, 0.95)}
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+password_hasher = PasswordHasher()
+
+
+def init_password_hasher(app):
+    """Configura o pool e o custo do bcrypt (calibrado se PASSWORD_HASH_ROUNDS não for definido)."""
+    rounds = app.config.get("PASSWORD_HASH_ROUNDS")
+    if not rounds:
+        target_ms = app.config.get("PASSWORD_HASH_TARGET_MS", 250)
+        rounds = calibrate_rounds(
+            target_ms,
+            min_rounds=app.config.get("PASSWORD_HASH_MIN_ROUNDS", DEFAULT_ROUNDS)
+        )
+        logger.info(f"Custo do bcrypt calibrado para {rounds} (alvo de {target_ms}ms)")
+
+    password_hasher.configure(
+        workers=app.config.get("PASSWORD_HASH_WORKERS"),
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING"),
+        rounds=rounds,
+        timeout=app.config.get("PASSWORD_HASH_TIMEOUT_SECONDS")
+    )
+    return password_hasher
+
 
 def hash_password(password):
     """Gera um hash seguro para a senha."""
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    return password_hasher.hash(password)
 
 
 def verify_password(password, hashed_password):
     """Verifica se a senha corresponde ao hash armazenado."""
-    password_bytes = password.encode('utf-8')
-    hashed_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+    return password_hasher.verify(password, hashed_password)
+
+
+def needs_rehash(hashed_password):
+    """Se o hash foi gerado com um custo menor que o atual."""
+    return password_hasher.needs_rehash(hashed_password)
@@ -2,6 +2,7 @@ import logging
 from datetime import datetime
 from flask import request, g
 from app.db.mongo_client import db
+from app.utils.security.log_sink import log_sink
 from bson import ObjectId
 import json
 
@@ -42,8 +43,8 @@ class AuditLogger:
                 "method": request.method
             }
             
-            # Salvar no MongoDB
-            db.audit_logs.insert_one(audit_entry)
+            # Salvar no MongoDB (em lote, fora da requisição)
+            log_sink.write("audit_logs", audit_entry)
             
             # Log também no sistema de logging
             logger = logging.getLogger('audit')
@@ -83,8 +84,8 @@ class AuditLogger:
                 "additional_data": AuditLogger._sanitize_data(additional_data)
             }
             
-            # Salvar no MongoDB
-            db.security_logs.insert_one(security_entry)
+            # Salvar no MongoDB (em lote, fora da requisição)
+            log_sink.write("security_logs", security_entry)
             
             # Log crítico também no sistema de logging
             logger = logging.getLogger('security')
@@ -121,8 +122,8 @@ class AuditLogger:
                 "endpoint": request.endpoint
             }
             
-            # Salvar no MongoDB
-            db.data_access_logs.insert_one(access_entry)
+            # Salvar no MongoDB (em lote, fora da requisição)
+            log_sink.write("data_access_logs", access_entry)
             
             if not authorized:
                 AuditLogger.log_security_event(
@@ -168,39 +169,52 @@ class AuditLogger:
         
         return data
     
+    @staticmethod
+    def list_admin_activity(admin_id=None, start_date=None, end_date=None, limit=100, cursor=None, skip=0):
+        """
+        Lista atividades administrativas (mais recentes primeiro), paginada por cursor
+
+        Usa os índices (admin_id, timestamp, _id) e (timestamp, _id) de audit_logs.
+
+        Returns:
+            tuple: (atividades, next_cursor ou None)
+        """
+        from app.utils.helpers.pagination import paginate_find
+
+        query = {}
+
+        if admin_id:
+            query["admin_id"] = admin_id
+
+        if start_date or end_date:
+            date_query = {}
+            if start_date:
+                date_query["$gte"] = start_date
+            if end_date:
+                date_query["$lte"] = end_date
+            query["timestamp"] = date_query
+
+        activities, next_cursor = paginate_find(
+            db.audit_logs, query, limit, cursor=cursor, skip=skip, sort_field="timestamp"
+        )
+
+        # Converter ObjectIds para strings
+        for activity in activities:
+            activity["_id"] = str(activity["_id"])
+            if "admin_id" in activity and activity["admin_id"]:
+                activity["admin_id"] = str(activity["admin_id"])
+            if "user_id" in activity and activity["user_id"]:
+                activity["user_id"] = str(activity["user_id"])
+
+        return activities, next_cursor
+
     @staticmethod
     def get_admin_activity_report(admin_id=None, start_date=None, end_date=None, limit=100):
         """
         Gera relatório de atividades administrativas
         """
         try:
-            query = {}
-            
-            if admin_id:
-                query["admin_id"] = admin_id
-            
-            if start_date or end_date:
-                date_query = {}
-                if start_date:
-                    date_query["$gte"] = start_date
-                if end_date:
-                    date_query["$lte"] = end_date
-                query["timestamp"] = date_query
-            
-            activities = list(
-                db.audit_logs.find(query)
-                .sort("timestamp", -1)
-                .limit(limit)
-            )
-            
-            # Converter ObjectIds para strings
-            for activity in activities:
-                activity["_id"] = str(activity["_id"])
-                if "admin_id" in activity and activity["admin_id"]:
-                    activity["admin_id"] = str(activity["admin_id"])
-                if "user_id" in activity and activity["user_id"]:
-                    activity["user_id"] = str(activity["user_id"])
-            
+            activities, _next_cursor = AuditLogger.list_admin_activity(admin_id, start_date, end_date, limit)
             return activities
             
         except Exception as e:
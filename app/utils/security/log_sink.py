@@ -0,0 +1,203 @@
+"""Gravação assíncrona e em lote dos logs de auditoria e segurança.
+
+AuditLogger monta o documento na requisição e o entrega a `log_sink`, que
+o coloca em uma fila em memória limitada (AUDIT_LOG_QUEUE_SIZE). Uma thread
+por processo esvazia a fila com insert_many por coleção, a cada
+AUDIT_LOG_FLUSH_SECONDS ou quando AUDIT_LOG_BATCH_SIZE documentos se
+acumulam.
+
+Fila cheia (AUDIT_LOG_OVERFLOW):
+    - "drop": o documento é descartado na hora e contado em `dropped`
+    - "block": a requisição espera até AUDIT_LOG_BLOCK_TIMEOUT_MS por espaço
+      na fila antes de descartar
+
+Com AUDIT_LOG_MODE = "sync" cada documento é gravado na hora (testes e
+scripts). A fila é esvaziada ao encerrar o processo.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LogSink:
+    """Fila limitada + thread de gravação em lote."""
+
+    def __init__(self, mode="async", max_queue=10000, batch_size=500, flush_interval=1.0,
+                 overflow="drop", block_timeout=0.05):
+        self.mode = mode
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def configure(self, mode=None, max_queue=None, batch_size=None, flush_interval=None,
+                  overflow=None, block_timeout=None):
+        with self._lock:
+            if mode is not None:
+                self.mode = mode
+            if max_queue is not None and max_queue != self.max_queue:
+                self.max_queue = max_queue
+                self._queue = queue.Queue(maxsize=max_queue)
+            if batch_size is not None:
+                self.batch_size = batch_size
+            if flush_interval is not None:
+                self.flush_interval = flush_interval
+            if overflow is not None:
+                self.overflow = overflow
+            if block_timeout is not None:
+                self.block_timeout = block_timeout
+
+    # ------------------------------------------------------------ gravação
+
+    def _insert(self, collection_name, documents):
+        from app.db.mongo_client import db
+
+        try:
+            if len(documents) == 1:
+                db[collection_name].insert_one(documents[0])
+            else:
+                db[collection_name].insert_many(documents, ordered=False)
+            with self._lock:
+                self.written += len(documents)
+                self.batches += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += len(documents)
+            logger.error(f"Falha ao gravar {len(documents)} logs em {collection_name}: {e}")
+
+    def write(self, collection_name, document):
+        """Entrega um documento para gravação. Retorna False se ele foi descartado."""
+        if self.mode == "sync":
+            self._insert(collection_name, [document])
+            return True
+
+        self._ensure_writer()
+        try:
+            if self.overflow == "block":
+                self._queue.put((collection_name, document), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait((collection_name, document))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _write_batch(self, batch):
+        grouped = {}
+        for collection_name, document in batch:
+            grouped.setdefault(collection_name, []).append(document)
+        for collection_name, documents in grouped.items():
+            self._insert(collection_name, documents)
+        for _ in batch:
+            self._queue.task_done()
+
+    def _drain(self):
+        """Retira até batch_size itens da fila e grava agrupados por coleção."""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write_batch(batch)
+        return len(batch)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Acumula até o lote encher ou o intervalo acabar
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _ensure_writer(self):
+        # Após um fork (gunicorn --preload) a thread do processo pai não existe no filho
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="audit-log-sink", daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------ controle
+
+    def flush(self, timeout=5.0):
+        """Grava tudo o que está na fila (na thread chamadora)."""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            self._drain()
+
+    def shutdown(self, timeout=5.0):
+        """Para a thread de gravação e grava o que ainda estiver na fila."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "overflow": self.overflow,
+                "queued": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches
+            }
+
+
+log_sink = LogSink()
+atexit.register(log_sink.shutdown)
+
+
+def init_log_sink(app):
+    """Configura a fila dos logs de auditoria a partir da configuração da aplicação."""
+    log_sink.configure(
+        mode=app.config.get("AUDIT_LOG_MODE", "async"),
+        max_queue=app.config.get("AUDIT_LOG_QUEUE_SIZE", 10000),
+        batch_size=app.config.get("AUDIT_LOG_BATCH_SIZE", 500),
+        flush_interval=app.config.get("AUDIT_LOG_FLUSH_SECONDS", 1.0),
+        overflow=app.config.get("AUDIT_LOG_OVERFLOW", "drop"),
+        block_timeout=app.config.get("AUDIT_LOG_BLOCK_TIMEOUT_MS", 50) / 1000
+    )
+    return log_sink
@@ -0,0 +1,57 @@
+"""Busca de padrões suspeitos (SQL injection, XSS) em query strings e payloads JSON.
+
+Todos os padrões ficam em uma única regex compilada (alternância,
+case-insensitive): cada texto é percorrido uma vez, sem lower() e sem
+montar o repr do payload. No JSON só os valores string (e as chaves) são
+examinados, até SECURITY_SCAN_MAX_BYTES caracteres por requisição; corpos
+maiores que o limite não são decodificados e têm só o texto bruto dos
+primeiros SECURITY_SCAN_MAX_BYTES bytes examinado (ver security_middleware).
+"""
+import re
+
+SUSPICIOUS_PATTERNS = (
+    'union select', 'drop table', 'delete from', 'insert into',
+    'update set', 'or 1=1', 'and 1=1', '--', ';--',
+    '<script>', 'javascript:', 'eval(', 'document.cookie'
+)
+
+# Padrões mais longos primeiro: ";--" é reportado em vez de "--"
+_PATTERN = re.compile(
+    "|".join(re.escape(p) for p in sorted(SUSPICIOUS_PATTERNS, key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+DEFAULT_MAX_BYTES = 64 * 1024
+
+
+def scan_text(text, max_bytes=DEFAULT_MAX_BYTES):
+    """Primeiro padrão suspeito encontrado no texto (em minúsculas) ou None."""
+    if not text:
+        return None
+    match = _PATTERN.search(text, 0, max_bytes)
+    return match.group(0).lower() if match else None
+
+
+def scan_json(data, max_bytes=DEFAULT_MAX_BYTES):
+    """Primeiro padrão suspeito nas strings de um JSON já decodificado (ou None).
+
+    Percorre o documento sem recursão; para ao atingir max_bytes
+    caracteres examinados.
+    """
+    budget = max_bytes
+    stack = [data]
+    while stack and budget > 0:
+        value = stack.pop()
+        if isinstance(value, str):
+            found = scan_text(value, budget)
+            if found:
+                return found
+            budget -= len(value)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(key, str):
+                    stack.append(key)
+                stack.append(item)
+        elif isinstance(value, list):
+            stack.extend(value)
+    return None
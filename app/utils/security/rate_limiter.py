@@ -0,0 +1,312 @@
+"""Motor de rate limiting com estado O(1) por cliente.
+
+Algoritmos (estado de tamanho fixo, uma verificação = uma atualização):
+
+    - "sliding_window": contador da janela atual + contador da anterior; a
+      contagem estimada é anterior * (fração restante da janela) + atual
+    - "token_bucket": fichas que se recompõem continuamente até o limite
+      (permite rajadas curtas de até `limit` requisições)
+
+Backends (RATE_LIMIT_BACKEND):
+
+    - "memory": em memória, por processo, com no máximo RATE_LIMIT_MAX_KEYS
+      chaves (as que ficaram mais tempo sem uso são descartadas primeiro)
+    - "mongo": coleção rate_limits compartilhada entre workers; cada
+      verificação é um único find_one_and_update com pipeline, e as chaves
+      ociosas expiram pelo índice TTL
+
+Este módulo não depende do Flask: os decorators ficam em
+app/utils/decorators/rate_limiting.py.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+RateLimitResult = namedtuple("RateLimitResult", ["allowed", "limit", "remaining", "reset_after", "retry_after"])
+
+
+class SlidingWindowCounter:
+    """Janela deslizante aproximada por dois contadores. Estado: (janela, atual, anterior)."""
+
+    name = "sliding_window"
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+
+    def _weight(self, now):
+        return 1 - (now % self.period) / self.period
+
+    def _result(self, allowed, previous, current, now):
+        estimate = previous * self._weight(now) + current
+        reset_after = self.period - (now % self.period)
+        retry_after = 0
+        if not allowed:
+            # Quando o peso da janela anterior cair o bastante para caber mais uma
+            retry_after = reset_after if previous == 0 else min(
+                reset_after, max((estimate + 1 - self.limit) / previous * self.period, 0)
+            )
+        return RateLimitResult(
+            allowed, self.limit, max(int(self.limit - estimate), 0),
+            math.ceil(reset_after), math.ceil(retry_after)
+        )
+
+    def check(self, state, now, cost=1):
+        window = int(now // self.period)
+        if state is None or state[0] < window - 1:
+            previous, current = 0, 0
+        elif state[0] == window - 1:
+            previous, current = state[1], 0
+        else:
+            previous, current = state[2], state[1]
+
+        allowed = previous * self._weight(now) + current + cost <= self.limit
+        if allowed:
+            current += cost
+        return (window, current, previous), self._result(allowed, previous, current, now)
+
+    def expires_in(self):
+        return 2 * self.period
+
+    def pipeline(self, now, cost=1):
+        """Mesma atualização de check() como pipeline de update do MongoDB."""
+        window = int(now // self.period)
+        return [
+            {"$set": {
+                "p": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$w", window]}, "then": {"$ifNull": ["$p", 0]}},
+                        {"case": {"$eq": ["$w", window - 1]}, "then": {"$ifNull": ["$c", 0]}}
+                    ],
+                    "default": 0
+                }},
+                "c": {"$cond": [{"$eq": ["$w", window]}, {"$ifNull": ["$c", 0]}, 0]},
+                "w": window
+            }},
+            {"$set": {"allowed": {"$lte": [
+                {"$add": [{"$multiply": ["$p", self._weight(now)]}, "$c", cost]}, self.limit
+            ]}}},
+            {"$set": {"c": {"$cond": ["$allowed", {"$add": ["$c", cost]}, "$c"]}}}
+        ]
+
+    def from_document(self, document, now, cost=1):
+        return self._result(document["allowed"], document["p"], document["c"], now)
+
+
+class TokenBucket:
+    """Balde de fichas recompostas a limit/period por segundo. Estado: (fichas, instante)."""
+
+    name = "token_bucket"
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+
+    def _result(self, allowed, tokens, cost):
+        missing = max(cost - tokens, 0)
+        return RateLimitResult(
+            allowed, self.limit, int(tokens),
+            math.ceil((self.limit - tokens) / self.rate),
+            0 if allowed else math.ceil(missing / self.rate)
+        )
+
+    def check(self, state, now, cost=1):
+        if state is None:
+            tokens = self.limit
+        else:
+            tokens = min(self.limit, state[0] + max(now - state[1], 0) * self.rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        return (tokens, now), self._result(allowed, tokens, cost)
+
+    def expires_in(self):
+        return self.period
+
+    def pipeline(self, now, cost=1):
+        return [
+            {"$set": {
+                "t": {"$min": [self.limit, {"$add": [
+                    {"$ifNull": ["$t", self.limit]},
+                    {"$multiply": [{"$max": [0, {"$subtract": [now, {"$ifNull": ["$ts", now]}]}]}, self.rate]}
+                ]}]},
+                "ts": now
+            }},
+            {"$set": {"allowed": {"$gte": ["$t", cost]}}},
+            {"$set": {"t": {"$cond": ["$allowed", {"$subtract": ["$t", cost]}, "$t"]}}}
+        ]
+
+    def from_document(self, document, now, cost=1):
+        return self._result(document["allowed"], document["t"], cost)
+
+
+ALGORITHMS = {
+    SlidingWindowCounter.name: SlidingWindowCounter,
+    TokenBucket.name: TokenBucket,
+}
+
+
+class MemoryBackend:
+    """Estado em memória, limitado a max_keys chaves (descarta as ociosas há mais tempo)."""
+
+    name = "memory"
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def hit(self, key, algorithm, now, cost=1):
+        with self._lock:
+            state, result = algorithm.check(self._states.get(key), now, cost)
+            self._states[key] = state
+            self._states.move_to_end(key)
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+                self.evicted += 1
+        return result
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+
+    def stats(self):
+        return {"backend": self.name, "keys": len(self._states), "max_keys": self.max_keys, "evicted": self.evicted}
+
+
+class MongoBackend:
+    """Estado compartilhado entre workers na coleção rate_limits (um documento por chave)."""
+
+    name = "mongo"
+
+    def __init__(self, collection):
+        from pymongo import ReturnDocument
+
+        self.collection = collection
+        self._return_after = ReturnDocument.AFTER
+
+    def hit(self, key, algorithm, now, cost=1):
+        pipeline = algorithm.pipeline(now, cost)
+        pipeline[-1]["$set"]["expires_at"] = datetime.utcnow() + timedelta(seconds=algorithm.expires_in())
+        document = self.collection.find_one_and_update(
+            {"_id": key}, pipeline, upsert=True, return_document=self._return_after
+        )
+        return algorithm.from_document(document, now, cost)
+
+    def reset(self, key=None):
+        self.collection.delete_many({} if key is None else {"_id": key})
+
+    def stats(self):
+        return {"backend": self.name, "keys": self.collection.estimated_document_count()}
+
+
+class RateLimiter:
+    """Verifica limites por chave com o backend configurado.
+
+    Em caso de erro no backend a requisição é liberada (fail-open): uma
+    falha do MongoDB não pode derrubar a API inteira.
+    """
+
+    def __init__(self, backend=None, algorithm="sliding_window", policies=None, enabled=True):
+        self.backend = backend or MemoryBackend()
+        self.algorithm = algorithm
+        self.policies = policies or {}
+        self.enabled = enabled
+        self._algorithms = {}
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    def configure(self, backend=None, algorithm=None, policies=None, enabled=None):
+        if backend is not None:
+            self.backend = backend
+        if algorithm is not None:
+            if algorithm not in ALGORITHMS:
+                raise ValueError(f"Algoritmo de rate limiting desconhecido: {algorithm}")
+            self.algorithm = algorithm
+        if policies is not None:
+            self.policies = policies
+        if enabled is not None:
+            self.enabled = enabled
+
+    def policy(self, name, limit, period=60, algorithm=None):
+        """Limite efetivo de uma rota: o declarado no decorator ou o de RATE_LIMIT_POLICIES."""
+        override = self.policies.get(name, {})
+        return (
+            override.get("limit", limit),
+            override.get("period", period),
+            override.get("algorithm", algorithm or self.algorithm)
+        )
+
+    def _algorithm(self, name, limit, period):
+        cache_key = (name, limit, period)
+        algorithm = self._algorithms.get(cache_key)
+        if algorithm is None:
+            algorithm = self._algorithms[cache_key] = ALGORITHMS[name](limit, period)
+        return algorithm
+
+    def hit(self, key, limit, period=60, algorithm=None, cost=1):
+        """Registra uma requisição de `key`. Retorna RateLimitResult (allowed=False: bloquear)."""
+        algorithm = self._algorithm(algorithm or self.algorithm, limit, period)
+        if not self.enabled:
+            return RateLimitResult(True, limit, limit, 0, 0)
+
+        try:
+            result = self.backend.hit(key, algorithm, time.time(), cost)
+        except Exception as e:
+            logger.error(f"Erro no backend de rate limiting ({self.backend.name}): {e}")
+            self.errors += 1
+            return RateLimitResult(True, limit, limit, 0, 0)
+
+        if result.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return result
+
+    def stats(self):
+        return {
+            **self.backend.stats(),
+            "algorithm": self.algorithm,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+def init_rate_limiter(app):
+    """Configura o backend, o algoritmo padrão e as políticas por rota."""
+    backend_name = app.config.get("RATE_LIMIT_BACKEND", "memory")
+    if backend_name == "memory":
+        backend = MemoryBackend(app.config.get("RATE_LIMIT_MAX_KEYS", 100000))
+    elif backend_name == "mongo":
+        from app.db.mongo_client import db
+        from app.models import create_indexes
+        from app.models.rate_limit.schema import rate_limit_indexes
+
+        create_indexes(db.rate_limits, rate_limit_indexes)
+        backend = MongoBackend(db.rate_limits)
+    else:
+        raise ValueError(f"Backend de rate limiting desconhecido: {backend_name}")
+
+    rate_limiter.configure(
+        backend=backend,
+        algorithm=app.config.get("RATE_LIMIT_ALGORITHM", "sliding_window"),
+        policies=app.config.get("RATE_LIMIT_POLICIES", {}),
+        enabled=app.config.get("RATE_LIMIT_ENABLED", True)
+    )
+    return rate_limiter
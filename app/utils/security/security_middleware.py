@@ -1,7 +1,22 @@
-from flask import request, g
+import re
+from flask import request, g, current_app
 from app.utils.security.audit_logger import AuditLogger
+from app.utils.security.payload_scanner import scan_text, scan_json, DEFAULT_MAX_BYTES
 import logging
 
+_OBJECT_ID = re.compile(r'^[0-9a-fA-F]{24}$')
+
+
+def skip_payload_scan(f):
+    """Marca a rota para não ter query string/payload examinados (ex.: uploads grandes)."""
+    f._skip_payload_scan = True
+    return f
+
+
+def _current_user_id():
+    return g.user['_id'] if hasattr(g, 'user') and g.user else None
+
+
 class SecurityMiddleware:
     """Middleware para detectar e registrar tentativas de acesso suspeitas"""
     
@@ -9,44 +24,45 @@ class SecurityMiddleware:
     def detect_unauthorized_access():
         """Detecta tentativas de acesso não autorizado"""
         
-        # Detectar tentativas de SQL injection (mesmo sendo MongoDB)
-        suspicious_patterns = [
-            'union select', 'drop table', 'delete from', 'insert into',
-            'update set', 'or 1=1', 'and 1=1', '--', ';--',
-            '<script>', 'javascript:', 'eval(', 'document.cookie'
-        ]
-        
+        # Detectar tentativas de SQL injection (mesmo sendo MongoDB); os padrões
+        # ficam em payload_scanner, compilados em uma única regex
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, '_skip_payload_scan', False):
+            return
+
+        max_bytes = current_app.config.get('SECURITY_SCAN_MAX_BYTES', DEFAULT_MAX_BYTES)
+
         # Verificar parâmetros da query string
-        query_string = request.query_string.decode('utf-8').lower()
-        for pattern in suspicious_patterns:
-            if pattern in query_string:
+        if request.query_string:
+            query_string = request.query_string.decode('utf-8', 'replace')
+            pattern = scan_text(query_string, max_bytes)
+            if pattern:
                 AuditLogger.log_security_event(
                     event_type="suspicious_query_param",
                     description=f"Parâmetro suspeito detectado: {pattern}",
                     severity="medium",
-                    user_id=g.user['_id'] if hasattr(g, 'user') and g.user else None,
-                    additional_data={"query_string": request.query_string.decode('utf-8')[:200]}
+                    user_id=_current_user_id(),
+                    additional_data={"query_string": query_string[:200]}
                 )
-                break
         
-        # Verificar payload JSON
+        # Verificar payload JSON; corpos acima do limite não são decodificados
+        # aqui: examina-se o texto bruto dos primeiros max_bytes
         if request.is_json:
-            try:
-                data = request.get_json()
+            pattern = None
+            if (request.content_length or 0) <= max_bytes:
+                data = request.get_json(silent=True)
                 if data:
-                    json_str = str(data).lower()
-                    for pattern in suspicious_patterns:
-                        if pattern in json_str:
-                            AuditLogger.log_security_event(
-                                event_type="suspicious_json_payload",
-                                description=f"Payload suspeito detectado: {pattern}",
-                                severity="medium",
-                                user_id=g.user['_id'] if hasattr(g, 'user') and g.user else None,
-                                additional_data={"payload_sample": str(data)[:200]}
-                            )
-                            break
-            except:
-                pass
+                    pattern = scan_json(data, max_bytes)
+            else:
+                pattern = scan_text(request.get_data()[:max_bytes].decode('utf-8', 'replace'), max_bytes)
+            if pattern:
+                AuditLogger.log_security_event(
+                    event_type="suspicious_json_payload",
+                    description=f"Payload suspeito detectado: {pattern}",
+                    severity="medium",
+                    user_id=_current_user_id(),
+                    additional_data={"payload_sample": request.get_data(as_text=True)[:200]}
+                )
     
     @staticmethod
     def detect_admin_bypass_attempt():
@@ -82,18 +98,17 @@ class SecurityMiddleware:
         # (Implementação simplificada - em produção usar cache distribuído)
         
         # Detectar múltiplos IDs inválidos em sequência
-        if any(param.endswith('_id') for param in request.view_args or {}):
-            for param_name, param_value in (request.view_args or {}).items():
-                if param_name.endswith('_id') and param_value:
-                    # Verificar se é um ObjectId válido
-                    if len(param_value) != 24 or not all(c in '0123456789abcdef' for c in param_value.lower()):
-                        AuditLogger.log_security_event(
-                            event_type="resource_enumeration",
-                            description=f"ID inválido usado para enumeração: {param_name}",
-                            severity="low",
-                            user_id=g.user['_id'] if hasattr(g, 'user') and g.user else None,
-                            additional_data={"invalid_id": param_value, "parameter": param_name}
-                        )
+        for param_name, param_value in (request.view_args or {}).items():
+            if param_name.endswith('_id') and param_value:
+                # Verificar se é um ObjectId válido
+                if not isinstance(param_value, str) or not _OBJECT_ID.match(param_value):
+                    AuditLogger.log_security_event(
+                        event_type="resource_enumeration",
+                        description=f"ID inválido usado para enumeração: {param_name}",
+                        severity="low",
+                        user_id=_current_user_id(),
+                        additional_data={"invalid_id": str(param_value), "parameter": param_name}
+                    )
     
     @staticmethod
     def check_request_security():
@@ -0,0 +1,163 @@
+"""Versão dos tokens por usuário e tabela de revogação em memória.
+
+Os tokens levam as claims `role`, `is_active` e `tv` (o token_version do
+usuário na emissão). Desativar a conta, trocar o papel ou a senha
+incrementa `users.token_version` (bump_token_version em
+app.models.user.crud), o que invalida todos os tokens emitidos antes.
+
+Com AUTH_TOKEN_MODE = "stateless" os decorators de autenticação validam o
+token apenas com as claims e esta tabela (id do usuário -> token_version
+atual), sem consultar o MongoDB. A tabela guarda só os usuários cuja versão
+já foi incrementada e é atualizada em segundo plano a cada
+AUTH_REVOCATION_REFRESH_SECONDS, lendo apenas os usuários alterados desde a
+leitura anterior (índice em token_version_updated_at). Um bump feito neste
+processo vale na hora; feito em outro worker, vale na próxima atualização.
+
+Enquanto a tabela não foi carregada, ou se a última atualização tiver mais
+de AUTH_REVOCATION_MAX_STALENESS_SECONDS, os decorators voltam a validar
+pelo documento do usuário (modo "database").
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+# Margem da leitura incremental (relógios e escritas de outros processos fora de ordem)
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+_refresh_timer = None
+
+
+def token_claims(user):
+    """Claims adicionais dos tokens emitidos para o usuário."""
+    return {
+        "role": user.get("role", "user"),
+        "is_active": bool(user.get("is_active", False)),
+        "tv": int(user.get("token_version", 0))
+    }
+
+
+class RevocationTable:
+    """Versão atual dos tokens dos usuários que já tiveram bump."""
+
+    def __init__(self, mode="database", max_staleness=30):
+        self.mode = mode
+        self.max_staleness = max_staleness
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._watermark = None
+        self._refreshed_at = None
+        self.refreshes = 0
+        self.rejected = 0
+
+    def configure(self, mode=None, max_staleness=None):
+        with self._lock:
+            if mode is not None:
+                self.mode = mode
+            if max_staleness is not None:
+                self.max_staleness = max_staleness
+
+    @property
+    def ready(self):
+        refreshed_at = self._refreshed_at
+        return refreshed_at is not None and time.monotonic() - refreshed_at <= self.max_staleness
+
+    def use_claims(self, claims):
+        """Se o token pode ser validado só pelas claims (sem ler o usuário)."""
+        return self.mode == "stateless" and "tv" in claims and self.ready
+
+    def current_version(self, user_id):
+        return self._versions.get(str(user_id), 0)
+
+    def is_revoked(self, user_id, token_version):
+        """Token emitido antes do último bump conhecido. Tokens sem `tv` passam."""
+        if token_version is None or self.current_version(user_id) <= token_version:
+            return False
+        with self._lock:
+            self.rejected += 1
+        return True
+
+    def note(self, user_id, version):
+        """Registra a versão atual do usuário (nunca volta para uma versão menor)."""
+        key = str(user_id)
+        with self._lock:
+            if version > self._versions.get(key, 0):
+                self._versions[key] = version
+
+    def refresh(self):
+        """Lê os usuários com versão alterada desde a última leitura."""
+        from app.db.mongo_client import db
+
+        with self._refresh_lock:
+            started = time.monotonic()
+            if self._watermark is None:
+                query = {"token_version_updated_at": {"$exists": True}}
+            else:
+                query = {"token_version_updated_at": {"$gt": self._watermark - REFRESH_OVERLAP}}
+
+            latest = self._watermark
+            changed = 0
+            for user in db.users.find(query, {"token_version": 1, "token_version_updated_at": 1}):
+                self.note(user["_id"], user.get("token_version", 0))
+                updated_at = user.get("token_version_updated_at")
+                if updated_at and (latest is None or updated_at > latest):
+                    latest = updated_at
+                changed += 1
+
+            self._watermark = latest
+            self._refreshed_at = started
+            self.refreshes += 1
+            return changed
+
+    def stats(self):
+        refreshed_at = self._refreshed_at
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "ready": self.ready,
+                "users": len(self._versions),
+                "refreshes": self.refreshes,
+                "rejected": self.rejected,
+                "seconds_since_refresh": round(time.monotonic() - refreshed_at, 1) if refreshed_at else None
+            }
+
+
+token_revocation = RevocationTable()
+
+
+def start_revocation_refresh_job(interval_seconds):
+    """Atualiza a tabela de revogação em segundo plano (primeira leitura imediata)."""
+    global _refresh_timer
+
+    if interval_seconds <= 0 or _refresh_timer is not None:
+        return
+
+    def run():
+        global _refresh_timer
+        try:
+            token_revocation.refresh()
+        except Exception as e:
+            logger.error(f"Erro ao atualizar a tabela de revogação de tokens: {e}")
+        _refresh_timer = threading.Timer(interval_seconds, run)
+        _refresh_timer.daemon = True
+        _refresh_timer.start()
+
+    _refresh_timer = threading.Timer(0, run)
+    _refresh_timer.daemon = True
+    _refresh_timer.start()
+
+
+def init_token_revocation(app):
+    """Configura o modo de autenticação e inicia a atualização da tabela."""
+    mode = app.config.get("AUTH_TOKEN_MODE", "database")
+    interval = app.config.get("AUTH_REVOCATION_REFRESH_SECONDS", 5)
+    token_revocation.configure(
+        mode=mode,
+        max_staleness=app.config.get("AUTH_REVOCATION_MAX_STALENESS_SECONDS", max(interval * 6, 30))
+    )
+    if mode == "stateless":
+        start_revocation_refresh_job(interval)
+    return token_revocation
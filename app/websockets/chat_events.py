@@ -3,8 +3,11 @@ from flask import request as flask_request
 from flask_socketio import emit, join_room, leave_room, disconnect
 from flask_jwt_extended import decode_token
 from app.extensions.socketio import socketio
-from app.services.chat.chat_service import send_message, get_chat_messages
+from app.services.chat.chat_service import (
+    send_message, get_chat_messages, advance_read_watermark, serialize_watermarks
+)
 from app.models.user.crud import get_user_by_id
+from app.websockets.presence import get_presence
 from datetime import datetime
 import jwt as pyjwt
 import logging
@@ -13,8 +16,10 @@ from bson import ObjectId
 # Configurar logging
 logger = logging.getLogger(__name__)
 
-# Dicionário para rastrear usuários conectados
-connected_users = {}
+
+def user_room(user_id):
+    """Sala pessoal do usuário (todas as conexões dele, em qualquer worker)."""
+    return f"user_{user_id}"
 
 
 def serialize_datetime(obj):
@@ -59,10 +64,6 @@ def sanitize_message_data(message):
             'profile_pic': str(user_data.get('profile_pic', '')) if user_data.get('profile_pic') else None
         }
 
-    # Dados de leitura
-    if 'read_by' in message:
-        sanitized['read_by'] = [str(user_id) for user_id in message.get('read_by', [])]
-
     # Outros campos opcionais
     for field in ['edited', 'edit_history']:
         if field in message:
@@ -85,10 +86,28 @@ def sanitize_room_data(room):
         'created_at': room.get('created_at').isoformat() if room.get('created_at') else None,
         'updated_at': room.get('updated_at').isoformat() if room.get('updated_at') else None,
         'last_message_at': room.get('last_message_at').isoformat() if room.get('last_message_at') else None,
-        'unread_count': int(room.get('unread_count', 0))
+        'unread_count': int(room.get('unread_count', 0)),
+        'read_watermarks': serialize_watermarks(room)
     }
 
 
+def build_read_receipt(room_id, user_id, watermark):
+    """Payload do evento read_receipt: apenas a marca de leitura do usuário."""
+    receipt = serialize_watermarks({"read_watermarks": {str(user_id): watermark}})[str(user_id)]
+    return {'room_id': str(room_id), 'user_id': str(user_id), **receipt}
+
+
+def broadcast_read_receipt(room_id, user_id, watermark, skip_sid=None):
+    """Avisa os participantes da sala que o usuário leu até a marca informada."""
+    if not watermark:
+        return
+    try:
+        socketio.emit('read_receipt', build_read_receipt(room_id, user_id, watermark),
+                      to=str(room_id), skip_sid=skip_sid)
+    except Exception as e:
+        logger.error(f"Erro ao enviar confirmação de leitura: {e}")
+
+
 @socketio.on('connect')
 def handle_connect(auth=None):
     """Usuário conectado ao WebSocket."""
@@ -127,12 +146,15 @@ def handle_connect(auth=None):
             disconnect()
             return False
 
-        # Registrar usuário conectado
-        connected_users[flask_request.sid] = {
-            'user_id': user_id,
-            'username': user['username'],
-            'user_data': user
-        }
+        # Token anterior à desativação, troca de papel ou de senha
+        if payload.get('tv') is not None and user.get('token_version', 0) > payload['tv']:
+            emit('error', {'message': 'Token revogado'})
+            disconnect()
+            return False
+
+        # Registrar usuário conectado e colocá-lo na sua sala pessoal
+        get_presence().register(flask_request.sid, user)
+        join_room(user_room(user_id))
 
         emit('connected', {
             'message': 'Conectado ao chat',
@@ -154,10 +176,10 @@ def handle_connect(auth=None):
 def handle_disconnect():
     """Usuário desconectado do WebSocket."""
     try:
-        if flask_request.sid in connected_users:
-            user_info = connected_users[flask_request.sid]
+        user_info = get_presence().get(flask_request.sid)
+        if user_info:
             logger.info(f"Usuário {user_info['username']} desconectado")
-            del connected_users[flask_request.sid]
+            get_presence().unregister(flask_request.sid)
         else:
             logger.info(f"Conexão {flask_request.sid} desconectada (usuário não identificado)")
     except Exception as e:
@@ -168,11 +190,12 @@ def handle_disconnect():
 def handle_join_room(data):
     """Usuário entra em uma sala de chat."""
     try:
-        if flask_request.sid not in connected_users:
+        user_info = get_presence().get(flask_request.sid)
+        if not user_info:
             emit('error', {'message': 'Usuário não autenticado'})
             return
 
-        user_id = connected_users[flask_request.sid]['user_id']
+        user_id = user_info['user_id']
         room_id = data.get('room_id')
 
         if not room_id:
@@ -217,12 +240,22 @@ def handle_join_room(data):
 
                 logger.info(f"Enviando {len(sanitized_messages)} mensagens para usuário {user_id}")
 
+                room_data = sanitize_room_data(room)
+                room_data['read_watermarks'] = messages_result["data"]["read_watermarks"]
+
                 emit('room_joined', {
                     'room_id': room_id,
                     'messages': sanitized_messages,
-                    'room_data': sanitize_room_data(room)
+                    'room_data': room_data
                 })
 
+                # Entrar na sala marca tudo como lido: avisar o outro participante
+                own_watermark = room_data['read_watermarks'].get(user_id)
+                if own_watermark:
+                    socketio.emit('read_receipt', {
+                        'room_id': room_id, 'user_id': user_id, **own_watermark
+                    }, to=room_id, skip_sid=flask_request.sid)
+
             else:
                 logger.error(f"Erro ao buscar mensagens: {messages_result['message']}")
                 emit('error', {'message': messages_result["message"]})
@@ -250,8 +283,9 @@ def handle_leave_room(data):
             leave_room(room_id)
             emit('room_left', {'room_id': room_id})
 
-            if flask_request.sid in connected_users:
-                user_id = connected_users[flask_request.sid]['user_id']
+            user_info = get_presence().get(flask_request.sid)
+            if user_info:
+                user_id = user_info['user_id']
                 logger.info(f"Usuário {user_id} saiu da sala {room_id}")
 
     except Exception as e:
@@ -263,11 +297,12 @@ def handle_leave_room(data):
 def handle_send_message(data):
     """Usuário envia uma mensagem."""
     try:
-        if flask_request.sid not in connected_users:
+        user_info = get_presence().get(flask_request.sid)
+        if not user_info:
             emit('error', {'message': 'Usuário não autenticado'})
             return
 
-        user_id = connected_users[flask_request.sid]['user_id']
+        user_id = user_info['user_id']
         room_id = data.get('room_id')
         content = data.get('content', '').strip()
 
@@ -305,14 +340,46 @@ def handle_send_message(data):
         emit('error', {'message': f'Erro ao enviar mensagem: {str(e)}'})
 
 
+@socketio.on('mark_read')
+def handle_mark_read(data):
+    """Usuário leu as mensagens da sala (ex.: recebeu uma mensagem com a sala aberta)."""
+    try:
+        user_info = get_presence().get(flask_request.sid)
+        if not user_info:
+            emit('error', {'message': 'Usuário não autenticado'})
+            return
+
+        user_id = user_info['user_id']
+        room_id = data.get('room_id')
+        if not room_id:
+            emit('error', {'message': 'ID da sala é obrigatório'})
+            return
+
+        from app.db.mongo_client import db
+
+        room = db.chat_rooms.find_one(
+            {"_id": ObjectId(room_id)},
+            {"buyer_id": 1, "seller_id": 1}
+        )
+        if not room or user_id not in (str(room["buyer_id"]), str(room["seller_id"])):
+            emit('error', {'message': 'Acesso negado à sala'})
+            return
+
+        watermark = advance_read_watermark(room_id, user_id)
+        broadcast_read_receipt(room_id, user_id, watermark)
+
+    except Exception as e:
+        logger.error(f"Erro ao marcar sala como lida: {e}")
+        emit('error', {'message': 'Erro ao marcar mensagens como lidas'})
+
+
 @socketio.on('typing')
 def handle_typing(data):
     """Usuário está digitando."""
     try:
-        if flask_request.sid not in connected_users:
+        user_info = get_presence().get(flask_request.sid)
+        if not user_info:
             return
-
-        user_info = connected_users[flask_request.sid]
         room_id = data.get('room_id')
 
         if room_id:
@@ -330,10 +397,9 @@ def handle_typing(data):
 def handle_stop_typing(data):
     """Usuário parou de digitar."""
     try:
-        if flask_request.sid not in connected_users:
+        user_info = get_presence().get(flask_request.sid)
+        if not user_info:
             return
-
-        user_info = connected_users[flask_request.sid]
         room_id = data.get('room_id')
 
         if room_id:
@@ -391,8 +457,8 @@ def send_order_status_update(room_id, order_id, new_status, updated_by_username)
 def handle_ping(data):
     """Responde ping para teste de conexão."""
     try:
-        if flask_request.sid in connected_users:
-            user_info = connected_users[flask_request.sid]
+        user_info = get_presence().get(flask_request.sid)
+        if user_info:
             emit('pong', {
                 'message': 'pong',
                 'user_id': user_info['user_id'],
@@ -410,16 +476,18 @@ def handle_ping(data):
 
 # Função para obter usuários conectados (apenas para debug/admin)
 def get_connected_users():
-    """Retorna lista de usuários conectados."""
+    """Retorna lista de usuários conectados (todos os workers, se compartilhada)."""
+    connections = get_presence().list_connections()
     return {
-        'count': len(connected_users),
+        'count': len(connections),
         'users': [
             {
-                'sid': sid,
+                'sid': info['sid'],
                 'user_id': info['user_id'],
-                'username': info['username']
+                'username': info['username'],
+                'worker_id': info.get('worker_id')
             }
-            for sid, info in connected_users.items()
+            for info in connections
         ]
     }
 
@@ -429,15 +497,12 @@ def get_connected_users():
 def handle_admin_connections(data):
     """Handler admin para verificar conexões ativas."""
     try:
-        if flask_request.sid not in connected_users:
+        user_info = get_presence().get(flask_request.sid)
+        if not user_info:
             emit('error', {'message': 'Não autenticado'})
             return
-
-        user_info = connected_users[flask_request.sid]
-        user = user_info.get('user_data', {})
-
         # Verificar se é admin
-        if user.get('role') not in ['admin', 'support']:
+        if user_info.get('role') not in ['admin', 'support']:
             emit('error', {'message': 'Acesso negado - apenas administradores'})
             return
 
@@ -454,8 +519,8 @@ def handle_admin_connections(data):
 def handle_test_connection(data):
     """Testa a conexão WebSocket."""
     try:
-        if flask_request.sid in connected_users:
-            user_info = connected_users[flask_request.sid]
+        user_info = get_presence().get(flask_request.sid)
+        if user_info:
             emit('test_response', {
                 'status': 'connected',
                 'user_id': user_info['user_id'],
@@ -479,11 +544,12 @@ def handle_test_connection(data):
 def handle_debug_room(data):
     """Debug de informações da sala."""
     try:
-        if flask_request.sid not in connected_users:
+        user_info = get_presence().get(flask_request.sid)
+        if not user_info:
             emit('error', {'message': 'Usuário não autenticado'})
             return
 
-        user_id = connected_users[flask_request.sid]['user_id']
+        user_id = user_info['user_id']
         room_id = data.get('room_id')
 
         if not room_id:
@@ -530,7 +596,7 @@ def log_stats():
     """Log de estatísticas do WebSocket."""
     try:
         stats = {
-            'connected_users': len(connected_users),
+            'connected_users': len(get_presence().local_sids()),
             'timestamp': datetime.utcnow().isoformat()
         }
         logger.info(f"WebSocket Stats: {stats}")
@@ -544,9 +610,9 @@ def broadcast_notification_to_user(user_id, notification_data):
     try:
         user_id = str(user_id)
         
-        # Check if user is connected
-        if user_id in connected_users:
-            room_name = f"user_{user_id}"
+        # Check if user is connected (in any worker)
+        if get_presence().is_online(user_id):
+            room_name = user_room(user_id)
             
             # Sanitize notification data
             sanitized_notification = serialize_datetime(notification_data)
@@ -573,8 +639,8 @@ def broadcast_unread_count_update(user_id, unread_count):
     try:
         user_id = str(user_id)
         
-        if user_id in connected_users:
-            room_name = f"user_{user_id}"
+        if get_presence().is_online(user_id):
+            room_name = user_room(user_id)
             
             socketio.emit('unread_count_update', {
                 'unread_count': unread_count,
@@ -0,0 +1,189 @@
+"""Registro de presença das conexões WebSocket.
+
+Cada worker guarda localmente os dados das conexões que atende (o sid só
+existe no processo que aceitou a conexão). Para saber se um usuário está
+online em qualquer worker, a presença também pode ser compartilhada:
+
+    - "local": apenas em memória (um único processo, testes)
+    - "mongo": coleção socket_presence com TTL; cada worker renova o
+      expires_at das suas conexões a cada heartbeat, e conexões de um worker
+      que caiu expiram sozinhas
+
+O backend é escolhido por SOCKETIO_PRESENCE_BACKEND. Ao encerrar o processo
+(atexit) o worker remove as próprias conexões em vez de esperar o TTL.
+"""
+import atexit
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LocalPresence:
+    """Presença em memória: enxerga apenas as conexões deste processo."""
+
+    def __init__(self):
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def register(self, sid, user):
+        info = {
+            "user_id": str(user["_id"]),
+            "username": user.get("username", ""),
+            "role": user.get("role", "user")
+        }
+        with self._lock:
+            self._connections[sid] = info
+        return info
+
+    def unregister(self, sid):
+        with self._lock:
+            return self._connections.pop(sid, None)
+
+    def get(self, sid):
+        """Dados da conexão atendida por este worker (ou None)."""
+        return self._connections.get(sid)
+
+    def local_sids(self):
+        with self._lock:
+            return list(self._connections)
+
+    def is_online(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            return any(info["user_id"] == user_id for info in self._connections.values())
+
+    def list_connections(self):
+        with self._lock:
+            return [
+                {"sid": sid, "worker_id": WORKER_ID, **info}
+                for sid, info in self._connections.items()
+            ]
+
+    def heartbeat(self):
+        """Nada a renovar: a presença local some junto com o processo."""
+
+    def shutdown(self):
+        with self._lock:
+            self._connections.clear()
+
+
+class MongoPresence(LocalPresence):
+    """Presença compartilhada entre workers via MongoDB (coleção com TTL)."""
+
+    def __init__(self, collection, ttl_seconds=90):
+        super().__init__()
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    def _expires_at(self):
+        return datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+
+    def register(self, sid, user):
+        info = super().register(sid, user)
+        try:
+            self.collection.replace_one(
+                {"_id": sid},
+                {
+                    **info,
+                    "worker_id": WORKER_ID,
+                    "connected_at": datetime.utcnow(),
+                    "expires_at": self._expires_at()
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Erro ao registrar presença de {sid}: {e}")
+        return info
+
+    def unregister(self, sid):
+        info = super().unregister(sid)
+        try:
+            self.collection.delete_one({"_id": sid})
+        except Exception as e:
+            logger.error(f"Erro ao remover presença de {sid}: {e}")
+        return info
+
+    def is_online(self, user_id):
+        if super().is_online(user_id):
+            return True
+        return self.collection.find_one(
+            {"user_id": str(user_id), "expires_at": {"$gt": datetime.utcnow()}},
+            {"_id": 1}
+        ) is not None
+
+    def list_connections(self):
+        return [
+            {
+                "sid": entry["_id"],
+                "worker_id": entry.get("worker_id"),
+                "user_id": entry["user_id"],
+                "username": entry.get("username", ""),
+                "role": entry.get("role", "user")
+            }
+            for entry in self.collection.find({"expires_at": {"$gt": datetime.utcnow()}})
+        ]
+
+    def heartbeat(self):
+        """Renova o TTL das conexões deste worker."""
+        sids = self.local_sids()
+        if not sids:
+            return
+        try:
+            self.collection.update_many(
+                {"_id": {"$in": sids}},
+                {"$set": {"expires_at": self._expires_at(), "worker_id": WORKER_ID}}
+            )
+        except Exception as e:
+            logger.error(f"Erro no heartbeat de presença: {e}")
+
+    def shutdown(self):
+        try:
+            self.collection.delete_many({"worker_id": WORKER_ID})
+        except Exception as e:
+            logger.error(f"Erro ao limpar presença do worker {WORKER_ID}: {e}")
+        super().shutdown()
+
+
+presence = LocalPresence()
+
+
+def init_presence(app, socketio):
+    """Escolhe o backend de presença e inicia o heartbeat deste worker."""
+    global presence
+
+    backend = app.config.get("SOCKETIO_PRESENCE_BACKEND", "local")
+    if backend == "mongo":
+        from app.db.mongo_client import db
+        from app.models import create_indexes
+        from app.models.presence.schema import presence_indexes
+
+        ttl_seconds = app.config.get("SOCKETIO_PRESENCE_TTL_SECONDS", 90)
+        create_indexes(db.socket_presence, presence_indexes)
+        presence = MongoPresence(db.socket_presence, ttl_seconds)
+
+        # Heartbeat a cada terço do TTL; usa a tarefa de fundo do modo assíncrono
+        # configurado (thread, greenlet do eventlet/gevent)
+        interval = max(ttl_seconds // 3, 1)
+
+        def heartbeat_loop():
+            while True:
+                socketio.sleep(interval)
+                presence.heartbeat()
+
+        socketio.start_background_task(heartbeat_loop)
+    elif backend != "local":
+        raise ValueError(f"Backend de presença desconhecido: {backend}")
+
+    atexit.register(presence.shutdown)
+    return presence
+
+
+def get_presence():
+    """Registro de presença ativo (use em vez de importar `presence` diretamente)."""
+    return presence
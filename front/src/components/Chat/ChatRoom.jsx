@@ -27,6 +27,8 @@ const ChatRoom = ({ orderId, onClose }) => {
   const [typingUsers, setTypingUsers] = useState(new Set());
   const [socket, setSocket] = useState(null);
   const [pendingMessages, setPendingMessages] = useState(new Set());
+  // Marca de leitura do outro participante (até onde ele já leu)
+  const [otherReadAt, setOtherReadAt] = useState(null);
   
   const messagesEndRef = useRef(null);
   const messagesContainerRef = useRef(null);
@@ -90,6 +92,16 @@ const ChatRoom = ({ orderId, onClose }) => {
     socketInstance.on('room_joined', (data) => {
       console.log('Entrou na sala:', data);
       setMessages(data.messages || []);
+
+      const watermarks = data.room_data?.read_watermarks || {};
+      const otherUserId = Object.keys(watermarks).find(id => id !== user._id);
+      setOtherReadAt(otherUserId ? watermarks[otherUserId].read_at : null);
+    });
+
+    socketInstance.on('read_receipt', (data) => {
+      if (data.room_id === roomId && data.user_id !== user._id) {
+        setOtherReadAt(data.read_at);
+      }
     });
 
     socketInstance.on('new_message', (data) => {
@@ -139,6 +151,8 @@ const ChatRoom = ({ orderId, onClose }) => {
         // Tocar som de notificação se não for própria mensagem
         if (message.user_id !== user._id) {
           playNotificationSound();
+          // Sala aberta: a mensagem já foi vista
+          socketInstance.emit('mark_read', { room_id: roomId });
         }
       }
     });
@@ -318,7 +332,8 @@ const ChatRoom = ({ orderId, onClose }) => {
       
       // Se tem _id do servidor, foi confirmada
       if (message._id && !message.is_pending) {
-        return message.read_by?.length > 1 ? 'read' : 'sent';
+        const readByOther = otherReadAt && new Date(message.created_at) <= new Date(otherReadAt);
+        return readByOther ? 'read' : 'sent';
       }
       
       // Caso padrão para mensagens enviadas
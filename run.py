@@ -1,4 +1,14 @@
 import os
+
+# eventlet/gevent precisam do monkey patch antes de qualquer outro import
+_async_mode = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+if _async_mode == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif _async_mode == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
 from app import create_app 
 from app.extensions.socketio import socketio
 
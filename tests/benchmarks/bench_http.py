@@ -0,0 +1,354 @@
+"""Teste de carga HTTP da API sobre um marketplace sintético.
+
+Popula o mongod de benchmark com seed_marketplace.py e dispara uma mistura
+ponderada de requisições com N workers concorrentes (cada um autenticado
+como um usuário diferente):
+
+    ads_list       GET  /api/ads/            (com e sem filtro de jogo/tipo)
+    ad_detail      GET  /api/ads/<id>
+    games          GET  /api/games/
+    cart           GET  /api/cart/
+    cart_add       POST /api/cart/add
+    checkout       POST /api/orders/checkout
+    orders         GET  /api/orders/
+    notifications  GET  /api/notifications/
+
+Mede:
+    - vazão total e por endpoint (req/s), erros e códigos de status
+    - latência p50/p95/p99 por endpoint
+    - operações do MongoDB por requisição: na fase de perfil cada endpoint é
+      chamado sozinho (serverStatus.opcounters antes/depois), e na fase de carga
+      é medida a média da mistura inteira
+
+O resultado é gravado em JSON (tests/benchmarks/results/ ou --output) e pode
+ser comparado com uma execução anterior via --baseline.
+
+Uso:
+    python tests/benchmarks/bench_http.py --users 5000 --workers 32 --duration 60
+    python tests/benchmarks/bench_http.py --mix ads_list=10,ad_detail=5 --output base.json
+    python tests/benchmarks/bench_http.py --baseline base.json
+    AUTH_TOKEN_MODE=database python tests/benchmarks/bench_http.py --output auth_db.json
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+import common
+import seed_marketplace
+
+DEFAULT_MIX = {
+    "ads_list": 30,
+    "ad_detail": 25,
+    "games": 10,
+    "cart": 10,
+    "cart_add": 5,
+    "checkout": 2,
+    "orders": 8,
+    "notifications": 10,
+}
+
+
+class Workload:
+    """Monta as requisições de cada endpoint a partir dos ids do marketplace."""
+
+    def __init__(self, market, rnd):
+        self.market = market
+        self.rnd = rnd
+
+    def request(self, endpoint, user_id):
+        """Retorna (método, caminho, corpo JSON) para o endpoint."""
+        rnd, market = self.rnd, self.market
+
+        if endpoint == "ads_list":
+            params = ["limit=20"]
+            if rnd.random() < 0.4:
+                params.append(f"game_id={rnd.choice(market.games)}")
+            if rnd.random() < 0.3:
+                params.append(f"ad_type={rnd.choice(['venda', 'troca', 'procura'])}")
+            return "GET", "/api/ads/?" + "&".join(params), None
+        if endpoint == "ad_detail":
+            return "GET", f"/api/ads/{rnd.choice(market.ads)}", None
+        if endpoint == "games":
+            return "GET", "/api/games/?limit=20", None
+        if endpoint == "cart":
+            return "GET", "/api/cart/", None
+        if endpoint == "cart_add":
+            return "POST", "/api/cart/add", {"ad_id": str(self._foreign_sale_ad(user_id)), "quantity": 1}
+        if endpoint == "checkout":
+            return "POST", "/api/orders/checkout", {
+                "cart_items": [{"ad_id": str(self._foreign_sale_ad(user_id)), "quantity": 1}],
+                "shipping_address": seed_marketplace.ADDRESS,
+                "payment_method": "pending",
+            }
+        if endpoint == "orders":
+            return "GET", "/api/orders/?limit=20", None
+        if endpoint == "notifications":
+            return "GET", "/api/notifications/?limit=20", None
+        raise ValueError(f"Endpoint desconhecido: {endpoint}")
+
+    def _foreign_sale_ad(self, user_id):
+        """Anúncio de venda ativo de outro usuário (não é possível comprar o próprio)."""
+        while True:
+            ad_id = self.rnd.choice(self.market.sale_ads)
+            if self.market.ad_owner[ad_id] != user_id:
+                return ad_id
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, latency_ms, status):
+        with self.lock:
+            self.latencies[endpoint].append(latency_ms)
+            self.statuses[endpoint][str(status)] += 1
+            if status is None or status >= 400:
+                self.errors[endpoint] += 1
+
+
+def _call(session, base_url, method, path, body, timeout):
+    started = time.perf_counter()
+    try:
+        response = session.request(method, base_url + path, json=body, timeout=timeout)
+        status = response.status_code
+    except Exception:
+        status = None
+    return (time.perf_counter() - started) * 1000, status
+
+
+def _session(user_id):
+    import requests
+
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {common.make_access_token(user_id)}"
+    return session
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Endpoint desconhecido: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def profile_endpoints(base_url, database, market, endpoints, requests_per_endpoint, timeout, seed):
+    """Operações do MongoDB por requisição de cada endpoint, medidas isoladamente."""
+    rnd = random.Random(seed)
+    workload = Workload(market, rnd)
+    user_id = market.users[1 % len(market.users)]
+    session = _session(user_id)
+    profile = {}
+
+    for endpoint in endpoints:
+        before = common.server_opcounters(database)
+        latencies = []
+        for _ in range(requests_per_endpoint):
+            method, path, body = workload.request(endpoint, user_id)
+            latency, _status = _call(session, base_url, method, path, body, timeout)
+            latencies.append(latency)
+        delta = common.opcounters_delta(before, common.server_opcounters(database))
+        # serverStatus também conta como comando; desconta as duas leituras
+        delta["command"] = max(0, delta.get("command", 0) - 2)
+        profile[endpoint] = {
+            "requests": requests_per_endpoint,
+            "mongo_ops_per_request": {
+                key: round(value / requests_per_endpoint, 2) for key, value in delta.items() if value
+            },
+            "mongo_ops_total_per_request": round(sum(delta.values()) / requests_per_endpoint, 2),
+            "sequential_latency_ms": common.percentiles(latencies),
+        }
+
+    session.close()
+    return profile
+
+
+def run_load(base_url, database, market, mix, args):
+    """Fase de carga: workers concorrentes escolhendo endpoints pela mistura."""
+    stats = EndpointStats()
+    endpoints, weights = list(mix), list(mix.values())
+    deadline = time.monotonic() + args.warmup + args.duration
+    measure_from = time.monotonic() + args.warmup
+    counters = {}
+
+    def worker(index):
+        rnd = random.Random(args.seed + index)
+        workload = Workload(market, rnd)
+        user_id = market.users[rnd.randrange(len(market.users))]
+        session = _session(user_id)
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            endpoint = rnd.choices(endpoints, weights)[0]
+            method, path, body = workload.request(endpoint, user_id)
+            latency, status = _call(session, base_url, method, path, body, args.timeout)
+            if now >= measure_from:
+                stats.record(endpoint, latency, status)
+            if args.think_time:
+                time.sleep(rnd.expovariate(1 / args.think_time))
+        session.close()
+
+    def snapshot_after_warmup():
+        time.sleep(args.warmup)
+        counters["before"] = common.server_opcounters(database)
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(args.workers)]
+    warmup_thread = threading.Thread(target=snapshot_after_warmup, daemon=True)
+    warmup_thread.start()
+    for thread in threads:
+        thread.start()
+    warmup_thread.join()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    delta = common.opcounters_delta(counters["before"], common.server_opcounters(database))
+
+    total_requests = sum(len(samples) for samples in stats.latencies.values())
+    total_errors = sum(stats.errors.values())
+    per_endpoint = {
+        endpoint: {
+            "requests": len(samples),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "errors": stats.errors[endpoint],
+            "status_codes": dict(stats.statuses[endpoint]),
+            "latency_ms": common.percentiles(samples),
+        }
+        for endpoint, samples in sorted(stats.latencies.items())
+    }
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": total_requests,
+        "errors": total_errors,
+        "throughput_rps": round(total_requests / elapsed, 2) if elapsed else None,
+        "latency_ms": common.percentiles([s for samples in stats.latencies.values() for s in samples]),
+        "mongo_ops": delta,
+        "mongo_ops_per_request": round(sum(delta.values()) / total_requests, 2) if total_requests else None,
+        "endpoints": per_endpoint,
+    }
+
+
+def compare_with_baseline(metrics, baseline_path):
+    """Diferença percentual (atual x baseline) das métricas principais."""
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle)["metrics"]
+
+    def change(current, previous):
+        if current is None or not previous:
+            return None
+        return round((current - previous) / previous * 100, 1)
+
+    comparison = {
+        "baseline": baseline_path,
+        "throughput_rps_pct": change(metrics["load"]["throughput_rps"], baseline["load"].get("throughput_rps")),
+        "mongo_ops_per_request_pct": change(metrics["load"]["mongo_ops_per_request"],
+                                            baseline["load"].get("mongo_ops_per_request")),
+        "endpoints": {},
+    }
+    for endpoint, current in metrics["load"]["endpoints"].items():
+        previous = baseline["load"].get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        entry = {
+            f"{key}_pct": change(current["latency_ms"].get(key), previous["latency_ms"].get(key))
+            for key in ("p50", "p95", "p99")
+        }
+        entry["throughput_rps_pct"] = change(current["throughput_rps"], previous["throughput_rps"])
+        ops_now = metrics.get("profile", {}).get(endpoint, {}).get("mongo_ops_total_per_request")
+        ops_before = baseline.get("profile", {}).get(endpoint, {}).get("mongo_ops_total_per_request")
+        entry["mongo_ops_per_request"] = {"baseline": ops_before, "current": ops_now}
+        comparison["endpoints"][endpoint] = entry
+    return comparison
+
+
+def print_report(metrics):
+    load = metrics["load"]
+    print(f"\n{'endpoint':<14} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'ops/req':>8} {'erros':>6}")
+    for endpoint, data in load["endpoints"].items():
+        latency = data["latency_ms"]
+        ops = metrics.get("profile", {}).get(endpoint, {}).get("mongo_ops_total_per_request", "-")
+        print(f"{endpoint:<14} {data['throughput_rps']:>8} {latency.get('p50', '-'):>9} "
+              f"{latency.get('p95', '-'):>9} {latency.get('p99', '-'):>9} {ops:>8} {data['errors']:>6}")
+    print(f"\nTotal: {load['throughput_rps']} req/s | {load['mongo_ops_per_request']} ops MongoDB/req | "
+          f"erros: {load['errors']}")
+
+    comparison = metrics.get("comparison")
+    if comparison:
+        print(f"\nComparação com {comparison['baseline']}: vazão {comparison['throughput_rps_pct']}% | "
+              f"ops/req {comparison['mongo_ops_per_request_pct']}%")
+        for endpoint, entry in comparison["endpoints"].items():
+            print(f"  {endpoint:<14} p50 {entry['p50_pct']}% p95 {entry['p95_pct']}% p99 {entry['p99_pct']}% "
+                  f"req/s {entry['throughput_rps_pct']}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    seed_marketplace.add_arguments(parser)
+    parser.add_argument("--workers", type=int, default=16, help="Clientes HTTP concorrentes")
+    parser.add_argument("--duration", type=float, default=30, help="Duração da fase de carga (s)")
+    parser.add_argument("--warmup", type=float, default=5, help="Aquecimento não medido (s)")
+    parser.add_argument("--think-time", type=float, default=0, help="Pausa média entre requisições (s)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Pesos por endpoint, ex.: ads_list=30,ad_detail=25,checkout=2")
+    parser.add_argument("--profile-requests", type=int, default=50,
+                        help="Requisições por endpoint na fase de perfil (0 desativa)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--mongo-uri", default=common.DEFAULT_MONGO_URI)
+    parser.add_argument("--db", default=common.DEFAULT_DB_NAME)
+    parser.add_argument("--async-mode", default="threading", choices=["threading", "eventlet", "gevent"])
+    parser.add_argument("--url", help="Servidor já em execução (não inicia bench_server.py)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    client, database = common.connect_database(args.mongo_uri, args.db, reset=True)
+    print("Gerando marketplace sintético...")
+    started = time.perf_counter()
+    market = seed_marketplace.seed_from_args(database, args)
+    seed_seconds = time.perf_counter() - started
+    print(f"  {market.summary()} em {seed_seconds:.1f}s")
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        port = common.free_port()
+        server = common.start_server(port, args.mongo_uri, args.db, args.async_mode)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        metrics = {"dataset": market.summary(), "seed_seconds": round(seed_seconds, 2)}
+        if args.profile_requests:
+            print(f"Perfil: {args.profile_requests} requisições sequenciais por endpoint")
+            metrics["profile"] = profile_endpoints(base_url, database, market, list(args.mix),
+                                                   args.profile_requests, args.timeout, args.seed)
+        print(f"Carga contra {base_url}: {args.workers} workers por {args.duration}s")
+        metrics["load"] = run_load(base_url, database, market, args.mix, args)
+        if server:
+            metrics["server_rss_bytes"] = common.process_rss_bytes(server.pid)
+    finally:
+        if server:
+            common.stop_server(server)
+        client.close()
+
+    if args.baseline:
+        metrics["comparison"] = compare_with_baseline(metrics, args.baseline)
+
+    parameters = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    output = common.write_results("http", parameters, metrics, args.output)
+    print_report(metrics)
+    print(f"\nResultado salvo em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Pico de logins: bcrypt na thread da requisição vs. no pool de processos.
+
+N threads (simulando as threads do worker web) fazem verificações de senha
+seguidas enquanto uma thread "saudável" mede a latência de uma tarefa curta
+de CPU (serialização de uma resposta JSON). Com o bcrypt na própria thread
+a tarefa curta disputa o processo com os hashes; com o pool ela fica
+isolada. Também mede vazão, latência das verificações, rejeições da fila
+limitada (503) e o custo escolhido pela calibração.
+
+Uso:
+    python tests/benchmarks/bench_password_hasher.py --threads 16 --duration 10
+    python tests/benchmarks/bench_password_hasher.py --rounds 10 --max-pending 8
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import common
+
+from app.utils.helpers.password_helpers import (  # noqa: E402
+    PasswordHasher, PasswordHasherBusy, calibrate_rounds, _bcrypt_hash
+)
+
+RESPONSE = {"success": True, "data": {"ads": [{"title": f"Conta {i}", "price": i * 1.5, "tags": ["a", "b"]} for i in range(50)]}}
+
+
+def spike(hasher, stored_hash, threads, duration):
+    """Verificações concorrentes + latência da tarefa curta durante o pico."""
+    deadline = time.monotonic() + duration
+    verify_ms, probe_ms = [], []
+    counters = {"ok": 0, "rejected": 0}
+    lock = threading.Lock()
+
+    def login_thread():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                hasher.verify("Senha123", stored_hash)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    verify_ms.append(elapsed)
+                    counters["ok"] += 1
+            except PasswordHasherBusy:
+                with lock:
+                    counters["rejected"] += 1
+                time.sleep(0.005)
+
+    def probe_thread():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            json.dumps(RESPONSE)
+            probe_ms.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+    workers = [threading.Thread(target=login_thread) for _ in range(threads)]
+    workers.append(threading.Thread(target=probe_thread))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return {
+        "verifications_per_second": round(counters["ok"] / duration, 1),
+        "rejected": counters["rejected"],
+        "verify_ms": common.percentiles(verify_ms),
+        "probe_ms": common.percentiles(probe_ms),
+        "hasher": hasher.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16, help="Threads fazendo login ao mesmo tempo")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos do pool")
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--rounds", type=int, help="Custo do bcrypt (padrão: calibrado)")
+    parser.add_argument("--target-ms", type=int, default=250, help="Alvo da calibração")
+    parser.add_argument("--output", help="Arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rounds = args.rounds or calibrate_rounds(args.target_ms)
+    calibration_s = round(time.perf_counter() - started, 2)
+    stored_hash = _bcrypt_hash(b"Senha123", rounds)[0].decode("utf-8")
+    print(f"custo {rounds} (calibração em {calibration_s}s)")
+
+    metrics = {"rounds": rounds, "calibration_seconds": calibration_s}
+    for mode, workers in (("inline", 0), ("pool", args.workers)):
+        hasher = PasswordHasher(workers=workers, max_pending=args.max_pending, rounds=rounds)
+        if workers:
+            hasher.verify("aquecimento", stored_hash)
+        metrics[mode] = spike(hasher, stored_hash, args.threads, args.duration)
+        hasher.shutdown()
+        result = metrics[mode]
+        print(f"{mode:>7}: {result['verifications_per_second']:>7} verificações/s  "
+              f"verify p50 {result['verify_ms'].get('p50')}ms p99 {result['verify_ms'].get('p99')}ms  "
+              f"tarefa curta p50 {result['probe_ms'].get('p50')}ms p99 {result['probe_ms'].get('p99')}ms  "
+              f"rejeitadas {result['rejected']}")
+
+    output = common.write_results("password_hasher", vars(args), metrics, args.output)
+    print(f"Resultado gravado em {output}")
+
+
+if __name__ == "__main__":
+    main()
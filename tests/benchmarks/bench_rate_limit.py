@@ -0,0 +1,122 @@
+"""Microbenchmark do rate limiting: verificações por segundo e memória retida.
+
+Compara a implementação anterior (lista de datetimes por cliente, refeita a
+cada requisição) com o motor de app/utils/security/rate_limiter.py, nos dois
+algoritmos e no backend em memória (e no MongoDB com --mongo-uri).
+
+Cenários:
+    hot   poucos clientes fazendo muitas requisições (lista cheia até o limite)
+    scan  cada requisição vem de um IP novo (varredura): mede o crescimento
+          do estado sem despejo
+
+Uso:
+    python tests/benchmarks/bench_rate_limit.py --checks 200000 --limit 60
+    python tests/benchmarks/bench_rate_limit.py --mongo-uri mongodb://localhost:27017 --mongo-checks 5000
+"""
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import common
+
+from app.utils.security.rate_limiter import MemoryBackend, MongoBackend, RateLimiter  # noqa: E402
+
+
+class LegacyLimiter:
+    """Cópia do decorator antigo: lista de datetimes por cliente, sem despejo."""
+
+    def __init__(self):
+        self.storage = defaultdict(list)
+
+    def hit(self, key, limit, period=60, algorithm=None):
+        current_time = datetime.utcnow()
+        cutoff_time = current_time - timedelta(seconds=period)
+        self.storage[key] = [req_time for req_time in self.storage[key] if req_time > cutoff_time]
+        if len(self.storage[key]) >= limit:
+            return False
+        self.storage[key].append(current_time)
+        return True
+
+    def keys(self):
+        return len(self.storage)
+
+
+def client_keys(scenario, checks, hot_clients):
+    if scenario == "hot":
+        return [f"bench:ip_10.0.{(i % hot_clients) // 256}.{(i % hot_clients) % 256}" for i in range(checks)]
+    return [f"bench:ip_{i >> 24 & 255}.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(checks)]
+
+
+def run(limiter, keys, limit, algorithm=None, track_memory=False):
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    allowed = 0
+    for key in keys:
+        result = limiter.hit(key, limit, 60, algorithm)
+        allowed += 1 if result is True or getattr(result, "allowed", False) else 0
+    elapsed = time.perf_counter() - started
+    peak = None
+    if track_memory:
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "checks_per_second": round(len(keys) / elapsed),
+        "us_per_check": round(elapsed / len(keys) * 1e6, 2),
+        "allowed": allowed,
+        "peak_memory_mb": round(peak / (1024 * 1024), 2) if peak is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=60, help="Requisições por minuto por cliente")
+    parser.add_argument("--hot-clients", type=int, default=100)
+    parser.add_argument("--max-keys", type=int, default=10_000, help="Chaves mantidas pelo backend em memória")
+    parser.add_argument("--memory", action="store_true", help="Mede o pico de memória (mais lento)")
+    parser.add_argument("--mongo-uri", help="Inclui o backend MongoDB compartilhado")
+    parser.add_argument("--mongo-checks", type=int, default=5_000)
+    parser.add_argument("--output", help="Arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    metrics = {}
+    header = f"{'cenário':<8}{'implementação':<28}{'checks/s':>12}{'µs/check':>10}{'chaves':>10}{'pico MB':>10}"
+    print(header)
+
+    for scenario in ("hot", "scan"):
+        keys = client_keys(scenario, args.checks, args.hot_clients)
+        candidates = [("legacy_list", LegacyLimiter(), None)]
+        for algorithm in ("sliding_window", "token_bucket"):
+            limiter = RateLimiter(MemoryBackend(args.max_keys), algorithm=algorithm)
+            candidates.append((f"memory_{algorithm}", limiter, algorithm))
+
+        for name, limiter, algorithm in candidates:
+            result = run(limiter, keys, args.limit, algorithm, args.memory)
+            result["keys_retained"] = limiter.keys() if isinstance(limiter, LegacyLimiter) \
+                else limiter.backend.stats()["keys"]
+            metrics[f"{scenario}.{name}"] = result
+            print(f"{scenario:<8}{name:<28}{result['checks_per_second']:>12}{result['us_per_check']:>10}"
+                  f"{result['keys_retained']:>10}{result['peak_memory_mb'] or '-':>10}")
+
+    if args.mongo_uri:
+        database = common.connect_database(args.mongo_uri, reset=True)
+        keys = client_keys("hot", args.mongo_checks, args.hot_clients)
+        for algorithm in ("sliding_window", "token_bucket"):
+            database.rate_limits.drop()
+            limiter = RateLimiter(MongoBackend(database.rate_limits), algorithm=algorithm)
+            result = run(limiter, keys, args.limit, algorithm)
+            result["keys_retained"] = database.rate_limits.estimated_document_count()
+            metrics[f"hot.mongo_{algorithm}"] = result
+            print(f"{'hot':<8}{'mongo_' + algorithm:<28}{result['checks_per_second']:>12}"
+                  f"{result['us_per_check']:>10}{result['keys_retained']:>10}{'-':>10}")
+        database.rate_limits.drop()
+
+    output = common.write_results("rate_limit", vars(args), metrics, args.output)
+    print(f"Resultado gravado em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark da busca: índice invertido x varredura com regex.
+
+Gera um catálogo sintético de anúncios (100k por padrão), constrói o índice
+invertido de app/services/search e compara o tempo por consulta com a
+varredura equivalente ao `$regex` case-insensitive em title/description
+usada hoje no painel admin.
+
+Com --mongo-uri, a comparação também é feita contra o MongoDB real
+(a coleção de benchmark é criada e removida ao final).
+
+Uso:
+    python tests/benchmarks/bench_search.py --ads 100000
+    python tests/benchmarks/bench_search.py --ads 100000 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from app.services.search.search_index import InvertedIndex, fold_accents  # noqa: E402
+
+GAMES = [
+    "Valorant", "League of Legends", "Counter-Strike 2", "Fortnite", "Minecraft",
+    "FIFA 24", "Grand Theft Auto V", "The Witcher 3", "Elden Ring", "Pokémon Escarlate",
+    "Call of Duty Warzone", "Rocket League", "Dota 2", "Apex Legends", "Hollow Knight",
+]
+PLATFORMS = ["PC", "PlayStation 5", "PlayStation 4", "Xbox Series", "Nintendo Switch"]
+AD_TYPES = ["venda", "troca", "procura"]
+WORDS = [
+    "conta", "skin", "edição", "colecionador", "lendária", "rara", "completa", "mídia",
+    "física", "digital", "ranqueada", "platina", "diamante", "imortal", "passe", "batalha",
+    "moedas", "itens", "personagens", "desbloqueados", "nível", "alto", "original", "lacrado",
+    "usado", "novo", "caixa", "manual", "entrega", "rápida", "garantia", "troco", "vendo",
+]
+QUERIES = ["valorant conta", "skin lendária", "edição colecionador", "fifa",
+           "elden", "pokemon escarlate", "conta imortal", "mídia física lacrado"]
+
+
+def generate_ads(count, seed=42):
+    """Gera anúncios sintéticos com títulos e descrições em português."""
+    rnd = random.Random(seed)
+    ads = []
+    for i in range(count):
+        game = rnd.choice(GAMES)
+        ads.append({
+            "_id": f"{i:024x}",
+            "title": f"{game} {' '.join(rnd.sample(WORDS, 3))}",
+            "description": " ".join(rnd.choices(WORDS, k=rnd.randint(8, 25))),
+            "game": game,
+            "platform": rnd.choice(PLATFORMS),
+            "ad_type": rnd.choice(AD_TYPES),
+            "price_per_hour": round(rnd.uniform(10, 1500), 2),
+        })
+    return ads
+
+
+def build_index(ads):
+    index = InvertedIndex()
+    for ad in ads:
+        index.add(
+            ad["_id"],
+            [(ad["title"], 3), (ad["game"], 2), (ad["description"], 1), (ad["platform"], 1)],
+            {"platform": fold_accents(ad["platform"]), "ad_type": ad["ad_type"],
+             "price": ad["price_per_hour"]},
+        )
+    return index
+
+
+def regex_scan(ads, query, limit=20):
+    """Equivalente em Python ao $regex case-insensitive (varredura completa)."""
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+    matches = [ad for ad in ads if pattern.search(ad["title"]) or pattern.search(ad["description"])]
+    return len(matches), matches[:limit]
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def bench_mongo(uri, ads, repeat):
+    from pymongo import MongoClient
+
+    client = MongoClient(uri)
+    collection = client["gameunite_bench"]["search_bench_ads"]
+    collection.drop()
+    collection.insert_many([dict(ad) for ad in ads], ordered=False)
+
+    results = {}
+    for query in QUERIES:
+        regex = {"$regex": re.escape(query), "$options": "i"}
+        mongo_query = {"$or": [{"title": regex}, {"description": regex}]}
+        median, _ = timed(lambda: list(collection.find(mongo_query).limit(20)), repeat)
+        results[query] = median
+
+    collection.drop()
+    client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ads", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mongo-uri", help="Compara também com $regex no MongoDB")
+    args = parser.parse_args()
+
+    print(f"Gerando {args.ads} anúncios sintéticos...")
+    ads = generate_ads(args.ads)
+
+    started = time.perf_counter()
+    index = build_index(ads)
+    print(f"Índice construído em {time.perf_counter() - started:.2f}s")
+
+    mongo_results = bench_mongo(args.mongo_uri, ads, args.repeat) if args.mongo_uri else {}
+
+    header = f"{'consulta':<24}{'índice (ms)':>14}{'regex (ms)':>14}{'speedup':>10}{'hits idx':>10}{'hits re':>10}"
+    if mongo_results:
+        header += f"{'mongo (ms)':>12}"
+    print(header)
+
+    for query in QUERIES:
+        index_ms, (index_total, _) = timed(lambda: index.search(query, limit=20), args.repeat)
+        regex_ms, (regex_total, _) = timed(lambda: regex_scan(ads, query), args.repeat)
+        line = (f"{query:<24}{index_ms:>14.2f}{regex_ms:>14.2f}"
+                f"{regex_ms / max(index_ms, 1e-6):>9.1f}x{index_total:>10}{regex_total:>10}")
+        if mongo_results:
+            line += f"{mongo_results[query]:>12.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Custo por requisição da verificação de payload do SecurityMiddleware.
+
+Compara a verificação anterior (query string em minúsculas + str(payload)
+em minúsculas + um `in` por padrão) com payload_scanner (uma regex
+compilada sobre as strings do JSON, com limite de caracteres), para
+payloads JSON de tamanhos diferentes e uma query string típica de listagem.
+
+Os payloads são benignos (nenhum evento é gravado no MongoDB); o tempo de
+cada verificação é medido dentro de um request context novo, então inclui
+a decodificação do JSON feita pela verificação.
+
+Uso:
+    python tests/benchmarks/bench_security_middleware.py --repeat 2000
+    python tests/benchmarks/bench_security_middleware.py --sizes 1,100,10000 --max-bytes 65536
+"""
+import argparse
+import json
+import random
+import time
+
+import common
+
+from flask import Flask, request  # noqa: E402
+
+from app.utils.security.payload_scanner import SUSPICIOUS_PATTERNS, scan_json, scan_text  # noqa: E402
+
+WORDS = ["conta", "skin", "lendária", "valorant", "entrega", "rápida", "garantia", "nível", "alto"]
+QUERY_STRING = "page=2&per_page=20&game_id=64b7f0c2e4b0a1a2b3c4d5e6&ad_type=venda&sort=price_asc&search=conta+imortal"
+
+
+def legacy_check():
+    """Verificação anterior, sem a gravação do evento (retorna o padrão encontrado)."""
+    query_string = request.query_string.decode('utf-8').lower()
+    for pattern in SUSPICIOUS_PATTERNS:
+        if pattern in query_string:
+            return pattern
+    if request.is_json:
+        data = request.get_json()
+        if data:
+            json_str = str(data).lower()
+            for pattern in SUSPICIOUS_PATTERNS:
+                if pattern in json_str:
+                    return pattern
+    return None
+
+
+def make_scanner_check(max_bytes):
+    def scanner_check():
+        if request.query_string:
+            found = scan_text(request.query_string.decode('utf-8', 'replace'), max_bytes)
+            if found:
+                return found
+        if request.is_json and (request.content_length or 0) <= max_bytes:
+            data = request.get_json(silent=True)
+            if data:
+                return scan_json(data, max_bytes)
+        return None
+    return scanner_check
+
+
+def make_payload(items, seed=7):
+    rnd = random.Random(seed)
+    return {
+        "title": "Conta Valorant imortal",
+        "items": [
+            {"name": " ".join(rnd.choices(WORDS, k=6)), "price": rnd.randint(1, 500), "tags": rnd.sample(WORDS, 3)}
+            for _ in range(items)
+        ]
+    }
+
+
+def measure(app, check, body, repeat):
+    samples = []
+    for _ in range(repeat):
+        with app.test_request_context(
+            f"/api/ads/?{QUERY_STRING}", method="POST", data=body, content_type="application/json"
+        ):
+            started = time.perf_counter()
+            check()
+            samples.append((time.perf_counter() - started) * 1e6)
+    return common.percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--sizes", default="1,100,1000,10000", help="Itens no payload JSON")
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--output", help="Arquivo JSON de resultado")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    scanner_check = make_scanner_check(args.max_bytes)
+    metrics = {}
+
+    print(f"{'itens':>8}{'bytes':>12}{'anterior p50 µs':>18}{'scanner p50 µs':>17}{'anterior p99':>14}{'scanner p99':>13}")
+    for items in (int(size) for size in args.sizes.split(",")):
+        body = json.dumps(make_payload(items))
+        repeat = max(args.repeat // max(items // 100, 1), 20)
+        legacy = measure(app, legacy_check, body, repeat)
+        scanner = measure(app, scanner_check, body, repeat)
+        metrics[str(items)] = {"bytes": len(body), "legacy_us": legacy, "scanner_us": scanner}
+        print(f"{items:>8}{len(body):>12}{legacy['p50']:>18}{scanner['p50']:>17}{legacy['p99']:>14}{scanner['p99']:>13}")
+
+    output = common.write_results("security_middleware", vars(args), metrics, args.output)
+    print(f"Resultado gravado em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Servidor usado pelos benchmarks (configuração "benchmark", mongod local).
+
+Normalmente iniciado por common.start_server; também pode ser executado à mão:
+    SOCKETIO_ASYNC_MODE=eventlet python tests/benchmarks/bench_server.py --port 5055
+"""
+import argparse
+import os
+import sys
+
+# eventlet/gevent precisam do monkey patch antes de qualquer outro import
+_async_mode = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+if _async_mode == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif _async_mode == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from app import create_app  # noqa: E402
+from app.extensions.socketio import socketio  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    app = create_app("benchmark")
+    socketio.run(app, host=args.host, port=args.port, debug=False,
+                 log_output=False, allow_unsafe_werkzeug=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Teste de carga do Socket.IO (app/websockets/chat_events.py).
+
+Simula milhares de clientes: cada par comprador/vendedor compartilha uma sala
+de chat e cada cliente faz connect -> join_chat_room -> send_message/typing.
+Mede:
+    - latência de connect (até o evento "connected") e de join (até "room_joined")
+    - latência de fan-out das mensagens (envio -> "new_message" no outro participante)
+    - mensagens/s enviadas e entregues, erros
+    - RSS do servidor (início, após as conexões, pico e fim)
+
+O servidor é iniciado com a configuração "benchmark" contra um mongod local
+(ou use --url para apontar para um servidor já em execução com o mesmo banco).
+O resultado é gravado em JSON (tests/benchmarks/results/ ou --output).
+
+Dependências: tests/benchmarks/requirements.txt. Para milhares de clientes,
+aumente o limite de descritores (ulimit -n 65535) e prefira
+--async-mode eventlet no servidor.
+
+Uso:
+    python tests/benchmarks/bench_socketio.py --clients 2000 --duration 30
+    python tests/benchmarks/bench_socketio.py --clients 200 --async-mode eventlet --output base.json
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import common
+
+MESSAGE_PREFIX = "bench"
+
+
+def seed_chat_fixture(database, rooms):
+    """Cria pares de usuários, pedidos e salas de chat. Retorna [(sala, comprador, vendedor)]."""
+    from bson import ObjectId
+
+    now = datetime.utcnow()
+    users, orders, chat_rooms, fixture = [], [], [], []
+
+    for index in range(rooms):
+        buyer_id, seller_id, order_id, room_id = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+        for user_id, name in ((buyer_id, f"buyer{index}"), (seller_id, f"seller{index}")):
+            users.append({
+                "_id": user_id, "username": name, "email": f"{name}@bench.local",
+                "password": "", "first_name": name, "role": "user",
+                "is_active": True, "created_at": now, "updated_at": now,
+            })
+        orders.append({
+            "_id": order_id, "buyer_id": buyer_id, "seller_id": seller_id, "status": "paid",
+            "total_price": 10.0, "ad_snapshot": {"title": f"Anúncio {index}", "game_name": "Bench"},
+            "created_at": now, "updated_at": now,
+        })
+        chat_rooms.append({
+            "_id": room_id, "order_id": order_id, "buyer_id": buyer_id, "seller_id": seller_id,
+            "admin_id": None, "has_support_request": False, "status": "active",
+            "unread_counts": {str(buyer_id): 0, str(seller_id): 0},
+            "created_at": now, "updated_at": now,
+        })
+        fixture.append((str(room_id), str(buyer_id), str(seller_id)))
+
+    database.users.insert_many(users, ordered=False)
+    database.orders.insert_many(orders, ordered=False)
+    database.chat_rooms.insert_many(chat_rooms, ordered=False)
+    return fixture
+
+
+class Metrics:
+    def __init__(self):
+        self.connect_ms = []
+        self.join_ms = []
+        self.fanout_ms = []
+        self.echo_ms = []
+        self.sent = 0
+        self.typing_sent = 0
+        self.delivered = 0
+        self.errors = 0
+        self.connect_failures = 0
+
+
+class BenchClient:
+    """Um participante de chat simulado."""
+
+    def __init__(self, url, user_id, room_id, metrics):
+        import socketio
+
+        self.url = url
+        self.user_id = user_id
+        self.room_id = room_id
+        self.metrics = metrics
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.connected = asyncio.Event()
+        self.joined = asyncio.Event()
+
+        self.sio.on("connected", self._on_connected)
+        self.sio.on("room_joined", self._on_room_joined)
+        self.sio.on("new_message", self._on_new_message)
+        self.sio.on("error", self._on_error)
+
+    async def _on_connected(self, data):
+        self.connected.set()
+
+    async def _on_room_joined(self, data):
+        self.joined.set()
+
+    async def _on_error(self, data):
+        self.metrics.errors += 1
+
+    async def _on_new_message(self, data):
+        content = (data.get("message") or {}).get("content", "")
+        parts = content.split("|")
+        if len(parts) < 4 or parts[0] != MESSAGE_PREFIX:
+            return
+        latency = (time.time() - float(parts[3])) * 1000
+        if parts[1] == self.user_id:
+            self.metrics.echo_ms.append(latency)
+        else:
+            self.metrics.fanout_ms.append(latency)
+            self.metrics.delivered += 1
+
+    async def connect(self, timeout):
+        token = common.make_access_token(self.user_id)
+        started = time.perf_counter()
+        try:
+            await self.sio.connect(self.url, auth={"token": token}, transports=["websocket"], wait_timeout=timeout)
+            await asyncio.wait_for(self.connected.wait(), timeout)
+        except Exception:
+            self.metrics.connect_failures += 1
+            return False
+        self.metrics.connect_ms.append((time.perf_counter() - started) * 1000)
+        return True
+
+    async def join(self, timeout):
+        started = time.perf_counter()
+        await self.sio.emit("join_chat_room", {"room_id": self.room_id})
+        try:
+            await asyncio.wait_for(self.joined.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.metrics.errors += 1
+            return False
+        self.metrics.join_ms.append((time.perf_counter() - started) * 1000)
+        return True
+
+    async def chat(self, deadline, message_rate, typing_ratio, message_size, rnd):
+        """Envia mensagens (processo de Poisson com a taxa informada) até o prazo."""
+        sequence = 0
+        padding = "x" * max(0, message_size - 60)
+        while True:
+            await asyncio.sleep(rnd.expovariate(message_rate))
+            if time.monotonic() >= deadline:
+                return
+            if rnd.random() < typing_ratio:
+                await self.sio.emit("typing", {"room_id": self.room_id})
+                self.metrics.typing_sent += 1
+            sequence += 1
+            content = f"{MESSAGE_PREFIX}|{self.user_id}|{sequence}|{time.time():.6f}|{padding}"
+            await self.sio.emit("send_message", {"room_id": self.room_id, "content": content})
+            self.metrics.sent += 1
+
+    async def close(self):
+        try:
+            await self.sio.disconnect()
+        except Exception:
+            pass
+
+
+async def sample_rss(pid, samples, stop):
+    while not stop.is_set():
+        rss = common.process_rss_bytes(pid) if pid else None
+        if rss:
+            samples.append(rss)
+        await asyncio.sleep(1)
+
+
+async def run_load(url, fixture, args, server_pid):
+    metrics = Metrics()
+    rnd = random.Random(args.seed)
+
+    clients = []
+    for room_id, buyer_id, seller_id in fixture:
+        clients.append(BenchClient(url, buyer_id, room_id, metrics))
+        clients.append(BenchClient(url, seller_id, room_id, metrics))
+
+    rss_samples, stop_sampling = [], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(server_pid, rss_samples, stop_sampling))
+    rss = {"start": common.process_rss_bytes(server_pid) if server_pid else None}
+
+    # Fase 1: conexões (com concorrência limitada para não virar um SYN flood)
+    limiter = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(client):
+        async with limiter:
+            return await client.connect(args.timeout)
+
+    started = time.perf_counter()
+    connected = await asyncio.gather(*(connect(client) for client in clients))
+    connect_phase_s = time.perf_counter() - started
+    clients = [client for client, ok in zip(clients, connected) if ok]
+    rss["after_connect"] = common.process_rss_bytes(server_pid) if server_pid else None
+
+    # Fase 2: entrada nas salas
+    started = time.perf_counter()
+    joined = await asyncio.gather(*(client.join(args.timeout) for client in clients))
+    join_phase_s = time.perf_counter() - started
+    clients = [client for client, ok in zip(clients, joined) if ok]
+
+    # Fase 3: conversa
+    started = time.perf_counter()
+    deadline = time.monotonic() + args.duration
+    await asyncio.gather(*(
+        client.chat(deadline, args.message_rate, args.typing_ratio, args.message_size,
+                    random.Random(rnd.random()))
+        for client in clients
+    ))
+    await asyncio.sleep(args.drain)
+    chat_phase_s = time.perf_counter() - started
+
+    rss["end"] = common.process_rss_bytes(server_pid) if server_pid else None
+    stop_sampling.set()
+    await sampler
+    rss["peak"] = max(rss_samples) if rss_samples else None
+
+    await asyncio.gather(*(client.close() for client in clients))
+
+    return {
+        "clients_requested": len(fixture) * 2,
+        "clients_connected": sum(1 for ok in connected if ok),
+        "clients_joined": len(clients),
+        "connect_failures": metrics.connect_failures,
+        "errors": metrics.errors,
+        "connect_latency_ms": common.percentiles(metrics.connect_ms),
+        "join_latency_ms": common.percentiles(metrics.join_ms),
+        "fanout_latency_ms": common.percentiles(metrics.fanout_ms),
+        "echo_latency_ms": common.percentiles(metrics.echo_ms),
+        "messages_sent": metrics.sent,
+        "typing_events_sent": metrics.typing_sent,
+        "messages_delivered": metrics.delivered,
+        "delivery_ratio": round(metrics.delivered / metrics.sent, 4) if metrics.sent else None,
+        "messages_sent_per_sec": round(metrics.sent / args.duration, 2),
+        "messages_delivered_per_sec": round(metrics.delivered / chat_phase_s, 2),
+        "phase_seconds": {
+            "connect": round(connect_phase_s, 3),
+            "join": round(join_phase_s, 3),
+            "chat": round(chat_phase_s, 3),
+        },
+        "server_rss_bytes": rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000, help="Total de clientes (2 por sala)")
+    parser.add_argument("--duration", type=float, default=30, help="Duração da fase de conversa (s)")
+    parser.add_argument("--message-rate", type=float, default=0.2, help="Mensagens/s por cliente")
+    parser.add_argument("--typing-ratio", type=float, default=0.5, help="Fração de mensagens precedidas de typing")
+    parser.add_argument("--message-size", type=int, default=120, help="Tamanho aproximado da mensagem")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--drain", type=float, default=3, help="Espera final pelas entregas (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-uri", default=common.DEFAULT_MONGO_URI)
+    parser.add_argument("--db", default=common.DEFAULT_DB_NAME)
+    parser.add_argument("--async-mode", default="threading", choices=["threading", "eventlet", "gevent"])
+    parser.add_argument("--url", help="Servidor já em execução (não inicia bench_server.py)")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    rooms = max(1, args.clients // 2)
+    client, database = common.connect_database(args.mongo_uri, args.db, reset=True)
+    print(f"Criando {rooms} salas de chat ({rooms * 2} usuários)...")
+    fixture = seed_chat_fixture(database, rooms)
+
+    server = None
+    url = args.url
+    if not url:
+        port = common.free_port()
+        server = common.start_server(port, args.mongo_uri, args.db, args.async_mode)
+        url = f"http://127.0.0.1:{port}"
+
+    try:
+        print(f"Carga contra {url}: {rooms * 2} clientes por {args.duration}s")
+        metrics = asyncio.run(run_load(url, fixture, args, server.pid if server else None))
+    finally:
+        if server:
+            common.stop_server(server)
+        client.close()
+
+    parameters = {key: value for key, value in vars(args).items() if key != "output"}
+    output = common.write_results("socketio", parameters, metrics, args.output)
+
+    print(f"connect p95: {metrics['connect_latency_ms'].get('p95')} ms | "
+          f"fan-out p50/p95/p99: {metrics['fanout_latency_ms'].get('p50')}/"
+          f"{metrics['fanout_latency_ms'].get('p95')}/{metrics['fanout_latency_ms'].get('p99')} ms | "
+          f"{metrics['messages_delivered_per_sec']} msgs/s entregues | erros: {metrics['errors']}")
+    print(f"Resultado salvo em {output}")
+
+
+if __name__ == "__main__":
+    main()
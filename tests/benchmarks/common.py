@@ -0,0 +1,215 @@
+"""Utilitários compartilhados pelos benchmarks de tests/benchmarks.
+
+Os benchmarks sobem a aplicação com a configuração "benchmark"
+(app/config/benchmark.py) contra um mongod local, nunca contra o Atlas:
+
+    mongod --dbpath /tmp/gameunite-bench --port 27017
+
+O banco usado é BENCH_MONGODB_DB (gameunite_bench por padrão) e é apagado
+no início de cada execução. Os resultados são gravados em JSON em
+tests/benchmarks/results/ para comparar uma execução com outra.
+"""
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+DEFAULT_MONGO_URI = "mongodb://localhost:27017"
+DEFAULT_DB_NAME = "gameunite_bench"
+
+# Precisa ser igual a BenchmarkConfig.JWT_SECRET_KEY
+JWT_SECRET = "jwt-benchmark-secret"
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+# ---------------------------------------------------------------- métricas
+
+def percentiles(samples):
+    """Resumo de uma lista de latências (ms): p50/p90/p95/p99, média e máximo."""
+    if not samples:
+        return {"count": 0}
+
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+        return round(ordered[index], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def process_rss_bytes(pid):
+    """Memória residente de um processo (psutil, se instalado, ou /proc)."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None
+
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+# ---------------------------------------------------------------- MongoDB
+
+def connect_database(uri=DEFAULT_MONGO_URI, db_name=DEFAULT_DB_NAME, reset=False):
+    """Conecta ao mongod de benchmark (opcionalmente apagando o banco)."""
+    from pymongo import MongoClient
+
+    client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+    client.admin.command("ping")
+    if reset:
+        client.drop_database(db_name)
+    return client, client[db_name]
+
+
+def server_opcounters(database):
+    """Contadores de operações do mongod (serverStatus.opcounters)."""
+    status = database.client.admin.command("serverStatus")
+    return {key: int(value) for key, value in status.get("opcounters", {}).items()}
+
+
+def opcounters_delta(before, after):
+    return {key: after.get(key, 0) - before.get(key, 0) for key in after}
+
+
+# ---------------------------------------------------------------- autenticação
+
+def make_access_token(user_id, expires_in=timedelta(hours=6), role="user", claims=True):
+    """Gera um access token compatível com o flask_jwt_extended (sem passar pelo login).
+
+    Com claims=True inclui role/is_active/tv como o login (usuários semeados
+    têm token_version 0); claims=False gera um token sem elas, que força a
+    leitura do usuário a cada requisição.
+    """
+    import jwt as pyjwt
+
+    now = datetime.utcnow()
+    payload = {
+        "sub": str(user_id),
+        "iat": now,
+        "nbf": now,
+        "exp": now + expires_in,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "fresh": False,
+    }
+    if claims:
+        payload.update({"role": role, "is_active": True, "tv": 0})
+    return pyjwt.encode(payload, JWT_SECRET, algorithm="HS256")
+
+
+# ---------------------------------------------------------------- servidor
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, mongo_uri=DEFAULT_MONGO_URI, db_name=DEFAULT_DB_NAME,
+                 async_mode="threading", extra_env=None, timeout=60):
+    """Sobe bench_server.py em um subprocesso e espera o health check responder."""
+    import urllib.request
+
+    env = dict(os.environ)
+    env.update({
+        "BENCH_MONGODB_URI": mongo_uri,
+        "BENCH_MONGODB_DB": db_name,
+        "SOCKETIO_ASYNC_MODE": async_mode,
+    })
+    env.update(extra_env or {})
+
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(__file__), "bench_server.py"), "--port", str(port)],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+
+    deadline = time.monotonic() + timeout
+    url = f"http://127.0.0.1:{port}/api/health/"
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Servidor encerrou ao iniciar:\n{process.stderr.read().decode(errors='replace')}")
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return process
+        except OSError:
+            time.sleep(0.5)
+
+    stop_server(process)
+    raise RuntimeError(f"Servidor não respondeu em {timeout}s")
+
+
+def stop_server(process):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# ---------------------------------------------------------------- resultados
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def write_results(name, parameters, metrics, output=None):
+    """Grava o resultado em JSON (com metadados para comparação entre execuções)."""
+    document = {
+        "benchmark": name,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "git_revision": git_revision(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "parameters": parameters,
+        "metrics": metrics,
+    }
+
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{name}-{stamp}.json")
+
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(document, handle, indent=2, ensure_ascii=False, default=str)
+    return output
@@ -0,0 +1,351 @@
+"""Gerador de um marketplace sintético para os benchmarks.
+
+Popula o mongod de benchmark com usuários, jogos, anúncios (com curtidas),
+favoritos, carrinhos, pedidos, salas de chat com histórico de mensagens e
+notificações. Os documentos seguem o formato gravado pelos serviços
+(incluindo os campos desnormalizados: ads_count/active_ads_count nos jogos,
+last_message/unread_counts/read_watermarks nas salas e user_counters), para
+que as rotas não precisem reconciliar nada durante a carga.
+
+O tamanho é controlado por --users; as demais quantidades são proporcionais
+e podem ser ajustadas individualmente. O gerador é determinístico (--seed).
+
+Uso:
+    python tests/benchmarks/seed_marketplace.py --users 10000
+    python tests/benchmarks/seed_marketplace.py --users 1000 --ads-per-user 5 --no-reset
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import common
+
+GAME_NAMES = [
+    "Valorant", "League of Legends", "Counter-Strike 2", "Fortnite", "Minecraft",
+    "FIFA 24", "Grand Theft Auto V", "The Witcher 3", "Elden Ring", "Pokémon Escarlate",
+    "Call of Duty Warzone", "Rocket League", "Dota 2", "Apex Legends", "Hollow Knight",
+    "Zelda Tears of the Kingdom", "Mario Kart 8", "Red Dead Redemption 2", "Hades", "Stardew Valley",
+]
+CATEGORIES = ["FPS", "MOBA", "RPG", "Esporte", "Aventura", "Corrida", "Simulação"]
+PLATFORMS = ["PC", "PlayStation 5", "PlayStation 4", "Xbox Series", "Nintendo Switch"]
+CONDITIONS = ["novo", "usado", "seminovo"]
+WORDS = [
+    "conta", "skin", "edição", "colecionador", "lendária", "rara", "completa", "mídia",
+    "física", "digital", "ranqueada", "platina", "diamante", "imortal", "passe", "batalha",
+    "moedas", "itens", "personagens", "desbloqueados", "nível", "alto", "original", "lacrado",
+]
+ORDER_STATUSES = ["pending", "paid", "shipped", "delivered", "cancelled"]
+NOTIFICATION_TYPES = ["order", "chat", "system", "favorite"]
+ADDRESS = {
+    "street": "Rua do Benchmark", "number": "100", "neighborhood": "Centro",
+    "city": "São Paulo", "state": "SP", "zipcode": "01000-000",
+}
+BATCH_SIZE = 5000
+
+
+def _sentence(rnd, words):
+    return " ".join(rnd.choice(WORDS) for _ in range(words))
+
+
+def _insert(collection, documents):
+    for start in range(0, len(documents), BATCH_SIZE):
+        collection.insert_many(documents[start:start + BATCH_SIZE], ordered=False)
+
+
+class Marketplace:
+    """Ids gerados pelo seeder, usados pelos benchmarks para montar a carga."""
+
+    def __init__(self):
+        self.users = []
+        self.games = []
+        self.ads = []
+        self.sale_ads = []
+        self.ad_owner = {}
+        self.orders = []
+        self.chat_rooms = []
+
+    def summary(self):
+        return {
+            "users": len(self.users),
+            "games": len(self.games),
+            "ads": len(self.ads),
+            "sale_ads": len(self.sale_ads),
+            "orders": len(self.orders),
+            "chat_rooms": len(self.chat_rooms),
+        }
+
+
+def seed_marketplace(database, users=1000, games=50, ads_per_user=3, favorites_per_user=5,
+                     likes_per_ad=4, cart_items_per_user=2, orders_per_user=2,
+                     chat_fraction=0.5, messages_per_room=20, notifications_per_user=15,
+                     seed=42):
+    """Gera o marketplace e devolve um Marketplace com os ids criados."""
+    from bson import ObjectId
+
+    rnd = random.Random(seed)
+    now = datetime.utcnow()
+    market = Marketplace()
+
+    def past(days=90):
+        return now - timedelta(seconds=rnd.randint(0, days * 86400))
+
+    # ------------------------------------------------------------ usuários
+    user_docs = []
+    for index in range(users):
+        user_id = ObjectId()
+        name = f"user{index}"
+        created = past(365)
+        user_docs.append({
+            "_id": user_id, "username": name, "email": f"{name}@bench.local",
+            "password": "", "first_name": "Usuário", "last_name": str(index),
+            "role": "admin" if index == 0 else "user", "is_active": True,
+            "last_login": created, "created_at": created, "updated_at": created,
+        })
+        market.users.append(user_id)
+    _insert(database.users, user_docs)
+
+    # ------------------------------------------------------------ jogos
+    game_docs = {}
+    for index in range(games):
+        game_id = ObjectId()
+        base = GAME_NAMES[index % len(GAME_NAMES)]
+        name = base if index < len(GAME_NAMES) else f"{base} {index // len(GAME_NAMES) + 1}"
+        game_docs[game_id] = {
+            "_id": game_id, "name": name, "slug": name.lower().replace(" ", "-"),
+            "description": _sentence(rnd, 12), "image_url": "", "cover_url": "",
+            "platform": rnd.choice(PLATFORMS), "category": rnd.choice(CATEGORIES),
+            "is_featured": index < 5, "is_active": True,
+            "ads_count": 0, "active_ads_count": 0,
+            "created_at": past(365), "updated_at": now,
+        }
+        market.games.append(game_id)
+
+    # ------------------------------------------------------------ anúncios
+    ad_docs = []
+    for user_id in market.users:
+        for _ in range(ads_per_user):
+            ad_id = ObjectId()
+            game_id = rnd.choice(market.games)
+            ad_type = rnd.choices(["venda", "troca", "procura"], weights=[6, 3, 1])[0]
+            status = rnd.choices(["active", "inactive"], weights=[9, 1])[0]
+            created = past()
+            ad = {
+                "_id": ad_id, "user_id": user_id, "game_id": game_id,
+                "title": f"{game_docs[game_id]['name']} {_sentence(rnd, 3)}",
+                "description": _sentence(rnd, 25), "ad_type": ad_type,
+                "platform": rnd.choice(PLATFORMS), "condition": rnd.choice(CONDITIONS),
+                "status": status, "is_boosted": rnd.random() < 0.05, "boost_expires_at": None,
+                "view_count": rnd.randint(0, 500), "likes_count": 0, "favorites_count": 0,
+                "image_url": "/uploads/ads/no-ads-image.jpg",
+                "created_at": created, "updated_at": created,
+            }
+            if ad["is_boosted"]:
+                ad["boost_expires_at"] = now + timedelta(days=rnd.randint(1, 7))
+            if ad_type == "venda":
+                ad["price_per_hour"] = round(rnd.uniform(5, 500), 2)
+                if status == "active":
+                    market.sale_ads.append(ad_id)
+            elif ad_type == "troca":
+                ad["desired_games"] = game_docs[rnd.choice(market.games)]["name"]
+
+            game_docs[game_id]["ads_count"] += 1
+            if status == "active":
+                game_docs[game_id]["active_ads_count"] += 1
+            ad_docs.append(ad)
+            market.ads.append(ad_id)
+            market.ad_owner[ad_id] = user_id
+
+    # Curtidas (coleção ad_likes + total no anúncio, como em like_ad)
+    like_docs = []
+    for ad in ad_docs:
+        likers = rnd.sample(market.users, min(len(market.users), rnd.randint(0, likes_per_ad * 2)))
+        for liker in likers:
+            if liker != ad["user_id"]:
+                like_docs.append({"ad_id": ad["_id"], "user_id": liker, "created_at": past(30)})
+                ad["likes_count"] += 1
+
+    _insert(database.games, list(game_docs.values()))
+    _insert(database.ad_likes, like_docs)
+    ads_by_id = {ad["_id"]: ad for ad in ad_docs}
+
+    # ------------------------------------------------------------ favoritos e carrinho
+    # (anúncios gravados depois dos favoritos para já levarem favorites_count)
+    favorite_docs, cart_docs = [], []
+    for user_id in market.users:
+        for ad_id in set(rnd.sample(market.ads, min(len(market.ads), favorites_per_user))):
+            if market.ad_owner[ad_id] != user_id:
+                favorite_docs.append({"user_id": user_id, "ad_id": ad_id, "created_at": past(30)})
+                ads_by_id[ad_id]["favorites_count"] += 1
+
+        for ad_id in set(rnd.sample(market.sale_ads, min(len(market.sale_ads), cart_items_per_user))):
+            if market.ad_owner[ad_id] == user_id:
+                continue
+            ad = ads_by_id[ad_id]
+            created = now - timedelta(hours=rnd.randint(0, 48))
+            cart_docs.append({
+                "user_id": user_id, "ad_id": ad_id, "quantity": 1,
+                "price_snapshot": ad.get("price_per_hour", 0),
+                "ad_snapshot": {
+                    "title": ad["title"], "game_name": game_docs[ad["game_id"]]["name"],
+                    "platform": ad["platform"], "condition": ad["condition"],
+                    "image_url": ad["image_url"], "seller_username": "",
+                    "seller_id": str(ad["user_id"]),
+                },
+                "created_at": created, "updated_at": created,
+                "expires_at": created + timedelta(days=7),
+            })
+    _insert(database.ads, ad_docs)
+    _insert(database.favorites, favorite_docs)
+    _insert(database.cart, cart_docs)
+
+    # ------------------------------------------------------------ pedidos e chats
+    order_docs, room_docs, message_docs = [], [], []
+    for buyer_id in market.users:
+        for _ in range(orders_per_user):
+            ad_id = rnd.choice(market.sale_ads) if market.sale_ads else None
+            if ad_id is None or market.ad_owner[ad_id] == buyer_id:
+                continue
+            ad = ads_by_id[ad_id]
+            created = past(60)
+            order_id = ObjectId()
+            status = rnd.choice(ORDER_STATUSES)
+            order_docs.append({
+                "_id": order_id, "buyer_id": buyer_id, "seller_id": ad["user_id"],
+                "ad_id": ad_id, "game_id": ad["game_id"], "quantity": 1,
+                "unit_price": ad["price_per_hour"], "total_price": ad["price_per_hour"],
+                "status": status, "payment_status": "paid" if status in ("paid", "shipped", "delivered") else "pending",
+                "shipping_address": ADDRESS, "notes": "", "created_at": created, "updated_at": created,
+                "expires_at": created + timedelta(days=1),
+                "ad_snapshot": {
+                    "title": ad["title"], "description": ad["description"],
+                    "platform": ad["platform"], "condition": ad["condition"],
+                    "image_url": ad["image_url"], "game_name": game_docs[ad["game_id"]]["name"],
+                },
+            })
+            market.orders.append(order_id)
+
+            if rnd.random() >= chat_fraction:
+                continue
+
+            room_id = ObjectId()
+            participants = (buyer_id, ad["user_id"])
+            messages = [{
+                "_id": ObjectId(), "room_id": room_id, "user_id": None, "user_role": None,
+                "content": "💬 Chat criado para o pedido. Conversem sobre detalhes da transação.",
+                "is_system": True, "created_at": created,
+            }]
+            for sequence in range(1, messages_per_room):
+                sender = rnd.choice(participants)
+                messages.append({
+                    "_id": ObjectId(), "room_id": room_id, "user_id": sender,
+                    "user_role": "buyer" if sender == buyer_id else "seller",
+                    "content": _sentence(rnd, rnd.randint(3, 15)), "is_system": False,
+                    "created_at": created + timedelta(minutes=sequence),
+                })
+            message_docs.extend(messages)
+
+            # Cada participante leu até uma mensagem aleatória do histórico
+            last = messages[-1]
+            watermarks, unread = {}, {}
+            for participant in participants:
+                read_upto = rnd.randint(0, len(messages) - 1)
+                watermarks[str(participant)] = {
+                    "message_id": str(messages[read_upto]["_id"]),
+                    "created_at": messages[read_upto]["created_at"],
+                }
+                unread[str(participant)] = sum(
+                    1 for message in messages[read_upto + 1:] if message["user_id"] != participant
+                )
+            room_docs.append({
+                "_id": room_id, "order_id": order_id, "buyer_id": buyer_id,
+                "seller_id": ad["user_id"], "admin_id": None, "has_support_request": False,
+                "status": "active",
+                "last_message": {
+                    "message_id": str(last["_id"]), "content": last["content"],
+                    "created_at": last["created_at"], "is_system": last["is_system"],
+                    "user_id": str(last["user_id"]) if last["user_id"] else None,
+                },
+                "unread_counts": unread, "read_watermarks": watermarks,
+                "created_at": created, "updated_at": last["created_at"],
+            })
+            market.chat_rooms.append(room_id)
+
+    _insert(database.orders, order_docs)
+    _insert(database.chat_rooms, room_docs)
+    _insert(database.chat_messages, message_docs)
+
+    # ------------------------------------------------------------ notificações
+    notification_docs, counter_docs = [], []
+    for user_id in market.users:
+        unread = 0
+        for _ in range(notifications_per_user):
+            read = rnd.random() < 0.6
+            unread += 0 if read else 1
+            created = past(30)
+            notification_docs.append({
+                "user_id": user_id, "type": rnd.choice(NOTIFICATION_TYPES),
+                "title": _sentence(rnd, 3), "message": _sentence(rnd, 10),
+                "read": read, "data": {}, "created_at": created, "updated_at": created,
+            })
+        counter_docs.append({
+            "_id": user_id, "notifications_total": notifications_per_user,
+            "notifications_unread": unread, "updated_at": now,
+        })
+    _insert(database.notifications, notification_docs)
+    _insert(database.user_counters, counter_docs)
+
+    return market
+
+
+def add_arguments(parser):
+    """Opções de tamanho do marketplace (compartilhadas com bench_http.py)."""
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--ads-per-user", type=int, default=3)
+    parser.add_argument("--favorites-per-user", type=int, default=5)
+    parser.add_argument("--likes-per-ad", type=int, default=4)
+    parser.add_argument("--cart-items-per-user", type=int, default=2)
+    parser.add_argument("--orders-per-user", type=int, default=2)
+    parser.add_argument("--chat-fraction", type=float, default=0.5, help="Fração de pedidos com chat")
+    parser.add_argument("--messages-per-room", type=int, default=20)
+    parser.add_argument("--notifications-per-user", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def seed_from_args(database, args):
+    return seed_marketplace(
+        database,
+        users=args.users,
+        games=args.games,
+        ads_per_user=args.ads_per_user,
+        favorites_per_user=args.favorites_per_user,
+        likes_per_ad=args.likes_per_ad,
+        cart_items_per_user=args.cart_items_per_user,
+        orders_per_user=args.orders_per_user,
+        chat_fraction=args.chat_fraction,
+        messages_per_room=args.messages_per_room,
+        notifications_per_user=args.notifications_per_user,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--mongo-uri", default=common.DEFAULT_MONGO_URI)
+    parser.add_argument("--db", default=common.DEFAULT_DB_NAME)
+    parser.add_argument("--no-reset", action="store_true", help="Não apaga o banco antes de popular")
+    args = parser.parse_args()
+
+    client, database = common.connect_database(args.mongo_uri, args.db, reset=not args.no_reset)
+    try:
+        started = time.perf_counter()
+        market = seed_from_args(database, args)
+        print(f"Marketplace criado em {time.perf_counter() - started:.1f}s: {market.summary()}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Fixtures dos testes unitários.
+
+Os serviços usam o `db` global de app.db.mongo_client, importado por valor
+em cada módulo. A fixture mongo_db troca esse valor por um banco mongomock
+em todos os módulos do app já carregados.
+
+Uso:
+    python -m pytest -q tests/unit
+"""
+import os
+import sys
+
+import mongomock
+import pytest
+from mongomock.collection import BulkOperationBuilder
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+
+def _ignore_sort(method):
+    # pymongo >= 4.11 passa sort= para UpdateOne/ReplaceOne em bulk_write; o
+    # mongomock ainda não aceita o argumento (sempre None nos nossos usos)
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+for _name in ("add_update", "add_replace"):
+    _method = getattr(BulkOperationBuilder, _name)
+    if "sort" not in _method.__code__.co_varnames:
+        setattr(BulkOperationBuilder, _name, _ignore_sort(_method))
+
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    import app.db.mongo_client as mongo_client
+
+    database = mongomock.MongoClient().get_database("gameunite_test")
+    monkeypatch.setattr(mongo_client, "db", database)
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app.") and module is not None and "db" in vars(module) and vars(module)["db"] is None:
+            monkeypatch.setattr(module, "db", database)
+    return database
@@ -0,0 +1,52 @@
+import inspect
+
+from bson import ObjectId
+from flask import Flask
+
+from app.api.admin import routes as admin_routes
+from app.services.ad import ad_service
+from app.services.search import search_service
+
+IMAGE = "/api/upload/ads/" + "a" * 64 + ".jpg"
+
+
+def _ad_with_side_data(mongo_db):
+    game_id = mongo_db.games.insert_one({"name": "Valorant", "ads_count": 1, "active_ads_count": 1}).inserted_id
+    ad_id = mongo_db.ads.insert_one({"game_id": game_id, "status": "active", "image_url": IMAGE}).inserted_id
+    mongo_db.upload_blobs.insert_one({"_id": "ads/" + "a" * 64 + ".jpg", "ref_count": 2, "unreferenced_since": None})
+    mongo_db.ad_likes.insert_one({"ad_id": ad_id, "user_id": ObjectId()})
+    return ad_id, game_id
+
+
+def _assert_side_effects(mongo_db, game_id, removed):
+    assert removed == [None]
+    game = mongo_db.games.find_one({"_id": game_id})
+    assert (game["ads_count"], game["active_ads_count"]) == (0, 0)
+    assert mongo_db.upload_blobs.find_one()["ref_count"] == 1
+    assert mongo_db.ad_likes.count_documents({}) == 0
+
+
+def test_owner_deletion_runs_the_deletion_hook(mongo_db, monkeypatch):
+    removed = []
+    monkeypatch.setattr(search_service, "remove_ad", lambda ad_id: removed.append(None))
+
+    ad_id, game_id = _ad_with_side_data(mongo_db)
+    owner = ObjectId()
+    mongo_db.ads.update_one({"_id": ad_id}, {"$set": {"user_id": owner}})
+    assert ad_service.delete_ad(str(ad_id), str(owner))["success"] is True
+    _assert_side_effects(mongo_db, game_id, removed)
+
+
+def test_admin_deletion_releases_the_image(mongo_db, monkeypatch):
+    removed = []
+    monkeypatch.setattr(search_service, "remove_ad", lambda ad_id: removed.append(None))
+    ad_id, game_id = _ad_with_side_data(mongo_db)
+
+    # Rota sem os decorators de autenticação
+    delete_ad_admin = inspect.unwrap(admin_routes.delete_ad_admin)
+    with Flask(__name__).test_request_context():
+        response = delete_ad_admin(str(ad_id))
+
+    assert response[1] == 200
+    assert mongo_db.ads.count_documents({}) == 0
+    _assert_side_effects(mongo_db, game_id, removed)
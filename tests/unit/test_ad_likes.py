@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.models import create_indexes
+from app.models.ad_likes.schema import ad_likes_indexes
+from app.services.ad import ad_service
+from app.services.ad.likes_migration import MIGRATION_ID, ensure_ad_likes_migrated, migrate_ad_likes
+
+
+@pytest.fixture
+def ad(mongo_db):
+    create_indexes(mongo_db.ad_likes, ad_likes_indexes)
+    owner = ObjectId()
+    ad_id = mongo_db.ads.insert_one({"user_id": owner, "title": "Zelda", "likes_count": 0}).inserted_id
+    return str(ad_id), str(owner)
+
+
+def test_like_toggles_and_keeps_the_count(mongo_db, ad):
+    ad_id, _owner = ad
+    fan, other = str(ObjectId()), str(ObjectId())
+
+    assert ad_service.like_ad(ad_id, fan)["liked"] is True
+    result = ad_service.like_ad(ad_id, other)
+    assert (result["liked"], result["total_likes"]) == (True, 2)
+
+    result = ad_service.like_ad(ad_id, fan)
+    assert (result["liked"], result["total_likes"]) == (False, 1)
+    assert mongo_db.ad_likes.count_documents({}) == 1
+
+    assert ad_service.get_ad_likes(ad_id, other) == {"success": True, "total_likes": 1, "user_liked": True}
+    assert ad_service.get_ad_likes(ad_id, fan)["user_liked"] is False
+
+
+def test_owner_cannot_like_own_ad(mongo_db, ad):
+    ad_id, owner = ad
+
+    result = ad_service.like_ad(ad_id, owner)
+
+    assert result["success"] is False
+    assert mongo_db.ad_likes.count_documents({}) == 0
+
+
+def test_like_missing_or_invalid_ad(ad):
+    assert ad_service.like_ad(str(ObjectId()), str(ObjectId()))["message"] == "Anúncio não encontrado"
+    assert ad_service.like_ad("invalido", str(ObjectId()))["success"] is False
+
+
+def test_get_liked_ad_ids_returns_only_liked_ads(mongo_db, ad):
+    ad_id, _owner = ad
+    other_ad = str(mongo_db.ads.insert_one({"user_id": ObjectId(), "likes_count": 0}).inserted_id)
+    fan = str(ObjectId())
+    ad_service.like_ad(ad_id, fan)
+
+    assert ad_service.get_liked_ad_ids(fan, [ad_id, other_ad, "invalido"]) == {ObjectId(ad_id)}
+    assert ad_service.get_liked_ad_ids(None, [ad_id]) == set()
+    assert ad_service.get_liked_ad_ids(fan, []) == set()
+
+
+def test_migration_moves_arrays_and_recounts(mongo_db):
+    create_indexes(mongo_db.ad_likes, ad_likes_indexes)
+    users = [ObjectId() for _ in range(3)]
+    liked = mongo_db.ads.insert_one({"likes": users + [users[0]], "updated_at": datetime(2026, 1, 1)}).inserted_id
+    plain = mongo_db.ads.insert_one({"title": "Sem curtidas"}).inserted_id
+
+    result = migrate_ad_likes(mongo_db)
+
+    assert result["likes_written"] == 3
+    assert result["ads_cleaned"] == 1
+    assert mongo_db.ads.find_one({"_id": liked})["likes_count"] == 3
+    assert "likes" not in mongo_db.ads.find_one({"_id": liked})
+    assert mongo_db.ads.find_one({"_id": plain})["likes_count"] == 0
+
+    # Repetir não duplica curtidas
+    mongo_db.ads.update_one({"_id": liked}, {"$set": {"likes": users}})
+    assert migrate_ad_likes(mongo_db, drop_likes=False)["likes_written"] == 0
+    assert mongo_db.ad_likes.count_documents({}) == 3
+    assert mongo_db.ads.find_one({"_id": liked})["likes"] == users
+
+
+def test_ensure_migrated_runs_once(mongo_db):
+    assert ensure_ad_likes_migrated(mongo_db) is not None
+    assert mongo_db.migrations.find_one({"_id": MIGRATION_ID})
+    assert ensure_ad_likes_migrated(mongo_db) is None
+
+
+def test_migration_creates_the_unique_index_used_by_the_toggle(mongo_db):
+    # Banco novo (run.py usa a configuração "testing", sem setup_indexes)
+    owner, fan = ObjectId(), str(ObjectId())
+    ad_id = str(mongo_db.ads.insert_one({"user_id": owner, "likes_count": 0}).inserted_id)
+    mongo_db.ad_likes.insert_many([{"ad_id": ObjectId(ad_id), "user_id": ObjectId(fan),
+                                    "created_at": datetime(2026, 1, day)} for day in (1, 2)])
+
+    assert ensure_ad_likes_migrated(mongo_db)["duplicates_removed"] == 1
+
+    assert ad_service.like_ad(ad_id, fan)["liked"] is False
+    assert ad_service.like_ad(ad_id, fan)["liked"] is True
+    assert mongo_db.ad_likes.count_documents({}) == 1
+
+
+def test_ensure_migrated_recreates_a_missing_index(mongo_db):
+    mongo_db.migrations.insert_one({"_id": MIGRATION_ID})
+
+    assert ensure_ad_likes_migrated(mongo_db) is None
+    assert any(index.get("unique") for index in mongo_db.ad_likes.index_information().values())
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.cart import cart_service
+from app.services.order import order_service
+from app.services.upload import blob_store
+
+IMAGE = "/api/upload/ads/" + "b" * 64 + ".jpg"
+BLOB_ID = "ads/" + "b" * 64 + ".jpg"
+
+
+def _ref_count(mongo_db):
+    return mongo_db.upload_blobs.find_one({"_id": BLOB_ID})["ref_count"]
+
+
+def _sale_ad(mongo_db):
+    game_id = mongo_db.games.insert_one({"name": "Valorant"}).inserted_id
+    seller_id = mongo_db.users.insert_one({"username": "vendedor"}).inserted_id
+    ad_id = mongo_db.ads.insert_one({
+        "user_id": seller_id, "game_id": game_id, "status": "active", "ad_type": "venda",
+        "title": "Conta", "description": "Conta nível 50", "platform": "PC",
+        "condition": "usado", "price_per_hour": 10.0, "image_url": IMAGE
+    }).inserted_id
+    mongo_db.upload_blobs.insert_one({"_id": BLOB_ID, "ref_count": 1, "unreferenced_since": None})
+    return ad_id
+
+
+def test_count_references_includes_order_and_cart_snapshots(mongo_db):
+    mongo_db.orders.insert_one({"ad_snapshot": {"image_url": IMAGE}})
+    mongo_db.cart.insert_one({"ad_snapshot": {"image_url": IMAGE}})
+    mongo_db.cart.insert_one({"ad_snapshot": {"image_url": ""}})
+
+    assert blob_store.count_references() == {BLOB_ID: 2}
+
+
+def test_reconcile_keeps_image_of_deleted_ad_used_by_an_order(mongo_db):
+    mongo_db.orders.insert_one({"ad_snapshot": {"image_url": IMAGE}})
+    mongo_db.upload_blobs.insert_one({"_id": BLOB_ID, "ref_count": 0, "unreferenced_since": datetime(2000, 1, 1)})
+
+    assert blob_store.reconcile_blob_refcounts(upload_folder="/nao/existe")["success"] is True
+
+    blob = mongo_db.upload_blobs.find_one({"_id": BLOB_ID})
+    assert (blob["ref_count"], blob["unreferenced_since"]) == (1, None)
+
+
+def test_order_snapshot_acquires_the_image(mongo_db, monkeypatch):
+    monkeypatch.setattr(order_service, "notify_order_status_change", lambda **kwargs: None)
+    ad_id = _sale_ad(mongo_db)
+
+    result = order_service.create_order(str(ObjectId()), {"ad_id": str(ad_id)})
+
+    assert result["success"] is True
+    assert _ref_count(mongo_db) == 2
+
+
+def test_cart_snapshot_acquires_and_releases_the_image(mongo_db):
+    ad_id = _sale_ad(mongo_db)
+    buyer_id = str(ObjectId())
+
+    assert cart_service.add_to_cart(buyer_id, str(ad_id))["success"] is True
+    assert _ref_count(mongo_db) == 2
+
+    assert cart_service.remove_from_cart(buyer_id, str(ad_id))["success"] is True
+    assert _ref_count(mongo_db) == 1
+
+
+def test_expired_and_cleared_cart_items_release_the_image(mongo_db):
+    _sale_ad(mongo_db)
+    buyer_id = ObjectId()
+    mongo_db.upload_blobs.update_one({"_id": BLOB_ID}, {"$set": {"ref_count": 3}})
+    mongo_db.cart.insert_many([
+        {"user_id": buyer_id, "ad_snapshot": {"image_url": IMAGE},
+         "expires_at": datetime.utcnow() - timedelta(days=1)},
+        {"user_id": buyer_id, "ad_snapshot": {"image_url": IMAGE},
+         "expires_at": datetime.utcnow() + timedelta(days=1)}
+    ])
+
+    assert cart_service.get_cart_count(str(buyer_id))["success"] is True
+    assert _ref_count(mongo_db) == 2
+
+    result = cart_service.clear_cart(str(buyer_id))
+    assert result["message"] == "1 itens removidos do carrinho"
+    assert _ref_count(mongo_db) == 1
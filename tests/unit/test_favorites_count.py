@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models import create_indexes
+from app.models.favorites.schema import favorites_indexes
+from app.services.favorites import favorites_service
+from app.services.favorites.favorites_count_migration import (
+    MIGRATION_ID, ensure_favorites_count_migrated, migrate_favorites_count
+)
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def ad_id(mongo_db):
+    create_indexes(mongo_db.favorites, favorites_indexes)
+    return str(mongo_db.ads.insert_one({"user_id": ObjectId(), "title": "Zelda", "favorites_count": 0}).inserted_id)
+
+
+def _count(mongo_db, ad_id):
+    return mongo_db.ads.find_one({"_id": ObjectId(ad_id)})["favorites_count"]
+
+
+def test_add_and_remove_keep_the_count(mongo_db, ad_id):
+    user_id = str(ObjectId())
+
+    result = favorites_service.add_to_favorites(user_id, ad_id)
+    assert result["data"]["favorites_count"] == 1
+    assert favorites_service.add_to_favorites(user_id, ad_id)["success"] is False
+    assert _count(mongo_db, ad_id) == 1
+    # O dono do anúncio é avisado
+    assert mongo_db.notifications.count_documents({}) == 1
+
+    assert favorites_service.remove_from_favorites(user_id, ad_id)["data"]["favorites_count"] == 0
+    assert favorites_service.remove_from_favorites(user_id, ad_id)["success"] is False
+    assert _count(mongo_db, ad_id) == 0
+
+
+def test_toggle_alternates_and_counts(mongo_db, ad_id):
+    first, second = str(ObjectId()), str(ObjectId())
+
+    assert favorites_service.toggle_favorite(first, ad_id)["data"]["action"] == "added"
+    data = favorites_service.toggle_favorite(second, ad_id)["data"]
+    assert (data["is_favorited"], data["favorites_count"]) == (True, 2)
+
+    data = favorites_service.toggle_favorite(first, ad_id)["data"]
+    assert (data["action"], data["favorites_count"]) == ("removed", 1)
+    assert favorites_service.get_ad_favorites_count(ad_id) == {"success": True, "count": 1}
+
+
+def test_favorite_missing_ad(ad_id):
+    missing = str(ObjectId())
+    assert favorites_service.add_to_favorites(str(ObjectId()), missing)["message"] == "Anúncio não encontrado"
+    assert favorites_service.toggle_favorite(str(ObjectId()), missing)["success"] is False
+
+
+def test_favorites_status_for_a_page(mongo_db, ad_id):
+    other_ad = str(mongo_db.ads.insert_one({"user_id": ObjectId(), "favorites_count": 0}).inserted_id)
+    user_id = str(ObjectId())
+    favorites_service.add_to_favorites(user_id, ad_id)
+
+    result = favorites_service.get_favorites_status(user_id, [ad_id, other_ad, "invalido"])
+
+    assert result["data"]["favorited"] == {ad_id: True, other_ad: False}
+    assert favorites_service.get_favorited_ad_ids("invalido", [ad_id]) == set()
+
+
+def test_migration_removes_duplicates_and_recounts(mongo_db):
+    ad_id, plain = ObjectId(), ObjectId()
+    mongo_db.ads.insert_many([{"_id": ad_id, "favorites_count": 9}, {"_id": plain}])
+    user_a, user_b = ObjectId(), ObjectId()
+    mongo_db.favorites.insert_many([
+        {"user_id": user_a, "ad_id": ad_id, "created_at": START},
+        {"user_id": user_a, "ad_id": ad_id, "created_at": START + timedelta(minutes=1)},
+        {"user_id": user_b, "ad_id": ad_id, "created_at": START},
+    ])
+
+    result = migrate_favorites_count(mongo_db)
+
+    assert result["duplicates_removed"] == 1
+    assert mongo_db.favorites.find_one({"user_id": user_a})["created_at"] == START
+    assert mongo_db.ads.find_one({"_id": ad_id})["favorites_count"] == 2
+    assert mongo_db.ads.find_one({"_id": plain})["favorites_count"] == 0
+    assert migrate_favorites_count(mongo_db) == {"duplicates_removed": 0, "counts_written": 0}
+
+
+def test_ensure_migrated_runs_once(mongo_db):
+    assert ensure_favorites_count_migrated(mongo_db) is not None
+    assert mongo_db.migrations.find_one({"_id": MIGRATION_ID})
+    assert ensure_favorites_count_migrated(mongo_db) is None
+
+
+def test_ensure_migrated_creates_the_unique_index_on_a_fresh_database(mongo_db):
+    # Banco novo (run.py usa a configuração "testing", sem setup_indexes)
+    ad_id = str(mongo_db.ads.insert_one({"user_id": ObjectId(), "title": "Zelda"}).inserted_id)
+    user_id = str(ObjectId())
+
+    ensure_favorites_count_migrated(mongo_db)
+
+    assert favorites_service.add_to_favorites(user_id, ad_id)["success"] is True
+    assert favorites_service.add_to_favorites(user_id, ad_id)["success"] is False
+    assert mongo_db.favorites.count_documents({}) == 1
+    assert _count(mongo_db, ad_id) == 1
+
+
+def test_ensure_migrated_recreates_a_missing_index(mongo_db):
+    mongo_db.migrations.insert_one({"_id": MIGRATION_ID})
+
+    assert ensure_favorites_count_migrated(mongo_db) is None
+    assert any(index.get("unique") for index in mongo_db.favorites.index_information().values())
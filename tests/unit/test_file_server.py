@@ -0,0 +1,104 @@
+import pytest
+from flask import Flask
+from werkzeug.exceptions import NotFound
+
+from app.services.upload import file_server
+from app.services.upload import storage as storage_module
+
+DIGEST = "c" * 64
+ORIGINAL = f"ads/{DIGEST}.jpg"
+VARIANT = f"ads/medium/{DIGEST}.jpg"
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_module, "_config", {"backend": "local", "root": str(tmp_path), "base_url": "http://x"})
+    file_server.placeholder_cache.clear()
+    (tmp_path / "ads" / "medium").mkdir(parents=True)
+    (tmp_path / ORIGINAL).write_bytes(b"original")
+    (tmp_path / "ads" / "medium" / "no-ads-image.jpg").write_bytes(b"padrao")
+
+    app = Flask(__name__)
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    yield app, tmp_path
+    file_server.placeholder_cache.clear()
+
+
+def _serve(app, path, **headers):
+    with app.test_request_context(f"/api/upload/{path}", headers=headers):
+        response = file_server.serve_upload(path)
+        response.direct_passthrough = False
+        return response
+
+
+def test_content_addressed_file_is_immutable_with_name_etag(uploads):
+    app, _ = uploads
+    response = _serve(app, ORIGINAL)
+
+    assert response.status_code == 200
+    assert response.get_data() == b"original"
+    assert response.headers["ETag"] == f'"{DIGEST}-original-original"'
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+
+
+def test_matching_etag_answers_304_without_touching_the_disk(uploads, monkeypatch):
+    app, _ = uploads
+    monkeypatch.setattr(file_server, "get_storage", lambda: pytest.fail("acessou o armazenamento"))
+
+    response = _serve(app, ORIGINAL, **{"If-None-Match": f'"{DIGEST}-original-original"'})
+
+    assert response.status_code == 304
+    assert response.get_data() == b""
+
+
+def test_variant_prefers_webp_when_accepted(uploads):
+    app, root = uploads
+    (root / f"{VARIANT}.webp").write_bytes(b"webp")
+    (root / VARIANT).write_bytes(b"jpeg")
+
+    response = _serve(app, VARIANT, Accept="image/webp,*/*")
+    assert response.mimetype == "image/webp"
+    assert response.headers["ETag"] == f'"{DIGEST}-medium-webp"'
+    assert response.headers["Vary"] == "Accept"
+
+    assert _serve(app, VARIANT, Accept="*/*").get_data() == b"jpeg"
+
+
+def test_missing_variant_falls_back_to_original_without_cache(uploads):
+    app, _ = uploads
+    response = _serve(app, VARIANT)
+
+    assert response.get_data() == b"original"
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+@pytest.mark.parametrize("path", ["../segredo.txt", "ads/../../segredo.txt", "ads//a.jpg", "ads/./a.jpg"])
+def test_path_traversal_is_rejected(uploads, path):
+    app, root = uploads
+    (root.parent / "segredo.txt").write_bytes(b"segredo")
+
+    with pytest.raises(NotFound):
+        _serve(app, path)
+
+
+def test_missing_file_serves_cached_placeholder(uploads):
+    app, root = uploads
+    response = _serve(app, "ads/inexistente.jpg")
+
+    assert response.status_code == 200
+    assert response.get_data() == b"padrao"
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+
+    # Servido da memória: o arquivo não é relido
+    (root / "ads" / "medium" / "no-ads-image.jpg").unlink()
+    etag = response.headers["ETag"]
+    assert _serve(app, "ads/outro.jpg").get_data() == b"padrao"
+    assert _serve(app, "ads/outro.jpg", **{"If-None-Match": etag}).status_code == 304
+
+
+def test_missing_placeholder_is_404(uploads):
+    app, root = uploads
+    (root / "ads" / "medium" / "no-ads-image.jpg").unlink()
+
+    with pytest.raises(NotFound):
+        _serve(app, "ads/inexistente.jpg")
@@ -0,0 +1,78 @@
+from bson import ObjectId
+
+from app.services.game import game_counter_service as counters
+
+
+def _game(mongo_db, **fields):
+    return mongo_db.games.insert_one({"name": "Valorant", "ads_count": 0, "active_ads_count": 0, **fields}).inserted_id
+
+
+def _counts(mongo_db, game_id):
+    game = mongo_db.games.find_one({"_id": game_id})
+    return game["ads_count"], game["active_ads_count"]
+
+
+def test_create_delete_and_status_changes_adjust_counters(mongo_db):
+    game_id = _game(mongo_db)
+
+    counters.on_ad_created({"game_id": game_id, "status": "active"})
+    counters.on_ad_created({"game_id": str(game_id), "status": "paused"})
+    assert _counts(mongo_db, game_id) == (2, 1)
+
+    counters.on_ad_status_changed(game_id, "paused", "active")
+    assert _counts(mongo_db, game_id) == (2, 2)
+
+    counters.on_ad_status_changed(game_id, "active", "active")
+    counters.on_ad_status_changed(game_id, "active", "sold")
+    assert _counts(mongo_db, game_id) == (2, 1)
+
+    counters.on_ad_deleted({"game_id": game_id, "status": "active"})
+    assert _counts(mongo_db, game_id) == (1, 0)
+
+
+def test_invalid_game_id_is_ignored(mongo_db):
+    counters.adjust_game_ad_counters("nao-e-objectid", total_delta=1)
+    counters.adjust_game_ad_counters(None, total_delta=1)
+    assert mongo_db.games.count_documents({}) == 0
+
+
+def test_reconcile_fixes_drifted_counters(mongo_db):
+    drifted = _game(mongo_db, ads_count=7, active_ads_count=7)
+    correct = _game(mongo_db, ads_count=1, active_ads_count=1)
+    missing = mongo_db.games.insert_one({"name": "Sem contadores"}).inserted_id
+    mongo_db.ads.insert_many([
+        {"game_id": drifted, "status": "active"},
+        {"game_id": drifted, "status": "paused"},
+        {"game_id": correct, "status": "active"},
+    ])
+
+    result = counters.reconcile_game_ad_counters()
+
+    assert result == {"success": True, "games_checked": 3, "games_fixed": 2}
+    assert _counts(mongo_db, drifted) == (2, 1)
+    assert _counts(mongo_db, correct) == (1, 1)
+    assert _counts(mongo_db, missing) == (0, 0)
+
+
+def test_reconcile_without_ads_zeroes_counters(mongo_db):
+    game_id = _game(mongo_db, ads_count=3, active_ads_count=2)
+    mongo_db.ads.insert_one({"game_id": ObjectId(), "status": "active"})
+
+    counters.reconcile_game_ad_counters()
+
+    assert _counts(mongo_db, game_id) == (0, 0)
+
+
+def test_backfill_fills_existing_games_once(mongo_db):
+    legacy = mongo_db.games.insert_one({"name": "Antigo"}).inserted_id
+    mongo_db.ads.insert_many([
+        {"game_id": legacy, "status": "active"},
+        {"game_id": legacy, "status": "sold"},
+    ])
+
+    assert counters.ensure_game_counters_backfilled()["games_fixed"] == 1
+    assert _counts(mongo_db, legacy) == (2, 1)
+    assert mongo_db.migrations.find_one({"_id": counters.MIGRATION_ID})
+
+    mongo_db.games.update_one({"_id": legacy}, {"$unset": {"ads_count": ""}})
+    assert counters.ensure_game_counters_backfilled() is None
@@ -0,0 +1,94 @@
+import io
+
+import pytest
+from PIL import Image, JpegImagePlugin
+
+from app.services.upload import image_encoder
+from app.services.upload.image_encoder import (
+    ImageTooLargeError, alternate_path, encode_variants, read_image_header, supported_formats
+)
+
+
+def _write(path, size, mode="RGB", fmt="JPEG", color="red"):
+    Image.new(mode, size, color).save(path, fmt)
+    return str(path)
+
+
+def test_variants_have_exact_sizes_and_atomic_names(tmp_path):
+    source = _write(tmp_path / "foto.jpg", (1600, 1200))
+    outputs = {
+        "thumbnail": ((150, 150), str(tmp_path / "thumbnail" / "foto.jpg")),
+        "large": ((800, 600), str(tmp_path / "large" / "foto.jpg")),
+    }
+
+    assert encode_variants(source, outputs) == {"thumbnail": True, "large": True}
+
+    for size, path in outputs.values():
+        with Image.open(path) as variant:
+            assert (variant.size, variant.format) == (size, "JPEG")
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_original_is_decoded_once_and_reduced_with_draft(tmp_path, monkeypatch):
+    source = _write(tmp_path / "foto.jpg", (2000, 2000))
+    opened, drafts = [], []
+    original_open, original_draft = Image.open, JpegImagePlugin.JpegImageFile.draft
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return original_open(*args, **kwargs)
+
+    def recording_draft(self, mode, size):
+        drafts.append(size)
+        return original_draft(self, mode, size)
+
+    monkeypatch.setattr(image_encoder.Image, "open", counting_open)
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", recording_draft)
+    outputs = {name: ((side, side), str(tmp_path / name / "foto.jpg"))
+               for name, side in (("thumbnail", 100), ("medium", 300), ("large", 500))}
+
+    encode_variants(source, outputs)
+
+    assert opened == [source]
+    assert drafts == [(500, 500)]  # pedido no tamanho da maior variante
+
+
+def test_transparent_png_gets_white_background(tmp_path):
+    source = _write(tmp_path / "logo.png", (400, 400), mode="RGBA", fmt="PNG", color=(0, 0, 0, 0))
+    output = str(tmp_path / "out" / "logo.png")
+
+    assert encode_variants(source, {"thumbnail": ((100, 100), output)})["thumbnail"] is True
+    with Image.open(output) as variant:
+        assert variant.getpixel((50, 50)) == (255, 255, 255)
+
+
+def test_modern_formats_are_written_next_to_the_jpeg(tmp_path):
+    if "webp" not in supported_formats(("webp",)):
+        pytest.skip("Pillow sem WebP")
+    source = _write(tmp_path / "foto.jpg", (400, 400))
+    output = str(tmp_path / "out" / "foto.jpg")
+
+    encode_variants(source, {"medium": ((200, 200), output)}, formats=("webp", "formato-inexistente"))
+
+    with Image.open(alternate_path(output, "webp")) as variant:
+        assert variant.format == "WEBP"
+
+
+def test_too_many_pixels_fails_every_variant(tmp_path):
+    source = _write(tmp_path / "foto.jpg", (1000, 1000))
+
+    results = encode_variants(source, {"a": ((10, 10), str(tmp_path / "a.jpg")),
+                                       "b": ((20, 20), str(tmp_path / "b.jpg"))}, max_pixels=1000)
+
+    assert results == {"a": False, "b": False}
+
+
+def test_read_image_header_validates_without_moving_the_stream():
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 200)).save(buffer, "PNG")
+    buffer.seek(5)
+
+    assert read_image_header(buffer) == ((300, 200), "PNG")
+    assert buffer.tell() == 5
+    with pytest.raises(ImageTooLargeError):
+        read_image_header(buffer, max_pixels=100)
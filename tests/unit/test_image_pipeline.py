@@ -0,0 +1,134 @@
+import io
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from PIL import Image
+
+from app.services.upload import image_pipeline as pipeline_module
+from app.services.upload import storage as storage_module
+from app.services.upload.image_pipeline import ImagePipeline
+
+OUTPUTS = {"thumbnail": ((64, 64), "ads/thumbnail/foto.jpg"), "medium": ((200, 200), "ads/medium/foto.jpg")}
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_module, "_config", {"backend": "local", "root": str(tmp_path), "base_url": "http://x"})
+    storage = storage_module.get_storage()
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), "red").save(buffer, "JPEG")
+    buffer.seek(0)
+    storage.save("ads/foto.jpg", buffer)
+    return storage
+
+
+def _manifest(mongo_db, **fields):
+    return mongo_db.upload_variants.insert_one({
+        "category": "ads", "filename": "foto.jpg", "original_key": "ads/foto.jpg",
+        "outputs": {name: {"size": list(size), "key": key} for name, (size, key) in OUTPUTS.items()},
+        "status": "pending", "queued": False, "attempts": 0,
+        "variants": {name: {"status": "pending"} for name in OUTPUTS}, **fields
+    }).inserted_id
+
+
+class FakeExecutor:
+    """Executa na hora; com broken=True recusa como um pool cujo processo morreu."""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool("processo morreu")
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_inline_generation_marks_manifest_ready(mongo_db, storage):
+    manifest_id = _manifest(mongo_db)
+    pipeline = ImagePipeline(workers=0, formats=())
+
+    assert pipeline.submit(manifest_id, "ads/foto.jpg", OUTPUTS) is True
+
+    manifest = mongo_db.upload_variants.find_one()
+    assert manifest["status"] == "ready"
+    assert manifest["variants"]["thumbnail"]["status"] == "ready"
+    assert storage.exists("ads/medium/foto.jpg")
+
+
+def test_full_queue_rejects_and_leaves_manifest_pending(mongo_db, storage):
+    manifest_id = _manifest(mongo_db)
+    pipeline = ImagePipeline(workers=1, max_pending=0)
+
+    assert pipeline.submit(manifest_id, "ads/foto.jpg", OUTPUTS) is False
+    assert pipeline.stats()["rejected"] == 1
+    assert mongo_db.upload_variants.find_one()["queued"] is False
+
+
+def test_broken_pool_is_replaced_on_submit(mongo_db, storage, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "ProcessPoolExecutor", lambda **kwargs: FakeExecutor())
+    pipeline = ImagePipeline(workers=1, formats=())
+    broken = pipeline._executor = FakeExecutor(broken=True)
+    manifest_id = _manifest(mongo_db)
+
+    assert pipeline.submit(manifest_id, "ads/foto.jpg", OUTPUTS) is True
+
+    assert broken.shut_down is True
+    assert pipeline._executor is not broken
+    assert pipeline.stats()["restarts"] == 1
+    assert mongo_db.upload_variants.find_one()["status"] == "ready"
+
+
+def test_worker_crash_discards_pool_and_fails_variants(mongo_db, storage):
+    pipeline = ImagePipeline(workers=1)
+    executor = pipeline._executor = FakeExecutor()
+    manifest_id = _manifest(mongo_db, attempts=1)
+    future = Future()
+    future.set_exception(BrokenProcessPool("processo morreu"))
+    pipeline._pending = 1
+
+    pipeline._on_done(manifest_id, OUTPUTS, future, executor)
+
+    assert pipeline._executor is None
+    assert executor.shut_down is True
+    manifest = mongo_db.upload_variants.find_one()
+    assert manifest["variants"]["medium"]["status"] == "failed"
+    assert manifest["status"] == "pending"  # a varredura tenta de novo
+
+
+def test_results_for_deleted_manifest_remove_orphaned_files(mongo_db, storage):
+    pipeline_module.generate_variants("ads/foto.jpg", OUTPUTS)
+
+    pipeline_module.record_variant_results("manifesto-removido", OUTPUTS, {name: True for name in OUTPUTS})
+
+    assert not storage.exists("ads/thumbnail/foto.jpg")
+    assert not storage.exists("ads/medium/foto.jpg")
+
+
+def test_results_for_deleted_manifest_keep_files_of_a_reupload(mongo_db, storage):
+    pipeline_module.generate_variants("ads/foto.jpg", OUTPUTS)
+    _manifest(mongo_db)  # o mesmo conteúdo enviado de novo
+
+    pipeline_module.record_variant_results("manifesto-removido", OUTPUTS, {name: True for name in OUTPUTS})
+
+    assert storage.exists("ads/thumbnail/foto.jpg")
+    assert storage.exists("ads/medium/foto.jpg")
+
+
+def test_retry_requeues_pending_and_fails_missing_originals(mongo_db, storage, monkeypatch):
+    pipeline = ImagePipeline(workers=0, formats=())
+    monkeypatch.setattr(pipeline_module, "image_pipeline", pipeline)
+    _manifest(mongo_db)
+    _manifest(mongo_db, filename="sumiu.jpg", original_key="ads/sumiu.jpg")
+
+    result = pipeline_module.retry_pending_variants()
+
+    assert (result["requeued"], result["failed"]) == (1, 1)
+    statuses = {m["filename"]: m["status"] for m in mongo_db.upload_variants.find()}
+    assert statuses == {"foto.jpg": "ready", "sumiu.jpg": "failed"}
@@ -0,0 +1,29 @@
+from app.models import create_indexes, get_index_plan
+from app.models.game.schema import game_indexes
+
+
+def test_partial_slug_index_replaces_legacy_unique_index(mongo_db):
+    mongo_db.games.create_index("slug", unique=True)
+    assert "slug_1" in mongo_db.games.index_information()
+
+    create_indexes(mongo_db.games, game_indexes)
+
+    indexes = mongo_db.games.index_information()
+    assert "slug_1" not in indexes
+    assert indexes["slug_unique_partial"]["partialFilterExpression"] == {"slug": {"$type": "string"}}
+
+    # Jogos sem slug não colidem mais
+    mongo_db.games.insert_many([{"name": "Sem slug 1"}, {"name": "Sem slug 2"}])
+
+
+def test_replaced_index_missing_is_not_an_error(mongo_db):
+    create_indexes(mongo_db.games, game_indexes)
+    create_indexes(mongo_db.games, game_indexes)
+
+    assert "slug_unique_partial" in mongo_db.games.index_information()
+
+
+def test_every_planned_index_has_a_key():
+    for collection_name, index_configs in get_index_plan().items():
+        for index_config in index_configs:
+            assert index_config.get("key"), collection_name
@@ -0,0 +1,34 @@
+from app.models import setup_indexes
+from app.services.audit.log_storage import TTL_FIELDS, apply_log_retention, retention_from_config
+
+
+def _ttl(mongo_db, collection_name):
+    field = TTL_FIELDS[collection_name]
+    for index in mongo_db[collection_name].list_indexes():
+        if dict(index["key"]) == {field: 1}:
+            return index.get("expireAfterSeconds")
+    return None
+
+
+def test_retention_from_config_uses_days_and_defaults():
+    retention = retention_from_config({"LOG_RETENTION_DAYS_AUDIT": 7})
+
+    assert retention["audit_logs"] == 7 * 86400
+    assert retention["security_logs"] == 90 * 86400
+
+
+def test_index_plan_leaves_ttl_to_apply_log_retention(mongo_db):
+    setup_indexes(mongo_db)
+    assert all(_ttl(mongo_db, name) is None for name in TTL_FIELDS)
+
+    retention = retention_from_config({"LOG_RETENTION_DAYS_AUDIT": 7})
+    result = apply_log_retention(retention)
+
+    assert result["success"] is True
+    assert sorted(result["changed"]) == sorted(TTL_FIELDS)
+    assert _ttl(mongo_db, "audit_logs") == 7 * 86400
+
+    # Reiniciar a aplicação não recria o TTL com o valor padrão
+    setup_indexes(mongo_db)
+    assert apply_log_retention(retention)["changed"] == []
+    assert _ttl(mongo_db, "audit_logs") == 7 * 86400
@@ -0,0 +1,69 @@
+import pytest
+
+from app.utils.security.log_sink import LogSink
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    # Sem thread de gravação: a fila só é esvaziada por flush()
+    sink = LogSink(max_queue=3, batch_size=2)
+    monkeypatch.setattr(sink, "_ensure_writer", lambda: None)
+    return sink
+
+
+def test_full_queue_drops_and_counts(mongo_db, sink):
+    accepted = [sink.write("audit_logs", {"n": i}) for i in range(5)]
+
+    assert accepted == [True, True, True, False, False]
+    assert sink.stats()["dropped"] == 2
+    assert mongo_db.audit_logs.count_documents({}) == 0
+
+
+def test_block_overflow_waits_then_drops(mongo_db, sink):
+    sink.configure(overflow="block", block_timeout=0.01)
+    for i in range(3):
+        sink.write("audit_logs", {"n": i})
+
+    assert sink.write("audit_logs", {"n": 3}) is False
+    assert sink.dropped == 1
+
+
+def test_flush_writes_batches_grouped_by_collection(mongo_db, sink):
+    sink.write("audit_logs", {"n": 1})
+    sink.write("security_logs", {"n": 2})
+    sink.write("audit_logs", {"n": 3})
+
+    sink.flush()
+
+    stats = sink.stats()
+    assert (stats["queued"], stats["written"], stats["batches"]) == (0, 3, 3)
+    assert mongo_db.audit_logs.count_documents({}) == 2
+    assert mongo_db.security_logs.count_documents({}) == 1
+
+
+def test_failed_insert_is_counted_not_raised(sink, monkeypatch):
+    monkeypatch.setattr("app.db.mongo_client.db", None)
+    sink.write("audit_logs", {"n": 1})
+
+    sink.flush()
+
+    assert (sink.failed, sink.written) == (1, 0)
+
+
+def test_sync_mode_writes_immediately(mongo_db):
+    sink = LogSink(mode="sync")
+
+    assert sink.write("audit_logs", {"n": 1}) is True
+    assert mongo_db.audit_logs.count_documents({}) == 1
+    assert sink.stats()["queued"] == 0
+
+
+def test_writer_thread_flushes_on_shutdown(mongo_db):
+    sink = LogSink(batch_size=100, flush_interval=0.05)
+    for i in range(10):
+        sink.write("audit_logs", {"n": i})
+
+    sink.shutdown()
+
+    assert mongo_db.audit_logs.count_documents({}) == 10
+    assert sink.stats()["written"] == 10
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services.favorites import favorites_service
+from app.utils.helpers.pagination import (
+    InvalidCursorError, decode_cursor, encode_cursor, paginate_find
+)
+
+START = datetime(2026, 1, 1)
+
+
+def test_cursor_round_trip():
+    document = {"_id": ObjectId(), "created_at": START}
+    value, last_id = decode_cursor(encode_cursor(document))
+    assert value == START
+    assert last_id == document["_id"]
+
+
+@pytest.mark.parametrize("cursor", ["nao-base64!", "e30", "eyJ2IjogMSwgImlkIjogMn0"])
+def test_invalid_cursor_raises(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_paginate_find_walks_all_documents_with_ties(mongo_db):
+    # Vários documentos com o mesmo created_at: o desempate por _id não pode pular nem repetir
+    documents = [{"_id": ObjectId(), "created_at": START + timedelta(minutes=i // 3)} for i in range(10)]
+    mongo_db.items.insert_many(documents)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = paginate_find(mongo_db.items, {}, 4, cursor=cursor)
+        seen.extend(document["_id"] for document in page)
+        if cursor is None:
+            break
+
+    expected = [d["_id"] for d in sorted(documents, key=lambda d: (d["created_at"], d["_id"]), reverse=True)]
+    assert seen == expected
+
+
+def test_paginate_find_skip_without_cursor(mongo_db):
+    mongo_db.items.insert_many([{"_id": ObjectId(), "created_at": START + timedelta(minutes=i)} for i in range(5)])
+
+    page, cursor = paginate_find(mongo_db.items, {}, 2, skip=4)
+
+    assert len(page) == 1
+    assert cursor is None
+
+
+def test_user_favorites_pages_stay_full_when_ads_were_deleted(mongo_db):
+    user_id = ObjectId()
+    favorites, ad_ids = [], []
+    for i in range(6):
+        ad_id = ObjectId()
+        ad_ids.append(str(ad_id))
+        if i % 2 == 0:
+            mongo_db.ads.insert_one({"_id": ad_id, "title": f"Anúncio {i}"})
+        favorites.append({"_id": ObjectId(), "user_id": user_id, "ad_id": ad_id,
+                          "created_at": START + timedelta(minutes=i)})
+    mongo_db.favorites.insert_many(favorites)
+
+    first = favorites_service.get_user_favorites(str(user_id), limit=2)["data"]
+    assert [f["ad"]["_id"] for f in first["favorites"]] == [ad_ids[4], ad_ids[2]]
+    assert first["next_cursor"]
+
+    second = favorites_service.get_user_favorites(str(user_id), limit=2, cursor=first["next_cursor"])["data"]
+    assert [f["ad"]["_id"] for f in second["favorites"]] == [ad_ids[0]]
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("limit, expected", [(0, 1), (-5, 1), (3, 3), (1000, 100)])
+def test_limit_is_clamped(mongo_db, limit, expected):
+    mongo_db.items.insert_many([{"_id": ObjectId(), "created_at": START + timedelta(minutes=i)} for i in range(150)])
+
+    page, cursor = paginate_find(mongo_db.items, {}, limit)
+
+    assert len(page) == expected
+    assert cursor is not None
+
+
+def test_user_favorites_with_zero_limit(mongo_db):
+    user_id, ad_id = ObjectId(), ObjectId()
+    mongo_db.ads.insert_one({"_id": ad_id, "title": "Zelda"})
+    mongo_db.favorites.insert_one({"user_id": user_id, "ad_id": ad_id, "created_at": START})
+
+    result = favorites_service.get_user_favorites(str(user_id), limit=0)
+
+    assert result["success"] is True
+    assert len(result["data"]["favorites"]) == 1
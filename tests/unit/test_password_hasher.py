@@ -0,0 +1,72 @@
+import bcrypt
+import pytest
+
+from flask import Flask
+
+from app.utils.helpers import password_helpers
+from app.utils.helpers.password_helpers import PasswordHasher, PasswordHasherBusy, hash_rounds
+
+
+@pytest.fixture
+def hasher():
+    # bcrypt na própria thread e com custo mínimo: só a lógica em volta é testada
+    return PasswordHasher(workers=0, rounds=5)
+
+
+def _hash(rounds):
+    return bcrypt.hashpw(b"senha", bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def test_hash_and_verify_inline(hasher):
+    hashed = hasher.hash("senha")
+
+    assert hash_rounds(hashed) == 5
+    assert hasher.verify("senha", hashed) is True
+    assert hasher.verify("outra", hashed) is False
+    assert hasher.stats()["latency_ms"]["p50"] is not None
+
+
+@pytest.mark.parametrize("rounds, expected", [(4, True), (5, False), (6, False)])
+def test_only_weaker_hashes_are_rehashed(hasher, rounds, expected):
+    assert hasher.needs_rehash(_hash(rounds)) is expected
+
+
+def test_unknown_hash_format_is_left_alone(hasher):
+    assert hash_rounds("texto-puro") is None
+    assert hasher.needs_rehash("texto-puro") is False
+
+
+def test_rehash_in_background_inline_uses_current_cost(hasher):
+    new_hashes = []
+
+    assert hasher.rehash_in_background("senha", new_hashes.append) is True
+    assert hash_rounds(new_hashes[0]) == 5
+    assert hasher.rehashed == 1
+
+
+def test_full_queue_rejects_new_work():
+    hasher = PasswordHasher(workers=1, max_pending=0, rounds=5)
+
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash("senha")
+    assert hasher.rehash_in_background("senha", lambda new_hash: None) is False
+    assert hasher.stats()["rejected"] == 2
+
+
+def test_calibration_never_lowers_the_default_cost(monkeypatch):
+    # Máquina lenta: qualquer custo acima do mínimo passa do alvo
+    monkeypatch.setattr(password_helpers, "_bcrypt_hash", lambda password, rounds: (b"", 10.0))
+    monkeypatch.setattr(password_helpers, "password_hasher", PasswordHasher(workers=0))
+
+    app = Flask(__name__)
+    app.config["PASSWORD_HASH_WORKERS"] = 0
+    assert password_helpers.init_password_hasher(app).rounds == password_helpers.DEFAULT_ROUNDS
+
+    app.config["PASSWORD_HASH_MIN_ROUNDS"] = 13
+    assert password_helpers.init_password_hasher(app).rounds == 13
+
+
+def test_calibration_raises_the_cost_on_a_fast_machine(monkeypatch):
+    monkeypatch.setattr(password_helpers, "_bcrypt_hash", lambda password, rounds: (b"", rounds / 1000))
+
+    assert password_helpers.calibrate_rounds(target_ms=14) == 14
@@ -0,0 +1,40 @@
+import pytest
+
+from app.utils.security.payload_scanner import scan_json, scan_text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1 UNION SELECT senha", "union select"),
+    ("<SCRIPT>alert(1)</script>", "<script>"),
+    ("admin';--", ";--"),
+    ("jogo -- usado", "--"),
+    ("Zelda: Breath of the Wild", None),
+    ("", None),
+    (None, None),
+])
+def test_scan_text(text, expected):
+    assert scan_text(text) == expected
+
+
+def test_scan_json_finds_patterns_in_nested_values_and_keys():
+    assert scan_json({"ad": {"tags": ["rpg", {"note": "x OR 1=1"}]}}) == "or 1=1"
+    assert scan_json({"javascript:void(0)": "ok"}) == "javascript:"
+
+
+def test_scan_json_ignores_non_string_values():
+    assert scan_json({"price": 10.5, "active": True, "stock": None, "ids": [1, 2]}) is None
+
+
+def test_scan_json_stops_at_max_bytes():
+    data = ["a" * 100, "<script>"]
+    # A pilha é percorrida do fim: coloca o padrão depois do texto longo
+    data.reverse()
+    assert scan_json(data, max_bytes=50) is None
+    assert scan_json(data, max_bytes=200) == "<script>"
+
+
+def test_scan_json_handles_deep_nesting_without_recursion():
+    data = "eval(x)"
+    for _ in range(5000):
+        data = {"n": [data]}
+    assert scan_json(data) == "eval("
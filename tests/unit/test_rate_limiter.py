@@ -0,0 +1,96 @@
+import pytest
+
+from app.utils.security.rate_limiter import (
+    MemoryBackend, MongoBackend, RateLimiter, SlidingWindowCounter, TokenBucket
+)
+
+
+def _run(algorithm, times, state=None):
+    results = []
+    for now in times:
+        state, result = algorithm.check(state, now)
+        results.append(result)
+    return state, results
+
+
+def test_sliding_window_blocks_after_limit_within_window():
+    _state, results = _run(SlidingWindowCounter(3, 60), [0, 1, 2, 3])
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[2].remaining == 0
+    assert results[3].retry_after == 57
+
+
+def test_sliding_window_weights_previous_window():
+    limiter = SlidingWindowCounter(4, 60)
+    state, _results = _run(limiter, [50, 51, 52, 53])
+
+    # 15s na janela seguinte: 4 * 0.75 = 3 estimadas, cabe só mais uma
+    state, results = _run(limiter, [75, 76], state)
+    assert [r.allowed for r in results] == [True, False]
+
+    # Duas janelas depois a anterior deixa de contar
+    _state, results = _run(limiter, [180, 181, 182, 183], state)
+    assert all(r.allowed for r in results)
+
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(2, 10)  # uma ficha a cada 5s
+    state, results = _run(bucket, [0, 0, 0])
+    assert [r.allowed for r in results] == [True, True, False]
+    assert results[2].retry_after == 5
+
+    state, results = _run(bucket, [5, 5], state)
+    assert [r.allowed for r in results] == [True, False]
+
+    # Fichas nunca passam do limite, mesmo após muito tempo ocioso
+    _state, results = _run(bucket, [1000, 1000, 1000], state)
+    assert [r.allowed for r in results] == [True, True, False]
+
+
+def test_memory_backend_evicts_idle_keys():
+    backend = MemoryBackend(max_keys=2)
+    algorithm = SlidingWindowCounter(1, 60)
+    backend.hit("a", algorithm, 0)
+    backend.hit("b", algorithm, 0)
+    backend.hit("a", algorithm, 1)
+    backend.hit("c", algorithm, 1)
+
+    assert backend.stats()["keys"] == 2
+    assert backend.evicted == 1
+    # "b" foi descartada: recomeça do zero
+    assert backend.hit("b", algorithm, 2).allowed is True
+    assert backend.hit("c", algorithm, 2).allowed is False
+
+
+@pytest.mark.parametrize("algorithm", [SlidingWindowCounter(3, 60), TokenBucket(3, 60)])
+def test_mongo_pipeline_matches_in_memory_check(mongo_db, algorithm):
+    backend = MongoBackend(mongo_db.rate_limits)
+    times = [10, 11, 12, 13, 70, 71, 95, 96]
+
+    _state, expected = _run(algorithm, times)
+    actual = [backend.hit("k", algorithm, now) for now in times]
+
+    assert [r.allowed for r in actual] == [r.allowed for r in expected]
+    assert mongo_db.rate_limits.find_one({"_id": "k"})["expires_at"]
+
+
+def test_rate_limiter_policies_and_fail_open():
+    class BrokenBackend(MemoryBackend):
+        def hit(self, *args, **kwargs):
+            raise RuntimeError("mongo fora")
+
+    limiter = RateLimiter(policies={"login": {"limit": 1, "period": 30}})
+    assert limiter.policy("login", 10) == (1, 30, "sliding_window")
+    assert limiter.policy("outra", 10, 60, "token_bucket") == (10, 60, "token_bucket")
+
+    assert limiter.hit("k", 1).allowed is True
+    assert limiter.hit("k", 1).allowed is False
+    assert (limiter.allowed, limiter.limited) == (1, 1)
+
+    limiter.configure(backend=BrokenBackend())
+    assert limiter.hit("k", 1).allowed is True
+    assert limiter.errors == 1
+
+    with pytest.raises(ValueError):
+        limiter.configure(algorithm="fixed_window")
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.chat import chat_service
+from app.services.chat.read_watermark_migration import (
+    MIGRATION_ID, ensure_read_watermarks_migrated, migrate_read_by_to_watermarks
+)
+
+START = datetime(2026, 1, 1)
+
+
+def _room(mongo_db, **fields):
+    buyer, seller = ObjectId(), ObjectId()
+    room_id = mongo_db.chat_rooms.insert_one({"buyer_id": buyer, "seller_id": seller, **fields}).inserted_id
+    return room_id, buyer, seller
+
+
+def test_sender_watermark_advances_with_own_message(mongo_db):
+    room_id, buyer, _seller = _room(mongo_db)
+
+    message_id = chat_service.send_message(str(room_id), str(buyer), "oi")["data"]["message"]["_id"]
+
+    watermark = mongo_db.chat_rooms.find_one()["read_watermarks"][str(buyer)]
+    assert watermark["message_id"] == message_id
+
+
+def test_mark_as_read_moves_watermark_to_last_message(mongo_db):
+    room_id, buyer, seller = _room(mongo_db)
+    chat_service.send_message(str(room_id), str(buyer), "oi")
+    last_id = chat_service.send_message(str(room_id), str(buyer), "alô")["data"]["message"]["_id"]
+
+    result = chat_service.mark_messages_as_read(str(room_id), str(seller))
+
+    assert result["data"]["marked_count"] == 2
+    assert result["data"]["read_watermark"]["message_id"] == last_id
+    room = mongo_db.chat_rooms.find_one()
+    assert room["unread_counts"][str(seller)] == 0
+    assert room["read_watermarks"][str(seller)]["message_id"] == last_id
+
+
+def test_mark_as_read_on_room_without_last_message_uses_latest_message(mongo_db):
+    room_id, buyer, seller = _room(mongo_db, unread_counts={})
+    mongo_db.chat_messages.insert_many([
+        {"room_id": room_id, "user_id": buyer, "content": "a", "created_at": START},
+        {"room_id": room_id, "user_id": buyer, "content": "b", "created_at": START + timedelta(minutes=1)},
+    ])
+    latest = mongo_db.chat_messages.find_one({"content": "b"})
+
+    watermark = chat_service.advance_read_watermark(room_id, seller)
+
+    assert watermark == {"message_id": str(latest["_id"]), "created_at": latest["created_at"]}
+
+
+def test_mark_as_read_on_empty_room_has_no_watermark(mongo_db):
+    room_id, _buyer, seller = _room(mongo_db)
+
+    result = chat_service.mark_messages_as_read(str(room_id), str(seller))
+
+    assert result["success"] is True
+    assert result["data"]["read_watermark"] is None
+
+
+def test_migration_keeps_newest_read_message_per_user(mongo_db):
+    room_id, buyer, seller = _room(mongo_db)
+    mongo_db.chat_messages.insert_many([
+        {"room_id": room_id, "content": "a", "created_at": START, "read_by": [buyer, seller]},
+        {"room_id": room_id, "content": "b", "created_at": START + timedelta(minutes=1), "read_by": [seller]},
+        {"room_id": room_id, "content": "c", "created_at": START + timedelta(minutes=2), "read_by": []},
+    ])
+    first = mongo_db.chat_messages.find_one({"content": "a"})
+    second = mongo_db.chat_messages.find_one({"content": "b"})
+
+    result = migrate_read_by_to_watermarks(mongo_db, drop_read_by=True)
+
+    watermarks = mongo_db.chat_rooms.find_one()["read_watermarks"]
+    assert watermarks[str(buyer)]["message_id"] == str(first["_id"])
+    assert watermarks[str(seller)]["message_id"] == str(second["_id"])
+    assert result["messages_cleaned"] == 3
+    assert mongo_db.chat_messages.count_documents({"read_by": {"$exists": True}}) == 0
+
+
+def test_migration_does_not_move_newer_watermarks_back(mongo_db):
+    newer = {"message_id": "mais-nova", "created_at": START + timedelta(days=1)}
+    room_id, buyer, _seller = _room(mongo_db)
+    mongo_db.chat_rooms.update_one({"_id": room_id}, {"$set": {f"read_watermarks.{buyer}": newer}})
+    mongo_db.chat_messages.insert_one({"room_id": room_id, "content": "a", "created_at": START, "read_by": [buyer]})
+
+    migrate_read_by_to_watermarks(mongo_db)
+
+    assert mongo_db.chat_rooms.find_one()["read_watermarks"][str(buyer)] == newer
+
+
+def test_ensure_migrated_runs_once(mongo_db):
+    assert ensure_read_watermarks_migrated(mongo_db) is not None
+    assert mongo_db.migrations.find_one({"_id": MIGRATION_ID})
+    assert ensure_read_watermarks_migrated(mongo_db) is None
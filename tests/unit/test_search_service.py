@@ -0,0 +1,94 @@
+import pytest
+from bson import ObjectId
+
+from app.services.search import search_service
+from app.services.search.search_index import InvertedIndex
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(search_service, "_ads_index", InvertedIndex())
+    monkeypatch.setattr(search_service, "_games_index", InvertedIndex())
+    monkeypatch.setattr(search_service, "_game_names", {})
+    monkeypatch.setattr(search_service, "_built_at", None)
+    monkeypatch.setattr(search_service, "_rebuilding", False)
+    monkeypatch.setattr(search_service, "_pending_updates", [])
+    monkeypatch.setattr(search_service, "_rebuild_timer", None)
+
+
+def _ad(game_id, title, status="active"):
+    return {"_id": ObjectId(), "game_id": game_id, "title": title, "description": "",
+            "platform": "PC", "ad_type": "venda", "status": status, "price_per_hour": 10}
+
+
+def _ad_ids(query):
+    _total, hits = search_service._ads_index.search(query)
+    return {doc_id for doc_id, _score in hits}
+
+
+def test_rebuild_indexes_active_ads_and_games(mongo_db):
+    game_id = mongo_db.games.insert_one({"name": "Valorant", "is_active": True}).inserted_id
+    active = _ad(game_id, "Conta Radiante")
+    mongo_db.ads.insert_many([active, _ad(game_id, "Conta Imortal", status="inactive")])
+
+    assert search_service.rebuild_index() is True
+
+    assert _ad_ids("conta") == {str(active["_id"])}
+    assert _ad_ids("valorant") == {str(active["_id"])}
+    assert search_service.get_index_stats()["games_indexed"] == 1
+
+
+def test_updates_during_rebuild_are_replayed_on_new_index(mongo_db, monkeypatch):
+    game_id = mongo_db.games.insert_one({"name": "Valorant", "is_active": True}).inserted_id
+    removed = _ad(game_id, "Conta Radiante")
+    mongo_db.ads.insert_one(removed)
+    added = _ad(game_id, "Conta Nova")
+
+    original = search_service._ad_document
+    calls = {"count": 0}
+
+    def ad_document_with_concurrent_updates(ad, game_name=None):
+        # Simula requisições que alteram anúncios no meio da varredura
+        calls["count"] += 1
+        if calls["count"] == 1:
+            search_service.remove_ad(removed["_id"])
+            search_service.index_ad(added["_id"], added)
+        return original(ad, game_name)
+
+    monkeypatch.setattr(search_service, "_ad_document", ad_document_with_concurrent_updates)
+    search_service.rebuild_index()
+
+    assert _ad_ids("conta") == {str(added["_id"])}
+    assert search_service.get_index_stats()["pending_updates"] == 0
+
+
+def test_updates_apply_to_current_index_after_build(mongo_db):
+    game_id = mongo_db.games.insert_one({"name": "Valorant", "is_active": True}).inserted_id
+    ad = _ad(game_id, "Conta Radiante")
+    mongo_db.ads.insert_one(ad)
+    search_service.rebuild_index()
+
+    search_service.index_ad(ad["_id"], {**ad, "status": "paused"})
+    assert _ad_ids("conta") == set()
+
+    search_service.index_ad(ad["_id"], ad)
+    search_service.index_game(game_id, {"name": "Valorant Mobile", "is_active": True})
+    assert _ad_ids("mobile") == {str(ad["_id"])}
+
+
+def test_updates_before_first_build_are_ignored(mongo_db):
+    search_service.index_ad(ObjectId(), _ad(ObjectId(), "Conta"))
+    assert len(search_service._ads_index) == 0
+
+
+def test_ensure_index_builds_in_background(mongo_db):
+    mongo_db.ads.insert_one(_ad(None, "Conta Radiante"))
+
+    search_service.ensure_index()
+    timer = search_service._rebuild_timer
+    assert timer is not None
+    timer.join(5)
+
+    assert search_service.get_index_stats()["built"] is True
+    assert search_service.schedule_rebuild() is True
+    search_service._rebuild_timer.join(5)
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from flask import Flask, request
+
+from app.utils.security import security_middleware
+from app.utils.security.security_middleware import register_security_middleware
+
+
+@pytest.fixture
+def app(monkeypatch):
+    events = []
+    monkeypatch.setattr(
+        security_middleware.AuditLogger, "log_security_event",
+        lambda **kwargs: events.append(kwargs)
+    )
+
+    app = Flask(__name__)
+    app.config["SECURITY_SCAN_MAX_BYTES"] = 100
+    register_security_middleware(app)
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return {"keys": sorted(request.get_json())}
+
+    app.events = events
+    return app
+
+
+def _post(app, payload):
+    return app.test_client().post("/echo", data=json.dumps(payload), content_type="application/json")
+
+
+def test_small_json_body_is_scanned(app):
+    assert _post(app, {"title": "x OR 1=1"}).status_code == 200
+    assert [event["event_type"] for event in app.events] == ["suspicious_json_payload"]
+
+
+def test_oversized_json_body_has_its_prefix_scanned(app):
+    response = _post(app, {"a": "<script>", "b": "z" * 500})
+
+    # O corpo continua disponível para a rota
+    assert response.get_json() == {"keys": ["a", "b"]}
+    assert [event["description"] for event in app.events] == ["Payload suspeito detectado: <script>"]
+
+
+def test_oversized_json_body_beyond_the_prefix_is_not_scanned(app):
+    assert _post(app, {"a": "z" * 500, "b": "<script>"}).status_code == 200
+    assert app.events == []
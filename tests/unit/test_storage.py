@@ -0,0 +1,179 @@
+import io
+import os
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.services.upload import storage as storage_module
+from app.services.upload.storage import LocalStorage
+
+BUCKET = "gameunite-test"
+MB = 1024 * 1024
+
+
+# ---------------------------------------------------------------- local
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(root=str(tmp_path), base_url="http://cdn.test/api/upload/")
+
+
+def test_local_save_exists_size_and_url(local, tmp_path):
+    local.save("ads/foto.jpg", io.BytesIO(b"conteudo"))
+
+    assert local.exists("ads/foto.jpg")
+    assert local.size("ads/foto.jpg") == 8
+    assert (tmp_path / "ads" / "foto.jpg").read_bytes() == b"conteudo"
+    assert not [name for name in os.listdir(tmp_path / "ads") if name.endswith(".tmp")]
+    assert local.url("ads/foto.jpg") == "http://cdn.test/api/upload/ads/foto.jpg"
+    assert local.download_url("ads/foto.jpg") is None
+
+
+def test_local_missing_key(local):
+    assert local.exists("ads/nada.jpg") is False
+    assert local.size("ads/nada.jpg") is None
+
+
+def test_local_delete_counts_only_existing_keys(local):
+    local.save("ads/a.jpg", io.BytesIO(b"a"))
+    local.save("ads/medium/a.jpg", io.BytesIO(b"a"))
+
+    assert local.delete(["ads/a.jpg", "ads/medium/a.jpg", "ads/large/a.jpg"]) == 2
+    assert not local.exists("ads/a.jpg")
+
+
+def test_local_output_writes_in_place_and_save_file_copies(local, tmp_path):
+    with local.local_output("ads/medium/a.jpg") as path:
+        with open(path, "wb") as handle:
+            handle.write(b"variante")
+    assert local.size("ads/medium/a.jpg") == 8
+
+    with local.local_copy("ads/medium/a.jpg") as path:
+        local.save_file("ads/large/a.jpg", path)
+        local.save_file("ads/medium/a.jpg", path)  # mesmo arquivo: nada a fazer
+    assert (tmp_path / "ads" / "large" / "a.jpg").read_bytes() == b"variante"
+
+
+def test_local_has_no_direct_upload(local):
+    assert local.supports_presigned_upload is False
+    assert not hasattr(local, "presigned_upload")
+
+
+def test_storage_from_config_reuses_backend(tmp_path):
+    config = {"backend": "local", "root": str(tmp_path), "base_url": "http://x"}
+    assert storage_module.storage_from_config(config) is storage_module.storage_from_config(dict(config))
+
+    with pytest.raises(ValueError):
+        storage_module.storage_from_config({"backend": "s3"})
+    with pytest.raises(ValueError):
+        storage_module.storage_from_config({"backend": "ftp"})
+
+
+# ---------------------------------------------------------------- S3 (moto)
+
+@pytest.fixture
+def s3(monkeypatch):
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    with moto.mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield storage_module.S3Storage(
+            BUCKET, prefix="uploads/", region="us-east-1",
+            base_url="http://app.test/api/upload", multipart_threshold=5 * MB
+        )
+
+
+def _head(s3, key):
+    return s3.client.head_object(Bucket=BUCKET, Key=f"uploads/{key}")
+
+
+def test_s3_save_small_and_multipart(s3):
+    s3.save("ads/pequeno.png", io.BytesIO(b"png"))
+    s3.save("ads/grande.jpg", io.BytesIO(b"x" * (11 * MB)))
+
+    small = _head(s3, "ads/pequeno.png")
+    assert small["ContentType"] == "image/png"
+    assert small["CacheControl"] == "public, max-age=31536000, immutable"
+
+    big = _head(s3, "ads/grande.jpg")
+    assert big["ContentLength"] == 11 * MB
+    assert big["ETag"].strip('"').endswith("-3")  # enviado em 3 partes
+
+
+def test_s3_exists_and_size(s3):
+    s3.save("ads/a.jpg", io.BytesIO(b"12345"))
+
+    assert s3.exists("ads/a.jpg") is True
+    assert s3.size("ads/a.jpg") == 5
+    assert s3.exists("ads/nada.jpg") is False
+    assert s3.size("ads/nada.jpg") is None
+
+
+def test_s3_delete_batches_of_1000(s3, monkeypatch):
+    keys = [f"ads/{i}.jpg" for i in range(1500)]
+    for key in keys[:3]:
+        s3.save(key, io.BytesIO(b"x"))
+
+    calls = []
+    delete_objects = s3.client.delete_objects
+
+    def counting_delete_objects(**kwargs):
+        calls.append(len(kwargs["Delete"]["Objects"]))
+        return delete_objects(**kwargs)
+
+    monkeypatch.setattr(s3.client, "delete_objects", counting_delete_objects)
+
+    assert s3.delete(keys) == 1500
+    assert calls == [1000, 500]
+    assert not s3.exists("ads/0.jpg")
+
+
+def test_s3_local_output_uploads_sidecar_formats(s3):
+    with s3.local_output("ads/medium/foto.jpg") as path:
+        for name, data in (("foto.jpg", b"jpg"), ("foto.jpg.webp", b"webp"), ("foto.jpg.tmp", b"parcial")):
+            with open(os.path.join(os.path.dirname(path), name), "wb") as handle:
+                handle.write(data)
+    directory = os.path.dirname(path)
+
+    assert s3.size("ads/medium/foto.jpg") == 3
+    assert s3.size("ads/medium/foto.jpg.webp") == 4
+    assert not s3.exists("ads/medium/foto.jpg.tmp")
+    assert not os.path.exists(directory)
+
+
+def test_s3_local_copy_downloads_to_temp_file(s3):
+    s3.save("ads/a.jpg", io.BytesIO(b"original"))
+
+    with s3.local_copy("ads/a.jpg") as path:
+        with open(path, "rb") as handle:
+            assert handle.read() == b"original"
+    assert not os.path.exists(path)
+
+
+def test_s3_presigned_put_is_signed_with_checksum(s3):
+    upload = s3.presigned_upload("ads/novo.jpg", "image/jpeg", checksum_sha256="c2hhMjU2", expires_in=600)
+
+    parsed = urlparse(upload["url"])
+    query = parse_qs(parsed.query)
+    assert upload["method"] == "PUT"
+    assert upload["expires_in"] == 600
+    assert parsed.path.endswith("/uploads/ads/novo.jpg")
+    assert query["x-amz-checksum-sha256"] == ["c2hhMjU2"]
+    assert query["content-type"] == ["image/jpeg"]
+    assert upload["headers"] == {
+        "Content-Type": "image/jpeg",
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "x-amz-checksum-sha256": "c2hhMjU2"
+    }
+
+
+def test_s3_urls(s3):
+    assert s3.url("ads/a.jpg") == "http://app.test/api/upload/ads/a.jpg"
+    assert "uploads/ads/a.jpg" in s3.download_url("ads/a.jpg")
+
+    s3.public_base_url = "https://cdn.test"
+    assert s3.download_url("ads/a.jpg") == "https://cdn.test/uploads/ads/a.jpg"
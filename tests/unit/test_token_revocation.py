@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from flask import Flask, g
+from flask_jwt_extended import JWTManager, create_access_token
+
+from app.models.user import crud
+from app.utils.decorators import auth_decorators
+from app.utils.decorators.auth_decorators import LazyUser, jwt_required
+from app.utils.security import token_revocation as revocation_module
+from app.utils.security.token_revocation import RevocationTable, token_claims
+
+
+@pytest.fixture
+def table(monkeypatch):
+    fresh = RevocationTable(mode="stateless", max_staleness=30)
+    monkeypatch.setattr(revocation_module, "token_revocation", fresh)
+    monkeypatch.setattr(auth_decorators, "token_revocation", fresh)
+    return fresh
+
+
+def test_versions_only_move_forward():
+    table = RevocationTable()
+    table.note("u", 3)
+    table.note("u", 1)
+
+    assert table.current_version("u") == 3
+    assert table.is_revoked("u", 2) is True
+    assert table.is_revoked("u", 3) is False
+    assert table.is_revoked("u", None) is False  # token antigo, sem tv
+    assert table.is_revoked("outro", 0) is False
+    assert table.rejected == 1
+
+
+def test_claims_are_used_only_when_table_is_fresh(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(revocation_module.time, "monotonic", lambda: now[0])
+    table = RevocationTable(mode="stateless", max_staleness=30)
+    assert table.use_claims({"tv": 0}) is False  # ainda não carregada
+
+    table._refreshed_at = now[0]
+    assert table.use_claims({"tv": 0}) is True
+    assert table.use_claims({}) is False
+
+    now[0] += 31
+    assert table.use_claims({"tv": 0}) is False
+
+    table.configure(mode="database")
+    table._refreshed_at = now[0]
+    assert table.use_claims({"tv": 0}) is False
+
+
+def test_refresh_reads_only_users_changed_since_last_read(mongo_db, table):
+    start = datetime(2026, 1, 1)
+    bumped = mongo_db.users.insert_one({"token_version": 2, "token_version_updated_at": start}).inserted_id
+    mongo_db.users.insert_one({"username": "nunca-alterado"})
+
+    assert table.refresh() == 1
+    assert table.current_version(bumped) == 2
+    assert table.ready
+
+    # Só a margem de sobreposição é relida
+    assert table.refresh() == 1
+    mongo_db.users.update_one({"_id": bumped}, {"$set": {"token_version_updated_at": start - timedelta(minutes=1)}})
+    assert table.refresh() == 0
+
+    other = mongo_db.users.insert_one({"token_version": 1, "token_version_updated_at": start + timedelta(hours=1)})
+    assert table.refresh() == 1
+    assert table.current_version(other.inserted_id) == 1
+
+
+def test_bump_token_version_revokes_in_this_process(mongo_db, table):
+    user_id = str(mongo_db.users.insert_one({"token_version": 0}).inserted_id)
+
+    assert crud.bump_token_version(user_id) == 1
+    assert table.is_revoked(user_id, 0) is True
+    assert crud.bump_token_version(str(ObjectId())) is None
+
+
+def test_lazy_user_loads_document_only_for_other_fields(monkeypatch):
+    loads = []
+
+    def get_user_by_id(user_id):
+        loads.append(user_id)
+        return {"_id": user_id, "role": "admin", "username": "ana"}
+
+    monkeypatch.setattr(auth_decorators, "get_user_by_id", get_user_by_id)
+    user = LazyUser("abc", {"role": "user", "is_active": True, "tv": 4})
+
+    assert (user["_id"], user["role"], user["is_active"], user["token_version"]) == ("abc", "user", True, 4)
+    assert loads == []
+
+    assert user["username"] == "ana"
+    assert user.get("email") is None
+    assert "username" in user
+    assert loads == ["abc"]
+    assert user["role"] == "user"  # as claims valem durante a requisição
+    with pytest.raises(KeyError):
+        user["email"]
+
+
+@pytest.fixture
+def jwt_app():
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "segredo-de-teste"
+    JWTManager(app)
+    return app
+
+
+def _call(app, user, version=None):
+    claims = token_claims(user)
+    if version is not None:
+        claims["tv"] = version
+    with app.app_context():
+        token = create_access_token(identity=str(user["_id"]), additional_claims=claims)
+
+    @jwt_required
+    def view():
+        return g.user
+
+    with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+        return view()
+
+
+def test_stateless_mode_skips_the_user_lookup(jwt_app, table, monkeypatch):
+    monkeypatch.setattr(auth_decorators, "get_user_by_id", lambda user_id: pytest.fail("consultou o usuário"))
+    table._refreshed_at = revocation_module.time.monotonic()
+    user = {"_id": ObjectId(), "role": "user", "is_active": True, "token_version": 1}
+
+    assert isinstance(_call(jwt_app, user), LazyUser)
+
+    table.note(user["_id"], 2)
+    response, status = _call(jwt_app, user)
+    assert status == 401
+    assert response.get_json()["message"] == "Token revogado"
+
+
+def test_database_mode_notes_newer_versions(jwt_app, table, monkeypatch):
+    table.configure(mode="database")
+    user = {"_id": ObjectId(), "role": "user", "is_active": True, "token_version": 3}
+    monkeypatch.setattr(auth_decorators, "get_user_by_id", lambda user_id: dict(user, _id=user_id))
+
+    assert _call(jwt_app, user)["token_version"] == 3
+
+    response, status = _call(jwt_app, user, version=2)
+    assert status == 401
+    assert table.current_version(user["_id"]) == 3
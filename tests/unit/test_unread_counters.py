@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.services.chat import chat_service
+from app.services.notification import notification_service, unread_counter_service
+
+
+def _counters(mongo_db, user_id):
+    counters = mongo_db.user_counters.find_one({"_id": ObjectId(user_id)})
+    return counters["notifications_total"], counters["notifications_unread"]
+
+
+def _room(mongo_db):
+    buyer, seller = ObjectId(), ObjectId()
+    room_id = mongo_db.chat_rooms.insert_one({
+        "buyer_id": buyer, "seller_id": seller,
+        "unread_counts": {str(buyer): 0, str(seller): 0}
+    }).inserted_id
+    return str(room_id), buyer, seller
+
+
+def test_notification_counters_follow_create_read_and_delete(mongo_db):
+    user_id = str(ObjectId())
+    ids = [notification_service.create_notification(user_id, "info", f"t{i}", "m")["notification_id"]
+           for i in range(3)]
+    assert _counters(mongo_db, user_id) == (3, 3)
+
+    notification_service.mark_notification_as_read(ids[0], user_id)
+    notification_service.mark_notification_as_read(ids[0], user_id)
+    assert _counters(mongo_db, user_id) == (3, 2)
+
+    notification_service.delete_notification(ids[0], user_id)
+    notification_service.delete_notification(ids[1], user_id)
+    assert _counters(mongo_db, user_id) == (1, 1)
+
+    notification_service.mark_all_notifications_as_read(user_id)
+    assert notification_service.get_unread_count(user_id) == {"success": True, "count": 0}
+
+
+def test_first_counter_document_counts_older_notifications(mongo_db):
+    user_id = ObjectId()
+    mongo_db.notifications.insert_many([
+        {"user_id": user_id, "read": False, "created_at": datetime.utcnow()},
+        {"user_id": user_id, "read": True, "created_at": datetime.utcnow()},
+    ])
+
+    notification_service.create_notification(str(user_id), "info", "t", "m")
+
+    assert _counters(mongo_db, user_id) == (3, 2)
+
+
+def test_reconcile_notification_counters_fixes_drift_and_missing_users(mongo_db):
+    drifted, missing = ObjectId(), ObjectId()
+    mongo_db.notifications.insert_many([
+        {"user_id": drifted, "read": False},
+        {"user_id": drifted, "read": True},
+        {"user_id": missing, "read": False},
+    ])
+    mongo_db.user_counters.insert_one({"_id": drifted, "notifications_total": 9, "notifications_unread": 9})
+
+    result = unread_counter_service.reconcile_notification_counters()
+
+    assert result == {"users_fixed": 2}
+    assert _counters(mongo_db, drifted) == (2, 1)
+    assert _counters(mongo_db, missing) == (1, 1)
+
+
+def test_chat_messages_increment_the_other_participant_only(mongo_db):
+    room_id, buyer, seller = _room(mongo_db)
+
+    chat_service.send_message(room_id, str(buyer), "oi")
+    chat_service.send_message(room_id, str(buyer), "tudo bem?")
+    room = mongo_db.chat_rooms.find_one()
+    assert room["unread_counts"] == {str(buyer): 0, str(seller): 2}
+    assert room["last_message"]["content"] == "tudo bem?"
+
+    chat_service.send_system_message(room_id, "Pedido enviado")
+    room = mongo_db.chat_rooms.find_one()
+    assert room["unread_counts"] == {str(buyer): 1, str(seller): 3}
+    assert room["last_message"]["is_system"] is True
+
+    chat_service.send_message(room_id, str(seller), "oi!")
+    room = mongo_db.chat_rooms.find_one()
+    assert room["unread_counts"] == {str(buyer): 2, str(seller): 0}
+
+
+def test_chat_message_from_outsider_is_rejected(mongo_db):
+    room_id, _buyer, _seller = _room(mongo_db)
+
+    result = chat_service.send_message(room_id, str(ObjectId()), "spam")
+
+    assert result["success"] is False
+    assert mongo_db.chat_messages.count_documents({}) == 0
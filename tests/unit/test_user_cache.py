@@ -0,0 +1,83 @@
+import pytest
+
+from app.models.user import cache as cache_module
+from app.models.user import crud
+from app.models.user.cache import UserCache
+
+
+@pytest.fixture
+def user_cache(monkeypatch):
+    fresh = UserCache(max_size=100, ttl_seconds=60)
+    monkeypatch.setattr(cache_module, "user_cache", fresh)
+    monkeypatch.setattr(crud, "user_cache", fresh)
+    return fresh
+
+
+def test_lru_evicts_least_recently_used():
+    cache = UserCache(max_size=2, ttl_seconds=60)
+    cache.set("a", {"_id": "a"})
+    cache.set("b", {"_id": "b"})
+    cache.get("a")
+    cache.set("c", {"_id": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"_id": "a"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = UserCache(max_size=10, ttl_seconds=30)
+    cache.set("a", {"_id": "a"})
+
+    now[0] += 29
+    assert cache.get("a") is not None
+    now[0] += 2
+    assert cache.get("a") is None
+
+
+def test_password_is_never_cached_and_reads_are_copies():
+    cache = UserCache()
+    cache.set("a", {"_id": "a", "password": "hash", "role": "user"})
+
+    first = cache.get("a")
+    first["role"] = "admin"
+
+    assert cache.get("a") == {"_id": "a", "role": "user"}
+
+
+def test_disabled_cache_stores_nothing():
+    cache = UserCache(max_size=0)
+    cache.set("a", {"_id": "a"})
+    assert cache.get("a") is None
+
+
+def test_get_user_by_id_reads_through_and_writes_invalidate(mongo_db, user_cache):
+    user_id = str(mongo_db.users.insert_one({"username": "ana", "password": "hash"}).inserted_id)
+
+    assert crud.get_user_by_id(user_id)["username"] == "ana"
+    assert "password" not in crud.get_user_by_id(user_id)
+    assert user_cache.stats()["hits"] == 1
+
+    # Escrita fora do crud: o cache ainda devolve o valor antigo
+    mongo_db.users.update_one({}, {"$set": {"username": "bia"}})
+    assert crud.get_user_by_id(user_id)["username"] == "ana"
+
+    crud.update_user(user_id, {"first_name": "Bia"})
+    user = crud.get_user_by_id(user_id)
+    assert (user["username"], user["first_name"]) == ("bia", "Bia")
+
+    crud.update_last_login(user_id)
+    assert user_cache.get(user_id) is None
+
+
+def test_get_users_by_ids_mixes_cache_and_single_query(mongo_db, user_cache):
+    ids = [str(i) for i in mongo_db.users.insert_many([{"username": "a"}, {"username": "b"}]).inserted_ids]
+    crud.get_user_by_id(ids[0])
+
+    users = crud.get_users_by_ids(ids + ["invalido", None])
+
+    assert {users[i]["username"] for i in ids} == {"a", "b"}
+    assert set(users) == set(ids)
+    assert user_cache.get(ids[1]) is not None
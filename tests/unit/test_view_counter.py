@@ -0,0 +1,90 @@
+from bson import ObjectId
+
+from app.services.ad import view_counter as view_counter_module
+from app.services.ad.view_counter import ViewCounter, ViewDeduper
+
+
+def _ad(mongo_db, views=0):
+    return mongo_db.ads.insert_one({"title": "Zelda", "view_count": views}).inserted_id
+
+
+def test_views_are_buffered_until_flush(mongo_db):
+    ad_id = _ad(mongo_db, views=10)
+    counter = ViewCounter(flush_interval=60)
+
+    for _ in range(3):
+        counter.record(ad_id)
+
+    assert counter.pending_views(ad_id) == 3
+    assert mongo_db.ads.find_one()["view_count"] == 10
+
+    assert counter.flush() == 3
+    assert mongo_db.ads.find_one()["view_count"] == 13
+    assert counter.pending_views(ad_id) == 0
+    assert counter.flush() == 0
+
+
+def test_failed_flush_puts_views_back_in_the_buffer(mongo_db, monkeypatch):
+    ad_id = _ad(mongo_db)
+    counter = ViewCounter(flush_interval=60)
+    counter.record(ad_id)
+    counter.record(ad_id)
+
+    monkeypatch.setattr("app.db.mongo_client.db", None)
+    assert counter.flush() == 0
+    counter.record(ad_id)
+    assert counter.pending_views(ad_id) == 3
+    assert counter.failed == 1
+
+    monkeypatch.setattr("app.db.mongo_client.db", mongo_db)
+    assert counter.flush() == 3
+    assert mongo_db.ads.find_one()["view_count"] == 3
+
+
+def test_buffer_flushes_when_full_or_interval_is_zero(mongo_db):
+    ad_ids = [_ad(mongo_db) for _ in range(3)]
+    counter = ViewCounter(flush_interval=60, max_pending=2)
+
+    counter.record(ad_ids[0])
+    assert counter.flushes == 0
+    counter.record(ad_ids[1])
+    assert (counter.flushes, counter.stats()["pending_ads"]) == (1, 0)
+
+    counter.configure(flush_interval=0)
+    counter.record(ad_ids[2])
+    assert mongo_db.ads.find_one({"_id": ad_ids[2]})["view_count"] == 1
+
+
+def test_repeated_viewer_is_counted_once_per_window(mongo_db):
+    ad_id, other_ad = _ad(mongo_db), _ad(mongo_db)
+    counter = ViewCounter(flush_interval=60)
+    counter.configure(dedupe_window=1800, dedupe_capacity=1000)
+
+    assert counter.record(ad_id, viewer="203.0.113.7") is True
+    assert counter.record(ad_id, viewer="203.0.113.7") is False
+    assert counter.record(ad_id, viewer="198.51.100.1") is True
+    assert counter.record(other_ad, viewer="203.0.113.7") is True
+    assert counter.record(ad_id) is True  # sem visitante: sempre conta
+
+    assert counter.pending_views(ad_id) == 3
+    assert counter.deduplicated == 1
+
+
+def test_deduper_forgets_after_two_windows(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(view_counter_module.time, "monotonic", lambda: now[0])
+    deduper = ViewDeduper(60, capacity=1000)
+
+    assert deduper.seen("ad:ip") is False
+    now[0] += 61
+    assert deduper.seen("ad:ip") is True  # ainda no filtro anterior
+    now[0] += 61
+    assert deduper.seen("ad:ip") is False
+
+
+def test_pending_views_accepts_object_ids():
+    counter = ViewCounter(flush_interval=60)
+    ad_id = ObjectId()
+    counter.record(str(ad_id))
+
+    assert counter.pending_views(ad_id) == 1